@@ -7,6 +7,7 @@ from app.api.apply import router as apply_router
 from app.api.tasks import router as tasks_router
 from app.api.users import router as users_router
 from app.api.reports import router as reports_router
+from app.api.results import router as results_router
 
 api_router = APIRouter(prefix="/api")
 
@@ -15,4 +16,4 @@ api_router.include_router(apply_router, prefix="/apply", tags=["压测申请"])
 api_router.include_router(tasks_router, prefix="/tasks", tags=["任务管理"])
 api_router.include_router(users_router, prefix="/users", tags=["用户管理"])
 api_router.include_router(reports_router, prefix="/reports", tags=["报告管理"])
-
+api_router.include_router(results_router, prefix="/results", tags=["结果查询"])
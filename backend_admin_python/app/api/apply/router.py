@@ -4,7 +4,7 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, field_serializer, Field
+from pydantic import BaseModel, TypeAdapter, field_serializer, Field, AliasChoices
 from datetime import datetime
 from app.database import get_db
 from app.models.user import User
@@ -31,6 +31,7 @@ class ApplyCreate(BaseModel):
     duration: str = "30s"
     expected_qps: Optional[int] = None
     request_body: Optional[str] = None
+    scenario: Optional[dict] = None  # 多接口加权请求场景，见ScenarioService
 
 
 class ApplyResponse(BaseModel):
@@ -39,19 +40,17 @@ class ApplyResponse(BaseModel):
     application_name: str
     url: str
     method: str
-    concurrent_users: int
+    # ORM字段名为concurrency/audit_status，对外保持concurrent_users/status
+    concurrent_users: int = Field(validation_alias=AliasChoices("concurrent_users", "concurrency"))
     duration: str
     expected_qps: Optional[int]
-    status: str
+    status: str = Field(validation_alias=AliasChoices("status", "audit_status"))
     created_at: Optional[datetime]
     updated_at: Optional[datetime] = None
     
     model_config = {
         "from_attributes": True
     }
-
-
-
     
     @field_serializer('created_at', 'updated_at', when_used='always')
     def serialize_datetimes(self, value: Optional[datetime]) -> Optional[str]:
@@ -78,6 +77,7 @@ class ApplyAdminResponse(BaseModel):
     record_info: str
     description: Optional[str] = None
     request_body: Optional[str] = None
+    scenario: Optional[dict] = None
     audit_user_id: Optional[int] = None
     audit_time: Optional[datetime] = None
     audit_comment: Optional[str] = None
@@ -95,6 +95,11 @@ class ApplyAdminResponse(BaseModel):
         return str(value)
 
 
+# 列表批量校验（一次调用完成整页ORM对象到响应模型的转换）
+apply_list_adapter = TypeAdapter(list[ApplyResponse])
+apply_admin_list_adapter = TypeAdapter(list[ApplyAdminResponse])
+
+
 class ApplyAuditRequest(BaseModel):
     """审核申请请求模型"""
     approved: bool
@@ -143,7 +148,8 @@ async def create_apply(
             concurrency=apply_data.concurrency,
             duration=apply_data.duration,
             expected_qps=apply_data.expected_qps,
-            request_body=apply_data.request_body
+            request_body=apply_data.request_body,
+            scenario=apply_data.scenario
         )
         return apply_task
     except ValueError as e:
@@ -203,55 +209,16 @@ async def get_applies(
     # 根据用户角色返回不同的响应模型
     if current_user.role.value == "admin":
         # 管理员返回完整字段
-        apply_responses = []
-        for apply in applies:
-            apply_response = ApplyAdminResponse(
-                id=apply.id,
-                application_name=apply.application_name,
-                domain=apply.domain,
-                url=apply.url,
-                method=apply.method,
-                concurrency=apply.concurrency,
-                duration=apply.duration,
-                expected_qps=apply.expected_qps,
-                audit_status=apply.audit_status,
-                record_info=apply.record_info,
-                description=apply.description,
-                request_body=apply.request_body,
-                audit_user_id=apply.audit_user_id,
-                audit_time=apply.audit_time,
-                audit_comment=apply.audit_comment,
-                created_at=apply.created_at,
-                updated_at=apply.updated_at
-            )
-            apply_responses.append(apply_response)
-        
         return ApplyAdminListResponse(
-            items=apply_responses,
+            items=apply_admin_list_adapter.validate_python(applies, from_attributes=True),
             total=total,
             skip=skip,
             limit=limit
         )
     else:
         # 普通用户返回精简字段
-        apply_responses = []
-        for apply in applies:
-            apply_response = ApplyResponse(
-                id=apply.id,
-                application_name=apply.application_name,
-                url=apply.url,
-                method=apply.method,
-                concurrent_users=apply.concurrency,
-                duration=apply.duration,
-                expected_qps=apply.expected_qps,
-                status=apply.audit_status,
-                created_at=apply.created_at,
-                updated_at=apply.updated_at
-            )
-            apply_responses.append(apply_response)
-        
         return ApplyListResponse(
-            items=apply_responses,
+            items=apply_list_adapter.validate_python(applies, from_attributes=True),
             total=total,
             skip=skip,
             limit=limit
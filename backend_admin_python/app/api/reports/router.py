@@ -4,7 +4,6 @@
 from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import os
@@ -14,6 +13,7 @@ from app.models.user import User
 from app.models.report import ReportType, ReportStatus
 from app.services.report_service import ReportService
 from app.utils.auth import get_current_user, get_current_admin_user
+from app.utils.file_response import RangeFileResponse, is_content_addressed
 
 router = APIRouter()
 
@@ -25,7 +25,7 @@ router = APIRouter()
 class ReportGenerateRequest(BaseModel):
     """生成报告请求模型"""
     task_id: int
-    report_types: List[ReportType] = [ReportType.IMAGE, ReportType.PDF]  # 默认生成图片和PDF报告
+    report_types: Optional[List[ReportType]] = None  # 为空时生成所有支持的报告类型
 
 
 class ReportResponse(BaseModel):
@@ -36,6 +36,8 @@ class ReportResponse(BaseModel):
     report_type: str
     file_path: str
     file_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    preview_path: Optional[str] = None
     status: str
     generated_at: Optional[datetime] = None
     created_at: datetime
@@ -66,11 +68,10 @@ async def generate_reports(
     """
     为指定任务生成报告
     - **task_id**: 任务ID
-    - **report_types**: 报告类型列表，可选值：html, markdown, image, pdf
+    - **report_types**: 报告类型列表，可选值：HTML, MARKDOWN, IMAGE, PDF，为空时全部生成
     """
     try:
-        # 目前只支持生成图片报告，后续可以扩展支持多种类型
-        reports = ReportService.generate_reports_for_task(db, request.task_id)
+        reports = ReportService.generate_reports_for_task(db, request.task_id, request.report_types)
         return reports
     except ValueError as e:
         raise HTTPException(
@@ -104,29 +105,15 @@ async def get_reports(
     - **status**: 报告状态筛选
     - **report_type**: 报告类型筛选
     """
-    from app.models.report import Report
-    from sqlalchemy import and_
-
-    # 构建查询条件
-    conditions = []
-    if task_id:
-        conditions.append(Report.task_id == task_id)
-    if apply_id:
-        conditions.append(Report.apply_id == apply_id)
-    if status:
-        conditions.append(Report.status == status)
-    if report_type:
-        conditions.append(Report.report_type == report_type)
-
-    # 获取总数
-    total = db.query(Report).filter(and_(*conditions)).count()
-    
-    # 获取分页数据
-    reports = db.query(Report)\
-        .filter(and_(*conditions))\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    reports, total = ReportService.get_reports(
+        db=db,
+        task_id=task_id,
+        apply_id=apply_id,
+        status=status,
+        report_type=report_type,
+        skip=skip,
+        limit=limit
+    )
 
     return ReportListResponse(
         items=reports,
@@ -217,6 +204,8 @@ async def download_report(
     """
     下载报告文件
     - **report_id**: 报告ID
+
+    支持ETag条件请求和Range断点续传，内容寻址的报告文件设置immutable长期缓存
     """
     report = ReportService.get_report_by_id(db, report_id)
     if not report:
@@ -245,9 +234,42 @@ async def download_report(
     # 获取文件名
     file_name = os.path.basename(actual_file_path)
     
-    # 返回文件响应
-    return FileResponse(
+    # 返回文件响应（按扩展名设置Content-Type，仍以附件形式下载）
+    return RangeFileResponse(
         path=actual_file_path,
         filename=file_name,
-        media_type="application/octet-stream"
+        immutable=is_content_addressed(actual_file_path)
+    )
+
+
+@router.get("/{report_id}/preview", summary="获取报告预览图")
+async def get_report_preview(
+    report_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取报告的低分辨率WebP预览图（列表页缩略图）
+    - **report_id**: 报告ID
+
+    预览图按内容寻址，设置immutable长期缓存
+    """
+    report = ReportService.get_report_by_id(db, report_id)
+    if not report or not report.preview_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="报告预览图不存在"
+        )
+    
+    preview_file_path = ReportService._convert_upload_path_to_actual_path(report.preview_path)
+    if not os.path.exists(preview_file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="报告预览图不存在"
+        )
+    
+    return RangeFileResponse(
+        path=preview_file_path,
+        media_type="image/webp",
+        immutable=is_content_addressed(preview_file_path)
     )
@@ -0,0 +1,6 @@
+"""
+结果查询API模块
+"""
+from .router import router
+
+__all__ = ["router"]
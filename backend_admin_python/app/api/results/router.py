@@ -0,0 +1,68 @@
+"""
+结果查询API路由（基于列式结果存储的跨任务查询）
+"""
+from typing import Optional, List
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+
+from app.models.user import User
+from app.services.result_store_service import ResultStoreService, METRIC_COLUMNS
+from app.services.result_cache_service import ResultCacheService
+from app.utils.auth import get_current_user, get_current_admin_user
+
+router = APIRouter()
+
+
+@router.get("/query")
+async def query_results(
+    domain: Optional[str] = Query(None, description="目标域名"),
+    concurrency: Optional[int] = Query(None, ge=1, description="并发数"),
+    apply_id: Optional[int] = Query(None, description="申请ID"),
+    test_item: Optional[str] = Query(None, description="测试项名称"),
+    since: Optional[datetime] = Query(None, description="开始时间"),
+    until: Optional[datetime] = Query(None, description="结束时间"),
+    days: Optional[int] = Query(None, ge=1, le=3650, description="最近N天（未指定since时生效）"),
+    metrics: List[str] = Query(["qps", "avg_latency_ms"], description="返回的指标列"),
+    limit: int = Query(1000, ge=1, le=10000, description="最多返回行数"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    跨任务查询历史压测数据
+    例如：GET /api/results/query?domain=example.com&concurrency=500&days=90&metrics=qps
+    """
+    invalid = [m for m in metrics if m not in METRIC_COLUMNS]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的指标: {', '.join(invalid)}，可选: {', '.join(METRIC_COLUMNS)}"
+        )
+
+    if since is None and days:
+        since = datetime.utcnow() - timedelta(days=days)
+
+    rows = ResultStoreService.query_runs(
+        domain=domain,
+        concurrency=concurrency,
+        apply_id=apply_id,
+        test_item=test_item,
+        since=since,
+        until=until,
+        metrics=metrics,
+        limit=limit
+    )
+
+    return {
+        "items": rows,
+        "total": len(rows),
+        "metrics": metrics
+    }
+
+
+@router.get("/cache")
+async def get_result_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    结果数据缓存的命中/未命中/淘汰次数和占用字节数（管理员）
+    """
+    return ResultCacheService.stats()
@@ -2,17 +2,22 @@
 压测任务API路由
 """
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request, Response
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, HttpUrl, field_serializer
-from datetime import datetime
+from pydantic import BaseModel, Field, HttpUrl, field_serializer
+from datetime import datetime, timezone
 from app.database import get_db
 from app.models.user import User
 from app.models.task import TaskStatus
-from app.models.task_log import TaskLog
 from app.services.task_service import TaskService
+from app.services.archive_service import TaskLogArchiveService
+from app.services.compare_service import CompareService
+from app.services.series_store_service import SeriesStoreService, METHOD_LTTB
+from app.services.scenario_service import ScenarioService
 from app.utils.auth import get_current_admin_user
 from app.utils.background_tasks import add_background_task
+from app.utils.http_cache import make_etag, etag_matches, not_modified, set_etag
+from config.settings import settings
 
 router = APIRouter()
 
@@ -29,9 +34,20 @@ class TaskCreate(BaseModel):
     duration: str = "30s"
     threads: int = 4
     script_path: Optional[str] = None
+    scenario: Optional[dict] = None  # 多接口加权请求场景，为空时使用申请的场景
+    warmup_seconds: int = Field(0, ge=0, le=settings.TASK_MAX_WARMUP_SECONDS)  # 预热时长（秒），预热结果不计入统计
+    connection_close: bool = False  # 强制短连接，测量握手受限的容量
+    repetitions: int = Field(1, ge=1, le=settings.TASK_MAX_REPETITIONS)  # 重复试验次数，大于1时给出置信区间
     start_immediately: bool = False  # 是否立即开始执行
 
 
+class ScenarioCompileRequest(BaseModel):
+    """场景编译请求模型：scenario（对象）或definition（JSON/YAML文本）二选一"""
+    target_url: str
+    scenario: Optional[dict] = None
+    definition: Optional[str] = None
+
+
 class TaskResponse(BaseModel):
     """任务响应模型"""
     id: int
@@ -40,6 +56,10 @@ class TaskResponse(BaseModel):
     concurrency: int
     duration: str
     threads: int
+    scenario: Optional[dict] = None
+    warmup_seconds: int = 0
+    connection_close: bool = False
+    repetitions: int = 1
     status: str
     started_at: Optional[datetime]
     finished_at: Optional[datetime]
@@ -53,9 +73,24 @@ class TaskResponse(BaseModel):
         return value.isoformat() if value else None
 
 
+class TaskResultSummary(BaseModel):
+    """任务列表中的结果摘要（详细结果通过比较、报告等接口获取）"""
+    qps: Optional[float] = None
+    p99_latency_ms: Optional[float] = None
+    error_rate: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TaskListItem(TaskResponse):
+    """任务列表项：任务信息和结果摘要"""
+    result: Optional[TaskResultSummary] = None
+
+
 class TaskListResponse(BaseModel):
     """任务列表响应模型"""
-    items: list[TaskResponse]
+    items: list[TaskListItem]
     total: int
     skip: int
     limit: int
@@ -92,16 +127,26 @@ async def create_task(
         )
     
     # 创建任务
-    task = TaskService.create_task(
-        db=db,
-        apply_id=task_data.apply_id,
-        target_url=task_data.target_url,
-        concurrency=task_data.concurrency,
-        duration=task_data.duration,
-        threads=task_data.threads,
-        script_path=task_data.script_path,
-        created_by=current_user.id
-    )
+    try:
+        task = TaskService.create_task(
+            db=db,
+            apply_id=task_data.apply_id,
+            target_url=task_data.target_url,
+            concurrency=task_data.concurrency,
+            duration=task_data.duration,
+            threads=task_data.threads,
+            script_path=task_data.script_path,
+            scenario=task_data.scenario,
+            warmup_seconds=task_data.warmup_seconds,
+            connection_close=task_data.connection_close,
+            repetitions=task_data.repetitions,
+            created_by=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     # 如果指定立即开始，则添加到后台任务
     if task_data.start_immediately:
@@ -110,6 +155,34 @@ async def create_task(
     return task
 
 
+@router.post("/scenarios/compile")
+async def compile_scenario(
+    compile_data: ScenarioCompileRequest,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    校验压测场景并预览编译后的wrk Lua脚本（管理员）
+    """
+    try:
+        if compile_data.definition is not None:
+            scenario = ScenarioService.parse(compile_data.definition)
+        elif compile_data.scenario is not None:
+            scenario = compile_data.scenario
+        else:
+            raise ValueError("scenario和definition不能同时为空")
+        normalized = ScenarioService.normalize(scenario, compile_data.target_url)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "scenario": normalized,
+        "script": ScenarioService.compile_lua(normalized, ScenarioService.runtime_dir())
+    }
+
+
 @router.get("", response_model=TaskListResponse)
 async def get_tasks(
     status: Optional[str] = Query(None, description="任务状态筛选"),
@@ -149,20 +222,29 @@ async def get_tasks(
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     查看任务详情（管理员）
+    支持If-None-Match条件请求：任务状态未变化时返回304，不加载任务详情
     """
-    task = TaskService.get_task_by_id(db=db, task_id=task_id)
+    version = TaskService.get_task_version(db=db, task_id=task_id)
     
-    if not task:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="任务不存在"
         )
     
+    etag = make_etag("task", task_id, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    task = TaskService.get_task_by_id(db=db, task_id=task_id)
+    set_etag(response, etag)
     return task
 
 
@@ -240,39 +322,160 @@ async def retry_task(
 @router.get("/{task_id}/logs")
 async def get_task_logs(
     task_id: int,
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, ge=0, description="只返回ID大于该值的日志（增量轮询）"),
+    since: Optional[datetime] = Query(None, description="只返回该时间之后的日志"),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     获取任务日志（管理员）
+    前端每秒轮询：ETag由任务更新时间、状态和最新日志ID生成，If-None-Match命中时直接返回304，
+    不读取日志行；配合after_id只传输新增日志
     """
-    task = TaskService.get_task_by_id(db=db, task_id=task_id)
+    version = TaskLogArchiveService.get_logs_version(db=db, task_id=task_id)
     
-    if not task:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="任务不存在"
         )
     
-    logs = db.query(TaskLog).filter(
-        TaskLog.task_id == task_id
-    ).order_by(TaskLog.created_at.desc()).offset(skip).limit(limit).all()
+    # 分页和增量参数不同时返回的日志不同，一并计入ETag
+    etag = make_etag("logs", task_id, *version, skip, limit, after_id, since)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
+    # 日志时间以UTC无时区格式存储
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    # 已归档任务从归档文件读取，未归档任务从task_logs表读取
+    logs = TaskLogArchiveService.get_task_logs(
+        db=db, task_id=task_id, skip=skip, limit=limit, after_id=after_id, since=since
+    )
+    
+    # 客户端下次轮询时作为after_id传入：增量查询时为本次返回的最大ID（新日志超过limit条时，
+    # 剩余的日志在下一次轮询中返回），无新日志时保持原值
+    if after_id is not None or since is not None:
+        last_id = max((log["id"] for log in logs), default=after_id)
+    else:
+        last_id = version[2] or after_id
+    
+    set_etag(response, etag)
     return {
         "task_id": task_id,
-        "logs": [
-            {
-                "id": log.id,
-                "level": log.log_level.value,
-                "message": log.log_message,
-                "created_at": log.created_at.isoformat()
-            }
-            for log in logs
-        ],
+        "logs": logs,
         "total": len(logs),
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "last_id": last_id,
+        "status": version[1]
+    }
+
+
+@router.get("/{task_id}/raw-output")
+async def get_task_raw_output(
+    task_id: int,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取任务的原始压测输出（管理员）
+    """
+    task = TaskService.get_task_by_id(db=db, task_id=task_id)
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    
+    raw_output = TaskLogArchiveService.get_raw_output(db=db, task_id=task_id)
+    
+    if raw_output is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="原始压测输出不存在"
+        )
+    
+    return {
+        "task_id": task_id,
+        "raw_output": raw_output
     }
 
+
+@router.get("/{task_id}/series")
+async def get_task_series(
+    task_id: int,
+    metric: str = Query("qps", description="指标，多个用逗号分隔：qps, server_closes, bytes_in, bytes_out"),
+    from_second: Optional[int] = Query(None, alias="from", ge=0, description="起始秒（相对压测开始）"),
+    to_second: Optional[int] = Query(None, alias="to", ge=0, description="结束秒（含）"),
+    max_points: int = Query(settings.SERIES_DEFAULT_POINTS, ge=10, le=settings.SERIES_MAX_POINTS, description="每个指标最多返回的点数"),
+    method: str = Query(METHOD_LTTB, description="降采样方法：lttb（[秒, 值]）或minmax（[秒, 最小值, 最大值]）"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取任务的每秒指标时间序列（管理员）
+    按时间范围选择原始数据或预先计算的10秒/1分钟汇总，点数超过max_points时在服务端降采样
+    """
+    task = TaskService.get_task_by_id(db=db, task_id=task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+
+    try:
+        result = SeriesStoreService.query_series(
+            db=db,
+            task_id=task_id,
+            metrics=[m.strip() for m in metric.split(",") if m.strip()],
+            start=from_second,
+            end=to_second,
+            max_points=max_points,
+            method=method
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    result["started_at"] = task.started_at.isoformat() if task.started_at else None
+    return result
+
+
+@router.get("/{task_id}/compare")
+async def compare_task(
+    task_id: int,
+    baseline_task_id: Optional[int] = Query(None, description="基线任务ID，不指定时使用同一域名/URL最近N次压测"),
+    last_n: Optional[int] = Query(None, ge=1, le=50, description="滚动基线的压测次数"),
+    qps_drop_percent: Optional[float] = Query(None, ge=0, description="QPS下降阈值（%）"),
+    latency_increase_percent: Optional[float] = Query(None, ge=0, description="延迟上升阈值（%）"),
+    significance_level: Optional[float] = Query(None, gt=0, lt=1, description="显著性水平"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    比较任务与基线的压测结果，检测性能回归（管理员）
+    返回中的regression字段可直接用于发布门禁
+    """
+    try:
+        return CompareService.compare(
+            db=db,
+            candidate_task_id=task_id,
+            baseline_task_id=baseline_task_id,
+            last_n=last_n,
+            qps_drop_percent=qps_drop_percent,
+            latency_increase_percent=latency_increase_percent,
+            significance_level=significance_level
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
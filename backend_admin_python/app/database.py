@@ -1,14 +1,34 @@
 """
 数据库连接模块
 """
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from config.settings import settings
+from app.utils.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT
+
+
+class TimedQueuePool(QueuePool):
+    """记录获取连接等待时间和超时次数的连接池"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
 
 # 创建数据库引擎
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=TimedQueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,  # 连接前检查连接是否有效
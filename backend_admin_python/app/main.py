@@ -1,19 +1,28 @@
 """
 FastAPI应用主入口
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
 from config.settings import settings
+from app.database import get_db
+from app.services.health_service import HealthService
+from app.services.metrics_service import MetricsService
 from app.api.auth.router import router as auth_router
 from app.utils.middleware import log_requests
+from app.utils.compression import CompressionMiddleware
+from app.utils.file_response import ArtifactStaticFiles
+from app.utils.json_codec import FastJSONResponse
+from app.utils.metrics import HttpMetricsMiddleware, preallocate_routes, start_snapshot_writer
 from app.utils.logger import logger
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,  # 安装orjson时使用ORJSONResponse
 )
 
 # 添加日志中间件
@@ -28,6 +37,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩：JSON等文本响应超过阈值时按Accept-Encoding使用brotli或gzip
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+)
+
+# 请求耗时和处理中请求数（最外层，包含压缩等中间件的耗时）
+app.add_middleware(HttpMetricsMiddleware)
+
 # 注册路由
 app.include_router(auth_router, prefix=f"{settings.API_PREFIX}/auth", tags=["认证"])
 
@@ -36,14 +56,16 @@ from app.api.apply.router import router as apply_router
 from app.api.tasks.router import router as tasks_router
 from app.api.users.router import router as users_router
 from app.api.reports.router import router as reports_router
+from app.api.results.router import router as results_router
 app.include_router(apply_router, prefix=f"{settings.API_PREFIX}/apply", tags=["压测申请"])
 app.include_router(tasks_router, prefix=f"{settings.API_PREFIX}/tasks", tags=["压测任务"])
 app.include_router(users_router, prefix=f"{settings.API_PREFIX}/users", tags=["用户管理"])
 app.include_router(reports_router, prefix=f"{settings.API_PREFIX}/reports", tags=["报告管理"])
+app.include_router(results_router, prefix=f"{settings.API_PREFIX}/results", tags=["结果查询"])
 
 # 配置静态文件服务
-# 将/uploads路径映射到WRK_REPORT_DIR目录
-app.mount("/uploads", StaticFiles(directory=settings.WRK_REPORT_DIR), name="uploads")
+# 将/uploads路径映射到WRK_REPORT_DIR目录（支持ETag、Range，内容寻址文件长期缓存）
+app.mount("/uploads", ArtifactStaticFiles(directory=settings.WRK_REPORT_DIR), name="uploads")
 
 
 @app.get("/")
@@ -59,6 +81,29 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """健康检查"""
+    """健康检查（存活）"""
     return {"status": "ok"}
 
+
+@app.get("/ready")
+def readiness_check(db: Session = Depends(get_db)):
+    """就绪检查：数据库连接池和任务执行状态，不可用时返回503"""
+    result = HealthService.readiness(db)
+    status_code = status.HTTP_200_OK if result["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return FastJSONResponse(result, status_code=status_code)
+
+
+@app.get("/metrics")
+def metrics(request: Request, db: Session = Depends(get_db)):
+    """平台自身指标（OpenMetrics / Prometheus文本格式）"""
+    body, content_type = MetricsService.render(db, request.headers.get("accept", ""))
+    return Response(body, media_type=content_type)
+
+
+# 按路由表预先创建请求耗时的标签组合
+preallocate_routes(app.routes)
+
+# 多进程部署时定期写入本进程的指标快照，由 /metrics 合并
+if settings.METRICS_SHARED_DIR:
+    start_snapshot_writer(settings.METRICS_SHARED_DIR, settings.METRICS_SNAPSHOT_SECONDS)
+
@@ -8,6 +8,7 @@ from app.models.task import Task
 from app.models.result import Result
 from app.models.report import Report
 from app.models.task_log import TaskLog
+from app.models.task_log_archive import TaskLogArchive
 from app.models.feedback import Feedback
 
 __all__ = [
@@ -17,6 +18,7 @@ __all__ = [
     "Result",
     "Report",
     "TaskLog",
+    "TaskLogArchive",
     "Feedback",
 ]
 
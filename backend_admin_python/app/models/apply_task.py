@@ -1,7 +1,7 @@
 """
 压测申请模型
 """
-from sqlalchemy import Column, Integer, String, Text, Enum, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Enum, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -18,9 +18,17 @@ class AuditStatus(str, enum.Enum):
 class ApplyTask(Base):
     """压测申请表模型"""
     __tablename__ = "apply_tasks"
+    __table_args__ = (
+        # 我的申请列表（可选按审核状态筛选）、审核列表，均按提交时间倒序
+        Index("idx_user_id_created_at", "user_id", "created_at"),
+        Index("idx_user_id_audit_status_created_at", "user_id", "audit_status", "created_at"),
+        Index("idx_audit_status_created_at", "audit_status", "created_at"),
+        # 域名子串搜索（仅MySQL创建ngram全文索引）
+        Index("ft_domain", "domain", mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True, comment="申请ID")
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True, comment="申请人ID")
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="申请人ID")
     application_name = Column(String(255), nullable=False, comment="申请名称")
     domain = Column(String(255), nullable=False, index=True, comment="待压测域名")
     url = Column(String(500), nullable=False, comment="测试URL")
@@ -31,7 +39,8 @@ class ApplyTask(Base):
     duration = Column(String(20), nullable=False, default="30s", comment="压测时长")
     expected_qps = Column(Integer, nullable=True, comment="预期QPS")
     request_body = Column(Text, nullable=True, comment="请求体")
-    audit_status = Column(Enum(AuditStatus), nullable=False, default=AuditStatus.PENDING, index=True, comment="审核状态")
+    scenario = Column(JSON, nullable=True, comment="压测场景（多接口加权请求）")
+    audit_status = Column(Enum(AuditStatus), nullable=False, default=AuditStatus.PENDING, comment="审核状态")
     audit_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True, comment="审核人ID")
     audit_comment = Column(Text, nullable=True, comment="审核意见")
     audit_time = Column(DateTime, nullable=True, comment="审核时间")
@@ -33,6 +33,8 @@ class Report(Base):
     report_type = Column(Enum(ReportType), nullable=False, index=True, comment="报告类型")
     file_path = Column(String(500), nullable=False, comment="报告文件路径")
     file_size = Column(Integer, nullable=True, comment="文件大小（字节）")
+    content_hash = Column(String(64), nullable=True, index=True, comment="产物摘要（输入数据+渲染参数的SHA-256）")
+    preview_path = Column(String(500), nullable=True, comment="预览图路径（低分辨率WebP）")
     status = Column(Enum(ReportStatus), nullable=False, default=ReportStatus.GENERATING, index=True, comment="报告状态")
     generated_at = Column(DateTime, nullable=True, comment="生成完成时间")
     created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True, comment="创建时间")
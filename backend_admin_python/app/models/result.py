@@ -2,7 +2,7 @@
 压测结果模型
 """
 from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -17,12 +17,22 @@ class Result(Base):
     avg_latency_ms = Column(Numeric(10, 2), nullable=True, comment="平均响应时间（毫秒）")
     p95_latency_ms = Column(Numeric(10, 2), nullable=True, comment="P95延迟（毫秒）")
     p99_latency_ms = Column(Numeric(10, 2), nullable=True, comment="P99延迟（毫秒）")
+    steady_qps = Column(Numeric(10, 2), nullable=True, comment="稳态QPS")
+    steady_avg_latency_ms = Column(Numeric(10, 2), nullable=True, comment="稳态平均响应时间（毫秒）")
+    steady_p95_latency_ms = Column(Numeric(10, 2), nullable=True, comment="稳态P95延迟（毫秒）")
+    steady_p99_latency_ms = Column(Numeric(10, 2), nullable=True, comment="稳态P99延迟（毫秒）")
+    qps_ci_low = Column(Numeric(10, 2), nullable=True, comment="QPS置信区间下限（重复试验）")
+    qps_ci_high = Column(Numeric(10, 2), nullable=True, comment="QPS置信区间上限（重复试验）")
+    p99_ci_low = Column(Numeric(10, 2), nullable=True, comment="P99延迟置信区间下限（毫秒，重复试验）")
+    p99_ci_high = Column(Numeric(10, 2), nullable=True, comment="P99延迟置信区间上限（毫秒，重复试验）")
     error_rate = Column(Numeric(5, 2), nullable=True, comment="错误率（百分比）")
     total_requests = Column(Integer, nullable=True, comment="总请求数")
     successful_requests = Column(Integer, nullable=True, comment="成功请求数")
     failed_requests = Column(Integer, nullable=True, comment="失败请求数")
     data_file_path = Column(String(500), nullable=True, comment="CSV数据文件路径")
-    raw_result_json = Column(JSON, nullable=True, comment="原始压测结果（JSON格式）")
+    # 包含完整的压测原始输出（可达数MB）：默认不加载，详情查询用 undefer(Result.raw_result_json) 显式加载，
+    # 未显式加载时访问直接报错，避免列表查询逐行拉取
+    raw_result_json = deferred(Column(JSON, nullable=True, comment="原始压测结果（JSON格式）"), raiseload=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True, comment="创建时间")
 
     # 关系
@@ -1,7 +1,7 @@
 """
 压测任务模型
 """
-from sqlalchemy import Column, Integer, String, Enum, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, DateTime, ForeignKey, Index, JSON, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -20,6 +20,12 @@ class TaskStatus(str, enum.Enum):
 class Task(Base):
     """压测任务表模型"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        # 任务列表：按状态筛选并按创建时间倒序
+        Index("idx_status_created_at", "status", "created_at"),
+        # 任务执行进程：按排队时间领取待执行任务
+        Index("idx_status_queued_at", "status", "queued_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True, comment="任务ID")
     apply_id = Column(Integer, ForeignKey("apply_tasks.id", ondelete="CASCADE"), nullable=False, index=True, comment="关联申请ID")
@@ -28,8 +34,13 @@ class Task(Base):
     duration = Column(String(20), nullable=False, default="30s", comment="压测持续时间")
     threads = Column(Integer, nullable=False, default=4, comment="线程数")
     script_path = Column(String(500), nullable=True, comment="可选Lua脚本路径")
-    status = Column(Enum(TaskStatus), nullable=False, default=TaskStatus.PENDING, index=True, comment="任务状态")
+    scenario = Column(JSON, nullable=True, comment="压测场景（为空时使用申请的场景）")
+    warmup_seconds = Column(Integer, nullable=False, default=0, comment="预热时长（秒），预热结果不计入统计")
+    connection_close = Column(Boolean, nullable=False, default=False, comment="强制短连接（每个请求Connection: close）")
+    repetitions = Column(Integer, nullable=False, default=1, comment="重复试验次数")
+    status = Column(Enum(TaskStatus), nullable=False, default=TaskStatus.PENDING, comment="任务状态")
     created_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True, comment="创建人ID")
+    queued_at = Column(DateTime, nullable=True, comment="加入任务执行进程队列时间")
     started_at = Column(DateTime, nullable=True, comment="开始执行时间")
     finished_at = Column(DateTime, nullable=True, comment="完成时间")
     created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True, comment="创建时间")
@@ -41,6 +52,7 @@ class Task(Base):
     result = relationship("Result", back_populates="task", uselist=False)
     reports = relationship("Report", back_populates="task")
     logs = relationship("TaskLog", back_populates="task", cascade="all, delete-orphan")
+    log_archive = relationship("TaskLogArchive", back_populates="task", uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Task(id={self.id}, target_url={self.target_url}, status={self.status})>"
@@ -1,8 +1,8 @@
 """
 任务日志模型
 """
-from sqlalchemy import Column, Integer, Text, Enum, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Text, Enum, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
@@ -19,11 +19,16 @@ class LogLevel(str, enum.Enum):
 class TaskLog(Base):
     """任务日志表模型"""
     __tablename__ = "task_logs"
+    __table_args__ = (
+        # 任务日志：按任务查询并按时间倒序分页（二级索引隐含主键，满足id倒序）
+        Index("idx_task_id_created_at", "task_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True, comment="日志ID")
-    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True, comment="关联任务ID")
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, comment="关联任务ID")
     log_level = Column(Enum(LogLevel), nullable=False, default=LogLevel.INFO, index=True, comment="日志级别")
-    log_message = Column(Text, nullable=False, comment="日志消息")
+    # 默认不加载（删除任务时级联加载日志等场景不需要消息内容），读取日志时用 undefer(TaskLog.log_message) 显式加载
+    log_message = deferred(Column(Text, nullable=False, comment="日志消息"), raiseload=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True, comment="日志时间")
 
     # 关系
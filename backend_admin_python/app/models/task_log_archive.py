@@ -0,0 +1,30 @@
+"""
+任务日志归档模型
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class TaskLogArchive(Base):
+    """任务日志归档表模型（冷数据层）"""
+    __tablename__ = "task_log_archives"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True, comment="归档ID")
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, unique=True, comment="关联任务ID")
+    file_path = Column(String(500), nullable=False, comment="归档文件路径")
+    compression = Column(String(10), nullable=False, comment="压缩算法：zstd/gzip")
+    log_count = Column(Integer, nullable=False, default=0, comment="归档日志条数")
+    first_log_id = Column(Integer, nullable=True, comment="归档中最小日志ID")
+    last_log_id = Column(Integer, nullable=True, comment="归档中最大日志ID")
+    original_size = Column(BigInteger, nullable=False, default=0, comment="压缩前大小（字节）")
+    compressed_size = Column(BigInteger, nullable=False, default=0, comment="压缩后大小（字节）")
+    chunk_index = Column(JSON, nullable=False, comment="压缩块索引（偏移量、长度、日志ID范围）")
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, comment="归档时间")
+
+    # 关系
+    task = relationship("Task", back_populates="log_archive")
+
+    def __repr__(self):
+        return f"<TaskLogArchive(task_id={self.task_id}, log_count={self.log_count})>"
@@ -2,15 +2,27 @@
 压测申请服务层
 """
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, raiseload
 from sqlalchemy import and_, or_
 from datetime import datetime
 from app.models.apply_task import ApplyTask, AuditStatus
 from app.models.user import User
 from app.models.task import Task, TaskStatus
+from app.services.scenario_service import ScenarioService
 from app.utils.validators import validate_domain
 
 
+# 用户申请列表（ApplyResponse）需要的列，不加载备案信息、请求体等大文本列
+USER_LIST_COLUMNS = (
+    ApplyTask.id, ApplyTask.application_name, ApplyTask.url, ApplyTask.method,
+    ApplyTask.concurrency, ApplyTask.duration, ApplyTask.expected_qps,
+    ApplyTask.audit_status, ApplyTask.created_at, ApplyTask.updated_at,
+)
+
+# MySQL ngram全文索引的分词长度（ngram_token_size默认值），短于该长度的关键词无法走全文索引
+NGRAM_TOKEN_SIZE = 2
+
+
 class ApplyService:
     """压测申请服务类"""
     
@@ -27,7 +39,8 @@ class ApplyService:
         concurrency: int = 100,
         duration: str = "30s",
         expected_qps: Optional[int] = None,
-        request_body: Optional[str] = None
+        request_body: Optional[str] = None,
+        scenario: Optional[dict] = None
     ) -> ApplyTask:
         """
         创建压测申请
@@ -70,6 +83,7 @@ class ApplyService:
                 duration=duration,
                 expected_qps=expected_qps,
                 request_body=request_body,
+                scenario=ScenarioService.normalize(scenario, url) if scenario else None,
                 audit_status=AuditStatus.PENDING
             )
             
@@ -104,10 +118,26 @@ class ApplyService:
             query = query.filter(ApplyTask.audit_status == status)
         
         total = query.count()
-        applies = query.order_by(ApplyTask.created_at.desc()).offset(skip).limit(limit).all()
+        # 列表只加载需要的列，并禁止关系懒加载，避免逐行触发额外查询（N+1）
+        applies = query.options(
+            load_only(*USER_LIST_COLUMNS), raiseload("*")
+        ).order_by(ApplyTask.created_at.desc()).offset(skip).limit(limit).all()
         
         return applies, total
     
+    @staticmethod
+    def _domain_search_condition(db: Session, domain: str):
+        """
+        域名子串搜索条件
+        MySQL下先用ngram全文索引（ft_domain）的短语检索缩小候选行，再用LIKE复核子串，
+        避免 LIKE '%x%' 全表扫描；其他数据库或关键词过短时直接使用LIKE
+        """
+        like_condition = ApplyTask.domain.like(f"%{domain}%")
+        keyword = domain.replace('"', '').strip()
+        if db.get_bind().dialect.name == "mysql" and len(keyword) >= NGRAM_TOKEN_SIZE:
+            return and_(ApplyTask.domain.match(f'"{keyword}"'), like_condition)
+        return like_condition
+    
     @staticmethod
     def get_all_applies(
         db: Session,
@@ -126,10 +156,12 @@ class ApplyService:
             query = query.filter(ApplyTask.audit_status == status)
         
         if domain:
-            query = query.filter(ApplyTask.domain.like(f"%{domain}%"))
+            query = query.filter(ApplyService._domain_search_condition(db, domain))
         
         total = query.count()
-        applies = query.order_by(ApplyTask.created_at.desc()).offset(skip).limit(limit).all()
+        applies = query.options(raiseload("*")).order_by(
+            ApplyTask.created_at.desc()
+        ).offset(skip).limit(limit).all()
         
         return applies, total
     
@@ -0,0 +1,349 @@
+"""
+任务日志归档服务层
+将超过保留期的任务日志和原始压测输出（raw_output）打包为压缩归档文件，
+并提供从热数据（task_logs表）和冷数据（归档文件）透明读取日志的能力
+"""
+import os
+import json
+import gzip
+from typing import Optional, List
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer
+from app.models.task import Task, TaskStatus
+from app.models.result import Result
+from app.models.task_log import TaskLog
+from app.models.task_log_archive import TaskLogArchive
+from config.settings import settings
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，未安装时回退到gzip
+    zstandard = None
+
+
+# 可归档的任务状态（仅归档已结束的任务）
+ARCHIVABLE_STATUSES = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
+
+
+def _resolve_compression(preferred: str) -> str:
+    """根据配置和可用依赖确定实际使用的压缩算法"""
+    if preferred == "zstd" and zstandard is not None:
+        return "zstd"
+    return "gzip"
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    """压缩单个数据块"""
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    """解压单个数据块"""
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("归档文件使用zstd压缩，但当前环境未安装zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class TaskLogArchiveService:
+    """任务日志归档服务类"""
+
+    @staticmethod
+    def get_archive(db: Session, task_id: int) -> Optional[TaskLogArchive]:
+        """获取任务的日志归档记录"""
+        return db.query(TaskLogArchive).filter(TaskLogArchive.task_id == task_id).first()
+
+    @staticmethod
+    def find_archivable_tasks(db: Session, older_than_days: Optional[int] = None, limit: int = 100) -> List[Task]:
+        """
+        查找可归档的任务：已结束、结束时间超过保留期且尚未归档
+        """
+        days = settings.TASK_LOG_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+
+        return db.query(Task).outerjoin(
+            TaskLogArchive, TaskLogArchive.task_id == Task.id
+        ).filter(
+            Task.status.in_(ARCHIVABLE_STATUSES),
+            Task.finished_at.isnot(None),
+            Task.finished_at < cutoff,
+            TaskLogArchive.id.is_(None)
+        ).order_by(Task.finished_at.asc()).limit(limit).all()
+
+    @staticmethod
+    def archive_task(db: Session, task_id: int) -> Optional[TaskLogArchive]:
+        """
+        归档单个任务的日志和raw_output
+        归档文件由若干独立压缩块顺序拼接而成，chunk_index记录每个块的偏移量和日志ID范围，
+        读取时只需解压命中的块
+        :return: 归档记录，任务无可归档内容时返回None
+        """
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            raise ValueError("任务不存在")
+
+        if task.status not in ARCHIVABLE_STATUSES:
+            raise ValueError("只能归档已结束的任务")
+
+        if TaskLogArchiveService.get_archive(db, task_id):
+            raise ValueError("该任务日志已归档")
+
+        logs = db.query(
+            TaskLog.id, TaskLog.log_level, TaskLog.log_message, TaskLog.created_at
+        ).filter(TaskLog.task_id == task_id).order_by(TaskLog.id.asc()).all()
+
+        result = db.query(Result).options(undefer(Result.raw_result_json)).filter(Result.task_id == task_id).first()
+        raw_output = None
+        if result and isinstance(result.raw_result_json, dict):
+            raw_output = result.raw_result_json.get("raw_output")
+
+        if not logs and raw_output is None:
+            return None
+
+        compression = _resolve_compression(settings.TASK_LOG_ARCHIVE_COMPRESSION)
+        chunk_size = max(1, settings.TASK_LOG_ARCHIVE_CHUNK_SIZE)
+
+        os.makedirs(settings.TASK_LOG_ARCHIVE_DIR, exist_ok=True)
+        file_path = os.path.join(settings.TASK_LOG_ARCHIVE_DIR, f"task_{task_id}_logs.{compression}")
+        tmp_path = file_path + ".tmp"
+
+        chunks = []
+        raw_output_entry = None
+        offset = 0
+        original_size = 0
+
+        # 写入失败时删除未写完的临时文件
+        try:
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(logs), chunk_size):
+                    batch = logs[start:start + chunk_size]
+                    payload = json.dumps(
+                        [
+                            [log.id, log.log_level.value, log.log_message, log.created_at.isoformat()]
+                            for log in batch
+                        ],
+                        ensure_ascii=False
+                    ).encode("utf-8")
+                    block = _compress(payload, compression)
+                    f.write(block)
+                    chunks.append({
+                        "first_id": batch[0].id,
+                        "last_id": batch[-1].id,
+                        "count": len(batch),
+                        "offset": offset,
+                        "length": len(block)
+                    })
+                    offset += len(block)
+                    original_size += len(payload)
+
+                if raw_output is not None:
+                    payload = raw_output.encode("utf-8")
+                    block = _compress(payload, compression)
+                    f.write(block)
+                    raw_output_entry = {"offset": offset, "length": len(block)}
+                    offset += len(block)
+                    original_size += len(payload)
+
+            os.replace(tmp_path, file_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        try:
+            archive = TaskLogArchive(
+                task_id=task_id,
+                file_path=file_path,
+                compression=compression,
+                log_count=len(logs),
+                first_log_id=logs[0].id if logs else None,
+                last_log_id=logs[-1].id if logs else None,
+                original_size=original_size,
+                compressed_size=offset,
+                chunk_index={"chunks": chunks, "raw_output": raw_output_entry}
+            )
+            db.add(archive)
+
+            if logs:
+                db.query(TaskLog).filter(TaskLog.task_id == task_id).delete(synchronize_session=False)
+
+            if raw_output is not None:
+                # JSON列需要整体替换才能被SQLAlchemy识别为已修改
+                raw_result_json = dict(result.raw_result_json)
+                raw_result_json.pop("raw_output", None)
+                raw_result_json["raw_output_archived"] = True
+                result.raw_result_json = raw_result_json
+
+            db.commit()
+            db.refresh(archive)
+        except Exception:
+            db.rollback()
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+        return archive
+
+    @staticmethod
+    def archive_expired_tasks(db: Session, older_than_days: Optional[int] = None, limit: int = 100) -> List[TaskLogArchive]:
+        """批量归档超过保留期的任务"""
+        archives = []
+        for task in TaskLogArchiveService.find_archivable_tasks(db, older_than_days, limit):
+            archive = TaskLogArchiveService.archive_task(db, task.id)
+            if archive:
+                archives.append(archive)
+        return archives
+
+    @staticmethod
+    def _read_block(archive: TaskLogArchive, offset: int, length: int) -> bytes:
+        """从归档文件读取并解压一个压缩块"""
+        with open(archive.file_path, "rb") as f:
+            f.seek(offset)
+            block = f.read(length)
+        return _decompress(block, archive.compression)
+
+    @staticmethod
+    def read_archived_logs(
+        archive: TaskLogArchive,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        按日志ID倒序分页读取归档日志，只解压与分页范围重叠的块
+        指定after_id/since时只返回更新的日志（增量读取）：按ID正序取最早的limit条，
+        其余由下一次增量读取获取；last_id不大于after_id的块直接跳过
+        """
+        if after_id is not None or since is not None:
+            rows = []
+            for chunk in archive.chunk_index.get("chunks", []):
+                if after_id is not None and chunk["last_id"] <= after_id:
+                    continue
+                entries = json.loads(TaskLogArchiveService._read_block(archive, chunk["offset"], chunk["length"]))
+                rows.extend(
+                    entry for entry in entries
+                    if (after_id is None or entry[0] > after_id)
+                    and (since is None or datetime.fromisoformat(entry[3]) > since)
+                )
+                if len(rows) >= skip + limit:
+                    break
+            rows = rows[skip:skip + limit]
+        else:
+            total = archive.log_count
+            # 倒序分页对应的正序区间 [asc_start, asc_end)
+            asc_end = total - skip
+            asc_start = max(0, asc_end - limit)
+            if asc_end <= 0:
+                return []
+
+            rows = []
+            position = 0
+            for chunk in archive.chunk_index.get("chunks", []):
+                chunk_start = position
+                chunk_end = position + chunk["count"]
+                position = chunk_end
+                if chunk_end <= asc_start or chunk_start >= asc_end:
+                    continue
+                entries = json.loads(TaskLogArchiveService._read_block(archive, chunk["offset"], chunk["length"]))
+                rows.extend(entries[max(asc_start - chunk_start, 0):asc_end - chunk_start])
+
+        return [
+            {
+                "id": log_id,
+                "level": level,
+                "message": message,
+                "created_at": created_at
+            }
+            for log_id, level, message, created_at in reversed(rows)
+        ]
+
+    @staticmethod
+    def read_archived_raw_output(archive: TaskLogArchive) -> Optional[str]:
+        """读取归档中的raw_output"""
+        entry = archive.chunk_index.get("raw_output")
+        if not entry:
+            return None
+        return TaskLogArchiveService._read_block(archive, entry["offset"], entry["length"]).decode("utf-8")
+
+    @staticmethod
+    def get_logs_version(db: Session, task_id: int) -> Optional[tuple]:
+        """
+        获取任务日志的版本信息（任务更新时间、状态、最新日志ID），用于生成ETag
+        单条查询且只取索引列，不加载日志行；任务不存在时返回None
+        """
+        last_log_id = db.query(func.max(TaskLog.id)).filter(
+            TaskLog.task_id == task_id
+        ).scalar_subquery()
+        archived_last_id = db.query(TaskLogArchive.last_log_id).filter(
+            TaskLogArchive.task_id == task_id
+        ).scalar_subquery()
+
+        row = db.query(
+            Task.updated_at, Task.status, last_log_id, archived_last_id
+        ).filter(Task.id == task_id).first()
+        if row is None:
+            return None
+
+        updated_at, task_status, live_id, archived_id = row
+        return updated_at, task_status.value, live_id or archived_id or 0
+
+    @staticmethod
+    def get_task_logs(
+        db: Session,
+        task_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> List[dict]:
+        """
+        获取任务日志（按时间倒序），自动从task_logs表或归档文件读取
+        after_id/since用于轮询增量：只返回ID大于after_id、创建时间晚于since的日志，
+        新日志超过limit条时返回其中最早的limit条，客户端以返回的最大ID作为下一次的after_id
+        """
+        archive = TaskLogArchiveService.get_archive(db, task_id)
+        if archive:
+            return TaskLogArchiveService.read_archived_logs(
+                archive, skip=skip, limit=limit, after_id=after_id, since=since
+            )
+
+        query = db.query(TaskLog).options(undefer(TaskLog.log_message)).filter(TaskLog.task_id == task_id)
+        if after_id is not None:
+            query = query.filter(TaskLog.id > after_id)
+        if since is not None:
+            query = query.filter(TaskLog.created_at > since)
+        if after_id is not None or since is not None:
+            logs = query.order_by(TaskLog.id.asc()).offset(skip).limit(limit).all()
+            logs.reverse()
+        else:
+            logs = query.order_by(TaskLog.created_at.desc(), TaskLog.id.desc()).offset(skip).limit(limit).all()
+
+        return [
+            {
+                "id": log.id,
+                "level": log.log_level.value,
+                "message": log.log_message,
+                "created_at": log.created_at.isoformat()
+            }
+            for log in logs
+        ]
+
+    @staticmethod
+    def get_raw_output(db: Session, task_id: int) -> Optional[str]:
+        """获取任务的原始压测输出，自动从结果JSON或归档文件读取"""
+        result = db.query(Result).options(undefer(Result.raw_result_json)).filter(Result.task_id == task_id).first()
+        if result and isinstance(result.raw_result_json, dict):
+            if "raw_output" in result.raw_result_json:
+                return result.raw_result_json["raw_output"]
+            if not result.raw_result_json.get("raw_output_archived"):
+                return None
+
+        archive = TaskLogArchiveService.get_archive(db, task_id)
+        if not archive:
+            return None
+        return TaskLogArchiveService.read_archived_raw_output(archive)
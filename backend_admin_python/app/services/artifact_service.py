@@ -0,0 +1,147 @@
+"""
+报告产物存储服务层
+报告文件按"输入数据 + 渲染参数"的SHA-256寻址存放在 UPLOAD_DIR/artifacts/<前2位>/<摘要>.<扩展名>，
+相同输入直接复用已有文件；图片报告同时生成低分辨率WebP预览图，列表页无需下载原图
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from app.models.report import Report
+from config.settings import settings
+
+
+# 产物目录（相对UPLOAD_DIR，保证可以转换为/uploads路径）
+ARTIFACT_SUBDIR = "artifacts"
+
+# 可生成预览图的产物类型
+PREVIEWABLE_EXTENSIONS = {"png", "jpg", "jpeg"}
+
+
+class ArtifactService:
+    """报告产物存储服务类"""
+
+    @staticmethod
+    def artifact_root() -> str:
+        """产物根目录"""
+        return os.path.join(settings.UPLOAD_DIR, ARTIFACT_SUBDIR)
+
+    @staticmethod
+    def compute_key(csv_file_path: str, renderer: str, options: Optional[dict] = None) -> str:
+        """
+        计算产物摘要：CSV内容 + 渲染器标识（含版本）+ 渲染参数
+        渲染逻辑变化时修改渲染器版本即可让旧产物失效
+        """
+        digest = hashlib.sha256()
+        digest.update(renderer.encode("utf-8") + b"\0")
+        digest.update(json.dumps(options or {}, sort_keys=True, ensure_ascii=False).encode("utf-8") + b"\0")
+        with open(csv_file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def artifact_path(key: str, extension: str, variant: Optional[str] = None) -> str:
+        """产物文件路径，按摘要前2位分目录，避免单目录文件过多"""
+        name = f"{key}.{variant}.{extension}" if variant else f"{key}.{extension}"
+        return os.path.join(ArtifactService.artifact_root(), key[:2], name)
+
+    @staticmethod
+    def to_upload_path(file_path: str) -> str:
+        """实际文件路径转换为数据库中保存的/uploads路径"""
+        relative_path = os.path.relpath(file_path, settings.UPLOAD_DIR)
+        return "/uploads/" + relative_path.replace(os.sep, "/")
+
+    @staticmethod
+    def to_file_path(upload_path: str) -> str:
+        """/uploads路径转换为实际文件路径"""
+        return os.path.join(settings.UPLOAD_DIR, upload_path[len("/uploads/"):])
+
+    @staticmethod
+    def get_or_render(
+        csv_file_path: str,
+        renderer: str,
+        extension: str,
+        render: Callable[[str, str], str],
+        options: Optional[dict] = None
+    ) -> dict:
+        """
+        获取产物，不存在时调用render生成
+        :param render: 渲染函数 (csv_file_path, output_dir) -> 生成的文件路径，在临时目录中执行后原子移动到产物路径
+        :return: 产物信息（key、路径、/uploads路径、大小、预览图、是否复用）
+        """
+        key = ArtifactService.compute_key(csv_file_path, renderer, options)
+        path = ArtifactService.artifact_path(key, extension)
+        deduplicated = os.path.exists(path)
+
+        if not deduplicated:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 以"."开头的临时目录，渲染中途失败不会留下半成品产物
+            tmp_dir = tempfile.mkdtemp(prefix=".render-", dir=ArtifactService.artifact_root())
+            try:
+                produced = render(csv_file_path, tmp_dir)
+                if not produced or not os.path.exists(produced):
+                    raise FileNotFoundError(f"渲染未生成文件: {produced}")
+                os.replace(produced, path)
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        preview_path = None
+        if extension.lower() in PREVIEWABLE_EXTENSIONS:
+            preview_path = ArtifactService.artifact_path(key, "webp", variant="preview")
+            if not os.path.exists(preview_path):
+                ArtifactService.make_preview(path, preview_path)
+
+        return {
+            "key": key,
+            "path": path,
+            "upload_path": ArtifactService.to_upload_path(path),
+            "size": os.path.getsize(path),
+            "preview_path": ArtifactService.to_upload_path(preview_path) if preview_path else None,
+            "deduplicated": deduplicated,
+        }
+
+    @staticmethod
+    def make_preview(source_path: str, preview_path: str) -> str:
+        """生成WebP预览图（按最大宽度等比缩小）"""
+        from PIL import Image
+
+        max_width = settings.ARTIFACT_PREVIEW_MAX_WIDTH
+        tmp_path = preview_path + ".tmp"
+        with Image.open(source_path) as image:
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            if image.width > max_width:
+                image = image.resize((max_width, max(1, round(image.height * max_width / image.width))), Image.LANCZOS)
+            image.save(tmp_path, format="WEBP", quality=settings.ARTIFACT_PREVIEW_QUALITY, method=4)
+        os.replace(tmp_path, preview_path)
+        return preview_path
+
+    @staticmethod
+    def release(db: Session, report: Report) -> bool:
+        """
+        释放报告引用的产物：没有其他报告引用同一摘要时删除产物文件和预览图
+        :return: 是否删除了文件
+        """
+        if not report.content_hash:
+            return False
+
+        still_referenced = db.query(Report.id).filter(
+            Report.content_hash == report.content_hash,
+            Report.id != report.id
+        ).first()
+        if still_referenced:
+            return False
+
+        for upload_path in (report.file_path, report.preview_path):
+            if not upload_path or not upload_path.startswith("/uploads/"):
+                continue
+            file_path = ArtifactService.to_file_path(upload_path)
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        return True
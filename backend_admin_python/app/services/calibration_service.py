@@ -0,0 +1,80 @@
+"""
+压测客户端校准服务层
+读取tools/calibrate_generator.sh写入的校准文件（本机压测客户端对替身目标服务器能达到的最高每秒请求数），
+压测结果接近该上限时给出警告：此时瓶颈可能在压测客户端，而不是目标系统
+"""
+import os
+from typing import Optional
+from app.services.result_cache_service import ResultCacheService
+from config.settings import settings
+
+
+class CalibrationService:
+    """压测客户端校准服务类"""
+
+    @staticmethod
+    def load() -> Optional[dict]:
+        """读取校准文件，未校准或文件无法解析时返回None"""
+        path = settings.GENERATOR_CALIBRATION_FILE
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            calibration = ResultCacheService.read_json(path)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(calibration, dict) or not calibration.get("max_qps"):
+            return None
+        return calibration
+
+    @staticmethod
+    def _ceiling(calibration: dict, target_url: Optional[str]) -> tuple:
+        """
+        目标适用的上限：HTTPS目标使用TLS上限，未测量TLS上限时使用HTTP上限（偏高，只会少报）
+        :return: (协议, 上限QPS)
+        """
+        if target_url and target_url.lower().startswith("https://") and calibration.get("max_qps_tls"):
+            return "https", calibration["max_qps_tls"]
+        return "http", calibration["max_qps"]
+
+    @staticmethod
+    def fingerprint(target_url: Optional[str] = None) -> Optional[dict]:
+        """
+        校准结果、适用的协议和警告阈值，作为引用校准结果的报告的渲染参数：
+        重新校准后、或同一数据文件按不同协议的上限比较时不复用旧产物
+        """
+        calibration = CalibrationService.load()
+        if calibration is None:
+            return None
+        scheme, _ = CalibrationService._ceiling(calibration, target_url)
+        return {"generator_calibration": [
+            calibration.get("measured_at"), calibration["max_qps"], calibration.get("max_qps_tls"),
+            settings.GENERATOR_CEILING_WARN_PERCENT, scheme
+        ]}
+
+    @staticmethod
+    def assess(qps, target_url: Optional[str] = None) -> Optional[dict]:
+        """
+        比较QPS与压测客户端上限
+        HTTPS目标使用TLS上限，未测量TLS上限时使用HTTP上限（偏高，只会少报）
+        :return: {"ceiling_qps", "ratio", "near_ceiling", "scheme", "measured_at"}，未校准或QPS为空时返回None
+        """
+        calibration = CalibrationService.load()
+        if calibration is None or not qps:
+            return None
+        scheme, ceiling = CalibrationService._ceiling(calibration, target_url)
+        ratio = float(qps) / float(ceiling)
+        return {
+            "ceiling_qps": ceiling,
+            "ratio": round(ratio, 4),
+            "near_ceiling": ratio >= 1 - settings.GENERATOR_CEILING_WARN_PERCENT / 100,
+            "scheme": scheme,
+            "measured_at": calibration.get("measured_at"),
+        }
+
+    @staticmethod
+    def describe(assessment: dict, qps) -> str:
+        """接近上限时的警告文本"""
+        return (f"QPS {float(qps):.2f} 达到压测客户端上限 {assessment['ceiling_qps']}"
+                f"（{assessment['scheme'].upper()}，校准于 {assessment['measured_at'] or '未知时间'}）的 "
+                f"{assessment['ratio'] * 100:.1f}%，结果可能受压测客户端限制而不是目标系统的容量，"
+                f"建议增加压测机或分布式压测后复核")
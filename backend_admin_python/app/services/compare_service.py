@@ -0,0 +1,221 @@
+"""
+压测结果比较服务层
+将候选任务与基线任务（或同一域名/URL最近N次压测）比较，计算QPS和延迟分位数的变化，
+基于每秒请求数样本和延迟直方图进行显著性检验，并按阈值判定性能回归
+"""
+from typing import Optional, List
+from sqlalchemy.orm import Session, undefer
+from app.models.task import Task, TaskStatus
+from app.models.result import Result
+from app.models.apply_task import ApplyTask
+from app.utils.stats import (
+    mann_whitney_u, mann_whitney_u_grouped, merge_histograms,
+    histogram_percentile, histogram_mean, mean
+)
+from config.settings import settings
+
+
+# 比较的指标：(指标名, 直方图分位数, 是否越大越好)
+COMPARED_METRICS = [
+    ("qps", None, True),
+    ("avg_latency_ms", None, False),
+    ("p95_latency_ms", 95, False),
+    ("p99_latency_ms", 99, False),
+]
+
+# 显著性检验所需的最少每秒样本数
+MIN_SECOND_SAMPLES = 3
+
+
+def _to_float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _prefer(steady, full):
+    """稳态指标优先，未检测到稳态或旧任务时使用全程指标"""
+    return steady if steady is not None else full
+
+
+class CompareService:
+    """压测结果比较服务类"""
+
+    @staticmethod
+    def load_run(db: Session, task_id: int) -> dict:
+        """
+        读取单次压测的汇总指标和样本数据
+        每秒请求数和延迟直方图来自结果JSON中的metrics（status_code.lua输出），旧任务可能没有；
+        有稳态指标时使用稳态指标和稳态区间的每秒请求数，否则使用全程指标
+        """
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            raise ValueError(f"任务不存在: {task_id}")
+
+        result = db.query(Result).options(undefer(Result.raw_result_json)).filter(Result.task_id == task_id).first()
+        if not result:
+            raise ValueError(f"任务 {task_id} 没有压测结果")
+
+        raw = result.raw_result_json if isinstance(result.raw_result_json, dict) else {}
+        metrics = raw.get("metrics") or {}
+        histogram = [(float(value), float(count)) for value, count in metrics.get("latency_histogram_ms") or []]
+        requests_per_second = [float(v) for v in metrics.get("requests_per_second") or []]
+        steady_start = (raw.get("steady_state") or {}).get("start_index")
+        if result.steady_qps is not None and steady_start:
+            requests_per_second = requests_per_second[steady_start:]
+
+        run = {
+            "task_id": task_id,
+            "qps": _to_float(_prefer(result.steady_qps, result.qps)),
+            "avg_latency_ms": _to_float(_prefer(result.steady_avg_latency_ms, result.avg_latency_ms)),
+            "p95_latency_ms": _to_float(_prefer(result.steady_p95_latency_ms, result.p95_latency_ms)),
+            "p99_latency_ms": _to_float(_prefer(result.steady_p99_latency_ms, result.p99_latency_ms)),
+            "steady_state": result.steady_qps is not None,
+            "requests_per_second": requests_per_second,
+            "latency_histogram": histogram,
+        }
+        # 结果中未记录分位数时，优先使用wrk输出的精确值，其次从直方图估算
+        percentiles = metrics.get("latency_percentiles_ms") or {}
+        for name, percentile, _ in COMPARED_METRICS:
+            if run[name] is None and percentile is not None:
+                run[name] = _to_float(percentiles.get(f"p{percentile}"))
+                if run[name] is None and histogram:
+                    run[name] = histogram_percentile(histogram, percentile)
+        return run
+
+    @staticmethod
+    def find_baseline_tasks(db: Session, candidate: Task, last_n: int) -> List[Task]:
+        """
+        查找滚动基线：同一域名、同一目标URL和并发数下，候选任务之前最近N次已完成且有结果的任务
+        """
+        apply_task = db.query(ApplyTask).filter(ApplyTask.id == candidate.apply_id).first()
+        if not apply_task:
+            raise ValueError("候选任务关联的申请不存在")
+
+        return db.query(Task).join(
+            ApplyTask, ApplyTask.id == Task.apply_id
+        ).join(
+            Result, Result.task_id == Task.id
+        ).filter(
+            ApplyTask.domain == apply_task.domain,
+            Task.target_url == candidate.target_url,
+            Task.concurrency == candidate.concurrency,
+            Task.status == TaskStatus.COMPLETED,
+            Task.id < candidate.id
+        ).order_by(Task.id.desc()).limit(last_n).all()
+
+    @staticmethod
+    def _aggregate_baseline(runs: List[dict]) -> dict:
+        """
+        合并多次基线压测：指标取各次结果的均值，样本和直方图合并
+        结果中缺少延迟分位数的旧任务，从合并后的直方图估算
+        """
+        histograms = [run["latency_histogram"] for run in runs]
+        merged = merge_histograms(histograms) if all(histograms) else []
+
+        baseline = {
+            "requests_per_second": [v for run in runs for v in run["requests_per_second"]],
+            "latency_histogram": merged,
+        }
+        for name, percentile, _ in COMPARED_METRICS:
+            baseline[name] = mean([run[name] for run in runs if run[name] is not None])
+            if baseline[name] is None and merged and name != "qps":
+                baseline[name] = histogram_mean(merged) if percentile is None else histogram_percentile(merged, percentile)
+        return baseline
+
+    @staticmethod
+    def compare(
+        db: Session,
+        candidate_task_id: int,
+        baseline_task_id: Optional[int] = None,
+        last_n: Optional[int] = None,
+        qps_drop_percent: Optional[float] = None,
+        latency_increase_percent: Optional[float] = None,
+        significance_level: Optional[float] = None
+    ) -> dict:
+        """
+        比较候选任务与基线，返回各指标的变化、p值和回归判定
+        QPS使用每秒请求数样本做Mann-Whitney U检验；延迟指标使用延迟直方图做分组Mann-Whitney U检验，
+        检验的是整体延迟分布的偏移。指标变化超过阈值且显著（或无样本无法检验）时判定为回归
+        """
+        qps_drop_percent = settings.REGRESSION_QPS_DROP_PERCENT if qps_drop_percent is None else qps_drop_percent
+        latency_increase_percent = (
+            settings.REGRESSION_LATENCY_INCREASE_PERCENT if latency_increase_percent is None else latency_increase_percent
+        )
+        alpha = settings.REGRESSION_SIGNIFICANCE_LEVEL if significance_level is None else significance_level
+
+        candidate = CompareService.load_run(db, candidate_task_id)
+
+        if baseline_task_id is not None:
+            if baseline_task_id == candidate_task_id:
+                raise ValueError("基线任务不能与候选任务相同")
+            baseline_runs = [CompareService.load_run(db, baseline_task_id)]
+            baseline_mode = "task"
+        else:
+            candidate_task = db.query(Task).filter(Task.id == candidate_task_id).first()
+            tasks = CompareService.find_baseline_tasks(
+                db, candidate_task, last_n or settings.REGRESSION_BASELINE_RUNS
+            )
+            if not tasks:
+                raise ValueError("没有可用的基线任务（同一域名、URL和并发数下无更早的已完成任务）")
+            baseline_runs = [CompareService.load_run(db, task.id) for task in tasks]
+            baseline_mode = "rolling"
+
+        baseline = CompareService._aggregate_baseline(baseline_runs)
+
+        # 显著性检验
+        qps_test = None
+        if (len(baseline["requests_per_second"]) >= MIN_SECOND_SAMPLES
+                and len(candidate["requests_per_second"]) >= MIN_SECOND_SAMPLES):
+            qps_test = mann_whitney_u(baseline["requests_per_second"], candidate["requests_per_second"])
+
+        latency_test = None
+        if baseline["latency_histogram"] and candidate["latency_histogram"]:
+            latency_test = mann_whitney_u_grouped(baseline["latency_histogram"], candidate["latency_histogram"])
+
+        metrics = []
+        for name, _, higher_is_better in COMPARED_METRICS:
+            base_value = baseline.get(name)
+            cand_value = candidate.get(name)
+            test = qps_test if name == "qps" else latency_test
+            p_value = test[1] if test else None
+            threshold = qps_drop_percent if higher_is_better else latency_increase_percent
+
+            delta = delta_percent = None
+            regression = False
+            if base_value is not None and cand_value is not None:
+                delta = cand_value - base_value
+                if base_value != 0:
+                    delta_percent = delta / base_value * 100
+                    worse_percent = -delta_percent if higher_is_better else delta_percent
+                    regression = worse_percent >= threshold and (p_value is None or p_value < alpha)
+
+            metrics.append({
+                "metric": name,
+                "baseline": round(base_value, 3) if base_value is not None else None,
+                "candidate": round(cand_value, 3) if cand_value is not None else None,
+                "delta": round(delta, 3) if delta is not None else None,
+                "delta_percent": round(delta_percent, 2) if delta_percent is not None else None,
+                "p_value": round(p_value, 6) if p_value is not None else None,
+                "significant": (p_value < alpha) if p_value is not None else None,
+                "threshold_percent": threshold,
+                "regression": regression,
+            })
+
+        regressed = [m["metric"] for m in metrics if m["regression"]]
+        return {
+            "candidate_task_id": candidate_task_id,
+            "baseline_mode": baseline_mode,
+            "baseline_task_ids": [run["task_id"] for run in baseline_runs],
+            # 各次压测是否使用了稳态指标（未检测到稳态的任务使用全程指标）
+            "steady_state": {
+                "candidate": candidate["steady_state"],
+                "baseline": [run["steady_state"] for run in baseline_runs],
+            },
+            "thresholds": {
+                "qps_drop_percent": qps_drop_percent,
+                "latency_increase_percent": latency_increase_percent,
+                "significance_level": alpha,
+            },
+            "metrics": metrics,
+            "regression": bool(regressed),
+            "regressed_metrics": regressed,
+        }
@@ -0,0 +1,48 @@
+"""
+健康检查服务层
+/health 只表示进程存活；/ready 检查数据库连通性、连接池占用和任务执行状态，任一项不可用时返回503，
+负载均衡据此摘除实例
+"""
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.services.task_runner_service import TaskRunnerService
+from config.settings import settings
+
+
+class HealthService:
+    """健康检查服务类"""
+
+    @staticmethod
+    def check_database(db: Session) -> dict:
+        """
+        数据库检查：执行SELECT 1并读取连接池占用
+        连接池已满（已借出连接数达到 pool_size + max_overflow）时 ok 为False
+        """
+        started = time.perf_counter()
+        try:
+            db.execute(text("SELECT 1"))
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        result = {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+        pool = db.get_bind().pool
+        if hasattr(pool, "checkedout"):
+            limit = pool.size() + settings.DATABASE_MAX_OVERFLOW
+            result["pool"] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "limit": limit,
+            }
+            result["ok"] = pool.checkedout() < limit
+        return result
+
+    @staticmethod
+    def readiness(db: Session) -> dict:
+        """就绪检查结果：{"ready", "checks": {"database", "task_runner"}}"""
+        checks = {
+            "database": HealthService.check_database(db),
+            "task_runner": TaskRunnerService.state(),
+        }
+        return {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
@@ -0,0 +1,34 @@
+"""
+平台指标服务层
+GET /metrics 输出API请求耗时、处理中请求数、数据库连接池、任务数、报告生成耗时和任务日志写入量，
+供Prometheus采集，用于平台自身的容量规划
+"""
+from typing import Tuple
+from sqlalchemy.orm import Session
+from app.services.task_runner_service import TaskRunnerService
+from app.utils.metrics import (
+    OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, REGISTRY, TASKS
+)
+from config.settings import settings
+
+
+class MetricsService:
+    """平台指标服务类"""
+
+    @staticmethod
+    def render(db: Session, accept: str = "") -> Tuple[str, str]:
+        """
+        采集并输出指标文本
+        :param accept: 请求的Accept头，包含 application/openmetrics-text 时输出OpenMetrics格式，否则输出Prometheus文本格式
+        :return: (文本, Content-Type)
+        """
+        try:
+            for state, count in TaskRunnerService.counts(db).items():
+                TASKS.labels(state).set(count)
+        except Exception:
+            # 数据库不可用时仍输出其他指标
+            db.rollback()
+
+        openmetrics = "application/openmetrics-text" in accept
+        body = REGISTRY.render(openmetrics=openmetrics, directory=settings.METRICS_SHARED_DIR or None)
+        return body, OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
@@ -3,15 +3,55 @@
 """
 import os
 import json
+import time
+from functools import partial
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
 from app.models.report import Report, ReportType, ReportStatus
 from app.models.task import Task, TaskStatus
 from app.models.result import Result
 from config.settings import settings
-from report_module.image_generator import generate_report_image_wrapper
-from report_module.pdf_generator import generate_pdf_report
+from app.services.artifact_service import ArtifactService
+from app.services.calibration_service import CalibrationService
+from app.utils.metrics import REPORT_RENDER_DURATION
+
+
+# 渲染函数在首次生成报告时才导入matplotlib、reportlab和pandas，
+# API进程启动时不加载这些只有报告路径使用的库（tests/test_import_time.py 检查）
+def _render_image(csv_file_path: str, output_dir: str) -> str:
+    from report_module.image_generator import generate_report_image_wrapper
+    return generate_report_image_wrapper(csv_file_path=csv_file_path, output_dir=output_dir)
+
+
+def _render_pdf(csv_file_path: str, output_dir: str) -> str:
+    from report_module.pdf_generator import generate_pdf_report
+    return generate_pdf_report(csv_file_path=csv_file_path, output_dir=output_dir)
+
+
+def _render_html(csv_file_path: str, output_dir: str, target_url: Optional[str] = None) -> str:
+    from report_module.summary_generator import generate_html_report
+    return generate_html_report(csv_file_path=csv_file_path, output_dir=output_dir, target_url=target_url)
+
+
+def _render_markdown(csv_file_path: str, output_dir: str, target_url: Optional[str] = None) -> str:
+    from report_module.summary_generator import generate_markdown_report
+    return generate_markdown_report(csv_file_path=csv_file_path, output_dir=output_dir, target_url=target_url)
+
+
+# 报告渲染器：报告类型 -> (渲染器标识, 扩展名, 渲染函数)
+# 渲染器标识参与产物摘要计算，修改报告样式、DPI、降采样点数等渲染逻辑时需同步升级版本号
+REPORT_RENDERERS = {
+    ReportType.HTML: (
+        f"html:lttb-{settings.REPORT_MAX_POINTS}-{settings.REPORT_MIN_SERIES_POINTS}:v1", "html", _render_html
+    ),
+    ReportType.MARKDOWN: ("markdown:v1", "md", _render_markdown),
+    ReportType.IMAGE: ("image:matplotlib-300dpi:v2", "png", _render_image),
+    ReportType.PDF: ("pdf:reportlab-a4:v2", "pdf", _render_pdf),
+}
+
+# 结论中引用压测客户端校准结果的报告类型：渲染时传入目标URL（HTTPS目标与TLS上限比较）
+CALIBRATED_REPORT_TYPES = {ReportType.HTML, ReportType.MARKDOWN}
 
 
 class ReportService:
@@ -59,7 +99,7 @@ class ReportService:
         
         # 4. 如果未指定报告类型，生成所有支持的报告类型
         if not report_types:
-            report_types = [ReportType.IMAGE, ReportType.PDF]
+            report_types = list(REPORT_RENDERERS)
         
         generated_reports = []
         csv_file_path = result.data_file_path
@@ -68,159 +108,102 @@ class ReportService:
         if os.path.exists(csv_file_path):
             print(f"CSV文件大小: {os.path.getsize(csv_file_path)} 字节")
         
-        # 5. 生成指定类型的报告
+        # 5. 生成指定类型的报告（按CSV内容和渲染器寻址，相同数据复用已有产物）
         for report_type in report_types:
-            if report_type not in existing_report_types:
-                try:
-                    if report_type == ReportType.IMAGE:
-                        # 生成图片报告
-                        print(f"开始生成图片报告，CSV路径：{csv_file_path}")
-                        # 在UPLOAD_DIR下创建reports/images子目录
-                        image_output_dir = os.path.join(settings.UPLOAD_DIR, 'reports', 'images')
-                        os.makedirs(image_output_dir, exist_ok=True)
-                        print(f"图片输出目录：{image_output_dir}")
-                        report_file_path = generate_report_image_wrapper(
-                            csv_file_path=csv_file_path,
-                            output_dir=image_output_dir
-                        )
-                        print(f"图片报告生成完成，路径：{report_file_path}")
-                        
-                        # 检查文件是否存在
-                        if os.path.exists(report_file_path):
-                            file_size = os.path.getsize(report_file_path)
-                            print(f"报告文件大小：{file_size} 字节")
-                            
-                            # 转换报告路径为/uploads形式
-                            # 找到reports/images目录后的部分
-                            if 'reports/images' in report_file_path:
-                                # 获取reports/images之后的路径
-                                reports_index = report_file_path.index('reports/images')
-                                # 构建/uploads路径，确保有正确的斜杠分隔
-                                db_file_path = '/uploads/' + report_file_path[reports_index:]
-                                print(f"转换后的数据库路径：{db_file_path}")
-                            else:
-                                # 获取文件的绝对路径
-                                file_abs_path = os.path.abspath(report_file_path)
-                                upload_abs_path = os.path.abspath(settings.UPLOAD_DIR)
-                                # 计算相对路径
-                                if file_abs_path.startswith(upload_abs_path):
-                                    relative_path = file_abs_path[len(upload_abs_path):]
-                                    # 构建/uploads路径，确保有正确的斜杠分隔
-                                    db_file_path = f'/uploads/images/{relative_path.lstrip("/")}'
-                                else:
-                                    # 无法转换，使用原始路径
-                                    db_file_path = report_file_path
-                                print(f"构建的数据库路径：{db_file_path}")
-                            
-                            report = Report(
-                                task_id=task_id,
-                                apply_id=task.apply_id,
-                                report_type=report_type,
-                                file_path=db_file_path,
-                                file_size=file_size,
-                                status=ReportStatus.COMPLETED,
-                                generated_at=datetime.utcnow()
-                            )
-                            db.add(report)
-                            generated_reports.append(report)
-                            print(f"报告已添加到数据库：{report.id}")
-                        else:
-                            print(f"报告文件不存在，无法添加到数据库")
-                    elif report_type == ReportType.PDF:
-                        # 生成PDF报告
-                        print(f"\n=== 开始生成PDF报告 ===")
-                        print(f"CSV路径：{csv_file_path}")
-                        # 在UPLOAD_DIR下创建reports/pdfs子目录
-                        pdf_output_dir = os.path.join(settings.UPLOAD_DIR, 'reports', 'pdfs')
-                        os.makedirs(pdf_output_dir, exist_ok=True)
-                        print(f"PDF输出目录：{pdf_output_dir}")
-                        print(f"输出目录是否存在：{os.path.exists(pdf_output_dir)}")
-                        
-                        try:
-                            print(f"准备调用generate_pdf_report函数...")
-                            # 导入模块，确保能找到函数
-                            from report_module.pdf_generator import generate_pdf_report
-                            print(f"成功导入generate_pdf_report函数")
-                            
-                            report_file_path = generate_pdf_report(
-                                csv_file_path=csv_file_path,
-                                output_dir=pdf_output_dir
-                            )
-                            print(f"PDF报告生成完成，返回路径：{report_file_path}")
-                            print(f"返回的report_file_path类型：{type(report_file_path)}")
-                            print(f"返回的report_file_path值：{report_file_path}")
-                        except Exception as pdf_e:
-                            print(f"generate_pdf_report函数调用失败：{pdf_e}")
-                            import traceback
-                            traceback.print_exc()
-                            raise
-                        
-                        # 检查文件是否存在
-                        if os.path.exists(report_file_path):
-                            file_size = os.path.getsize(report_file_path)
-                            print(f"报告文件大小：{file_size} 字节")
-                            
-                            # 转换报告路径为/uploads形式
-                            # 找到reports/pdfs目录后的部分
-                            if 'reports/pdfs' in report_file_path:
-                                # 获取reports/pdfs之后的路径
-                                reports_index = report_file_path.index('reports/pdfs')
-                                # 构建/uploads路径，确保斜杠分隔正确
-                                db_file_path = '/uploads/' + report_file_path[reports_index:]
-                                print(f"转换后的数据库路径：{db_file_path}")
-                            else:
-                                # 获取文件的绝对路径
-                                file_abs_path = os.path.abspath(report_file_path)
-                                upload_abs_path = os.path.abspath(settings.UPLOAD_DIR)
-                                # 计算相对路径
-                                if file_abs_path.startswith(upload_abs_path):
-                                    relative_path = file_abs_path[len(upload_abs_path):]
-                                    # 构建/uploads路径
-                                    db_file_path = f'/uploads{relative_path}'
-                                else:
-                                    # 无法转换，使用原始路径
-                                    db_file_path = report_file_path
-                                print(f"构建的数据库路径：{db_file_path}")
-                            
-                            report = Report(
-                                task_id=task_id,
-                                apply_id=task.apply_id,
-                                report_type=report_type,
-                                file_path=db_file_path,
-                                file_size=file_size,
-                                status=ReportStatus.COMPLETED,
-                                generated_at=datetime.utcnow()
-                            )
-                            db.add(report)
-                            generated_reports.append(report)
-                            print(f"报告已添加到数据库：{report.id}")
-                        else:
-                            print(f"报告文件不存在，无法添加到数据库")
-                    else:
-                        # 其他报告类型暂不支持
-                        continue
-                except Exception as e:
-                    # 记录错误但不中断
-                    print(f"\n=== 生成{report_type}报告时发生异常 ===")
-                    print(f"异常类型: {type(e).__name__}")
-                    print(f"异常消息: {e}")
-                    print(f"异常发生位置: {e.__traceback__.tb_frame.f_code.co_filename}:{e.__traceback__.tb_lineno}")
-                    import traceback
-                    traceback.print_exc()
-                    report = Report(
-                        task_id=task_id,
-                        apply_id=task.apply_id,
-                        report_type=report_type,
-                        file_path="",
-                        status=ReportStatus.FAILED
-                    )
-                    db.add(report)
+            if report_type in existing_report_types:
+                continue
+            renderer = REPORT_RENDERERS.get(report_type)
+            if renderer is None:
+                # 其他报告类型暂不支持
+                continue
+            renderer_name, extension, render = renderer
+            options = None
+            if report_type in CALIBRATED_REPORT_TYPES:
+                render = partial(render, target_url=task.target_url)
+                options = CalibrationService.fingerprint(task.target_url)
+            started = time.perf_counter()
+            try:
+                print(f"开始生成{report_type.value}报告，CSV路径：{csv_file_path}")
+                artifact = ArtifactService.get_or_render(
+                    csv_file_path=csv_file_path,
+                    renderer=renderer_name,
+                    extension=extension,
+                    render=render,
+                    options=options
+                )
+                REPORT_RENDER_DURATION.labels(
+                    report_type.value, "deduplicated" if artifact["deduplicated"] else "rendered"
+                ).observe(time.perf_counter() - started)
+                print(f"{report_type.value}报告{'复用已有产物' if artifact['deduplicated'] else '生成完成'}：{artifact['upload_path']}")
+                
+                report = Report(
+                    task_id=task_id,
+                    apply_id=task.apply_id,
+                    report_type=report_type,
+                    file_path=artifact["upload_path"],
+                    file_size=artifact["size"],
+                    content_hash=artifact["key"],
+                    preview_path=artifact["preview_path"],
+                    status=ReportStatus.COMPLETED,
+                    generated_at=datetime.utcnow()
+                )
+                db.add(report)
+                generated_reports.append(report)
+            except Exception as e:
+                # 记录错误但不中断
+                REPORT_RENDER_DURATION.labels(report_type.value, "failed").observe(time.perf_counter() - started)
+                print(f"\n=== 生成{report_type}报告时发生异常 ===")
+                print(f"异常类型: {type(e).__name__}")
+                print(f"异常消息: {e}")
+                import traceback
+                traceback.print_exc()
+                report = Report(
+                    task_id=task_id,
+                    apply_id=task.apply_id,
+                    report_type=report_type,
+                    file_path="",
+                    status=ReportStatus.FAILED
+                )
+                db.add(report)
         
         db.commit()
         
         # 返回所有报告，包括已存在的和新生成的
         return existing_reports + generated_reports
     
+    @staticmethod
+    def get_reports(
+        db: Session,
+        task_id: Optional[int] = None,
+        apply_id: Optional[int] = None,
+        status: Optional[ReportStatus] = None,
+        report_type: Optional[ReportType] = None,
+        skip: int = 0,
+        limit: int = 10
+    ) -> tuple[List[Report], int]:
+        """
+        获取报告列表
+        返回：(报告列表, 总数)
+        """
+        query = db.query(Report)
+        
+        if task_id:
+            query = query.filter(Report.task_id == task_id)
+        if apply_id:
+            query = query.filter(Report.apply_id == apply_id)
+        if status:
+            query = query.filter(Report.status == status)
+        if report_type:
+            query = query.filter(Report.report_type == report_type)
+        
+        total = query.count()
+        # 列表不需要关联的任务和申请，禁止懒加载避免逐行触发额外查询（N+1）
+        reports = query.options(raiseload("*")).order_by(
+            Report.created_at.desc(), Report.id.desc()
+        ).offset(skip).limit(limit).all()
+        
+        return reports, total
+    
     @staticmethod
     def get_reports_by_task(db: Session, task_id: int) -> List[Report]:
         """获取任务的所有报告"""
@@ -258,17 +241,20 @@ class ReportService:
         if not report:
             raise ValueError("报告不存在")
         
-        # 删除文件
-        actual_file_path = ReportService._convert_upload_path_to_actual_path(report.file_path)
-        if os.path.exists(actual_file_path):
-            try:
-                os.remove(actual_file_path)
-                print(f"成功删除报告文件：{actual_file_path}")
-            except Exception as e:
-                print(f"删除报告文件失败：{actual_file_path}，错误：{e}")
-                pass  # 忽略文件删除错误
+        # 删除文件：内容寻址的产物可能被其他报告复用，只在最后一个引用删除时移除
+        if report.content_hash:
+            ArtifactService.release(db, report)
         else:
-            print(f"报告文件不存在：{actual_file_path}")
+            actual_file_path = ReportService._convert_upload_path_to_actual_path(report.file_path)
+            if os.path.exists(actual_file_path):
+                try:
+                    os.remove(actual_file_path)
+                    print(f"成功删除报告文件：{actual_file_path}")
+                except Exception as e:
+                    print(f"删除报告文件失败：{actual_file_path}，错误：{e}")
+                    pass  # 忽略文件删除错误
+            else:
+                print(f"报告文件不存在：{actual_file_path}")
         
         # 删除数据库记录
         db.delete(report)
@@ -0,0 +1,127 @@
+"""
+结果数据缓存服务层
+报告渲染、结果入库、置信区间计算都要读取同一批已完成压测的CSV数据文件和JSON指标文件；
+解析结果按 文件实际路径 + 修改时间 + 文件大小 缓存在进程内（按字节数LRU淘汰），文件被覆盖后自动失效，
+任务重试或结果替换时按任务ID和文件路径主动失效
+"""
+import os
+import sys
+from typing import TYPE_CHECKING, Iterable, Optional
+from app.utils import json_codec
+from app.utils.byte_lru_cache import ByteLRUCache
+from app.utils.result_file import parse_result_json
+from config.settings import settings
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_cache = ByteLRUCache(settings.RESULT_CACHE_MAX_BYTES)
+
+
+def _file_version(path: str) -> tuple:
+    """文件版本：实际路径（解析软链接）、修改时间（纳秒）、文件大小"""
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    return real_path, stat.st_mtime_ns, stat.st_size
+
+
+def _compact(frame: "pd.DataFrame") -> "pd.DataFrame":
+    """整数列按取值范围缩小类型（浮点列保持float64，避免报告中出现精度误差）"""
+    import pandas as pd
+    for column in frame.columns:
+        if pd.api.types.is_integer_dtype(frame[column]):
+            frame[column] = pd.to_numeric(frame[column], downcast="integer")
+    return frame
+
+
+def _object_size(value) -> int:
+    """估算JSON解析结果占用的字节数"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_object_size(k) + _object_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(_object_size(item) for item in value)
+    return size
+
+
+class ResultCacheService:
+    """结果数据缓存服务类"""
+
+    @staticmethod
+    def read_csv(csv_file_path: str, task_id: Optional[int] = None) -> "pd.DataFrame":
+        """
+        读取CSV数据文件（缓存解析后的DataFrame）
+        返回副本，调用方可以修改
+        :param task_id: 所属任务ID，用于按任务失效
+        """
+        # pandas只在读取数据文件时加载，API进程启动时不导入
+        import pandas as pd
+        real_path, mtime, size = _file_version(csv_file_path)
+        key = ("csv", real_path, mtime, size)
+        frame = _cache.get(key)
+        if frame is None:
+            ResultCacheService._drop_stale(real_path, key)
+            frame = _compact(pd.read_csv(real_path))
+            _cache.put(key, frame, int(frame.memory_usage(deep=True).sum()), tag=task_id)
+        return frame.copy()
+
+    @staticmethod
+    def read_json(json_file_path: str, task_id: Optional[int] = None, parser=json_codec.loads):
+        """
+        读取JSON文件（指标文件，缓存解析结果）
+        返回缓存中的共享对象，调用方修改前需自行复制
+        :param parser: 由文件内容（bytes）得到解析结果的函数
+        """
+        real_path, mtime, size = _file_version(json_file_path)
+        key = ("json", real_path, mtime, size)
+        value = _cache.get(key)
+        if value is None:
+            ResultCacheService._drop_stale(real_path, key)
+            with open(real_path, "rb") as f:
+                value = parser(f.read())
+            _cache.put(key, value, _object_size(value), tag=task_id)
+        return value
+
+    @staticmethod
+    def read_result_json(result_file_path: str) -> dict:
+        """
+        读取start_api.sh输出的结果JSON（按schema_version校验，兼容旧版文件）
+        结果文件只在任务完成时读取一次（runner模式下在runner进程中），且含数MB的raw_output，
+        不放入缓存，避免挤出反复读取的CSV和指标文件
+        """
+        with open(result_file_path, "rb") as f:
+            return parse_result_json(f.read())
+
+    @staticmethod
+    def invalidate(task_id: Optional[int] = None, paths: Iterable[Optional[str]] = ()) -> int:
+        """
+        使任务的缓存条目和指定文件的缓存条目失效（任务重试、结果替换时调用）
+        :return: 失效的条目数
+        """
+        real_paths = {os.path.realpath(path) for path in paths if path}
+        return _cache.invalidate(
+            lambda key, tag: (task_id is not None and tag == task_id) or key[1] in real_paths
+        )
+
+    @staticmethod
+    def invalidate_result(task_id: int, data_file_path: Optional[str]) -> int:
+        """使任务结果相关的缓存失效：任务条目、数据文件及其试验明细"""
+        paths = []
+        if data_file_path:
+            paths = [data_file_path, f"{os.path.splitext(data_file_path)[0]}_trials.csv"]
+        return ResultCacheService.invalidate(task_id=task_id, paths=paths)
+
+    @staticmethod
+    def stats() -> dict:
+        """缓存命中/未命中/淘汰次数和占用字节数"""
+        return _cache.stats()
+
+    @staticmethod
+    def clear():
+        """清空缓存（测试用）"""
+        _cache.clear()
+
+    @staticmethod
+    def _drop_stale(real_path: str, current_key: tuple):
+        """文件被覆盖后删除同一路径的旧版本条目"""
+        _cache.invalidate(lambda key, tag: key[1] == real_path and key != current_key)
@@ -0,0 +1,229 @@
+"""
+列式结果存储服务层
+将每次压测的CSV数据转换为按日期/申请ID分区的Parquet数据集，
+跨任务查询通过谓词下推和列裁剪完成，无需逐个打开历史CSV文件
+"""
+import os
+from typing import Optional, List
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.models.task import Task
+from app.models.result import Result
+from app.models.apply_task import ApplyTask
+from config.settings import settings
+
+
+# CSV表头（collect_data生成）到Parquet列名的映射
+CSV_COLUMN_MAP = {
+    "测试项": "test_item",
+    "并发数": "concurrency",
+    "QPS": "qps",
+    "平均延迟(ms)": "avg_latency_ms",
+    "Docker容器CPU峰值(%)": "cpu_peak_percent",
+    "Docker容器内存峰值(MB)": "mem_peak_mb",
+    "错误数": "errors",
+    "2xx响应数": "status_2xx",
+    "3xx响应数": "status_3xx",
+    "4xx响应数": "status_4xx",
+    "5xx响应数": "status_5xx",
+    "其他状态码": "status_other",
+    "总响应数": "total_responses",
+}
+
+# 可查询的指标列
+METRIC_COLUMNS = [
+    "qps", "avg_latency_ms", "cpu_peak_percent", "mem_peak_mb", "errors",
+    "status_2xx", "status_3xx", "status_4xx", "status_5xx", "status_other", "total_responses",
+]
+
+# 数据集名称：runs为每次压测的汇总行，后续的时间序列、直方图使用独立数据集
+DATASET_RUNS = "runs"
+
+
+def _runs_schema():
+    """runs数据集的固定Schema，保证各分区文件类型一致"""
+    import pyarrow as pa
+    return pa.schema([
+        ("task_id", pa.int64()),
+        ("domain", pa.string()),
+        ("target_url", pa.string()),
+        ("run_at", pa.timestamp("s")),
+        ("test_item", pa.string()),
+        ("concurrency", pa.int64()),
+        ("qps", pa.float64()),
+        ("avg_latency_ms", pa.float64()),
+        ("cpu_peak_percent", pa.float64()),
+        ("mem_peak_mb", pa.float64()),
+        ("errors", pa.int64()),
+        ("status_2xx", pa.int64()),
+        ("status_3xx", pa.int64()),
+        ("status_4xx", pa.int64()),
+        ("status_5xx", pa.int64()),
+        ("status_other", pa.int64()),
+        ("total_responses", pa.int64()),
+    ])
+
+
+def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """run_at以UTC无时区格式存储，带时区的查询条件先转换为UTC再去掉时区，否则pyarrow无法比较"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _partitioning():
+    """Hive风格分区：date=YYYY-MM-DD/apply_id=N"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(
+        pa.schema([("date", pa.string()), ("apply_id", pa.int64())]),
+        flavor="hive"
+    )
+
+
+class ResultStoreService:
+    """列式结果存储服务类"""
+
+    @staticmethod
+    def dataset_dir(dataset: str = DATASET_RUNS) -> str:
+        """数据集根目录"""
+        return os.path.join(settings.RESULT_STORE_DIR, dataset)
+
+    @staticmethod
+    def partition_path(dataset: str, run_at: datetime, apply_id: int, task_id: int) -> str:
+        """任务数据文件路径，每个任务一个文件，重复写入时覆盖"""
+        return os.path.join(
+            ResultStoreService.dataset_dir(dataset),
+            f"date={run_at.strftime('%Y-%m-%d')}",
+            f"apply_id={apply_id}",
+            f"task_{task_id}.parquet"
+        )
+
+    @staticmethod
+    def ingest_task_result(db: Session, task_id: int) -> Optional[str]:
+        """
+        将任务结果CSV转换为Parquet写入runs数据集
+        :return: 写入的Parquet文件路径，无CSV数据时返回None
+        """
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from app.services.result_cache_service import ResultCacheService
+
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            raise ValueError("任务不存在")
+
+        result = db.query(Result).filter(Result.task_id == task_id).first()
+        if not result or not result.data_file_path:
+            return None
+
+        # data_file_path可能是指向最新版本的软链接，解析为实际文件，避免后续压测覆盖
+        csv_file_path = os.path.realpath(result.data_file_path)
+        if not os.path.exists(csv_file_path):
+            raise FileNotFoundError(f"CSV文件不存在: {csv_file_path}")
+
+        apply_task = db.query(ApplyTask).filter(ApplyTask.id == task.apply_id).first()
+        run_at = task.finished_at or task.started_at or task.created_at or datetime.utcnow()
+
+        df = ResultCacheService.read_csv(csv_file_path, task_id=task_id).rename(columns=CSV_COLUMN_MAP)
+        if "test_item" not in df.columns:
+            raise ValueError(f"CSV文件缺少测试项列: {csv_file_path}")
+        for column in METRIC_COLUMNS + ["concurrency"]:
+            if column not in df.columns:
+                df[column] = 0
+            df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0)
+
+        df["task_id"] = task_id
+        df["domain"] = apply_task.domain if apply_task else None
+        df["target_url"] = task.target_url
+        df["run_at"] = pd.Timestamp(run_at).floor("s")
+        df["test_item"] = df["test_item"].astype(str)
+
+        schema = _runs_schema()
+        table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+        output_path = ResultStoreService.partition_path(DATASET_RUNS, run_at, task.apply_id, task_id)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # 以"."开头的临时文件会被pyarrow.dataset忽略，查询不会读到未写完的文件
+        tmp_path = os.path.join(os.path.dirname(output_path), f".task_{task_id}.parquet.tmp")
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, output_path)
+
+        return output_path
+
+    @staticmethod
+    def query_runs(
+        domain: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        apply_id: Optional[int] = None,
+        test_item: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        metrics: Optional[List[str]] = None,
+        limit: int = 1000
+    ) -> List[dict]:
+        """
+        跨任务查询压测汇总数据
+        日期和申请ID条件作用于分区目录（分区裁剪），其余条件下推到Parquet行组统计信息，
+        只读取请求的指标列
+        """
+        import pyarrow.dataset as ds
+
+        root = ResultStoreService.dataset_dir(DATASET_RUNS)
+        if not os.path.isdir(root):
+            return []
+
+        metrics = [m for m in (metrics or ["qps", "avg_latency_ms"]) if m in METRIC_COLUMNS]
+        columns = ["task_id", "apply_id", "domain", "run_at", "test_item", "concurrency"] + metrics
+
+        partitioning = _partitioning()
+        schema = _runs_schema()
+        for field in partitioning.schema:
+            schema = schema.append(field)
+
+        dataset = ds.dataset(root, format="parquet", partitioning=partitioning, schema=schema)
+
+        since = _to_naive_utc(since)
+        until = _to_naive_utc(until)
+        conditions = []
+        if since:
+            conditions.append(ds.field("date") >= since.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("run_at") >= since)
+        if until:
+            conditions.append(ds.field("date") <= until.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("run_at") <= until)
+        if apply_id is not None:
+            conditions.append(ds.field("apply_id") == apply_id)
+        if domain:
+            conditions.append(ds.field("domain") == domain)
+        if concurrency is not None:
+            conditions.append(ds.field("concurrency") == concurrency)
+        if test_item:
+            conditions.append(ds.field("test_item") == test_item)
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        table = dataset.to_table(columns=columns, filter=expression)
+        table = table.sort_by([("run_at", "ascending"), ("task_id", "ascending")])
+        if limit:
+            table = table.slice(max(0, table.num_rows - limit))
+
+        rows = table.to_pylist()
+        for row in rows:
+            if row.get("run_at") is not None:
+                row["run_at"] = row["run_at"].isoformat()
+        return rows
+
+    @staticmethod
+    def query_recent_runs(domain: str, concurrency: Optional[int] = None, days: int = 90,
+                          metrics: Optional[List[str]] = None) -> List[dict]:
+        """查询某域名最近N天的压测数据，例如：最近90天500并发下的QPS"""
+        return ResultStoreService.query_runs(
+            domain=domain,
+            concurrency=concurrency,
+            since=datetime.utcnow() - timedelta(days=days),
+            metrics=metrics
+        )
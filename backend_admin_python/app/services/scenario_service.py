@@ -0,0 +1,308 @@
+"""
+压测场景服务层
+场景定义（JSON/YAML）描述按权重混合的多个接口请求，校验后编译为wrk Lua脚本：
+生成的脚本只包含场景数据，请求构建、加权选择和各接口统计由 lib/scenario.lua 完成
+"""
+import os
+import re
+import json
+from typing import Optional
+from urllib.parse import urlsplit
+from config.settings import settings
+
+try:
+    import yaml
+except ImportError:  # PyYAML为可选依赖，未安装时只支持JSON格式的场景定义
+    yaml = None
+
+
+# 支持的请求方法
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+# 由wrk计算或与连接相关的请求头，不允许在场景中设置
+FORBIDDEN_HEADERS = {"content-length", "host", "connection", "transfer-encoding"}
+
+# 模板变量：{{seq}} 展开序号，{{thread}} 线程序号，{{rand}} 随机整数
+TEMPLATE_PATTERN = re.compile(r"\{\{\s*([a-zA-Z_]+)\s*\}\}")
+TEMPLATE_VARIABLES = {"seq", "thread", "rand"}
+
+MAX_ENDPOINTS = 50
+MAX_WEIGHT = 10000
+MAX_THINK_TIME_MS = 60000
+
+
+def _lua_string(value: str) -> str:
+    """Python字符串转换为Lua字符串字面量（控制字符使用十进制转义）"""
+    parts = ['"']
+    for char in value:
+        code = ord(char)
+        if char == "\\":
+            parts.append("\\\\")
+        elif char == '"':
+            parts.append('\\"')
+        elif code < 0x20 or code == 0x7F:
+            parts.append(f"\\{code:03d}")
+        else:
+            parts.append(char)
+    parts.append('"')
+    return "".join(parts)
+
+
+def _lua_value(value) -> str:
+    """场景数据转换为Lua字面量（仅支持脚本用到的类型）"""
+    if value is None:
+        return "nil"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return _lua_string(value)
+    if isinstance(value, dict):
+        items = ", ".join(f"[{_lua_string(str(key))}] = {_lua_value(item)}" for key, item in value.items())
+        return "{ " + items + " }" if items else "{}"
+    if isinstance(value, (list, tuple)):
+        return "{ " + ", ".join(_lua_value(item) for item in value) + " }" if value else "{}"
+    raise TypeError(f"不支持的Lua值类型: {type(value).__name__}")
+
+
+def _check_template(text: Optional[str], where: str) -> bool:
+    """检查模板变量，返回是否包含模板变量"""
+    if not text:
+        return False
+    names = TEMPLATE_PATTERN.findall(text)
+    unknown = set(names) - TEMPLATE_VARIABLES
+    if unknown:
+        raise ValueError(f"{where}包含不支持的模板变量: {', '.join(sorted(unknown))}")
+    return bool(names)
+
+
+class ScenarioService:
+    """压测场景服务类"""
+
+    @staticmethod
+    def parse(text: str) -> dict:
+        """解析JSON或YAML格式的场景定义"""
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            if yaml is None:
+                raise ValueError("场景定义不是有效的JSON（未安装PyYAML，不支持YAML格式）")
+            try:
+                data = yaml.safe_load(text)
+            except yaml.YAMLError as e:
+                raise ValueError(f"场景定义格式错误: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("场景定义必须是对象")
+        return data
+
+    @staticmethod
+    def normalize(scenario: dict, target_url: str) -> dict:
+        """
+        校验场景定义并转换为规范格式
+        请求地址可以是路径，或与压测目标同一主机的完整URL（wrk只连接一个主机）
+        :raises ValueError: 场景定义不合法
+        """
+        if not isinstance(scenario, dict):
+            raise ValueError("场景定义必须是对象")
+
+        requests = scenario.get("requests")
+        if not isinstance(requests, list) or not requests:
+            raise ValueError("场景至少需要包含一个请求")
+        if len(requests) > MAX_ENDPOINTS:
+            raise ValueError(f"场景最多包含 {MAX_ENDPOINTS} 个请求")
+
+        target = urlsplit(target_url)
+        normalized_requests = []
+        for index, item in enumerate(requests, start=1):
+            if not isinstance(item, dict):
+                raise ValueError(f"第 {index} 个请求定义必须是对象")
+
+            method = str(item.get("method") or "GET").upper()
+            if method not in ALLOWED_METHODS:
+                raise ValueError(f"第 {index} 个请求的方法不支持: {method}")
+
+            path = ScenarioService._request_path(item.get("path") or item.get("url") or "/", target, index)
+            name = str(item.get("name") or f"{method} {path}")
+
+            headers = item.get("headers") or {}
+            if not isinstance(headers, dict):
+                raise ValueError(f"请求 {name} 的headers必须是对象")
+            headers = {str(key): str(value) for key, value in headers.items()}
+            for key, value in headers.items():
+                if key.lower() in FORBIDDEN_HEADERS:
+                    raise ValueError(f"请求 {name} 不能设置请求头 {key}")
+                if any(char in key + value for char in "\r\n"):
+                    raise ValueError(f"请求 {name} 的请求头不能包含换行符")
+
+            body = item.get("body")
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body, ensure_ascii=False, separators=(",", ":"))
+                if not any(key.lower() == "content-type" for key in headers):
+                    headers["Content-Type"] = "application/json"
+            elif body is not None:
+                body = str(body)
+            if body == "":
+                body = None
+
+            weight = item.get("weight", 1)
+            if not isinstance(weight, int) or isinstance(weight, bool) or not 1 <= weight <= MAX_WEIGHT:
+                raise ValueError(f"请求 {name} 的权重必须是 1~{MAX_WEIGHT} 的整数")
+
+            templated = _check_template(path, f"请求 {name} 的地址") | _check_template(body, f"请求 {name} 的请求体")
+            for value in headers.values():
+                templated |= _check_template(value, f"请求 {name} 的请求头")
+
+            normalized_requests.append({
+                "name": name,
+                "method": method,
+                "path": path,
+                "headers": headers,
+                "body": body,
+                "weight": weight,
+                "templated": templated,
+            })
+
+        return {
+            "name": str(scenario.get("name") or "默认场景"),
+            "think_time_ms": ScenarioService._think_time(scenario.get("think_time_ms")),
+            "per_endpoint_breakdown": bool(scenario.get("per_endpoint_breakdown", False)),
+            "requests": normalized_requests,
+        }
+
+    @staticmethod
+    def _request_path(address: str, target, index: int) -> str:
+        """请求地址转换为路径（含查询参数）"""
+        address = str(address)
+        if address.startswith("/"):
+            return address
+        parts = urlsplit(address)
+        if not parts.scheme:
+            raise ValueError(f"第 {index} 个请求的地址必须是以/开头的路径或完整URL")
+        if (parts.scheme, parts.netloc) != (target.scheme, target.netloc):
+            raise ValueError(f"第 {index} 个请求的地址与压测目标不是同一主机: {address}")
+        path = parts.path or "/"
+        return f"{path}?{parts.query}" if parts.query else path
+
+    @staticmethod
+    def _think_time(value) -> dict:
+        """思考时间：数字表示固定值，[min, max]或{min, max}表示均匀分布区间（毫秒）"""
+        if value is None:
+            low = high = 0
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            low = high = value
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            low, high = value
+        elif isinstance(value, dict):
+            low, high = value.get("min", 0), value.get("max", value.get("min", 0))
+        else:
+            raise ValueError("think_time_ms 必须是数字、[最小值, 最大值]或{min, max}")
+        try:
+            low, high = float(low), float(high)
+        except (TypeError, ValueError):
+            raise ValueError("think_time_ms 必须是数字")
+        if not 0 <= low <= high <= MAX_THINK_TIME_MS:
+            raise ValueError(f"think_time_ms 必须满足 0 <= 最小值 <= 最大值 <= {MAX_THINK_TIME_MS}")
+        return {"min": low, "max": high}
+
+    @staticmethod
+    def from_request(method: Optional[str], request_body: Optional[str], target_url: str) -> Optional[dict]:
+        """
+        由申请中的请求方法和请求体生成单请求场景
+        GET且没有请求体时返回None（使用默认的状态码统计脚本）
+        """
+        method = (method or "GET").upper()
+        if method == "GET" and not request_body:
+            return None
+        headers = {}
+        if request_body:
+            try:
+                json.loads(request_body)
+                headers["Content-Type"] = "application/json"
+            except ValueError:
+                pass
+        target = urlsplit(target_url)
+        path = target.path or "/"
+        return ScenarioService.normalize({
+            "name": f"{method} {path}",
+            "requests": [{
+                "method": method,
+                "path": f"{path}?{target.query}" if target.query else path,
+                "headers": headers,
+                "body": request_body,
+            }],
+        }, target_url)
+
+    @staticmethod
+    def resolve_for_task(task, apply_task) -> Optional[dict]:
+        """
+        任务实际使用的场景：任务场景 > 申请场景 > 申请的请求方法和请求体
+        场景按任务的压测目标重新校验
+        """
+        scenario = task.scenario or (apply_task.scenario if apply_task else None)
+        if scenario:
+            return ScenarioService.normalize(scenario, task.target_url)
+        if apply_task:
+            return ScenarioService.from_request(apply_task.method, apply_task.request_body, task.target_url)
+        return None
+
+    @staticmethod
+    def compile_lua(scenario: dict, runtime_dir: str, template_variants: Optional[int] = None) -> str:
+        """
+        编译为wrk Lua脚本：定义scenario表后加载status_code.lua和scenario.lua
+        :param runtime_dir: wrk脚本的lib目录
+        """
+        endpoints = []
+        for item in scenario["requests"]:
+            endpoints.append({
+                "name": item["name"],
+                # 名称在Lua中直接拼入指标JSON，预先转义
+                "name_json": json.dumps(item["name"], ensure_ascii=False),
+                "method": item["method"],
+                "path": item["path"],
+                "headers": item["headers"],
+                "body": item["body"],
+                "weight": item["weight"],
+                "templated": item["templated"],
+            })
+
+        lines = [
+            "-- 压测场景脚本：由ScenarioService根据场景定义生成，请勿手工修改",
+            f"-- 场景: {scenario['name']}".replace("\n", " "),
+            "scenario = {",
+            f"    think_time_ms = {_lua_value(scenario['think_time_ms'])},",
+            f"    template_variants = {int(template_variants or settings.SCENARIO_TEMPLATE_VARIANTS)},",
+            "    endpoints = {",
+        ]
+        for endpoint in endpoints:
+            fields = ", ".join(
+                f"{key} = {_lua_value(endpoint[key])}"
+                for key in ("name", "name_json", "method", "path", "headers", "body", "weight", "templated")
+                if endpoint[key] is not None
+            )
+            lines.append(f"        {{ {fields} }},")
+        lines += [
+            "    },",
+            "}",
+            "",
+            f"dofile({_lua_string(os.path.join(runtime_dir, 'status_code.lua'))})",
+            f"dofile({_lua_string(os.path.join(runtime_dir, 'scenario.lua'))})",
+            "",
+        ]
+        return "\n".join(lines)
+
+    @staticmethod
+    def runtime_dir() -> str:
+        """wrk脚本lib目录（status_code.lua、scenario.lua所在目录）"""
+        return os.path.join(os.path.dirname(os.path.abspath(settings.WRK_SCRIPT_PATH)), "lib")
+
+    @staticmethod
+    def write_task_script(task_id: int, scenario: dict) -> str:
+        """编译场景并写入 WRK_DATA_DIR/scenarios/task_<任务ID>.lua，返回脚本绝对路径"""
+        script = ScenarioService.compile_lua(scenario, ScenarioService.runtime_dir())
+        scenario_dir = os.path.abspath(os.path.join(settings.WRK_DATA_DIR, "scenarios"))
+        os.makedirs(scenario_dir, exist_ok=True)
+        path = os.path.join(scenario_dir, f"task_{task_id}.lua")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(script)
+        return path
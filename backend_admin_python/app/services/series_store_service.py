@@ -0,0 +1,207 @@
+"""
+时间序列存储服务层
+每个任务的每秒指标（status_code.lua输出的每秒请求数、连接统计）写入 RESULT_STORE_DIR/series/task_<id>/：
+原始数据和预先计算的粗粒度汇总（默认10秒、1分钟，每个桶的最小/最大/平均值）各一个Parquet文件；
+查询按时间范围和点数上限选择最细的可用粒度，仍超出上限时在服务端按LTTB或最小/最大值降采样
+"""
+import os
+import math
+import warnings
+from typing import List, Optional
+from sqlalchemy.orm import Session, undefer
+from app.models.result import Result
+from app.utils.stats import lttb
+from config.settings import settings
+
+
+DATASET_SERIES = "series"
+
+# 可查询的指标 -> 在结果JSON metrics中的位置
+SERIES_METRICS = {
+    "qps": ("requests_per_second",),
+    "server_closes": ("connections", "per_second", "server_closes"),
+    "bytes_in": ("connections", "per_second", "bytes_in_estimated"),
+    "bytes_out": ("connections", "per_second", "bytes_out"),
+}
+
+METHOD_LTTB = "lttb"
+METHOD_MINMAX = "minmax"
+
+
+def _metric_values(metrics: dict, path: tuple) -> list:
+    value = metrics
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value if isinstance(value, list) else []
+
+
+def _rollup(values, bucket: int):
+    """按固定秒数分桶（向量化），返回每个桶的(最小值, 最大值, 平均值)，缺失值不参与计算"""
+    import numpy as np
+    count = -(-len(values) // bucket)
+    grid = np.full(count * bucket, np.nan)
+    grid[:len(values)] = values
+    grid = grid.reshape(count, bucket)
+    # 整个桶都缺失时结果为NaN，忽略numpy的空切片警告
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmin(grid, axis=1), np.nanmax(grid, axis=1), np.nanmean(grid, axis=1)
+
+
+def _clean(value) -> Optional[float]:
+    """NaN输出为null"""
+    return None if value is None or math.isnan(value) else round(float(value), 3)
+
+
+class SeriesStoreService:
+    """时间序列存储服务类"""
+
+    @staticmethod
+    def task_dir(task_id: int) -> str:
+        return os.path.join(settings.RESULT_STORE_DIR, DATASET_SERIES, f"task_{task_id}")
+
+    @staticmethod
+    def file_path(task_id: int, resolution: int) -> str:
+        """粒度为1秒时是原始数据，否则是对应秒数的汇总"""
+        name = "raw.parquet" if resolution == 1 else f"rollup_{resolution}s.parquet"
+        return os.path.join(SeriesStoreService.task_dir(task_id), name)
+
+    @staticmethod
+    def resolutions() -> List[int]:
+        return [1] + sorted(r for r in settings.SERIES_ROLLUP_SECONDS if r > 1)
+
+    @staticmethod
+    def ingest_task_series(db: Session, task_id: int) -> Optional[str]:
+        """
+        从结果JSON的metrics中提取每秒指标，写入原始数据和各粒度汇总
+        :return: 任务的序列目录，结果中没有每秒数据时返回None
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        result = db.query(Result).options(undefer(Result.raw_result_json)).filter(Result.task_id == task_id).first()
+        raw = result.raw_result_json if result and isinstance(result.raw_result_json, dict) else {}
+        metrics = raw.get("metrics") or {}
+
+        columns = {name: _metric_values(metrics, path) for name, path in SERIES_METRICS.items()}
+        seconds = max(len(values) for values in columns.values())
+        if seconds == 0:
+            return None
+        arrays = {}
+        for name, values in columns.items():
+            array = np.full(seconds, np.nan)
+            array[:len(values)] = np.asarray(values, dtype=float)
+            arrays[name] = array
+
+        task_dir = SeriesStoreService.task_dir(task_id)
+        os.makedirs(task_dir, exist_ok=True)
+        for resolution in SeriesStoreService.resolutions():
+            if resolution == 1:
+                table = {"second": np.arange(seconds, dtype=np.int32), **arrays}
+            else:
+                table = {"second": np.arange(0, seconds, resolution, dtype=np.int32)}
+                for name, array in arrays.items():
+                    table[f"{name}_min"], table[f"{name}_max"], table[f"{name}_mean"] = _rollup(array, resolution)
+            path = SeriesStoreService.file_path(task_id, resolution)
+            # 先写临时文件再替换，查询不会读到未写完的文件
+            tmp_path = os.path.join(task_dir, f".{os.path.basename(path)}.tmp")
+            pq.write_table(pa.table(table), tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+        return task_dir
+
+    @staticmethod
+    def query_series(
+        db: Session,
+        task_id: int,
+        metrics: List[str],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        max_points: Optional[int] = None,
+        method: str = METHOD_LTTB
+    ) -> dict:
+        """
+        查询任务的时间序列
+        :param start: 起始秒（相对压测开始，含），为空时从头开始
+        :param end: 结束秒（含），为空时到结束
+        :param max_points: 每个指标最多返回的点数
+        :param method: lttb返回[秒, 值]；minmax返回[秒, 最小值, 最大值]，不会漏掉尖峰
+        :raises ValueError: 指标或方法不支持、任务没有每秒数据
+        """
+        import pyarrow.parquet as pq
+
+        unknown = [m for m in metrics if m not in SERIES_METRICS]
+        if unknown or not metrics:
+            raise ValueError(f"不支持的指标: {', '.join(unknown) or '空'}（可选: {', '.join(SERIES_METRICS)}）")
+        if method not in (METHOD_LTTB, METHOD_MINMAX):
+            raise ValueError(f"不支持的降采样方法: {method}（可选: {METHOD_LTTB}, {METHOD_MINMAX}）")
+        max_points = max_points or settings.SERIES_DEFAULT_POINTS
+
+        if not os.path.exists(SeriesStoreService.file_path(task_id, 1)):
+            # 写入时序存储之前完成的任务：首次查询时从结果JSON补录
+            if not SeriesStoreService.ingest_task_series(db, task_id):
+                raise ValueError(f"任务 {task_id} 没有每秒指标数据")
+
+        total_seconds = pq.read_metadata(SeriesStoreService.file_path(task_id, 1)).num_rows
+        start = max(start or 0, 0)
+        end = total_seconds - 1 if end is None else min(end, total_seconds - 1)
+        if start > end:
+            raise ValueError(f"时间范围无效: {start}~{end}（共 {total_seconds} 秒）")
+
+        # 选择桶数不超过点数上限的最细粒度，都超出时使用最粗的汇总再降采样
+        span = end - start + 1
+        resolution = next((r for r in SeriesStoreService.resolutions() if -(-span // r) <= max_points),
+                          SeriesStoreService.resolutions()[-1])
+        if resolution == 1:
+            columns = metrics
+        else:
+            columns = [f"{m}_{stat}" for m in metrics for stat in ("min", "max", "mean")]
+        table = pq.read_table(
+            SeriesStoreService.file_path(task_id, resolution),
+            columns=["second"] + columns,
+            filters=[("second", ">=", start - start % resolution), ("second", "<=", end)]
+        )
+        seconds = table.column("second").to_numpy()
+
+        series = {}
+        for metric in metrics:
+            if resolution == 1:
+                values = table.column(metric).to_numpy()
+                lows = highs = means = values
+            else:
+                lows = table.column(f"{metric}_min").to_numpy()
+                highs = table.column(f"{metric}_max").to_numpy()
+                means = table.column(f"{metric}_mean").to_numpy()
+            series[metric] = SeriesStoreService._downsample(seconds, lows, highs, means, max_points, method)
+
+        return {
+            "task_id": task_id,
+            "from": start,
+            "to": end,
+            "total_seconds": total_seconds,
+            "resolution_seconds": resolution,
+            "method": method,
+            "series": series,
+        }
+
+    @staticmethod
+    def _downsample(seconds, lows, highs, means, max_points: int, method: str) -> list:
+        """点数超过上限时降采样：lttb按平均值选点；minmax按等宽分组取组内最小/最大值（向量化）"""
+        import numpy as np
+
+        if method == METHOD_MINMAX:
+            if len(seconds) > max_points:
+                edges = np.linspace(0, len(seconds), max_points + 1).astype(np.int64)[:-1]
+                edges = np.unique(edges)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    seconds = seconds[edges]
+                    lows = np.fmin.reduceat(lows, edges)
+                    highs = np.fmax.reduceat(highs, edges)
+            return [[int(s), _clean(low), _clean(high)] for s, low, high in zip(seconds, lows, highs)]
+
+        if len(seconds) <= max_points:
+            return [[int(s), _clean(v)] for s, v in zip(seconds, means)]
+        # LTTB不处理缺失值，缺失点按0参与选点，输出时仍为null
+        filled = np.nan_to_num(means, nan=0.0).tolist()
+        return [[int(seconds[i]), _clean(means[i])] for i, _ in lttb(filled, max_points)]
@@ -0,0 +1,155 @@
+"""
+稳态分析服务层
+压测开始阶段（JIT编译、缓存预热、连接池建立）的吞吐和延迟不代表系统的稳定水平：
+任务设置了预热时长时，预热在独立的wrk运行中完成，正式压测的结果即为稳态结果；
+否则按每秒请求数的滑动窗口变异系数检测稳态起点。结果同时保存全程指标和稳态指标
+"""
+from typing import Optional
+from app.utils.stats import (
+    coefficient_of_variation, find_steady_start, merge_histograms,
+    histogram_percentile, mean
+)
+from config.settings import settings
+
+
+# 稳态检测方式
+METHOD_WARMUP = "warmup"  # 独立预热运行，正式压测全程为稳态
+METHOD_CV = "cv"          # 按每秒请求数的变异系数检测稳态起点
+METHOD_NONE = "none"      # 未检测到稳态（样本不足或始终波动）
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+class SteadyStateService:
+    """稳态分析服务类"""
+
+    @staticmethod
+    def analyze(
+        result_data: dict,
+        window: Optional[int] = None,
+        max_cv: Optional[float] = None
+    ) -> dict:
+        """
+        计算全程指标和稳态指标
+        :param result_data: start_api.sh输出的结果JSON（含metrics、warmup_metrics）
+        :return: {"full": {...}, "steady_state": {...}}，指标为qps、avg_latency_ms、p95_latency_ms、p99_latency_ms；
+                 wrk只输出整次运行的延迟分布，稳态起点不在开头时稳态延迟为None（latency_scope为full）
+        """
+        window = window or settings.STEADY_STATE_WINDOW_SECONDS
+        max_cv = max_cv if max_cv is not None else settings.STEADY_STATE_MAX_CV
+
+        metrics = result_data.get("metrics") or {}
+        warmup_metrics = result_data.get("warmup_metrics") or {}
+        series = [float(v) for v in metrics.get("requests_per_second") or []]
+
+        measured = {
+            "qps": _to_float(result_data.get("qps")),
+            "avg_latency_ms": _to_float(result_data.get("avg_latency_ms")),
+            "p95_latency_ms": _to_float(result_data.get("p95_latency_ms")),
+            "p99_latency_ms": _to_float(result_data.get("p99_latency_ms")),
+        }
+        full = SteadyStateService._full_metrics(measured, metrics, warmup_metrics)
+        full["seconds"] = len(series)
+
+        steady = {
+            "warmup_seconds": int(result_data.get("warmup_seconds") or 0),
+            "window_seconds": window,
+            "max_cv": max_cv,
+        }
+        if warmup_metrics:
+            # 预热已在独立运行中完成，正式压测全程视为稳态；cv仍然计算，用于判断预热是否足够
+            cv = coefficient_of_variation(series)
+            steady.update(measured)
+            steady.update({
+                "method": METHOD_WARMUP,
+                "start_index": 0,
+                "seconds": len(series),
+                "cv": _round(cv, 4),
+                "stable": cv is not None and cv <= max_cv,
+                "latency_scope": "steady",
+            })
+            return {"full": full, "steady_state": steady}
+
+        start = find_steady_start(series, window, max_cv)
+        if start is None:
+            steady.update({
+                "method": METHOD_NONE,
+                "start_index": None,
+                "seconds": 0,
+                "cv": _round(coefficient_of_variation(series), 4),
+                "stable": False,
+                "qps": None,
+                "avg_latency_ms": None,
+                "p95_latency_ms": None,
+                "p99_latency_ms": None,
+                "latency_scope": None,
+            })
+            return {"full": full, "steady_state": steady}
+
+        steady_series = series[start:]
+        # 稳态从第一秒开始时整次运行的延迟分布即为稳态延迟
+        latency = measured if start == 0 else {}
+        steady.update({
+            "method": METHOD_CV,
+            "start_index": start,
+            "seconds": len(steady_series),
+            "cv": _round(coefficient_of_variation(steady_series), 4),
+            "stable": True,
+            "qps": _round(mean(steady_series), 2),
+            "avg_latency_ms": latency.get("avg_latency_ms"),
+            "p95_latency_ms": latency.get("p95_latency_ms"),
+            "p99_latency_ms": latency.get("p99_latency_ms"),
+            "latency_scope": "steady" if start == 0 else "full",
+        })
+        return {"full": full, "steady_state": steady}
+
+    @staticmethod
+    def describe(steady: dict, full: dict) -> str:
+        """稳态分析结果的任务日志文本"""
+        if steady["method"] == METHOD_NONE:
+            return (f"未检测到稳态区间（{steady['window_seconds']}秒窗口变异系数均超过{steady['max_cv']}），"
+                    f"稳态指标为空，比较时使用全程指标；建议延长压测时间或设置预热时长")
+        if steady["method"] == METHOD_WARMUP:
+            message = (f"已预热{steady['warmup_seconds']}秒，正式压测{steady['seconds']}秒为稳态区间："
+                       f"QPS {steady['qps']}（含预热全程 {full['qps']}），变异系数 {steady['cv']}")
+            if not steady["stable"]:
+                message += f"，超过{steady['max_cv']}，预热可能不足"
+            return message
+        message = (f"稳态区间: 第{steady['start_index'] + 1}秒起共{steady['seconds']}秒，"
+                   f"QPS {steady['qps']}（全程 {full['qps']}），变异系数 {steady['cv']}")
+        if steady["latency_scope"] == "full":
+            message += "；延迟分位数只有全程数据，需要稳态延迟时请设置预热时长"
+        return message
+
+    @staticmethod
+    def _full_metrics(measured: dict, metrics: dict, warmup_metrics: dict) -> dict:
+        """全程指标：有预热运行时合并预热和正式压测（请求数加权、直方图合并），否则即为正式压测的指标"""
+        if not warmup_metrics or not metrics:
+            return dict(measured)
+
+        runs = [warmup_metrics, metrics]
+        requests = sum(_to_float(run.get("requests")) or 0 for run in runs)
+        duration = sum(_to_float(run.get("duration_s")) or 0 for run in runs)
+        histogram = merge_histograms(
+            [(float(value), float(count)) for value, count in run.get("latency_histogram_ms") or []]
+            for run in runs
+        )
+        latency_sum = sum(
+            (_to_float(run.get("latency_mean_ms")) or 0) * (_to_float(run.get("requests")) or 0)
+            for run in runs
+        )
+        return {
+            "qps": _round(requests / duration, 2) if duration > 0 else None,
+            "avg_latency_ms": _round(latency_sum / requests) if requests > 0 else None,
+            "p95_latency_ms": histogram_percentile(histogram, 95) if histogram else None,
+            "p99_latency_ms": histogram_percentile(histogram, 99) if histogram else None,
+        }
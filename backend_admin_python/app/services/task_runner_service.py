@@ -0,0 +1,163 @@
+"""
+任务执行进程服务层
+TASK_EXECUTION_MODE=runner 时，API进程只把任务加入队列（记录queued_at），由独立的 task_runner.py 进程
+按排队时间领取并执行；HTTP worker重启、扩缩容不影响执行中的压测。
+任务执行进程定期写入状态文件（心跳），API进程的就绪检查据此判断任务执行是否可用
+"""
+import os
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from app.models.task import Task, TaskStatus
+from app.models.task_log import LogLevel
+from app.services.task_service import TaskService
+from config.settings import settings
+
+
+# 状态文件超过 N 个轮询间隔未更新视为任务执行进程已退出
+HEARTBEAT_STALE_POLLS = 5
+
+
+class TaskRunnerService:
+    """任务执行进程服务类"""
+
+    @staticmethod
+    def enqueue(db: Session, task_id: int) -> bool:
+        """
+        待执行任务加入队列
+        :return: 是否加入（任务不存在、不是待执行状态或已在队列中时返回False）
+        """
+        task = db.query(Task).filter(Task.id == task_id).first()
+        if not task or task.status != TaskStatus.PENDING or task.queued_at is not None:
+            return False
+        task.queued_at = datetime.utcnow()
+        TaskService.add_log(db=db, task_id=task_id, message="任务已加入执行队列", level=LogLevel.INFO)
+        return True
+
+    @staticmethod
+    def claim_next(db: Session) -> Optional[int]:
+        """
+        领取排队最早的任务并置为执行中
+        按状态条件更新，多个任务执行进程同时领取时只有一个成功
+        :return: 任务ID，队列为空时返回None
+        """
+        while True:
+            task_id = db.query(Task.id).filter(
+                Task.status == TaskStatus.PENDING,
+                Task.queued_at.isnot(None)
+            ).order_by(Task.queued_at, Task.id).limit(1).scalar()
+            if task_id is None:
+                return None
+            claimed = db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.status == TaskStatus.PENDING)
+                .values(status=TaskStatus.RUNNING, started_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+            if claimed:
+                return task_id
+
+    @staticmethod
+    def cancelled(db: Session, task_ids: Iterable[int]) -> List[int]:
+        """执行中被取消的任务（任务执行进程据此终止压测脚本）"""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        rows = db.query(Task.id).filter(Task.id.in_(task_ids), Task.status == TaskStatus.CANCELLED).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def requeue(db: Session, task_ids: Iterable[int], reason: str) -> int:
+        """
+        执行中的任务回到待执行状态（保留排队时间，重启后优先执行）
+        已完成、失败或取消的任务不受影响
+        :return: 重新排队的任务数
+        """
+        count = 0
+        for task in db.query(Task).filter(Task.id.in_(list(task_ids)), Task.status == TaskStatus.RUNNING).all():
+            task.status = TaskStatus.PENDING
+            task.started_at = None
+            task.queued_at = task.queued_at or datetime.utcnow()
+            TaskService.add_log(db=db, task_id=task.id, message=reason, level=LogLevel.WARNING)
+            count += 1
+        db.commit()
+        return count
+
+    @staticmethod
+    def recover(db: Session) -> int:
+        """任务执行进程启动时，上次异常退出遗留的执行中任务重新排队"""
+        task_ids = [row.id for row in db.query(Task.id).filter(
+            Task.status == TaskStatus.RUNNING,
+            Task.queued_at.isnot(None)
+        ).all()]
+        return TaskRunnerService.requeue(db, task_ids, "任务执行进程上次异常退出，任务重新排队")
+
+    @staticmethod
+    def counts(db: Session) -> Dict[str, int]:
+        """待执行、已排队、执行中的任务数"""
+        rows = dict(db.query(Task.status, func.count(Task.id)).filter(
+            Task.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
+        ).group_by(Task.status).all())
+        queued = db.query(func.count(Task.id)).filter(
+            Task.status == TaskStatus.PENDING, Task.queued_at.isnot(None)
+        ).scalar()
+        return {
+            "pending": rows.get(TaskStatus.PENDING, 0),
+            "queued": queued or 0,
+            "running": rows.get(TaskStatus.RUNNING, 0),
+        }
+
+    @staticmethod
+    def write_state(running: Iterable[int], draining: bool = False):
+        """写入任务执行进程状态文件（先写临时文件再替换，读取方不会读到半个文件）"""
+        path = settings.TASK_RUNNER_STATE_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            "pid": os.getpid(),
+            "running": sorted(running),
+            "draining": draining,
+            "updated_at": time.time(),
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def clear_state():
+        """任务执行进程退出时删除状态文件"""
+        try:
+            os.remove(settings.TASK_RUNNER_STATE_FILE)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def state() -> dict:
+        """
+        任务执行状态（就绪检查用）
+        runner模式下状态文件不存在、超时未更新或正在停止时 ok 为False
+        """
+        mode = settings.TASK_EXECUTION_MODE
+        if mode != "runner":
+            from app.utils.background_tasks import running_task_ids
+            return {"ok": True, "mode": mode, "running": running_task_ids()}
+
+        try:
+            with open(settings.TASK_RUNNER_STATE_FILE) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {"ok": False, "mode": mode, "error": "任务执行进程未运行"}
+
+        age = time.time() - state.get("updated_at", 0)
+        stale = age > settings.TASK_RUNNER_POLL_SECONDS * HEARTBEAT_STALE_POLLS
+        return {
+            "ok": not stale and not state.get("draining"),
+            "mode": mode,
+            "pid": state.get("pid"),
+            "running": state.get("running", []),
+            "draining": bool(state.get("draining")),
+            "heartbeat_age_seconds": round(age, 1),
+        }
@@ -5,14 +5,23 @@ import asyncio
 import subprocess
 import json
 import os
+import signal
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload, selectinload
 from sqlalchemy import and_
 from app.models.task import Task, TaskStatus
 from app.models.result import Result
 from app.models.task_log import TaskLog, LogLevel
 from app.models.apply_task import ApplyTask
+from app.services.result_store_service import ResultStoreService
+from app.services.series_store_service import SeriesStoreService
+from app.services.scenario_service import ScenarioService
+from app.services.steady_state_service import SteadyStateService
+from app.services.trial_service import TrialService
+from app.services.calibration_service import CalibrationService
+from app.services.result_cache_service import ResultCacheService
+from app.utils.metrics import TASK_LOG_WRITES
 from config.settings import settings
 
 
@@ -28,10 +37,16 @@ class TaskService:
         duration: str = "30s",
         threads: int = 4,
         script_path: Optional[str] = None,
+        scenario: Optional[dict] = None,
+        warmup_seconds: int = 0,
+        connection_close: bool = False,
+        repetitions: int = 1,
         created_by: int = None
     ) -> Task:
         """
         创建压测任务
+        scenario为空时执行时使用申请的场景；warmup_seconds为正式压测前的预热时长；
+        connection_close为True时每个请求都新建连接；repetitions为重复试验次数
         """
         task = Task(
             apply_id=apply_id,
@@ -40,6 +55,10 @@ class TaskService:
             duration=duration,
             threads=threads,
             script_path=script_path,
+            scenario=ScenarioService.normalize(scenario, target_url) if scenario else None,
+            warmup_seconds=warmup_seconds,
+            connection_close=connection_close,
+            repetitions=repetitions,
             status=TaskStatus.PENDING,
             created_by=created_by
         )
@@ -54,7 +73,21 @@ class TaskService:
     def get_task_by_id(db: Session, task_id: int) -> Optional[Task]:
         """根据ID获取任务"""
         return db.query(Task).filter(Task.id == task_id).first()
-    
+
+    @staticmethod
+    def get_task_version(db: Session, task_id: int) -> Optional[tuple]:
+        """
+        获取任务版本信息（更新时间、状态、开始/完成时间），用于生成ETag
+        只查询少量列，任务不存在时返回None
+        """
+        row = db.query(
+            Task.updated_at, Task.status, Task.started_at, Task.finished_at
+        ).filter(Task.id == task_id).first()
+        if row is None:
+            return None
+        updated_at, task_status, started_at, finished_at = row
+        return updated_at, task_status.value, started_at, finished_at
+
     @staticmethod
     def get_tasks(
         db: Session,
@@ -72,7 +105,11 @@ class TaskService:
             query = query.filter(Task.status == status)
         
         total = query.count()
-        tasks = query.order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
+        # 结果摘要批量加载（原始结果JSON为延迟加载列，不会随之读取）；
+        # 列表不需要关联的报告和日志，禁止懒加载避免逐行触发额外查询（N+1）
+        tasks = query.options(selectinload(Task.result), raiseload("*")).order_by(
+            Task.created_at.desc()
+        ).offset(skip).limit(limit).all()
         
         return tasks, total
     
@@ -84,6 +121,7 @@ class TaskService:
         level: LogLevel = LogLevel.INFO
     ):
         """添加任务日志"""
+        TASK_LOG_WRITES.labels(level.value).inc()
         log = TaskLog(
             task_id=task_id,
             log_level=level,
@@ -107,12 +145,38 @@ class TaskService:
         task.started_at = datetime.utcnow()
         db.commit()
         
+        process = None
         try:
             # 构建Bash脚本命令
             # 使用API模式的start_api.sh脚本
             script_dir = os.path.dirname(os.path.abspath(settings.WRK_SCRIPT_PATH))
             script_path = os.path.join(script_dir, "start_api.sh")
             
+            threads = task.threads
+            # 自定义Lua脚本优先；否则编译压测场景（任务场景、申请场景或申请的请求方法/请求体）
+            script_file = task.script_path
+            if not script_file:
+                scenario = ScenarioService.resolve_for_task(task, task.apply_task)
+                if scenario:
+                    script_file = ScenarioService.write_task_script(task_id, scenario)
+                    if scenario["per_endpoint_breakdown"]:
+                        # 每个wrk线程一个连接时，各接口的状态码和延迟才能与请求对应
+                        if task.concurrency <= settings.SCENARIO_BREAKDOWN_MAX_THREADS:
+                            threads = task.concurrency
+                        else:
+                            TaskService.add_log(
+                                db=db,
+                                task_id=task_id,
+                                message=f"并发数超过 {settings.SCENARIO_BREAKDOWN_MAX_THREADS}，各接口只统计请求数",
+                                level=LogLevel.WARNING
+                            )
+                    TaskService.add_log(
+                        db=db,
+                        task_id=task_id,
+                        message=f"使用压测场景: {scenario['name']}（{len(scenario['requests'])} 个请求）",
+                        level=LogLevel.INFO
+                    )
+            
             # 构建命令参数
             cmd = [
                 "bash",
@@ -120,12 +184,18 @@ class TaskService:
                 f"--target-url={task.target_url}",
                 f"--concurrency={task.concurrency}",
                 f"--duration={task.duration}",
-                f"--threads={task.threads}",
+                f"--threads={threads}",
                 f"--task-id={task_id}"
             ]
             
-            if task.script_path:
-                cmd.append(f"--script-path={task.script_path}")
+            if script_file:
+                cmd.append(f"--script-path={script_file}")
+            if task.warmup_seconds:
+                cmd.append(f"--warmup={task.warmup_seconds}")
+            if task.connection_close:
+                cmd.append("--connection-close")
+            if task.repetitions and task.repetitions > 1:
+                cmd.append(f"--repetitions={task.repetitions}")
             
             # 添加日志
             TaskService.add_log(
@@ -140,7 +210,8 @@ class TaskService:
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=os.path.dirname(script_path)
+                cwd=os.path.dirname(script_path),
+                start_new_session=True  # 独立进程组，终止时连同wrk等子进程一起结束
             )
             
             # 实时读取输出，处理可能的编码问题
@@ -173,44 +244,10 @@ class TaskService:
                 )
                 
                 if os.path.exists(result_file):
+                    # 任务的结果被替换，之前缓存的结果数据失效
+                    ResultCacheService.invalidate(task_id=task_id)
                     try:
-                        with open(result_file, 'rb') as f:
-                            # 先读取原始二进制内容
-                            content_bytes = f.read()
-                            
-                        # 尝试不同的编码方式
-                        encodings = ['utf-8', 'gbk', 'latin-1']
-                        content_str = None
-                        
-                        for encoding in encodings:
-                            try:
-                                content_str = content_bytes.decode(encoding)
-                                break
-                            except UnicodeDecodeError:
-                                continue
-                        
-                        if content_str:
-                            # 提取有效的JSON部分（找到第一个{和最后一个}）
-                            start_idx = content_str.find('{')
-                            end_idx = content_str.rfind('}') + 1
-                            
-                            if start_idx != -1 and end_idx != 0:
-                                json_content = content_str[start_idx:end_idx]
-                                
-                                # 使用更宽松的方式解析JSON
-                                try:
-                                    # 尝试直接解析，忽略控制字符
-                                    result_data = json.loads(json_content, strict=False)
-                                except json.JSONDecodeError:
-                                    # 如果仍然失败，尝试清理和重新编码
-                                    import re
-                                    # 移除所有非ASCII字符和控制字符
-                                    json_content = re.sub(r'[^\x20-\x7E\x0A\x0D\x09]', '', json_content)
-                                    result_data = json.loads(json_content, strict=False)
-                            else:
-                                raise ValueError("无法在结果文件中找到有效的JSON结构")
-                        else:
-                            raise ValueError("无法解码结果文件内容")
+                        result_data = ResultCacheService.read_result_json(result_file)
                     except Exception as e:
                         TaskService.add_log(
                             db=db,
@@ -220,6 +257,45 @@ class TaskService:
                         )
                         raise
                     
+                    # 重复试验：QPS和延迟取各次试验的均值，并计算置信区间
+                    intervals = {}
+                    if len(result_data.get("trials") or []) > 1:
+                        intervals = TrialService.summarize(result_data["trials"])
+                        result_data["confidence_intervals"] = intervals
+                        for metric in ("avg_latency_ms", "p95_latency_ms", "p99_latency_ms"):
+                            if intervals.get(metric):
+                                result_data[metric] = intervals[metric]["mean"]
+                        TaskService.add_log(
+                            db=db,
+                            task_id=task_id,
+                            message=TrialService.describe(intervals),
+                            level=LogLevel.INFO
+                        )
+                    qps_ci = intervals.get("qps") or {}
+                    p99_ci = intervals.get("p99_latency_ms") or {}
+                    
+                    # 稳态分析：同时保存全程指标和稳态指标
+                    result_data.update(SteadyStateService.analyze(result_data))
+                    steady = result_data["steady_state"]
+                    TaskService.add_log(
+                        db=db,
+                        task_id=task_id,
+                        message=SteadyStateService.describe(steady, result_data["full"]),
+                        level=LogLevel.INFO if steady["stable"] else LogLevel.WARNING
+                    )
+                    
+                    # 与压测客户端上限比较（需先运行tools/calibrate_generator.sh）
+                    ceiling = CalibrationService.assess(result_data.get('qps'), task.target_url)
+                    if ceiling is not None:
+                        result_data["generator_ceiling"] = ceiling
+                        if ceiling["near_ceiling"]:
+                            TaskService.add_log(
+                                db=db,
+                                task_id=task_id,
+                                message=CalibrationService.describe(ceiling, result_data.get('qps')),
+                                level=LogLevel.WARNING
+                            )
+                    
                     # 保存结果到数据库
                     result = Result(
                         task_id=task_id,
@@ -227,6 +303,14 @@ class TaskService:
                         avg_latency_ms=result_data.get('avg_latency_ms'),
                         p95_latency_ms=result_data.get('p95_latency_ms'),
                         p99_latency_ms=result_data.get('p99_latency_ms'),
+                        steady_qps=steady["qps"],
+                        steady_avg_latency_ms=steady["avg_latency_ms"],
+                        steady_p95_latency_ms=steady["p95_latency_ms"],
+                        steady_p99_latency_ms=steady["p99_latency_ms"],
+                        qps_ci_low=qps_ci.get("ci_low"),
+                        qps_ci_high=qps_ci.get("ci_high"),
+                        p99_ci_low=p99_ci.get("ci_low"),
+                        p99_ci_high=p99_ci.get("ci_high"),
                         error_rate=result_data.get('error_rate'),
                         total_requests=result_data.get('total_requests'),
                         successful_requests=result_data.get('successful_requests'),
@@ -264,6 +348,36 @@ class TaskService:
             
             db.commit()
             
+            if task.status == TaskStatus.COMPLETED:
+                # 写入列式结果存储（失败不影响任务状态，可通过ingest_results.py补录）
+                try:
+                    ResultStoreService.ingest_task_result(db, task_id)
+                except Exception as e:
+                    TaskService.add_log(
+                        db=db,
+                        task_id=task_id,
+                        message=f"写入列式结果存储失败: {str(e)}",
+                        level=LogLevel.WARNING
+                    )
+                # 写入时序存储（失败时首次查询序列时补录）
+                try:
+                    SeriesStoreService.ingest_task_series(db, task_id)
+                except Exception as e:
+                    TaskService.add_log(
+                        db=db,
+                        task_id=task_id,
+                        message=f"写入时序存储失败: {str(e)}",
+                        level=LogLevel.WARNING
+                    )
+            
+        except asyncio.CancelledError:
+            # 服务停止或任务被取消：终止压测脚本进程组，任务状态由调用方（任务执行进程）处理
+            if process is not None and process.returncode is None:
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            raise
         except Exception as e:
             # 异常处理
             task.status = TaskStatus.FAILED
@@ -320,6 +434,11 @@ class TaskService:
         if old_task.status not in [TaskStatus.FAILED, TaskStatus.CANCELLED]:
             raise ValueError("只能重试失败或已取消的任务")
         
+        # 原任务的结果数据不再使用，释放缓存
+        ResultCacheService.invalidate_result(
+            old_task.id, old_task.result.data_file_path if old_task.result else None
+        )
+        
         # 创建新任务
         new_task = Task(
             apply_id=old_task.apply_id,
@@ -328,6 +447,10 @@ class TaskService:
             duration=old_task.duration,
             threads=old_task.threads,
             script_path=old_task.script_path,
+            scenario=old_task.scenario,
+            warmup_seconds=old_task.warmup_seconds,
+            connection_close=old_task.connection_close,
+            repetitions=old_task.repetitions,
             status=TaskStatus.PENDING,
             created_by=created_by
         )
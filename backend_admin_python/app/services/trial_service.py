@@ -0,0 +1,118 @@
+"""
+重复试验服务层
+单次压测无法区分几个百分点的性能变化和测量噪声：任务设置重复试验次数时，每次试验的指标保存在原始结果中，
+QPS和延迟取各次试验的均值，并给出百分位Bootstrap置信区间；报告生成时从数据文件旁的试验明细计算误差线
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.services.result_cache_service import ResultCacheService
+from app.utils.stats import bootstrap_ci, mean
+from config.settings import settings
+
+
+# 计算置信区间的指标
+TRIAL_METRICS = ("qps", "avg_latency_ms", "p95_latency_ms", "p99_latency_ms")
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TrialService:
+    """重复试验服务类"""
+
+    @staticmethod
+    def summarize(
+        trials: Sequence[dict],
+        confidence: Optional[float] = None,
+        iterations: Optional[int] = None
+    ) -> Dict[str, Optional[dict]]:
+        """
+        计算各指标的试验均值和置信区间
+        :param trials: 每次试验的指标，如 [{"qps": 1000, "p99_latency_ms": 45}, ...]
+        :return: {指标: {"mean", "ci_low", "ci_high", "n", "confidence"}}，没有样本的指标为None；
+                 少于2个样本时区间为None
+        """
+        confidence = confidence or settings.BOOTSTRAP_CONFIDENCE
+        iterations = iterations or settings.BOOTSTRAP_ITERATIONS
+        summary = {}
+        for metric in TRIAL_METRICS:
+            values = [v for v in (_to_float(trial.get(metric)) for trial in trials) if v is not None]
+            if not values:
+                summary[metric] = None
+                continue
+            interval = bootstrap_ci(values, confidence=confidence, iterations=iterations)
+            summary[metric] = {
+                "mean": round(mean(values), 2),
+                "ci_low": round(interval[0], 2) if interval else None,
+                "ci_high": round(interval[1], 2) if interval else None,
+                "n": len(values),
+                "confidence": confidence,
+            }
+        return summary
+
+    @staticmethod
+    def describe(summary: Dict[str, Optional[dict]]) -> str:
+        """置信区间的任务日志文本"""
+        labels = {"qps": "QPS", "avg_latency_ms": "平均延迟", "p95_latency_ms": "P95", "p99_latency_ms": "P99"}
+        parts = []
+        trials = 0
+        for metric, label in labels.items():
+            item = summary.get(metric)
+            if not item:
+                continue
+            trials = max(trials, item["n"])
+            parts.append(f"{label} {item['mean']} [{item['ci_low']}, {item['ci_high']}]")
+        confidence = next((item["confidence"] for item in summary.values() if item), settings.BOOTSTRAP_CONFIDENCE)
+        return f"{trials}次重复试验均值及{confidence:.0%}置信区间: " + "，".join(parts)
+
+    @staticmethod
+    def trials_csv_path(csv_file_path: str) -> str:
+        """数据文件对应的试验明细文件（<数据文件名>_trials.csv）"""
+        return f"{os.path.splitext(csv_file_path)[0]}_trials.csv"
+
+    @staticmethod
+    def load_trials(csv_file_path: str) -> Dict[Tuple[str, int], List[dict]]:
+        """
+        读取数据文件旁的试验明细，逐次试验的分位数来自各自的指标文件
+        :return: {(测试项, 并发数): [{"trial", "qps", "avg_latency_ms", "p95_latency_ms", "p99_latency_ms"}, ...]}，
+                 没有试验明细时返回空字典
+        """
+        trials_path = TrialService.trials_csv_path(csv_file_path)
+        if not os.path.exists(trials_path):
+            return {}
+
+        trials = {}
+        frame = ResultCacheService.read_csv(trials_path)
+        for row in frame.to_dict("records"):
+            percentiles = {}
+            metrics_path = row.get("指标文件路径")
+            if isinstance(metrics_path, str) and os.path.exists(metrics_path):
+                try:
+                    percentiles = ResultCacheService.read_json(metrics_path).get("latency_percentiles_ms") or {}
+                except (OSError, ValueError):
+                    percentiles = {}
+            try:
+                key = (str(row["测试项"]), int(row["并发数"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            trials.setdefault(key, []).append({
+                "trial": row.get("试验序号"),
+                "qps": _to_float(row.get("QPS")),
+                "avg_latency_ms": _to_float(row.get("平均延迟(ms)")),
+                "p95_latency_ms": _to_float(percentiles.get("p95")),
+                "p99_latency_ms": _to_float(percentiles.get("p99")),
+            })
+        return trials
+
+    @staticmethod
+    def load_intervals(csv_file_path: str) -> Dict[Tuple[str, int], Dict[str, Optional[dict]]]:
+        """按测试项和并发数汇总试验明细的置信区间，供报告绘制误差线"""
+        return {
+            key: TrialService.summarize(trials)
+            for key, trials in TrialService.load_trials(csv_file_path).items()
+            if len(trials) > 1
+        }
@@ -1,9 +1,14 @@
 """
 后台任务管理器
 """
+from typing import List
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from app.services.task_service import TaskService
+from config.settings import settings
+
+# 当前进程内执行中的任务ID（inline模式的就绪检查）
+_running = set()
 
 
 async def run_task_in_background(db: Session, task_id: int):
@@ -13,15 +18,26 @@ async def run_task_in_background(db: Session, task_id: int):
     # 注意：这里需要创建一个新的数据库会话，因为后台任务可能在不同的线程中运行
     from app.database import SessionLocal
     background_db = SessionLocal()
+    _running.add(task_id)
     try:
         await TaskService.execute_task(background_db, task_id)
     finally:
+        _running.discard(task_id)
         background_db.close()
 
 
+def running_task_ids() -> List[int]:
+    """当前进程内执行中的任务ID"""
+    return sorted(_running)
+
+
 def add_background_task(background_tasks: BackgroundTasks, db: Session, task_id: int):
     """
     添加后台任务
+    runner模式下只加入队列，由独立的任务执行进程（task_runner.py）执行
     """
+    if settings.TASK_EXECUTION_MODE == "runner":
+        from app.services.task_runner_service import TaskRunnerService
+        TaskRunnerService.enqueue(db, task_id)
+        return
     background_tasks.add_task(run_task_in_background, db, task_id)
-
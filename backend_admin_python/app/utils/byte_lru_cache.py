@@ -0,0 +1,83 @@
+"""
+按字节数限制容量的LRU缓存
+每个条目记录估算的字节数，总量超过上限时从最久未使用的条目开始淘汰；
+条目可附带标签（如任务ID），按标签批量失效。线程安全
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class ByteLRUCache:
+    """按字节数淘汰的LRU缓存"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 键 -> (值, 字节数, 标签)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """命中时返回值并标记为最近使用，未命中返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int, tag: Hashable = None) -> bool:
+        """
+        写入条目并按需淘汰
+        :return: 是否写入（单个条目超过容量上限时不缓存）
+        """
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = (value, size, tag)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+            return True
+
+    def invalidate(self, predicate: Callable[[Hashable, Hashable], bool]) -> int:
+        """删除predicate(键, 标签)为真的条目，返回删除数量"""
+        with self._lock:
+            keys = [key for key, (_, _, tag) in self._entries.items() if predicate(key, tag)]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """命中/未命中/淘汰次数和当前占用"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
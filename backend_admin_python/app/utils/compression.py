@@ -0,0 +1,198 @@
+"""
+响应压缩中间件
+对JSON、文本等可压缩类型的响应按Accept-Encoding选择brotli或gzip压缩；
+图片、PDF等已压缩格式，以及206/304响应和已设置Content-Encoding的响应原样透传
+"""
+import os
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时只使用gzip
+    brotli = None
+
+
+# 可压缩的响应类型前缀
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+# 不压缩的状态码：无响应体或分段响应
+SKIP_STATUS_CODES = {204, 206, 304}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    根据Accept-Encoding选择压缩算法，q值相同时优先br
+    :return: br、gzip或None（客户端不接受压缩）
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip()] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = weights.get(name, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """判断响应类型是否值得压缩"""
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class _Compressor:
+    """统一gzip和brotli的流式压缩接口"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._finish = self._compressor.finish
+        else:
+            # wbits=31 输出带gzip头的格式
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._finish = self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data) if data else b""
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """gzip/brotli响应压缩中间件"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+            if encoding:
+                responder = _CompressionResponder(self, encoding, send)
+                await self.app(scope, receive, responder.send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _CompressionResponder:
+    """单个请求的压缩状态：缓存响应头，直到能确定是否压缩"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.eligible = False
+        self.started = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.eligible = (
+                message["status"] not in SKIP_STATUS_CODES
+                and "content-encoding" not in headers
+                and "content-range" not in headers
+                and is_compressible(headers.get("content-type", ""))
+            )
+            if not self.eligible:
+                await self.downstream(message)
+                self.started = True
+            else:
+                self.start_message = message
+            return
+
+        if not self.eligible:
+            await self.downstream(message)
+            return
+
+        # 零拷贝文件发送无法压缩，可压缩类型的文件改为读取后按普通响应体处理
+        if message_type == "http.response.pathsend":
+            message = {"type": "http.response.body", "body": _read_path(message["path"]), "more_body": False}
+        elif message_type == "http.response.zerocopysend":
+            message = {
+                "type": "http.response.body",
+                "body": _read_file(message["file"], message.get("offset"), message.get("count")),
+                "more_body": message.get("more_body", False),
+            }
+        elif message_type != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers["Content-Encoding"] = self.encoding
+            # 压缩后内容不同，强ETag降级为弱ETag
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            if more_body:
+                del headers["Content-Length"]
+                await self.downstream(self.start_message)
+            else:
+                compressed = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+def _read_path(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_file(file, offset: Optional[int], count: Optional[int]) -> bytes:
+    fd = file if isinstance(file, int) else file.fileno()
+    if offset is None:
+        offset = os.lseek(fd, 0, os.SEEK_CUR)
+    if count is None:
+        count = os.fstat(fd).st_size - offset
+    return os.pread(fd, count, offset)
@@ -0,0 +1,170 @@
+"""
+文件响应工具
+报告下载和/uploads静态文件使用：强ETag、If-None-Match/If-Range条件请求、单区间Range(206)，
+服务器支持时通过ASGI零拷贝扩展(sendfile)发送文件，否则分块读取
+"""
+import os
+import re
+import stat
+from typing import Optional, Tuple
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+from app.utils.http_cache import CACHE_CONTROL, if_none_match
+
+
+# 内容寻址文件（文件名包含内容摘要）内容不会变化，允许客户端长期缓存；
+# 不声明public，带Authorization的下载请求不会被共享缓存保存
+IMMUTABLE_CACHE_CONTROL = "max-age=31536000, immutable"
+CONTENT_ADDRESSED_PATTERN = re.compile(r"(^|[^0-9a-f])[0-9a-f]{32,64}([^0-9a-f]|$)")
+
+# Range请求无法满足
+UNSATISFIABLE = (-1, -1)
+
+
+def is_content_addressed(path: str) -> bool:
+    """判断文件名是否包含内容摘要（32~64位十六进制）"""
+    return bool(CONTENT_ADDRESSED_PATTERN.search(os.path.basename(str(path))))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单区间Range请求头
+    :return: (start, end)闭区间；无Range、格式不支持或多区间时返回None（返回完整文件）；
+             区间超出文件范围时返回UNSATISFIABLE
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[6:].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if not start_text:
+            # bytes=-N 表示最后N个字节
+            suffix = int(end_text)
+            if suffix <= 0:
+                return UNSATISFIABLE
+            return max(0, size - suffix), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return UNSATISFIABLE
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(FileResponse):
+    """支持条件请求和Range的文件响应"""
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path, immutable: bool = False, **kwargs):
+        super().__init__(path, **kwargs)
+        self.headers.setdefault("cache-control", IMMUTABLE_CACHE_CONTROL if immutable else CACHE_CONTROL)
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        """强ETag由inode、纳秒级修改时间和大小组成，文件被替换后必然变化"""
+        self.headers.setdefault(
+            "etag", f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        )
+        super().set_stat_headers(stat_result)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(self.stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(self.stat_result)
+
+        request_headers = Headers(scope=scope)
+        etag = self.headers["etag"]
+
+        if if_none_match(request_headers.get("if-none-match"), etag):
+            response = Response(status_code=304, headers={
+                "etag": etag,
+                "cache-control": self.headers["cache-control"],
+                "last-modified": self.headers["last-modified"],
+            })
+            await response(scope, receive, send)
+            return
+
+        size = self.stat_result.st_size
+        byte_range = None
+        if self.status_code == 200:
+            # If-Range与当前版本不一致时忽略Range，返回完整的新文件
+            if_range = request_headers.get("if-range")
+            if not if_range or if_range in (etag, self.headers["last-modified"]):
+                byte_range = parse_range(request_headers.get("range"), size)
+
+        if byte_range == UNSATISFIABLE:
+            response = Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+            await response(scope, receive, send)
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        if byte_range:
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            await self._send_file(scope, send, start, end - start + 1)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_file(self, scope: Scope, send: Send, offset: int, count: int) -> None:
+        """发送文件内容：优先零拷贝扩展，否则在线程池中按块pread"""
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+        if "http.response.pathsend" in extensions and offset == 0 and count == self.stat_result.st_size:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            remaining = count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # 文件在发送过程中被截断
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+
+class ArtifactStaticFiles(StaticFiles):
+    """/uploads静态文件：使用RangeFileResponse，内容寻址文件设置immutable缓存"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        return RangeFileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            immutable=is_content_addressed(full_path),
+        )
@@ -0,0 +1,49 @@
+"""
+HTTP条件请求工具函数
+为轮询类接口生成ETag，并在If-None-Match命中时返回304，避免重复查询和序列化
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+
+# 浏览器每次使用缓存前都向服务端验证，配合ETag即可把未变化的轮询变为304
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """根据资源版本信息生成弱ETag"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """判断请求的If-None-Match是否与当前ETag匹配（弱比较）"""
+    return if_none_match(request.headers.get("if-none-match"), etag)
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """判断If-None-Match请求头的取值是否与ETag匹配（弱比较）"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """304响应"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """为200响应设置ETag和缓存策略"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
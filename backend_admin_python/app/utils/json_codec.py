@@ -0,0 +1,28 @@
+"""
+JSON编解码
+优先使用orjson（解析和序列化比标准库json快数倍，是大结果文件、大列表响应的主要开销），未安装时回退到标准库json
+"""
+import json
+from typing import Any, Union
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+    ORJSONResponse = None
+
+# API默认响应类：序列化结果与JSONResponse一致（紧凑格式、不转义非ASCII字符），NaN/Infinity输出为null
+FastJSONResponse = ORJSONResponse or JSONResponse
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """
+    解析JSON（严格模式：字符串中不允许未转义的控制字符，bytes必须是UTF-8）
+    :raises ValueError: 不是合法的JSON（json.JSONDecodeError，orjson.JSONDecodeError是其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
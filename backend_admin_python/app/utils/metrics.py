@@ -0,0 +1,422 @@
+"""
+平台自身指标（OpenMetrics）
+计数器、仪表盘、直方图的标签组合在启动时预先创建，请求处理中只做查表和数值累加；
+多进程部署（serve.py）时各进程定期把指标快照写入 METRICS_SHARED_DIR，/metrics 合并所有存活进程的快照
+"""
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.settings import settings
+
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 延迟类直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 快照超过 N 个写入间隔未更新视为进程已退出
+SNAPSHOT_STALE_INTERVALS = 3
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Value:
+    """计数器/仪表盘的一个标签组合"""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Buckets:
+    """直方图的一个标签组合：各分桶计数（非累计）、总和、次数"""
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # 最后一个为+Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    """指标基类：按标签值元组保存子项，labels() 查表，不存在时创建"""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), shared: bool = True,
+                 registry: Optional["Registry"] = None):
+        """
+        :param shared: 多进程部署时是否合并各进程的值（按进程求和）；为False时只输出当前进程的值
+        :param registry: 注册到的注册表，默认为全局REGISTRY
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.shared = shared
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+        return child
+
+    def preallocate(self, label_sets: Iterable[Sequence[str]]):
+        """预先创建标签组合"""
+        for values in label_sets:
+            self.labels(*values)
+
+    def samples(self) -> Dict[Tuple[str, ...], object]:
+        """当前进程的值：{标签值: 数值或[各分桶计数..., 总和]}"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """计数器（单调递增）"""
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def samples(self):
+        return {labels: child.value for labels, child in self._children.items()}
+
+
+class Gauge(_Metric):
+    """仪表盘：直接设置的值，或采集时调用函数得到的值"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), shared: bool = True,
+                 registry: Optional["Registry"] = None,
+                 function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        """
+        :param function: 采集时调用，返回 {标签值: 数值}
+        """
+        self.function = function
+        super().__init__(name, documentation, labelnames, shared, registry)
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].dec(amount)
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def samples(self):
+        if self.function is not None:
+            try:
+                return dict(self.function())
+            except Exception:
+                return {}
+        return {labels: child.value for labels, child in self._children.items()}
+
+
+class Histogram(_Metric):
+    """直方图"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), shared: bool = True,
+                 registry: Optional["Registry"] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, shared, registry)
+
+    def _new_child(self):
+        return _Buckets(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def samples(self):
+        return {labels: child.counts + [child.sum] for labels, child in self._children.items()}
+
+
+class Registry:
+    """指标注册表：输出OpenMetrics/Prometheus文本格式，多进程时合并其他进程的快照"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def snapshot(self) -> dict:
+        """当前进程需要合并的指标值（写入快照文件）"""
+        return {
+            metric.name: [[list(labels), value] for labels, value in metric.samples().items()]
+            for metric in self._metrics if metric.shared
+        }
+
+    def write_snapshot(self, directory: str):
+        """写入 <目录>/<pid>.json（先写临时文件再替换）"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"pid": os.getpid(), "updated_at": time.time(), "metrics": self.snapshot()}, f)
+        os.replace(tmp_path, path)
+
+    def _other_snapshots(self, directory: str) -> List[dict]:
+        """其他存活进程的快照（进程已退出或快照过期的跳过）"""
+        snapshots = []
+        max_age = settings.METRICS_SNAPSHOT_SECONDS * SNAPSHOT_STALE_INTERVALS
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return snapshots
+        for name in names:
+            if not name.endswith(".json") or name == f"{os.getpid()}.json":
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    snapshot = json.load(f)
+                os.kill(snapshot["pid"], 0)
+            except (OSError, ValueError, KeyError):
+                continue
+            if time.time() - snapshot.get("updated_at", 0) <= max_age:
+                snapshots.append(snapshot["metrics"])
+        return snapshots
+
+    def collect(self, directory: Optional[str] = None) -> List[Tuple[_Metric, Dict[Tuple[str, ...], object]]]:
+        """各指标合并后的值"""
+        others = self._other_snapshots(directory) if directory else []
+        collected = []
+        for metric in self._metrics:
+            merged = metric.samples()
+            if metric.shared:
+                for snapshot in others:
+                    for labels, value in snapshot.get(metric.name, []):
+                        key = tuple(labels)
+                        if isinstance(value, list):
+                            current = merged.get(key) or [0] * len(value)
+                            merged[key] = [a + b for a, b in zip(current, value)]
+                        else:
+                            merged[key] = merged.get(key, 0) + value
+            collected.append((metric, merged))
+        return collected
+
+    def render(self, openmetrics: bool = True, directory: Optional[str] = None) -> str:
+        """
+        输出文本格式
+        :param openmetrics: True为OpenMetrics 1.0，False为Prometheus 0.0.4文本格式
+        """
+        lines = []
+        for metric, samples in self.collect(directory):
+            family = metric.name
+            if metric.type_name == "counter" and not openmetrics:
+                family = f"{metric.name}_total"
+            lines.append(f"# HELP {family} {metric.documentation}")
+            lines.append(f"# TYPE {family} {metric.type_name}")
+            for labels, value in sorted(samples.items()):
+                if metric.type_name == "histogram":
+                    counts, total = value[:-1], value[-1]
+                    observed = sum(counts)
+                    if not observed:
+                        continue  # 未出现过的标签组合不输出
+                    cumulative = 0
+                    for bound, count in zip(metric.upper_bounds + (float("inf"),), counts):
+                        cumulative += count
+                        le = f'le="{_format_value(bound)}"'
+                        lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}")
+                    label_text = _format_labels(metric.labelnames, labels)
+                    lines.append(f"{metric.name}_count{label_text} {observed}")
+                    lines.append(f"{metric.name}_sum{label_text} {_format_value(total)}")
+                elif metric.type_name == "counter":
+                    lines.append(f"{metric.name}_total{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+                else:
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def start_snapshot_writer(directory: str, interval: float) -> threading.Thread:
+    """后台线程定期写入当前进程的指标快照（多进程部署时由各worker和任务执行进程启动）"""
+    def loop():
+        while True:
+            try:
+                REGISTRY.write_snapshot(directory)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+
+# ==============================================================================
+# 平台指标
+# ==============================================================================
+
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+HTTP_REQUEST_DURATION = Histogram(
+    "ptp_http_request_duration_seconds", "API请求处理耗时（按路由模板）", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("ptp_http_requests_in_flight", "处理中的API请求数")
+
+DB_POOL_WAIT = Histogram(
+    "ptp_db_pool_wait_seconds", "从连接池获取数据库连接的等待时间",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_TIMEOUTS = Counter("ptp_db_pool_timeouts", "获取数据库连接超时次数")
+
+REPORT_RENDER_DURATION = Histogram(
+    "ptp_report_render_seconds", "报告生成耗时（含产物复用）", ("type", "result"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+REPORT_RENDER_DURATION.preallocate(
+    (report_type, result) for report_type in ("IMAGE", "PDF") for result in ("rendered", "deduplicated", "failed")
+)
+
+TASK_LOG_WRITES = Counter("ptp_task_log_writes", "任务日志写入条数", ("level",))
+TASK_LOG_WRITES.preallocate([(level,) for level in ("debug", "info", "warning", "error")])
+
+# 任务数按数据库统计，各进程结果相同，不合并
+TASKS = Gauge("ptp_tasks", "任务数（pending：待执行，queued：已排队待执行，running：执行中）", ("state",), shared=False)
+TASKS.preallocate([("pending",), ("queued",), ("running",)])
+
+
+def _pool_connections() -> Dict[Tuple[str, ...], float]:
+    from app.database import engine
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        ("checked_out",): pool.checkedout(),
+        ("overflow",): max(pool.overflow(), 0),
+        ("size",): pool.size(),
+    }
+
+
+DB_POOL_CONNECTIONS = Gauge(
+    "ptp_db_pool_connections", "数据库连接池连接数（checked_out：已借出，overflow：超出pool_size的连接，size：pool_size）",
+    ("state",), function=_pool_connections
+)
+
+
+# 路由（或挂载的应用）的id -> 请求方法 -> 各状态码类别的直方图子项（路由对象不可哈希，按id查表）
+_route_series: Dict[int, Dict[str, List[_Buckets]]] = {}
+_unmatched_series: Dict[str, List[_Buckets]] = {}
+KNOWN_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+
+
+def _allocate_series(methods: Iterable[str], path: str) -> Dict[str, List[_Buckets]]:
+    return {
+        method: [HTTP_REQUEST_DURATION.labels(method, path, status) for status in STATUS_CLASSES]
+        for method in methods
+    }
+
+
+def preallocate_routes(routes: Iterable):
+    """按应用的路由表预先创建请求耗时的标签组合（注册完全部路由后调用）"""
+    for route in routes:
+        path = getattr(route, "path", None)
+        if path is None:
+            continue
+        if hasattr(route, "methods"):
+            _route_series[id(route)] = _allocate_series(route.methods or KNOWN_METHODS, path)
+        else:
+            # 挂载的应用（静态文件目录），匹配后 scope["endpoint"] 为挂载的应用
+            _route_series[id(route.app)] = _allocate_series(("GET", "HEAD"), f"{path}/{{path}}")
+    _unmatched_series.update(_allocate_series(KNOWN_METHODS + ("OTHER",), "<unmatched>"))
+
+
+def _request_series(scope: Scope) -> List[_Buckets]:
+    method = scope["method"]
+    by_method = _route_series.get(id(scope.get("route"))) or _route_series.get(id(scope.get("endpoint")))
+    series = by_method.get(method) if by_method else None
+    if series is None:
+        # 未匹配任何路由（404、405等）统一记为 <unmatched>
+        series = _unmatched_series.get(method) or _unmatched_series["OTHER"]
+    return series
+
+
+class HttpMetricsMiddleware:
+    """
+    记录API请求耗时和处理中请求数
+    路由模板取自路由匹配结果（scope["route"]，静态文件挂载为scope["endpoint"]），
+    标签组合由 preallocate_routes 按 路由 -> 请求方法 -> 状态码类别 预先创建，请求处理中只查表
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            series = _request_series(scope)
+            series[min(max(status_code // 100, 1), 5) - 1].observe(time.perf_counter() - started)
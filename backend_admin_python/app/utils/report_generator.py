@@ -8,6 +8,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import os
+from app.services.result_cache_service import ResultCacheService
+from app.services.trial_service import TrialService
+from config.settings import settings
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['WenQuanYi Zen Hei', 'Arial Unicode MS', 'SimHei']
@@ -25,8 +28,8 @@ def generate_report_image(csv_file_path, output_dir=None):
     返回:
     str - 生成的图片路径
     """
-    # 读取CSV数据
-    df = pd.read_csv(csv_file_path)
+    # 读取CSV数据（进程内缓存，同一数据文件重复渲染不再读盘）
+    df = ResultCacheService.read_csv(csv_file_path)
     
     # 创建子图
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
@@ -39,6 +42,24 @@ def generate_report_image(csv_file_path, output_dir=None):
     colors = {value: predefined_colors[i % len(predefined_colors)] for i, value in enumerate(concurrency_values)}
     test_items = df['测试项'].unique()
     
+    # 重复试验的置信区间（数据文件旁有试验明细时），绘制为QPS和平均延迟的误差线
+    intervals = TrialService.load_intervals(csv_file_path)
+    
+    def error_bars(values, metric, concurrency):
+        """柱高到置信区间下限、上限的距离，没有试验明细时返回None"""
+        if not intervals:
+            return None
+        lower, upper = [], []
+        for item, value in zip(test_items, values):
+            interval = (intervals.get((item, int(concurrency))) or {}).get(metric)
+            if not interval or interval['ci_low'] is None:
+                lower.append(0)
+                upper.append(0)
+            else:
+                lower.append(max(value - interval['ci_low'], 0))
+                upper.append(max(interval['ci_high'] - value, 0))
+        return [lower, upper]
+    
     # 1. QPS对比（左上）
     ax1 = axes[0, 0]
     x = np.arange(len(test_items))
@@ -46,10 +67,11 @@ def generate_report_image(csv_file_path, output_dir=None):
     
     for i, concurrency in enumerate(concurrency_values):
         qps_values = [df[(df['测试项'] == item) & (df['并发数'] == concurrency)]['QPS'].values[0] for item in test_items]
-        bars = ax1.bar(x - 0.4 + i * width, qps_values, width, label=f'并发数{concurrency}', color=colors[concurrency], alpha=0.8)
+        bars = ax1.bar(x - 0.4 + i * width, qps_values, width, label=f'并发数{concurrency}', color=colors[concurrency], alpha=0.8,
+                       yerr=error_bars(qps_values, 'qps', concurrency), capsize=4)
         ax1.bar_label(bars, padding=3)
     
-    ax1.set_title('各测试项QPS对比', fontsize=14, fontweight='bold')
+    ax1.set_title('各测试项QPS对比' + (f'（误差线为{settings.BOOTSTRAP_CONFIDENCE:.0%}置信区间）' if intervals else ''), fontsize=14, fontweight='bold')
     ax1.set_xlabel('测试项')
     ax1.set_ylabel('QPS')
     ax1.set_xticks(x)
@@ -62,7 +84,8 @@ def generate_report_image(csv_file_path, output_dir=None):
     
     for i, concurrency in enumerate(concurrency_values):
         latency_values = [df[(df['测试项'] == item) & (df['并发数'] == concurrency)]['平均延迟(ms)'].values[0] for item in test_items]
-        bars = ax2.bar(x - 0.4 + i * width, latency_values, width, label=f'并发数{concurrency}', color=colors[concurrency], alpha=0.8)
+        bars = ax2.bar(x - 0.4 + i * width, latency_values, width, label=f'并发数{concurrency}', color=colors[concurrency], alpha=0.8,
+                       yerr=error_bars(latency_values, 'avg_latency_ms', concurrency), capsize=4)
         ax2.bar_label(bars, padding=3, fmt='%.1f')
     
     ax2.set_title('各测试项平均延迟对比(ms)', fontsize=14, fontweight='bold')
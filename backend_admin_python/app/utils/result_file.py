@@ -0,0 +1,115 @@
+"""
+压测结果文件（start_api.sh输出的 task_<id>_result.json）
+schema_version 2 起由jq生成，是合法的UTF-8 JSON，按版本严格解析为 ResultFile；
+没有版本号的旧文件（手工拼接JSON）按兼容方式解析：猜测编码、截取{}之间的内容、修复未转义的反斜杠
+"""
+import re
+import json
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, ValidationError
+from app.utils import json_codec
+
+
+RESULT_SCHEMA_VERSION = 2
+
+# 旧结果文件可能的编码（手工拼接时原始输出中可能混入其他编码的内容）
+LEGACY_ENCODINGS = ("utf-8", "gbk", "latin-1")
+
+# 合法的JSON转义，或其他任意反斜杠（旧文件中原始输出的反斜杠未转义）
+_ESCAPE = re.compile(r'\\(["\\/bfnrt]|u[0-9a-fA-F]{4})|\\')
+# bc输出的小于1的小数缺少整数部分（"error_rate": .50）
+_BARE_FRACTION = re.compile(r'(:\s*-?)\.(\d)')
+
+
+class ResultFile(BaseModel):
+    """结果文件（schema_version 2），未列出的字段原样保留"""
+    model_config = ConfigDict(extra="allow")
+
+    schema_version: int
+    success: bool
+    task_id: str = ""
+    target_url: str = ""
+    concurrency: int = 0
+    duration: str = ""
+    threads: int = 0
+    qps: float = 0
+    avg_latency_ms: float = 0
+    p95_latency_ms: Optional[float] = None
+    p99_latency_ms: Optional[float] = None
+    error_rate: float = 0
+    total_requests: int = 0
+    successful_requests: int = 0
+    failed_requests: int = 0
+    http_status: Dict[str, int] = {}
+    status_codes: Dict[str, int] = {}
+    connections: Optional[dict] = None
+    resource_usage: Dict[str, float] = {}
+    data_file_path: Optional[str] = None
+    status_log_path: Optional[str] = None
+    metrics_file_path: Optional[str] = None
+    metrics: Optional[dict] = None
+    warmup_seconds: int = 0
+    warmup_metrics: Optional[dict] = None
+    repetitions: int = 1
+    trials: List[dict] = []
+    raw_output: str = ""
+    # 压测失败时
+    error: Optional[str] = None
+    exit_code: Optional[int] = None
+    output: Optional[str] = None
+
+
+def parse_result_json(content: bytes) -> dict:
+    """
+    解析结果文件，返回与文件内容一致的字典（字段按 ResultFile 校验和转换类型）
+    :raises ValueError: 版本不支持、字段类型不符或旧文件无法解析
+    """
+    try:
+        data = json_codec.loads(content)
+    except ValueError:
+        return _parse_legacy(content)
+    if not isinstance(data, dict):
+        raise ValueError("结果文件不是JSON对象")
+
+    version = data.get("schema_version")
+    if version is None:
+        return data
+    if version != RESULT_SCHEMA_VERSION:
+        raise ValueError(f"不支持的结果文件版本: {version}（支持 {RESULT_SCHEMA_VERSION}）")
+    try:
+        return ResultFile.model_validate(data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        raise ValueError(f"结果文件格式错误: {e}") from None
+
+
+def _parse_legacy(content: bytes) -> dict:
+    """
+    旧版结果文件：依次尝试多种编码，截取第一个{到最后一个}之间的内容；
+    仍无法解析时转义原始输出中的反斜杠、补全小数的整数部分后重试
+    """
+    content_str = None
+    for encoding in LEGACY_ENCODINGS:
+        try:
+            content_str = content.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    if not content_str:
+        raise ValueError("无法解码结果文件内容")
+
+    start_idx = content_str.find('{')
+    end_idx = content_str.rfind('}') + 1
+    if start_idx == -1 or end_idx == 0:
+        raise ValueError("无法在结果文件中找到有效的JSON结构")
+
+    json_content = content_str[start_idx:end_idx]
+    try:
+        return json.loads(json_content, strict=False)
+    except json.JSONDecodeError:
+        pass
+    json_content = _ESCAPE.sub(lambda m: m.group(0) if m.group(1) else r"\\", json_content)
+    json_content = _BARE_FRACTION.sub(r"\g<1>0.\2", json_content)
+    try:
+        return json.loads(json_content, strict=False)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"结果文件不是合法的JSON: {e}") from None
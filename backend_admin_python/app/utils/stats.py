@@ -0,0 +1,207 @@
+"""
+统计工具函数
+用于压测结果比较：Mann-Whitney U检验（支持分桶数据）、直方图分位数计算、稳态区间检测、Bootstrap置信区间；
+报告时间序列降采样（LTTB）
+"""
+import math
+import random
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+
+# 直方图格式：[(桶下界, 计数), ...]，与status_code.lua输出的latency_histogram_ms一致
+Histogram = Sequence[Tuple[float, float]]
+
+
+def _normal_sf(z: float) -> float:
+    """标准正态分布的生存函数 P(Z > z)"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_u_grouped(a: Iterable[Tuple[float, float]], b: Iterable[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """
+    分组数据的Mann-Whitney U检验（双侧，正态近似，含结校正）
+    :param a: 样本A的(取值, 计数)序列，原始样本可用计数1表示
+    :param b: 样本B的(取值, 计数)序列
+    :return: (U统计量, p值)，任一样本为空时返回None
+    """
+    counts = {}
+    for value, count in a:
+        if count > 0:
+            counts.setdefault(value, [0.0, 0.0])[0] += count
+    for value, count in b:
+        if count > 0:
+            counts.setdefault(value, [0.0, 0.0])[1] += count
+
+    n1 = sum(c[0] for c in counts.values())
+    n2 = sum(c[1] for c in counts.values())
+    if n1 == 0 or n2 == 0:
+        return None
+
+    # 按取值排序后同一取值为一个结，使用平均秩
+    rank_sum_a = 0.0
+    tie_term = 0.0
+    position = 0.0
+    for value in sorted(counts):
+        count_a, count_b = counts[value]
+        tie = count_a + count_b
+        average_rank = position + (tie + 1) / 2
+        rank_sum_a += average_rank * count_a
+        tie_term += tie ** 3 - tie
+        position += tie
+
+    n = n1 + n2
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        # 所有取值完全相同，不存在差异
+        return u, 1.0
+
+    # 连续性校正
+    z = (abs(u - mean_u) - 0.5) / math.sqrt(variance)
+    p_value = min(1.0, 2 * _normal_sf(max(z, 0.0)))
+    return u, p_value
+
+
+def mann_whitney_u(a: Sequence[float], b: Sequence[float]) -> Optional[Tuple[float, float]]:
+    """原始样本的Mann-Whitney U检验，返回(U统计量, p值)"""
+    return mann_whitney_u_grouped(((v, 1) for v in a), ((v, 1) for v in b))
+
+
+def merge_histograms(histograms: Iterable[Histogram]) -> List[Tuple[float, float]]:
+    """合并多个直方图（桶边界一致时按桶累加）"""
+    merged = {}
+    for histogram in histograms:
+        for value, count in histogram or []:
+            merged[value] = merged.get(value, 0) + count
+    return sorted(merged.items())
+
+
+def histogram_percentile(histogram: Histogram, percentile: float) -> Optional[float]:
+    """根据直方图计算分位数（返回所在桶的下界）"""
+    total = sum(count for _, count in histogram)
+    if total <= 0:
+        return None
+    threshold = total * percentile / 100
+    cumulative = 0
+    for value, count in sorted(histogram):
+        cumulative += count
+        if cumulative >= threshold:
+            return value
+    return sorted(histogram)[-1][0]
+
+
+def histogram_mean(histogram: Histogram) -> Optional[float]:
+    """根据直方图计算均值"""
+    total = sum(count for _, count in histogram)
+    if total <= 0:
+        return None
+    return sum(value * count for value, count in histogram) / total
+
+
+def mean(values: Sequence[float]) -> Optional[float]:
+    """算术平均值，空序列返回None"""
+    return sum(values) / len(values) if values else None
+
+
+def coefficient_of_variation(values: Sequence[float]) -> Optional[float]:
+    """变异系数（总体标准差 / 均值），空序列或均值为0时返回None"""
+    average = mean(values)
+    if not average:
+        return None
+    variance = sum((v - average) ** 2 for v in values) / len(values)
+    return math.sqrt(variance) / average
+
+
+def find_steady_start(series: Sequence[float], window: int, max_cv: float) -> Optional[int]:
+    """
+    稳态起点检测：第一个满足以下条件的滑动窗口的起始下标
+      1. 窗口内变异系数不超过max_cv
+      2. 窗口均值与后半段中位数（视为稳态水平）的偏差不超过max_cv，避免把预热期的低位平台当成稳态
+    :return: 起始下标，样本不足或始终未稳定时返回None
+    """
+    if window <= 0 or len(series) < window:
+        return None
+    tail = sorted(series[len(series) // 2:])
+    reference = tail[len(tail) // 2]
+    if reference <= 0:
+        return None
+    for start in range(len(series) - window + 1):
+        values = series[start:start + window]
+        cv = coefficient_of_variation(values)
+        if cv is not None and cv <= max_cv and abs(mean(values) - reference) / reference <= max_cv:
+            return start
+    return None
+
+
+def quantile(values: Sequence[float], q: float) -> Optional[float]:
+    """样本分位数（线性插值），q取0~1，空序列返回None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def bootstrap_ci(
+    values: Sequence[float],
+    statistic: Callable[[Sequence[float]], float] = mean,
+    confidence: float = 0.95,
+    iterations: int = 2000,
+    seed: int = 0
+) -> Optional[Tuple[float, float]]:
+    """
+    百分位Bootstrap置信区间：有放回重采样iterations次，取统计量分布的(1-confidence)/2和(1+confidence)/2分位数
+    使用固定随机种子，同一组样本的区间可复现；样本很少时区间偏窄
+    :return: (下限, 上限)，少于2个样本时返回None
+    """
+    values = list(values)
+    if len(values) < 2:
+        return None
+    rng = random.Random(seed)
+    n = len(values)
+    estimates = [statistic([values[rng.randrange(n)] for _ in range(n)]) for _ in range(iterations)]
+    alpha = (1 - confidence) / 2
+    return quantile(estimates, alpha), quantile(estimates, 1 - alpha)
+
+
+def lttb(values: Sequence[float], threshold: int) -> List[Tuple[int, float]]:
+    """
+    Largest-Triangle-Three-Buckets降采样：保留首尾点，其余按桶各取一个与相邻桶构成最大三角形的点，
+    点数大幅减少时仍保留尖峰和拐点的形状
+    :param values: 等间隔序列（如每秒请求数），横坐标为下标
+    :param threshold: 最多保留的点数（小于3时按3）
+    :return: [(下标, 取值), ...]，点数不超过threshold时原样返回
+    """
+    n = len(values)
+    threshold = max(threshold, 3)
+    if n <= threshold:
+        return [(i, v) for i, v in enumerate(values)]
+
+    sampled = [(0, values[0])]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # 下一个桶的平均点（最后一个桶使用末尾点）
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= n - 1:
+            avg_x, avg_y = n - 1, values[n - 1]
+        else:
+            count = next_end - next_start
+            avg_x = (next_start + next_end - 1) / 2
+            avg_y = sum(values[next_start:next_end]) / count
+
+        ax, ay = a, values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (values[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append((best, values[best]))
+        a = best
+    sampled.append((n - 1, values[n - 1]))
+    return sampled
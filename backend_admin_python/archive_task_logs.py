@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+任务日志归档脚本
+将结束超过保留期的任务日志和raw_output压缩归档，建议通过cron每日执行：
+    0 3 * * * cd /path/to/backend_admin_python && python3 archive_task_logs.py
+"""
+import sys
+import argparse
+from app.database import SessionLocal
+from app.models import *  # 导入所有模型，确保关系映射完整
+from app.services.archive_service import TaskLogArchiveService
+from config.settings import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="归档已结束任务的日志和原始压测输出")
+    parser.add_argument("--days", type=int, default=settings.TASK_LOG_ARCHIVE_AFTER_DAYS,
+                        help=f"任务结束多少天后归档（默认: {settings.TASK_LOG_ARCHIVE_AFTER_DAYS}）")
+    parser.add_argument("--limit", type=int, default=100, help="本次最多归档的任务数（默认: 100）")
+    parser.add_argument("--task-id", type=int, default=None, help="只归档指定任务")
+    parser.add_argument("--dry-run", action="store_true", help="只列出待归档任务，不执行归档")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.task_id:
+            archive = TaskLogArchiveService.archive_task(db, args.task_id)
+            archives = [archive] if archive else []
+        elif args.dry_run:
+            tasks = TaskLogArchiveService.find_archivable_tasks(db, args.days, args.limit)
+            print(f"待归档任务数: {len(tasks)}")
+            for task in tasks:
+                print(f"  - 任务ID: {task.id}, 状态: {task.status.value}, 结束时间: {task.finished_at}")
+            return 0
+        else:
+            archives = TaskLogArchiveService.archive_expired_tasks(db, args.days, args.limit)
+
+        for archive in archives:
+            ratio = archive.compressed_size / archive.original_size * 100 if archive.original_size else 0
+            print(f"✅ 任务 {archive.task_id}: 归档 {archive.log_count} 条日志，"
+                  f"{archive.original_size} -> {archive.compressed_size} 字节 ({ratio:.1f}%)，"
+                  f"压缩算法: {archive.compression}，文件: {archive.file_path}")
+        print(f"\n共归档 {len(archives)} 个任务")
+        return 0
+    except Exception as e:
+        print(f"❌ 归档失败: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
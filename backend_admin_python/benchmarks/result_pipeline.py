@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+结果处理链路微基准
+生成 1 / 100 / 10000 行的CSV数据文件和结果JSON，逐个阶段测量耗时和峰值内存：
+结果JSON解析（当前格式 / 旧版格式）、稳态分析、CSV读取、图片报告、PDF报告、HTML/Markdown报告、Parquet入库，
+以及 lib/collect.sh、lib/reports.sh 中的awk分析函数。每次运行追加到历史文件，并与上一次对比：
+
+    python3 benchmarks/result_pipeline.py                          # 全部阶段和规模
+    python3 benchmarks/result_pipeline.py --stages report_image report_pdf --sizes 100 10000
+    python3 benchmarks/result_pipeline.py --list                   # 查看阶段名称
+
+Python阶段的峰值内存为 tracemalloc 统计的Python堆峰值（含numpy/pandas数组，不含matplotlib绘图缓冲区），
+awk阶段为子进程树的最大常驻内存（含启动进程约10MB的基线）。每个阶段先执行一次预热（按需导入的库在此加载），
+再计时最多 --repeat 次（Python阶段累计超过 --budget-seconds 后停止）取中位数；CSV读取缓存在每次执行前清空，测量的是首次渲染的开销
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WRK_BASH_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "backend_admin_wrk_bash")
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_SIZES = (1, 100, 10000)
+DEFAULT_HISTORY = "./storage/benchmarks/result_pipeline_history.jsonl"
+
+CSV_HEADER = ("测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,"
+              "2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数,指标文件路径,状态码分布")
+
+
+def write_csv(path: str, rows: int):
+    """
+    CSV数据文件：测试项 × 并发数 的完整网格（报告按测试项和并发数取值，网格不完整时无法渲染）
+    行数为10的倍数时每个测试项10个并发档位，否则每个测试项1个
+    """
+    levels = 10 if rows % 10 == 0 else 1
+    lines = [CSV_HEADER]
+    for item in range(rows // levels):
+        for level in range(levels):
+            concurrency = (level + 1) * 50
+            qps = 1000 + (item * 37 + level * 113) % 4000 - level * 20
+            errors = (item + level) % 7
+            total = qps * 30
+            lines.append(
+                f"svc{item:05d},{concurrency},{qps}.{level},{5 + level * 1.5 + item % 10:.2f},{30 + level * 5},"
+                f"{256 + item % 512},{errors},N/A,{total - errors},0,{errors},0,0,{total},N/A,200:{total - errors};502:{errors}"
+            )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# wrk单次运行的输出（约1KB），结果JSON的raw_output每行数据一段，10000行时结果文件约10MB
+WRK_OUTPUT = """Running 30s test @ https://svc{row}.example.com/api/首页
+  4 threads and 100 connections
+  Thread Stats   Avg      Stdev     Max   +/- Stdev
+    Latency    12.50ms    3.21ms 120.00ms   89.12%
+    Req/Sec   250.00     30.00   400.00     75.00%
+  Latency Distribution
+     50%   11.00ms
+     75%   14.00ms
+     90%   18.00ms
+     95%   30.10ms
+     99%   45.70ms
+  {requests} requests in 30.00s, 24.00MB read
+  Non-2xx or 3xx responses: 12
+Requests/sec:   {qps}.00
+Transfer/sec:    800.00KB
+状态码分布: 200:{requests} 502:12 （日志: C:\\logs\\wrk_{row}.log）
+[INFO] 测试项 svc{row} 并发 100 完成，CPU峰值 35%，内存峰值 256MB
+[INFO] 指标文件: /data/metrics/svc{row}_100_metrics.json
+[INFO] 状态码日志: /data/status/svc{row}_100.log
+[INFO] 结果已追加到 /data/internet_data.csv
+[INFO] 报告目录: /data/reports/20260101/svc{row}，分析报告: /data/reports/20260101/svc{row}/外网压测_分析报告.md
+"""
+
+
+def write_result_json(path: str, rows: int, legacy: bool = False):
+    """
+    start_api.sh输出的结果JSON：rows秒的每秒请求数序列、rows个延迟直方图桶、rows段wrk原始输出
+    legacy为True时为旧版格式：没有schema_version、GBK编码、前面带一行脚本输出，走编码猜测和截取的兼容解析
+    """
+    series = [1000 + (second * 7919) % 200 - (400 if second < rows // 10 else 0) for second in range(rows)]
+    result = {
+        "schema_version": 2,
+        "success": True,
+        "task_id": "1",
+        "target_url": "https://svc.example.com/",
+        "concurrency": 100,
+        "duration": f"{rows}s",
+        "threads": 4,
+        "qps": sum(series) / rows,
+        "avg_latency_ms": 12.5,
+        "p95_latency_ms": 30.1,
+        "p99_latency_ms": 45.7,
+        "error_rate": 0.1,
+        "total_requests": sum(series),
+        "successful_requests": sum(series) - rows,
+        "failed_requests": rows,
+        "metrics": {
+            "requests": sum(series),
+            "duration_s": rows,
+            "latency_mean_ms": 12.5,
+            "requests_per_second": series,
+            "latency_histogram_ms": [[round(0.1 * (bucket + 1), 1), 1 + bucket % 50] for bucket in range(rows)],
+        },
+        "warmup_seconds": 0,
+        "warmup_metrics": None,
+        "repetitions": 1,
+        "trials": [],
+        "raw_output": "".join(WRK_OUTPUT.format(row=row, qps=series[row], requests=series[row] * 30) for row in range(rows)),
+    }
+    if legacy:
+        del result["schema_version"]
+        content = ("开始执行压测...\n" + json.dumps(result, ensure_ascii=False, indent=2)).encode("gbk")
+    else:
+        content = json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _bash(function: str, *args: str, script_dir: Optional[str] = None) -> List[str]:
+    """在bash中加载压测脚本的函数库后调用指定函数（报告输出到script_dir下）"""
+    command = (
+        'source "$WRK_BASH_DIR/lib/collect.sh" >/dev/null 2>&1; source "$WRK_BASH_DIR/lib/reports.sh" >/dev/null 2>&1; '
+        + (f'SCRIPT_DIR="{script_dir}"; ' if script_dir else "")
+        + f'{function} "$@"'
+    )
+    return ["bash", "-c", command, "bench", *args]
+
+
+class Fixtures:
+    """某个规模的数据文件和输出目录"""
+
+    def __init__(self, workdir: str, rows: int):
+        self.rows = rows
+        self.dir = os.path.join(workdir, str(rows))
+        self.output_dir = os.path.join(self.dir, "output")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.csv = os.path.join(self.dir, "data.csv")
+        self.result_json = os.path.join(self.dir, "result.json")
+        self.result_json_legacy = os.path.join(self.dir, "result_legacy.json")
+        write_csv(self.csv, rows)
+        write_result_json(self.result_json, rows)
+        write_result_json(self.result_json_legacy, rows, legacy=True)
+        with open(self.result_json, "rb") as f:
+            self.result_bytes = f.read()
+        with open(self.result_json_legacy, "rb") as f:
+            self.result_bytes_legacy = f.read()
+
+    def clean_output(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+        os.makedirs(self.output_dir)
+
+
+def _ingest_session(fixtures: Fixtures):
+    """内存SQLite中的任务和结果记录，供Parquet入库阶段使用"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.database import Base
+    from app.models.user import User
+    from app.models.apply_task import ApplyTask
+    from app.models.task import Task, TaskStatus
+    from app.models.result import Result
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, username="bench", email="bench@example.com", password_hash="x"))
+    db.add(ApplyTask(id=1, user_id=1, application_name="bench", domain="svc.example.com",
+                     url="https://svc.example.com/", record_info="备案", concurrency=100, duration="30s"))
+    db.add(Task(id=1, apply_id=1, target_url="https://svc.example.com/", concurrency=100, duration="30s",
+                threads=4, status=TaskStatus.COMPLETED, created_by=1, finished_at=datetime(2026, 1, 1)))
+    db.add(Result(task_id=1, data_file_path=fixtures.csv))
+    db.commit()
+    return db
+
+
+def python_stages() -> Dict[str, Callable[[Fixtures], Callable[[], object]]]:
+    """阶段名称 -> 按规模准备好调用的函数（准备工作不计时）"""
+    from app.services.result_cache_service import ResultCacheService, parse_result_json
+    from app.services.steady_state_service import SteadyStateService
+
+    def cold(fn):
+        """清空结果数据缓存后调用，测量首次读取的开销"""
+        def call():
+            ResultCacheService.clear()
+            return fn()
+        return call
+
+    def report_image(fixtures):
+        from app.utils.report_generator import generate_report_image
+        return cold(lambda: generate_report_image(fixtures.csv, fixtures.output_dir))
+
+    def report_pdf(fixtures):
+        from report_module.pdf_generator import generate_pdf_report
+        return cold(lambda: generate_pdf_report(fixtures.csv, fixtures.output_dir))
+
+    def report_html(fixtures):
+        from report_module.summary_generator import generate_html_report
+        return cold(lambda: generate_html_report(fixtures.csv, fixtures.output_dir))
+
+    def report_markdown(fixtures):
+        from report_module.summary_generator import generate_markdown_report
+        return cold(lambda: generate_markdown_report(fixtures.csv, fixtures.output_dir))
+
+    def ingest_parquet(fixtures):
+        from app.services.result_store_service import ResultStoreService
+        db = _ingest_session(fixtures)
+        return cold(lambda: ResultStoreService.ingest_task_result(db, 1))
+
+    return {
+        "parse_result_json": lambda fixtures: lambda: parse_result_json(fixtures.result_bytes),
+        "parse_result_json_legacy": lambda fixtures: lambda: parse_result_json(fixtures.result_bytes_legacy),
+        "steady_state": lambda fixtures: (
+            lambda data: lambda: SteadyStateService.analyze(data)
+        )(parse_result_json(fixtures.result_bytes)),
+        "read_csv": lambda fixtures: cold(lambda: ResultCacheService.read_csv(fixtures.csv)),
+        "report_image": report_image,
+        "report_pdf": report_pdf,
+        "report_html": report_html,
+        "report_markdown": report_markdown,
+        "ingest_parquet": ingest_parquet,
+    }
+
+
+# awk分析阶段：阶段名称 -> (函数名, 是否输出报告文件)
+SHELL_STAGES = {
+    "awk_performance_trend": ("analyze_performance_trend", False),
+    "awk_find_breakpoint": ("find_breakpoint", False),
+    "awk_simple_analysis": ("generate_simple_analysis", True),
+}
+
+STAGES = (
+    "parse_result_json", "parse_result_json_legacy", "steady_state", "read_csv",
+    "report_image", "report_pdf", "report_html", "report_markdown", "ingest_parquet", *SHELL_STAGES,
+)
+
+
+def _timed(call: Callable[[], object]) -> float:
+    gc.collect()
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def measure_python(call: Callable[[], object], repeat: int, budget_seconds: float) -> dict:
+    """
+    预热一次后计时，最多repeat次、累计超过budget_seconds后停止（至少1次）；
+    首次调用已超过预算的阶段不再预热，首次调用即作为计时样本（按需导入的开销相对可以忽略）。
+    最后单独执行一次统计Python堆峰值（tracemalloc会拖慢执行，不与计时混在一起）
+    """
+    from app.utils.stats import quantile
+
+    first = _timed(call)
+    if first > budget_seconds * 1000:
+        timings = [first]
+    else:
+        timings = []
+        while len(timings) < repeat and (not timings or sum(timings) < budget_seconds * 1000):
+            timings.append(_timed(call))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"median_ms": round(quantile(timings, 0.5), 3), "min_ms": round(min(timings), 3),
+            "peak_kb": round(peak / 1024, 1), "runs": len(timings)}
+
+
+# 启动awk阶段的精简进程：fork出的子进程会继承父进程的常驻内存峰值，
+# 由基准进程（已加载pandas、matplotlib）直接启动时子进程的ru_maxrss都是几百MB
+SHELL_RUNNER = """
+import os, sys, json, time, subprocess
+repeat, command = int(sys.argv[1]), sys.argv[2:]
+samples = []
+for _ in range(repeat):
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        sys.exit(f"退出码 {os.waitstatus_to_exitcode(status)}")
+    samples.append(((time.perf_counter() - started) * 1000, usage.ru_maxrss))
+print(json.dumps(samples))
+"""
+
+
+def measure_shell(command: List[str], repeat: int, cwd: str) -> dict:
+    """预热一次后计时repeat次，峰值内存取子进程树的最大常驻内存（KB，含启动进程约10MB的基线）"""
+    from app.utils.stats import quantile
+
+    completed = subprocess.run(
+        [sys.executable, "-S", "-c", SHELL_RUNNER, str(repeat + 1), *command],
+        env=dict(os.environ, WRK_BASH_DIR=WRK_BASH_DIR), cwd=cwd, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{command[-2]} 执行失败: {completed.stderr.strip()}")
+    samples = json.loads(completed.stdout)[1:]
+    timings = [elapsed for elapsed, _ in samples]
+    return {"median_ms": round(quantile(timings, 0.5), 3), "min_ms": round(min(timings), 3),
+            "peak_kb": float(max(peak for _, peak in samples)), "runs": len(samples)}
+
+
+def run(stages: List[str], sizes: List[int], repeat: int, budget_seconds: float, workdir: str) -> Dict[str, Dict[str, dict]]:
+    """返回 {阶段: {规模: {median_ms, min_ms, peak_kb, runs}}}"""
+    callables = python_stages()
+    results: Dict[str, Dict[str, dict]] = {stage: {} for stage in stages}
+    devnull = open(os.devnull, "w")
+    try:
+        for rows in sizes:
+            fixtures = Fixtures(workdir, rows)
+            for stage in stages:
+                fixtures.clean_output()
+                # 报告生成函数输出较多调试信息，计时期间丢弃
+                with contextlib.redirect_stdout(devnull):
+                    if stage in SHELL_STAGES:
+                        function, writes_report = SHELL_STAGES[stage]
+                        args = (fixtures.csv, "bench") if writes_report else (fixtures.csv,)
+                        command = _bash(function, *args, script_dir=fixtures.output_dir if writes_report else None)
+                        # 报告函数在当前目录写临时文件，在输出目录中执行
+                        result = measure_shell(command, repeat, cwd=fixtures.output_dir)
+                    else:
+                        result = measure_python(callables[stage](fixtures), repeat, budget_seconds)
+                results[stage][str(rows)] = result
+                print(f"{stage:<24}{rows:>8}{result['median_ms']:>14.2f}{result['min_ms']:>12.2f}{result['peak_kb']:>14.1f}"
+                      f"{result['runs']:>6}")
+    finally:
+        devnull.close()
+    return results
+
+
+def compare(current: dict, previous: dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    与上一次运行对比，返回回归描述列表
+    耗时中位数超过 上次×(1+容差) 且绝对差值超过 min_delta_ms，或峰值内存超过 上次×(1+容差) 时判定为回归
+    """
+    regressions = []
+    for stage, by_size in current["results"].items():
+        for rows, now in by_size.items():
+            before = previous.get("results", {}).get(stage, {}).get(rows)
+            if not before:
+                continue
+            if now["median_ms"] > before["median_ms"] * (1 + tolerance) and now["median_ms"] - before["median_ms"] > min_delta_ms:
+                regressions.append(f"{stage}[{rows}]: median_ms {before['median_ms']} -> {now['median_ms']}")
+            if now["peak_kb"] > before["peak_kb"] * (1 + tolerance):
+                regressions.append(f"{stage}[{rows}]: peak_kb {before['peak_kb']} -> {now['peak_kb']}")
+    return regressions
+
+
+def load_history(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="结果处理链路微基准（解析、入库、报告渲染、awk分析）")
+    parser.add_argument("--stages", nargs="*", default=None, help="只运行指定阶段（默认全部）")
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(DEFAULT_SIZES),
+                        help="数据行数（默认: 1 100 10000）")
+    parser.add_argument("--repeat", type=int, default=5, help="每个阶段的最多计时次数，取中位数（默认: 5）")
+    parser.add_argument("--budget-seconds", type=float, default=30.0,
+                        help="Python阶段累计计时超过该秒数后不再重复（默认: 30）")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help=f"历史结果文件（默认: {DEFAULT_HISTORY}）")
+    parser.add_argument("--no-record", action="store_true", help="不写入历史文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="耗时和峰值内存的容差（默认: 0.2）")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="耗时差值小于该毫秒数时不判定为回归（默认: 2）")
+    parser.add_argument("--workdir", default=None, help="数据文件和报告输出目录（默认使用临时目录，运行后删除）")
+    parser.add_argument("--list", action="store_true", help="列出阶段名称")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(STAGES))
+        return 0
+    stages = args.stages or list(STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"未知阶段: {', '.join(sorted(unknown))}")
+    if args.repeat < 1:
+        parser.error("--repeat 必须大于0")
+
+    os.chdir(BACKEND_DIR)
+    # 未安装中文字体时matplotlib每次绘图都输出找不到字体的警告
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore", message="Glyph .* missing from")
+    workdir = args.workdir or tempfile.mkdtemp(prefix="result_pipeline_")
+    # 入库阶段写入工作目录，不影响正式的结果存储
+    from config.settings import settings
+    settings.RESULT_STORE_DIR = os.path.join(workdir, "result_store")
+
+    print(f"{'阶段':<22}{'行数':>6}{'中位数(ms)':>12}{'最小(ms)':>10}{'峰值内存(KB)':>10}{'次数':>4}")
+    try:
+        results = run(stages, args.sizes, args.repeat, args.budget_seconds, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    current = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "repeat": args.repeat,
+            "budget_seconds": args.budget_seconds,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    history = load_history(args.history)
+    if not args.no_record:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(current, ensure_ascii=False) + "\n")
+
+    if not history:
+        print(f"\n历史记录为空" + ("" if args.no_record else f"，本次结果已记录: {args.history}"))
+        return 0
+    previous = history[-1]
+    regressions = compare(current, previous, args.tolerance, args.min_delta_ms)
+    label = f"{previous['meta']['created_at']}（{previous['meta'].get('revision') or '-'}）"
+    if regressions:
+        print(f"\n❌ 与上次运行 {label} 相比性能回归:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"\n✅ 与上次运行 {label} 相比无回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,6 +37,77 @@ class Settings(BaseSettings):
     WRK_DATA_DIR: str = "../backend_admin_wrk_bash/data"
     WRK_REPORT_DIR: str = "../backend_admin_wrk_bash/reports"
     
+    # 任务日志归档配置（超过保留期的日志和raw_output压缩到归档文件）
+    TASK_LOG_ARCHIVE_DIR: str = "./storage/archive"
+    TASK_LOG_ARCHIVE_AFTER_DAYS: int = 7  # 任务结束多少天后归档
+    TASK_LOG_ARCHIVE_COMPRESSION: str = "zstd"  # zstd（需安装zstandard，否则回退gzip）或gzip
+    TASK_LOG_ARCHIVE_CHUNK_SIZE: int = 1000  # 每个压缩块包含的日志条数
+    
+    # 列式结果存储配置（Parquet数据集，按日期/申请ID分区）
+    RESULT_STORE_DIR: str = "./storage/result_store"
+    
+    # 时间序列查询配置（每秒指标存储在RESULT_STORE_DIR/series，预先计算粗粒度汇总）
+    SERIES_ROLLUP_SECONDS: List[int] = [10, 60]  # 汇总粒度（秒）
+    SERIES_DEFAULT_POINTS: int = 1000  # 每个指标默认最多返回的点数
+    SERIES_MAX_POINTS: int = 10000  # max_points参数上限
+    
+    # 压测客户端校准配置（tools/calibrate_generator.sh测量的本机压测客户端上限）
+    GENERATOR_CALIBRATION_FILE: str = "../backend_admin_wrk_bash/calibration/generator.json"
+    GENERATOR_CEILING_WARN_PERCENT: float = 20.0  # QPS与上限的差距小于该百分比时警告
+    
+    # 性能回归检测配置（任务结果比较）
+    REGRESSION_BASELINE_RUNS: int = 5  # 未指定基线任务时，取最近N次压测作为滚动基线
+    REGRESSION_QPS_DROP_PERCENT: float = 5.0  # QPS下降超过该百分比判定为回归
+    REGRESSION_LATENCY_INCREASE_PERCENT: float = 10.0  # 延迟上升超过该百分比判定为回归
+    REGRESSION_SIGNIFICANCE_LEVEL: float = 0.05  # 显著性水平
+    
+    # 稳态检测配置（未设置预热时，按每秒请求数检测稳态起点）
+    STEADY_STATE_WINDOW_SECONDS: int = 5  # 滑动窗口秒数
+    STEADY_STATE_MAX_CV: float = 0.1  # 窗口内变异系数不超过该值视为稳态
+    TASK_MAX_WARMUP_SECONDS: int = 600  # 任务预热时长上限
+    
+    # 结果数据缓存配置（解析后的CSV数据文件和JSON指标文件，进程内按字节数LRU淘汰）
+    RESULT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    
+    # 重复试验配置（每次试验的结果保存在原始结果中，QPS和延迟给出Bootstrap置信区间）
+    TASK_MAX_REPETITIONS: int = 10  # 任务重复试验次数上限
+    BOOTSTRAP_ITERATIONS: int = 2000  # Bootstrap重采样次数
+    BOOTSTRAP_CONFIDENCE: float = 0.95  # 置信水平
+    
+    # 响应压缩配置（JSON等文本响应超过阈值时压缩，客户端支持且安装brotli时优先br，否则gzip）
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 4  # 动态响应使用中等质量，兼顾压缩率和CPU
+    
+    # 报告产物配置（按输入数据和渲染参数寻址，存放在UPLOAD_DIR/artifacts）
+    ARTIFACT_PREVIEW_MAX_WIDTH: int = 800  # 预览图最大宽度（像素）
+    ARTIFACT_PREVIEW_QUALITY: int = 75  # 预览图WebP质量
+    
+    # HTML/Markdown报告配置（每秒请求数曲线按LTTB降采样后嵌入HTML）
+    REPORT_MAX_POINTS: int = 3000  # 所有曲线合计最多嵌入的点数
+    REPORT_MIN_SERIES_POINTS: int = 200  # 曲线较多时每条曲线至少保留的点数
+    
+    # 压测场景配置（多接口加权请求编译为wrk Lua脚本）
+    SCENARIO_TEMPLATE_VARIANTS: int = 64  # 含模板变量的请求在每个wrk线程中预先展开的份数
+    SCENARIO_BREAKDOWN_MAX_THREADS: int = 256  # 各接口精确统计需要每个wrk线程一个连接，并发超过该值时不启用
+    
+    # 生产启动配置（serve.py：多worker HTTP进程 + 独立的任务执行进程）
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8001
+    SERVER_WORKERS: int = 0  # HTTP worker进程数，0表示按CPU核数
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # 停止时等待进行中HTTP请求完成的秒数
+    
+    # 任务执行配置
+    TASK_EXECUTION_MODE: str = "inline"  # inline：在接收请求的API进程内后台执行；runner：由task_runner.py进程排队执行
+    TASK_RUNNER_CONCURRENCY: int = 1  # 同时执行的压测任务数（多个压测同时运行会互相影响测量结果）
+    TASK_RUNNER_POLL_SECONDS: float = 2.0  # 领取排队任务的轮询间隔
+    TASK_RUNNER_DRAIN_SECONDS: int = 60  # 停止时等待执行中任务完成的秒数，超时的任务终止并重新排队
+    TASK_RUNNER_STATE_FILE: str = "./storage/task_runner.json"  # 任务执行进程状态（心跳），供就绪检查读取
+    
+    # 平台自身指标（GET /metrics，OpenMetrics格式）
+    METRICS_SHARED_DIR: str = ""  # 多进程部署时各进程写入指标快照的目录，/metrics 合并所有进程（serve.py自动设置）
+    METRICS_SNAPSHOT_SECONDS: float = 5.0  # 指标快照写入间隔
+    
     # CORS配置
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001", "http://localhost:8000"]
     
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+列式结果存储补录脚本
+将已完成任务的CSV结果转换为Parquet写入结果存储，每秒指标写入时序存储，用于历史数据迁移或补录写入失败的任务：
+    python3 ingest_results.py            # 补录所有已完成任务
+    python3 ingest_results.py --task-id 12
+"""
+import sys
+import argparse
+from app.database import SessionLocal
+from app.models import *  # 导入所有模型，确保关系映射完整
+from app.models.task import Task, TaskStatus
+from app.services.result_store_service import ResultStoreService
+from app.services.series_store_service import SeriesStoreService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将压测结果CSV写入列式结果存储")
+    parser.add_argument("--task-id", type=int, default=None, help="只处理指定任务")
+    parser.add_argument("--limit", type=int, default=None, help="本次最多处理的任务数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.task_id:
+            task_ids = [args.task_id]
+        else:
+            query = db.query(Task.id).filter(Task.status == TaskStatus.COMPLETED).order_by(Task.id.asc())
+            if args.limit:
+                query = query.limit(args.limit)
+            task_ids = [row.id for row in query.all()]
+
+        ingested = 0
+        for task_id in task_ids:
+            try:
+                path = ResultStoreService.ingest_task_result(db, task_id)
+                SeriesStoreService.ingest_task_series(db, task_id)
+            except Exception as e:
+                print(f"❌ 任务 {task_id}: {str(e)}")
+                continue
+            if path:
+                ingested += 1
+                print(f"✅ 任务 {task_id}: {path}")
+            else:
+                print(f"⚠️ 任务 {task_id}: 无CSV结果数据，已跳过")
+
+        print(f"\n共写入 {ingested}/{len(task_ids)} 个任务")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,22 @@ from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from datetime import datetime
+from app.services.result_cache_service import ResultCacheService
+from app.services.trial_service import TrialService
+
+
+def parse_status_codes(value) -> list:
+    """
+    解析CSV中的状态码分布字段（200:123;502:4），按响应数降序返回[(状态码, 响应数)]
+    """
+    if not isinstance(value, str) or value in ('', 'N/A'):
+        return []
+    pairs = []
+    for item in value.split(';'):
+        code, _, count = item.partition(':')
+        if code.strip().isdigit() and count.strip().isdigit():
+            pairs.append((code.strip(), int(count)))
+    return sorted(pairs, key=lambda pair: pair[1], reverse=True)
 
 
 def generate_pdf_report(csv_file_path: str, output_dir: str) -> str:
@@ -88,7 +104,7 @@ def generate_pdf_report(csv_file_path: str, output_dir: str) -> str:
         
         # 读取CSV文件数据
         print(f"开始读取CSV文件...")
-        df = pd.read_csv(csv_file_path)
+        df = ResultCacheService.read_csv(csv_file_path)
         print(f"CSV文件读取成功，数据行数：{len(df)}")
         print(f"数据列名：{list(df.columns)}")
         print(f"""数据内容：
@@ -241,6 +257,46 @@ def generate_pdf_report(csv_file_path: str, output_dir: str) -> str:
         story.append(test_results_table)
         story.append(Spacer(1, 20))
         
+        # 重复试验：QPS和延迟的试验均值及置信区间
+        intervals = TrialService.load_intervals(csv_file_path)
+        if intervals:
+            def format_interval(item):
+                if not item:
+                    return 'N/A'
+                if item['ci_low'] is None:
+                    return f"{item['mean']}"
+                return f"{item['mean']} [{item['ci_low']}, {item['ci_high']}]"
+            
+            confidence = next(
+                (item['confidence'] for summary in intervals.values() for item in summary.values() if item), 0.95
+            )
+            story.append(Paragraph(f"重复试验（均值 [{confidence:.0%}置信区间]）", subtitle_style))
+            trials_data = [['测试项', '并发数', '试验次数', 'QPS', '平均延迟(ms)', 'P99延迟(ms)']]
+            for (item_name, concurrency), summary in intervals.items():
+                trials_data.append([
+                    item_name,
+                    str(concurrency),
+                    str(summary['qps']['n'] if summary['qps'] else 0),
+                    format_interval(summary['qps']),
+                    format_interval(summary['avg_latency_ms']),
+                    format_interval(summary['p99_latency_ms'])
+                ])
+            trials_table = Table(trials_data, colWidths=[doc.width * 0.15, doc.width * 0.1, doc.width * 0.1,
+                                                         doc.width * 0.25, doc.width * 0.2, doc.width * 0.2])
+            trials_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), bold_font),
+                ('FONTNAME', (0, 1), (-1, -1), normal_font),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+                ('TOPPADDING', (0, 0), (-1, -1), 8),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            story.append(trials_table)
+            story.append(Paragraph("置信区间为逐次试验均值的百分位Bootstrap区间，两组结果的区间不重叠时差异才可认为超出测量噪声。", body_style))
+            story.append(Spacer(1, 20))
+        
         # 2. 性能分析
         story.append(Paragraph("2. 性能分析", heading2_style))
         
@@ -323,6 +379,28 @@ def generate_pdf_report(csv_file_path: str, output_dir: str) -> str:
                     story.append(Paragraph(f"  - {row['测试项']}（并发数：{row['并发数']}）：{row['错误数']}个错误", bullet_style))
         else:
             story.append(Paragraph("- 未发现错误请求", bullet_style))
+
+        # 逐状态码分布（wrk Lua脚本精确计数，CSV格式 200:123;502:4）
+        if '状态码分布' in df.columns:
+            status_code_data = [['测试项', '并发数', '状态码', '响应数']]
+            for _, row in df.iterrows():
+                for code, count in parse_status_codes(row['状态码分布']):
+                    status_code_data.append([row['测试项'], str(row['并发数']), code, str(count)])
+            if len(status_code_data) > 1:
+                story.append(Spacer(1, 10))
+                story.append(Paragraph("状态码分布：", table_title_style))
+                status_code_table = Table(status_code_data, colWidths=[doc.width * 0.3, doc.width * 0.2, doc.width * 0.2, doc.width * 0.2])
+                status_code_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), bold_font),
+                    ('FONTNAME', (0, 1), (-1, -1), normal_font),
+                    ('FONTSIZE', (0, 0), (-1, -1), 9),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                    ('TOPPADDING', (0, 0), (-1, -1), 6),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                ]))
+                story.append(status_code_table)
         story.append(Spacer(1, 20))
         
         # 5. 结论与建议
@@ -0,0 +1,398 @@
+"""
+HTML / Markdown报告生成模块
+一次遍历CSV数据文件汇总全部统计（替代lib/reports.sh中逐项统计的多次awk），
+HTML报告自包含（内联样式、脚本和数据，可离线打开），每秒请求数曲线按LTTB降采样后嵌入
+"""
+import os
+import json
+import html
+import math
+from datetime import datetime
+from typing import List, Optional
+from app.services.result_cache_service import ResultCacheService
+from app.services.trial_service import TrialService
+from app.services.calibration_service import CalibrationService
+from app.utils.stats import lttb, coefficient_of_variation
+from config.settings import settings
+
+
+REPORT_TITLE = "外网压测"
+
+# 概览表格列：(标题, 字段, 小数位)
+OVERVIEW_COLUMNS = [
+    ("测试项", "test_item", None),
+    ("并发数", "concurrency", 0),
+    ("QPS", "qps", 2),
+    ("平均延迟(ms)", "avg_latency_ms", 2),
+    ("P95延迟(ms)", "p95_latency_ms", 2),
+    ("P99延迟(ms)", "p99_latency_ms", 2),
+    ("CPU峰值(%)", "cpu_percent", 2),
+    ("内存峰值(MB)", "memory_mb", 2),
+    ("错误数", "errors", 0),
+]
+
+PERCENTILE_KEYS = {"p95_latency_ms": "p95", "p99_latency_ms": "p99"}
+
+
+def _number(value) -> Optional[float]:
+    """CSV中的数值，空值或N/A返回None"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _format(value, digits: Optional[int]) -> str:
+    if value is None:
+        return "N/A"
+    if digits is None:
+        return str(value)
+    return f"{value:.{digits}f}"
+
+
+def _parse_status_codes(value) -> dict:
+    """CSV中的状态码分布（200:123;502:4）"""
+    counts = {}
+    if not isinstance(value, str):
+        return counts
+    for item in value.split(";"):
+        code, _, count = item.partition(":")
+        if code.strip().isdigit() and count.strip().isdigit():
+            counts[code.strip()] = counts.get(code.strip(), 0) + int(count)
+    return counts
+
+
+def _read_metrics(path) -> dict:
+    """读取status_code.lua输出的指标文件，不存在或无法解析时返回空字典"""
+    if not isinstance(path, str) or not os.path.exists(path):
+        return {}
+    try:
+        return ResultCacheService.read_json(path)
+    except (OSError, ValueError):
+        return {}
+
+
+def collect_report_data(csv_file_path: str, max_points: Optional[int] = None, target_url: Optional[str] = None) -> dict:
+    """
+    一次遍历数据文件，汇总报告所需的全部数据
+    :param target_url: 压测目标URL，HTTPS目标与TLS上限比较（CSV中没有目标协议）
+    :param max_points: 所有曲线合计最多嵌入的点数（默认REPORT_MAX_POINTS），每条曲线至少保留REPORT_MIN_SERIES_POINTS个点
+    :return: {"rows", "series", "best", "total_errors", "status_codes", "avg_cpu", "avg_memory", "intervals",
+              "generator_ceiling"}
+    """
+    if not os.path.exists(csv_file_path):
+        raise FileNotFoundError(f"CSV文件不存在: {csv_file_path}")
+    max_points = max_points or settings.REPORT_MAX_POINTS
+
+    rows, raw_series = [], []
+    best = None
+    total_errors = 0
+    status_codes = {}
+    cpu_values, memory_values = [], []
+    for record in ResultCacheService.read_csv(csv_file_path).to_dict("records"):
+        metrics = _read_metrics(record.get("指标文件路径"))
+        percentiles = metrics.get("latency_percentiles_ms") or {}
+        row = {
+            "test_item": str(record.get("测试项")),
+            "concurrency": _number(record.get("并发数")),
+            "qps": _number(record.get("QPS")),
+            "avg_latency_ms": _number(record.get("平均延迟(ms)")),
+            "cpu_percent": _number(record.get("Docker容器CPU峰值(%)")),
+            "memory_mb": _number(record.get("Docker容器内存峰值(MB)")),
+            "errors": _number(record.get("错误数")) or 0,
+        }
+        for field, key in PERCENTILE_KEYS.items():
+            row[field] = _number(percentiles.get(key))
+        rows.append(row)
+
+        if row["qps"] is not None and (best is None or row["qps"] > best["qps"]):
+            best = row
+        total_errors += row["errors"]
+        for code, count in _parse_status_codes(record.get("状态码分布")).items():
+            status_codes[code] = status_codes.get(code, 0) + count
+        if row["cpu_percent"] is not None:
+            cpu_values.append(row["cpu_percent"])
+        if row["memory_mb"] is not None:
+            memory_values.append(row["memory_mb"])
+
+        per_second = [float(v) for v in metrics.get("requests_per_second") or []]
+        if per_second:
+            raw_series.append((row, per_second))
+
+    # 曲线点数按条数均分预算，1小时（3600秒）的曲线也只嵌入几百到几千个点
+    series = []
+    if raw_series:
+        per_series = max(settings.REPORT_MIN_SERIES_POINTS, max_points // len(raw_series))
+        for row, per_second in raw_series:
+            cv = coefficient_of_variation(per_second)
+            series.append({
+                "name": f"{row['test_item']} / {_format(row['concurrency'], 0)}并发",
+                "seconds": len(per_second),
+                "min": min(per_second),
+                "mean": sum(per_second) / len(per_second),
+                "max": max(per_second),
+                "cv": cv,
+                "points": [[x, round(y, 2)] for x, y in lttb(per_second, per_series)],
+            })
+
+    return {
+        "rows": rows,
+        "series": series,
+        "best": best,
+        "total_errors": total_errors,
+        "status_codes": dict(sorted(status_codes.items(), key=lambda item: item[1], reverse=True)),
+        "avg_cpu": sum(cpu_values) / len(cpu_values) if cpu_values else None,
+        "avg_memory": sum(memory_values) / len(memory_values) if memory_values else None,
+        "intervals": TrialService.load_intervals(csv_file_path),
+        "generator_ceiling": CalibrationService.assess(best["qps"], target_url) if best else None,
+    }
+
+
+def _conclusions(data: dict) -> List[str]:
+    """结论与建议（与PDF报告一致）"""
+    lines = []
+    if data["total_errors"] > 0:
+        lines.append("系统存在错误请求，建议检查错误日志并优化系统")
+    else:
+        lines.append("系统整体性能表现良好，未发现错误请求")
+    ceiling = data.get("generator_ceiling")
+    if ceiling and ceiling["near_ceiling"]:
+        lines.append(CalibrationService.describe(ceiling, data["best"]["qps"]))
+    if data["best"]:
+        lines.append(f"建议根据最佳QPS对应的并发数（{_format(data['best']['concurrency'], 0)}）进行系统配置")
+    return lines
+
+
+def _format_interval(item: Optional[dict]) -> str:
+    if not item:
+        return "N/A"
+    if item["ci_low"] is None:
+        return f"{item['mean']}"
+    return f"{item['mean']} [{item['ci_low']}, {item['ci_high']}]"
+
+
+def _output_path(output_dir: str, extension: str) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"{REPORT_TITLE}_分析报告_{timestamp}.{extension}")
+
+
+# ==============================================================================
+# Markdown报告
+# ==============================================================================
+
+def _md_cell(value) -> str:
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _md_table(headers: List[str], rows: List[List]) -> List[str]:
+    lines = ["| " + " | ".join(headers) + " |", "|" + "|".join("---" for _ in headers) + "|"]
+    lines.extend("| " + " | ".join(_md_cell(cell) for cell in row) + " |" for row in rows)
+    return lines
+
+
+def render_markdown(data: dict) -> str:
+    """Markdown报告内容：概览、重复试验、每秒请求数统计、资源、错误和状态码、结论"""
+    lines = [
+        f"# {REPORT_TITLE} 性能分析报告",
+        f"**生成时间**：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "## 1. 测试结果概览",
+    ]
+    lines += _md_table(
+        [title for title, _, _ in OVERVIEW_COLUMNS],
+        [[_format(row[field], digits) for _, field, digits in OVERVIEW_COLUMNS] for row in data["rows"]]
+    )
+
+    if data["intervals"]:
+        lines += ["", "### 重复试验（均值 [置信区间]）"]
+        lines += _md_table(
+            ["测试项", "并发数", "试验次数", "QPS", "平均延迟(ms)", "P99延迟(ms)"],
+            [[item, concurrency, summary["qps"]["n"] if summary["qps"] else 0,
+              _format_interval(summary["qps"]), _format_interval(summary["avg_latency_ms"]),
+              _format_interval(summary["p99_latency_ms"])]
+             for (item, concurrency), summary in data["intervals"].items()]
+        )
+
+    lines += ["", "## 2. 性能分析"]
+    best = data["best"]
+    if best:
+        lines.append(f"- 最佳QPS：{_format(best['qps'], 2)}（{best['test_item']}，并发数 {_format(best['concurrency'], 0)}）")
+    if data["series"]:
+        lines += ["", "### 每秒请求数"]
+        lines += _md_table(
+            ["曲线", "秒数", "最小", "平均", "最大", "变异系数"],
+            [[s["name"], s["seconds"], _format(s["min"], 0), _format(s["mean"], 2), _format(s["max"], 0),
+              _format(s["cv"], 4)] for s in data["series"]]
+        )
+
+    lines += [
+        "", "## 3. 系统资源使用分析",
+        f"- 平均CPU使用率：{_format(data['avg_cpu'], 2)}%",
+        f"- 平均内存使用：{_format(data['avg_memory'], 2)}MB",
+        "", "## 4. 错误分析",
+    ]
+    if data["total_errors"] > 0:
+        lines.append(f"- 总错误数：{_format(data['total_errors'], 0)}")
+        lines += [f"  - {row['test_item']}（并发数：{_format(row['concurrency'], 0)}）：{_format(row['errors'], 0)}个错误"
+                  for row in data["rows"] if row["errors"] > 0]
+    else:
+        lines.append("- 未发现错误请求")
+    if data["status_codes"]:
+        lines += ["", "### 状态码分布"]
+        lines += _md_table(["状态码", "响应数"], [[code, count] for code, count in data["status_codes"].items()])
+
+    lines += ["", "## 5. 结论与建议"]
+    lines += [f"- {line}" for line in _conclusions(data)]
+    return "\n".join(lines) + "\n"
+
+
+def generate_markdown_report(csv_file_path: str, output_dir: str, target_url: Optional[str] = None) -> str:
+    """生成Markdown报告，返回文件路径"""
+    path = _output_path(output_dir, "md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_markdown(collect_report_data(csv_file_path, target_url=target_url)))
+    return path
+
+
+# ==============================================================================
+# HTML报告
+# ==============================================================================
+
+HTML_STYLE = """
+body{font-family:-apple-system,"PingFang SC","Microsoft YaHei",sans-serif;margin:24px;color:#222}
+h1{font-size:24px}h2{font-size:18px;margin-top:28px;border-bottom:1px solid #ddd;padding-bottom:4px}
+table{border-collapse:collapse;margin:8px 0}th,td{border:1px solid #ccc;padding:4px 10px;text-align:center}
+th{background:#f2f2f2;cursor:pointer}.legend span{display:inline-block;margin-right:14px;cursor:pointer}
+.legend i{display:inline-block;width:12px;height:12px;margin-right:4px;vertical-align:-1px}
+.legend .off{opacity:.35}#chart{position:relative}#tip{position:absolute;background:#fff;border:1px solid #999;
+padding:2px 6px;font-size:12px;pointer-events:none;display:none;white-space:nowrap}
+"""
+
+# 每秒请求数折线图（SVG，图例点击隐藏曲线，悬停显示数值）和表格按列排序
+HTML_SCRIPT = """
+(function(){
+var data=JSON.parse(document.getElementById('report-data').textContent);
+var colors=['#3498db','#e74c3c','#2ecc71','#f39c12','#9b59b6','#1abc9c','#e67e22','#34495e'];
+var box=document.getElementById('chart'),legend=document.getElementById('legend'),tip=document.getElementById('tip');
+var hidden={},W=960,H=320,L=60,R=20,T=10,B=30,NS='http://www.w3.org/2000/svg';
+function el(name,attrs){var e=document.createElementNS(NS,name);for(var k in attrs)e.setAttribute(k,attrs[k]);return e;}
+function draw(){
+  var old=box.querySelector('svg');if(old)box.removeChild(old);
+  var shown=data.series.filter(function(s,i){return !hidden[i];}),maxX=1,maxY=1;
+  shown.forEach(function(s){s.points.forEach(function(p){maxX=Math.max(maxX,p[0]);maxY=Math.max(maxY,p[1]);});});
+  var sx=function(x){return L+x/maxX*(W-L-R);},sy=function(y){return H-B-y/maxY*(H-T-B);};
+  var svg=el('svg',{width:W,height:H,viewBox:'0 0 '+W+' '+H});
+  for(var k=0;k<=4;k++){var y=maxY*k/4;svg.appendChild(el('line',{x1:L,x2:W-R,y1:sy(y),y2:sy(y),stroke:'#eee'}));
+    var t=el('text',{x:L-6,y:sy(y)+4,'text-anchor':'end','font-size':11});t.textContent=Math.round(y);svg.appendChild(t);}
+  var xt=el('text',{x:W-R,y:H-8,'text-anchor':'end','font-size':11});xt.textContent=maxX+' 秒';svg.appendChild(xt);
+  data.series.forEach(function(s,i){if(hidden[i])return;
+    svg.appendChild(el('polyline',{fill:'none',stroke:colors[i%colors.length],'stroke-width':1.5,
+      points:s.points.map(function(p){return sx(p[0])+','+sy(p[1]);}).join(' ')}));});
+  svg.addEventListener('mousemove',function(e){
+    var r=svg.getBoundingClientRect(),x=(e.clientX-r.left-L)/(W-L-R)*maxX,lines=[];
+    data.series.forEach(function(s,i){if(hidden[i])return;var best=null;
+      s.points.forEach(function(p){if(!best||Math.abs(p[0]-x)<Math.abs(best[0]-x))best=p;});
+      if(best)lines.push(s.name+'：第'+best[0]+'秒 '+best[1]);});
+    tip.textContent='';lines.forEach(function(line){var d=document.createElement('div');d.textContent=line;tip.appendChild(d);});
+    tip.style.display=lines.length?'block':'none';tip.style.left=(e.clientX-r.left+12)+'px';tip.style.top=(e.clientY-r.top+12)+'px';});
+  svg.addEventListener('mouseleave',function(){tip.style.display='none';});
+  box.insertBefore(svg,tip);
+}
+data.series.forEach(function(s,i){var span=document.createElement('span'),mark=document.createElement('i');
+  mark.style.background=colors[i%colors.length];span.appendChild(mark);span.appendChild(document.createTextNode(s.name));
+  span.onclick=function(){hidden[i]=!hidden[i];span.className=hidden[i]?'off':'';draw();};legend.appendChild(span);});
+if(data.series.length)draw();
+Array.prototype.forEach.call(document.querySelectorAll('table.sortable th'),function(th,col){th.onclick=function(){
+  var body=th.closest('table').tBodies[0],rows=Array.prototype.slice.call(body.rows),asc=th.dataset.asc!=='1';
+  rows.sort(function(a,b){var x=a.cells[col].textContent,y=b.cells[col].textContent,nx=parseFloat(x),ny=parseFloat(y);
+    var c=isNaN(nx)||isNaN(ny)?x.localeCompare(y):nx-ny;return asc?c:-c;});
+  th.dataset.asc=asc?'1':'0';rows.forEach(function(r){body.appendChild(r);});};});
+})();
+"""
+
+
+def _html_table(headers: List[str], rows: List[List], sortable: bool = False) -> str:
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows
+    )
+    css = ' class="sortable"' if sortable else ""
+    return f"<table{css}><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def render_html(data: dict) -> str:
+    """自包含HTML报告内容，曲线数据以JSON嵌入页面"""
+    parts = [
+        f"<h1>{html.escape(REPORT_TITLE)} 性能分析报告</h1>",
+        f"<p><b>生成时间</b>：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>",
+        "<h2>1. 测试结果概览</h2>",
+        _html_table(
+            [title for title, _, _ in OVERVIEW_COLUMNS],
+            [[_format(row[field], digits) for _, field, digits in OVERVIEW_COLUMNS] for row in data["rows"]],
+            sortable=True
+        ),
+    ]
+    if data["intervals"]:
+        parts.append("<h3>重复试验（均值 [置信区间]）</h3>")
+        parts.append(_html_table(
+            ["测试项", "并发数", "试验次数", "QPS", "平均延迟(ms)", "P99延迟(ms)"],
+            [[item, concurrency, summary["qps"]["n"] if summary["qps"] else 0,
+              _format_interval(summary["qps"]), _format_interval(summary["avg_latency_ms"]),
+              _format_interval(summary["p99_latency_ms"])]
+             for (item, concurrency), summary in data["intervals"].items()]
+        ))
+
+    parts.append("<h2>2. 性能分析</h2>")
+    best = data["best"]
+    if best:
+        parts.append(f"<p>最佳QPS：{_format(best['qps'], 2)}（{html.escape(best['test_item'])}，"
+                     f"并发数 {_format(best['concurrency'], 0)}）</p>")
+    if data["series"]:
+        parts.append("<h3>每秒请求数</h3>")
+        parts.append('<div id="legend" class="legend"></div><div id="chart"><div id="tip"></div></div>')
+        parts.append(_html_table(
+            ["曲线", "秒数", "最小", "平均", "最大", "变异系数", "嵌入点数"],
+            [[s["name"], s["seconds"], _format(s["min"], 0), _format(s["mean"], 2), _format(s["max"], 0),
+              _format(s["cv"], 4), len(s["points"])] for s in data["series"]],
+            sortable=True
+        ))
+
+    parts.append("<h2>3. 系统资源使用分析</h2>")
+    parts.append(f"<ul><li>平均CPU使用率：{_format(data['avg_cpu'], 2)}%</li>"
+                 f"<li>平均内存使用：{_format(data['avg_memory'], 2)}MB</li></ul>")
+
+    parts.append("<h2>4. 错误分析</h2>")
+    if data["total_errors"] > 0:
+        items = "".join(
+            f"<li>{html.escape(row['test_item'])}（并发数：{_format(row['concurrency'], 0)}）：{_format(row['errors'], 0)}个错误</li>"
+            for row in data["rows"] if row["errors"] > 0
+        )
+        parts.append(f"<p>总错误数：{_format(data['total_errors'], 0)}</p><ul>{items}</ul>")
+    else:
+        parts.append("<p>未发现错误请求</p>")
+    if data["status_codes"]:
+        parts.append(_html_table(["状态码", "响应数"], list(data["status_codes"].items()), sortable=True))
+
+    parts.append("<h2>5. 结论与建议</h2>")
+    parts.append("<ul>" + "".join(f"<li>{html.escape(line)}</li>" for line in _conclusions(data)) + "</ul>")
+
+    # 嵌入的JSON中转义"<"，曲线名称中的"</script>"不会提前结束脚本
+    embedded = json.dumps({"series": [{"name": s["name"], "points": s["points"]} for s in data["series"]]},
+                          ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+    return (
+        '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+        f"<title>{html.escape(REPORT_TITLE)} 性能分析报告</title><style>{HTML_STYLE}</style></head><body>"
+        + "".join(parts)
+        + f'<script type="application/json" id="report-data">{embedded}</script>'
+        + f"<script>{HTML_SCRIPT}</script></body></html>"
+    )
+
+
+def generate_html_report(csv_file_path: str, output_dir: str, target_url: Optional[str] = None) -> str:
+    """生成HTML报告，返回文件路径"""
+    path = _output_path(output_dir, "html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_html(collect_report_data(csv_file_path, target_url=target_url)))
+    return path
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+生产环境启动脚本
+多个uvicorn worker处理HTTP请求（uvloop + httptools），压测任务由独立的任务执行进程（task_runner.py）执行：
+    python3 serve.py                    # worker数按CPU核数
+    python3 serve.py --workers 4 --port 8001
+    python3 serve.py --no-runner        # 任务执行进程单独部署时
+
+启动前在主进程导入一次应用，配置或依赖有误时直接退出，不会启动一批反复崩溃的worker。
+收到SIGTERM后停止接受新连接，等待进行中的请求完成（最多 SERVER_GRACEFUL_TIMEOUT 秒），
+再通知任务执行进程停止（执行中的任务最多等待 TASK_RUNNER_DRAIN_SECONDS 秒，超时的重新排队）。
+开发环境请使用 start_app.py（自动重载）
+"""
+import os
+import sys
+import time
+import signal
+import shutil
+import argparse
+import subprocess
+import importlib.util
+import uvicorn
+from config.settings import settings
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_workers() -> int:
+    """HTTP worker数：SERVER_WORKERS，未配置时按CPU核数（异步worker每个占满一个核）"""
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+
+def preload_app() -> float:
+    """在主进程导入应用，返回耗时（秒）；导入失败时抛出异常"""
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+    return time.perf_counter() - started
+
+
+def start_runner() -> subprocess.Popen:
+    """启动任务执行进程（继承 TASK_EXECUTION_MODE=runner 环境变量）"""
+    return subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "task_runner.py")], cwd=BACKEND_DIR)
+
+
+def stop_runner(runner: subprocess.Popen):
+    """通知任务执行进程停止，等待执行中的任务处理完毕"""
+    if runner.poll() is not None:
+        return
+    runner.send_signal(signal.SIGTERM)
+    try:
+        runner.wait(timeout=settings.TASK_RUNNER_DRAIN_SECONDS + 30)
+    except subprocess.TimeoutExpired:
+        print("任务执行进程未按时退出，强制结束")
+        runner.kill()
+        runner.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生产环境启动：多worker HTTP服务 + 任务执行进程")
+    parser.add_argument("--host", default=settings.SERVER_HOST, help=f"监听地址（默认: {settings.SERVER_HOST}）")
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT, help=f"监听端口（默认: {settings.SERVER_PORT}）")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="HTTP worker进程数（默认: SERVER_WORKERS，未配置时为CPU核数）")
+    parser.add_argument("--no-runner", action="store_true", help="不启动任务执行进程（单独部署task_runner.py时）")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers 必须大于0")
+
+    # worker和任务执行进程通过环境变量继承执行模式：API进程只把任务加入队列
+    os.environ["TASK_EXECUTION_MODE"] = "runner"
+    settings.TASK_EXECUTION_MODE = "runner"
+
+    # 各worker和任务执行进程写入指标快照的目录，/metrics 合并；主进程不处理请求，预加载时不写快照
+    metrics_dir = settings.METRICS_SHARED_DIR or os.path.join(BACKEND_DIR, "storage", "metrics")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    settings.METRICS_SHARED_DIR = ""
+
+    try:
+        elapsed = preload_app()
+    except Exception as e:
+        print(f"❌ 应用导入失败: {e}")
+        return 1
+
+    os.environ["METRICS_SHARED_DIR"] = metrics_dir
+    settings.METRICS_SHARED_DIR = metrics_dir  # 单worker时主进程即worker，合并任务执行进程的快照
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    connections = args.workers * (settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW)
+    print(f"应用导入耗时 {elapsed:.2f}s")
+    print(f"启动 {args.workers} 个worker（{loop} + {http}），监听 {args.host}:{args.port}，"
+          f"数据库连接上限 {connections}")
+
+    runner = None if args.no_runner else start_runner()
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            loop=loop,
+            http=http,
+            proxy_headers=True,
+            timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+            log_level="debug" if settings.DEBUG else "info",
+        )
+    finally:
+        if runner is not None:
+            stop_runner(runner)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
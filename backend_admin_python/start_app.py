@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-应用启动脚本
+应用启动脚本（开发环境：检查依赖并以自动重载模式启动单个进程）
+生产环境请使用 serve.py（多worker、独立任务执行进程、SIGTERM优雅停止）
 """
 import sys
 import os
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+任务执行进程
+TASK_EXECUTION_MODE=runner 时按排队顺序领取并执行压测任务，由 serve.py 启动，也可单独部署：
+    TASK_EXECUTION_MODE=runner python3 task_runner.py
+
+收到SIGTERM/SIGINT后不再领取新任务，等待执行中的任务完成（最多 TASK_RUNNER_DRAIN_SECONDS 秒），
+超时的任务终止压测脚本并回到待执行状态，下次启动时重新执行
+"""
+import sys
+import signal
+import asyncio
+import argparse
+from typing import Dict
+from app.database import SessionLocal
+from app.models import *  # 导入所有模型，确保关系映射完整
+from app.services.task_runner_service import TaskRunnerService
+from app.utils.background_tasks import run_task_in_background
+from app.utils.logger import logger
+from app.utils.metrics import start_snapshot_writer
+from config.settings import settings
+
+
+async def run(concurrency: int, poll_seconds: float, drain_seconds: int) -> int:
+    """领取并执行排队任务，直到收到停止信号"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    db = SessionLocal()
+    try:
+        recovered = TaskRunnerService.recover(db)
+    finally:
+        db.close()
+    if recovered:
+        logger.warning(f"任务执行进程启动：{recovered} 个上次未完成的任务重新排队")
+    logger.info(f"任务执行进程已启动，并发 {concurrency}，轮询间隔 {poll_seconds}s")
+
+    jobs: Dict[int, asyncio.Task] = {}
+    while not stop.is_set():
+        for task_id in [task_id for task_id, job in jobs.items() if job.done()]:
+            jobs.pop(task_id)
+
+        db = SessionLocal()
+        try:
+            # 执行中被取消的任务：终止压测脚本
+            for task_id in TaskRunnerService.cancelled(db, jobs):
+                logger.info(f"任务 {task_id} 已取消，终止压测脚本")
+                jobs[task_id].cancel()
+            while len(jobs) < concurrency:
+                task_id = TaskRunnerService.claim_next(db)
+                if task_id is None:
+                    break
+                logger.info(f"领取任务 {task_id}")
+                jobs[task_id] = asyncio.create_task(run_task_in_background(None, task_id))
+        except Exception as e:
+            logger.error(f"领取任务失败: {str(e)}")
+        finally:
+            db.close()
+
+        TaskRunnerService.write_state(jobs)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    # 停止：等待执行中的任务，超时的终止并重新排队
+    running = {task_id: job for task_id, job in jobs.items() if not job.done()}
+    TaskRunnerService.write_state(running, draining=True)
+    pending = set()
+    if running:
+        logger.info(f"任务执行进程停止中，等待 {len(running)} 个执行中的任务（最多 {drain_seconds}s）")
+        _, pending = await asyncio.wait(running.values(), timeout=drain_seconds)
+        for job in pending:
+            job.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    interrupted = [task_id for task_id, job in running.items() if job in pending]
+    if interrupted:
+        db = SessionLocal()
+        try:
+            count = TaskRunnerService.requeue(db, interrupted, "服务停止，压测已终止，任务重新排队")
+        finally:
+            db.close()
+        logger.warning(f"{count} 个任务未在停止等待时间内完成，已重新排队: {interrupted}")
+    TaskRunnerService.clear_state()
+    logger.info("任务执行进程已停止")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按排队顺序执行压测任务（TASK_EXECUTION_MODE=runner）")
+    parser.add_argument("--concurrency", type=int, default=settings.TASK_RUNNER_CONCURRENCY,
+                        help=f"同时执行的任务数（默认: {settings.TASK_RUNNER_CONCURRENCY}）")
+    parser.add_argument("--poll-seconds", type=float, default=settings.TASK_RUNNER_POLL_SECONDS,
+                        help=f"轮询间隔秒数（默认: {settings.TASK_RUNNER_POLL_SECONDS}）")
+    parser.add_argument("--drain-seconds", type=int, default=settings.TASK_RUNNER_DRAIN_SECONDS,
+                        help=f"停止时等待执行中任务的秒数（默认: {settings.TASK_RUNNER_DRAIN_SECONDS}）")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency 必须大于0")
+    # 任务日志写入量等指标由API进程的 /metrics 合并输出
+    if settings.METRICS_SHARED_DIR:
+        start_snapshot_writer(settings.METRICS_SHARED_DIR, settings.METRICS_SNAPSHOT_SECONDS)
+    return asyncio.run(run(args.concurrency, args.poll_seconds, args.drain_seconds))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
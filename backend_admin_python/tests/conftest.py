@@ -0,0 +1,98 @@
+"""
+测试公共fixture
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import *  # 导入所有模型，确保建表完整
+from app.models.user import User, UserRole
+from app.models.apply_task import ApplyTask, AuditStatus
+from app.models.task import Task, TaskStatus
+
+
+@pytest.fixture
+def sqlite_connect():
+    """创建内存SQLite连接的函数，测试可覆盖该fixture包装DBAPI连接（如统计读取的数据量）"""
+    return lambda: sqlite3.connect(":memory:", check_same_thread=False)
+
+
+@pytest.fixture
+def db(sqlite_connect):
+    """基于内存SQLite的数据库会话，每个测试独立建表"""
+    connection = sqlite_connect()
+    engine = create_engine("sqlite://", creator=lambda: connection, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def admin_user(db):
+    """管理员用户"""
+    admin = User(username="admin", email="admin@example.com", password_hash="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    return admin
+
+
+@pytest.fixture
+def approved_apply(db, admin_user):
+    """管理员提交的已审核通过的压测申请"""
+    apply_task = ApplyTask(
+        user_id=admin_user.id, application_name="申请", domain="svc.example.com",
+        url="https://svc.example.com/", record_info="备案", audit_status=AuditStatus.APPROVED
+    )
+    db.add(apply_task)
+    db.commit()
+    return apply_task
+
+
+@pytest.fixture
+def make_task(db, admin_user, approved_apply):
+    """
+    创建压测任务：目标为approved_apply的URL，默认100并发、30秒、4线程
+    用法：task = make_task(TaskStatus.COMPLETED, duration="3600s")
+    """
+    def factory(status=TaskStatus.PENDING, **fields):
+        fields.setdefault("target_url", approved_apply.url)
+        fields.setdefault("concurrency", 100)
+        fields.setdefault("duration", "30s")
+        fields.setdefault("threads", 4)
+        task = Task(apply_id=approved_apply.id, status=status, created_by=admin_user.id, **fields)
+        db.add(task)
+        db.commit()
+        return task
+
+    return factory
+
+
+@pytest.fixture
+def make_client(db):
+    """
+    创建测试客户端：挂载全部API路由，数据库使用db fixture，当前用户固定为传入的用户
+    用法：client = make_client(user)
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api import api_router
+    from app.database import get_db
+    from app.utils.auth import get_current_user, get_current_active_user, get_current_admin_user
+
+    def factory(user):
+        app = FastAPI()
+        app.include_router(api_router)
+        app.dependency_overrides[get_db] = lambda: db
+        for dependency in (get_current_user, get_current_active_user, get_current_admin_user):
+            app.dependency_overrides[dependency] = lambda: user
+        return TestClient(app)
+
+    return factory
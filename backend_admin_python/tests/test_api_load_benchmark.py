@@ -0,0 +1,64 @@
+"""
+API负载基准测试：基线对比判定和小规模端到端运行
+"""
+import os
+import json
+import subprocess
+import sys
+import importlib.util
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(BACKEND_DIR, "benchmarks", "api_load.py")
+
+spec = importlib.util.spec_from_file_location("api_load", SCRIPT)
+api_load = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(api_load)
+
+
+def _results(p50=10.0, p99=30.0, rps=500.0, errors=0, **meta):
+    return {
+        "meta": {"database": "sqlite", "volumes": {"tasks": 500}, "concurrency": 8,
+                 "requests": 200, "rounds": 3, "target": "in-process", **meta},
+        "endpoints": {"task_list": {"p50_ms": p50, "p99_ms": p99, "throughput_rps": rps, "errors": errors}},
+    }
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = _results()
+    # 容差以内，或超出比例但绝对差值小于1ms：不判定回归
+    assert api_load.compare(_results(p50=11.9, p99=44.0, rps=410.0), baseline, 0.2, 0.5, 1.0) == []
+    assert api_load.compare(_results(p50=0.9), _results(p50=0.5), 0.2, 0.5, 1.0) == []
+
+    regressions = api_load.compare(_results(p50=13.0, p99=50.0, rps=390.0, errors=2), baseline, 0.2, 0.5, 1.0)
+    assert len(regressions) == 4
+    assert regressions[0] == "task_list: 2 个错误响应"
+
+
+def test_comparable_requires_same_configuration():
+    assert api_load.comparable(_results(), _results()) is None
+    reason = api_load.comparable(_results(concurrency=16, volumes={"tasks": 50000}), _results())
+    assert "volumes" in reason and "concurrency" in reason
+
+
+def test_small_scale_run_against_baseline(tmp_path):
+    env = dict(os.environ, WRK_REPORT_DIR=str(tmp_path), STORAGE_LOG_DIR=str(tmp_path / "logs"))
+
+    def run(*extra):
+        args = [
+            sys.executable, SCRIPT, "--scale", "0.0002", "--requests", "5", "--warmup", "1", "--rounds", "1",
+            "--endpoints", "task_list", "task_logs", "report_by_task",
+            "--database-url", f"sqlite:///{tmp_path / 'bench.db'}",
+            "--baseline", str(tmp_path / "baseline.json"), "--output", str(tmp_path / "latest.json"), *extra,
+        ]
+        return subprocess.run(args, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+
+    saved = run("--concurrency", "2", "--save-baseline")
+    assert saved.returncode == 0, saved.stdout[-2000:] + saved.stderr[-2000:]
+
+    baseline = json.loads((tmp_path / "baseline.json").read_text(encoding="utf-8"))
+    assert baseline["meta"]["volumes"]["task_logs"] == 1000
+    assert set(baseline["endpoints"]) == {"task_list", "task_logs", "report_by_task"}
+    assert all(item["errors"] == 0 for item in baseline["endpoints"].values())
+
+    # 并发不同，结果不可比
+    assert run("--concurrency", "1").returncode == 2
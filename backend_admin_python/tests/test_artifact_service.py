@@ -0,0 +1,72 @@
+"""
+报告产物存储测试：内容寻址去重、预览图生成、引用计数删除
+"""
+import os
+
+import pytest
+from PIL import Image
+
+from app.models.report import Report, ReportType, ReportStatus
+from app.services.artifact_service import ArtifactService
+from config.settings import settings
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "ARTIFACT_PREVIEW_MAX_WIDTH", 200)
+    csv_file = tmp_path / "result.csv"
+    csv_file.write_text("测试项,并发数,QPS\n首页,100,1200\n", encoding="utf-8")
+    return str(csv_file)
+
+
+def render_png(calls):
+    """模拟图片报告渲染：生成1000x500的PNG，记录调用次数"""
+    def render(csv_file_path, output_dir):
+        calls.append(csv_file_path)
+        path = os.path.join(output_dir, "外网压测_分析报告_20240101_000000.png")
+        Image.new("RGB", (1000, 500), "white").save(path)
+        return path
+    return render
+
+
+def test_identical_input_is_rendered_once(upload_dir):
+    calls = []
+    first = ArtifactService.get_or_render(upload_dir, "image:test:v1", "png", render_png(calls))
+    second = ArtifactService.get_or_render(upload_dir, "image:test:v1", "png", render_png(calls))
+
+    assert len(calls) == 1
+    assert not first["deduplicated"] and second["deduplicated"]
+    assert first["upload_path"] == second["upload_path"]
+    assert first["upload_path"] == f"/uploads/artifacts/{first['key'][:2]}/{first['key']}.png"
+
+    with Image.open(ArtifactService.to_file_path(first["preview_path"])) as preview:
+        assert preview.format == "WEBP"
+        assert preview.size == (200, 100)
+
+    # 渲染器版本变化时重新渲染
+    upgraded = ArtifactService.get_or_render(upload_dir, "image:test:v2", "png", render_png(calls))
+    assert len(calls) == 2
+    assert upgraded["key"] != first["key"]
+
+
+def test_release_keeps_shared_artifact(db, upload_dir):
+    artifact = ArtifactService.get_or_render(upload_dir, "image:test:v1", "png", render_png([]))
+    reports = [
+        Report(
+            task_id=task_id, apply_id=1, report_type=ReportType.IMAGE, status=ReportStatus.COMPLETED,
+            file_path=artifact["upload_path"], content_hash=artifact["key"], preview_path=artifact["preview_path"]
+        )
+        for task_id in (1, 2)
+    ]
+    db.add_all(reports)
+    db.commit()
+
+    assert not ArtifactService.release(db, reports[0])
+    db.delete(reports[0])
+    db.commit()
+    assert os.path.exists(artifact["path"])
+
+    assert ArtifactService.release(db, reports[1])
+    assert not os.path.exists(artifact["path"])
+    assert not os.path.exists(ArtifactService.to_file_path(artifact["preview_path"]))
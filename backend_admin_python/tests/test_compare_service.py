@@ -0,0 +1,106 @@
+"""
+压测结果比较与回归检测测试
+"""
+import random
+import pytest
+
+from app.models.user import User
+from app.models.apply_task import ApplyTask
+from app.models.task import Task, TaskStatus
+from app.models.result import Result
+from app.services.compare_service import CompareService
+from app.utils.stats import mann_whitney_u, mann_whitney_u_grouped, histogram_percentile
+
+
+def _create_run(db, apply_task, user, qps, latency_ms, seed):
+    """创建一次已完成的压测，每秒请求数和延迟直方图围绕给定值波动"""
+    rng = random.Random(seed)
+    task = Task(
+        apply_id=apply_task.id, target_url=apply_task.url, concurrency=500,
+        duration="30s", threads=4, status=TaskStatus.COMPLETED, created_by=user.id
+    )
+    db.add(task)
+    db.commit()
+
+    histogram = [[round(latency_ms * (0.5 + i / 10), 3), 100 + rng.randint(0, 20)] for i in range(10)]
+    db.add(Result(
+        task_id=task.id,
+        qps=qps,
+        avg_latency_ms=latency_ms,
+        p95_latency_ms=latency_ms * 1.4,
+        p99_latency_ms=latency_ms * 1.5,
+        raw_result_json={"metrics": {
+            "requests_per_second": [qps + rng.uniform(-qps * 0.02, qps * 0.02) for _ in range(30)],
+            "latency_histogram_ms": histogram,
+        }}
+    ))
+    db.commit()
+    return task
+
+
+@pytest.fixture
+def apply_task(db):
+    user = User(username="tester", email="tester@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    apply_task = ApplyTask(
+        user_id=user.id, application_name="回归检测", domain="example.com",
+        url="https://example.com/", record_info="备案"
+    )
+    db.add(apply_task)
+    db.commit()
+    return apply_task
+
+
+def test_mann_whitney_u_detects_shift():
+    _, p_same = mann_whitney_u([1, 2, 3, 4, 5] * 4, [1, 2, 3, 4, 5] * 4)
+    _, p_shift = mann_whitney_u(list(range(20)), list(range(15, 35)))
+    assert p_same > 0.9
+    assert p_shift < 0.001
+
+
+def test_grouped_test_matches_raw_samples():
+    a = [1, 1, 2, 3, 3, 3]
+    b = [2, 3, 4, 4, 5]
+    assert mann_whitney_u(a, b) == pytest.approx(
+        mann_whitney_u_grouped([(1, 2), (2, 1), (3, 3)], [(2, 1), (3, 1), (4, 2), (5, 1)])
+    )
+
+
+def test_histogram_percentile():
+    assert histogram_percentile([(1.0, 50), (2.0, 45), (10.0, 5)], 95) == 2.0
+    assert histogram_percentile([(1.0, 50), (2.0, 45), (10.0, 5)], 99) == 10.0
+
+
+def test_rolling_baseline_flags_regression(db, apply_task):
+    user = db.query(User).first()
+    baseline = [_create_run(db, apply_task, user, 1000, 20, seed) for seed in range(3)]
+    candidate = _create_run(db, apply_task, user, 800, 30, 99)
+
+    report = CompareService.compare(db, candidate.id)
+
+    assert report["baseline_mode"] == "rolling"
+    assert report["baseline_task_ids"] == [t.id for t in reversed(baseline)]
+    assert report["regression"] is True
+    metrics = {m["metric"]: m for m in report["metrics"]}
+    assert metrics["qps"]["delta_percent"] == pytest.approx(-20.0, abs=0.5)
+    assert metrics["qps"]["significant"] is True
+    assert set(report["regressed_metrics"]) == {"qps", "avg_latency_ms", "p95_latency_ms", "p99_latency_ms"}
+
+
+def test_unchanged_run_is_not_regression(db, apply_task):
+    user = db.query(User).first()
+    baseline = _create_run(db, apply_task, user, 1000, 20, 1)
+    candidate = _create_run(db, apply_task, user, 1005, 20, 2)
+
+    report = CompareService.compare(db, candidate.id, baseline_task_id=baseline.id)
+
+    assert report["baseline_mode"] == "task"
+    assert report["regression"] is False
+
+
+def test_compare_without_baseline_raises(db, apply_task):
+    user = db.query(User).first()
+    candidate = _create_run(db, apply_task, user, 1000, 20, 1)
+    with pytest.raises(ValueError):
+        CompareService.compare(db, candidate.id)
@@ -0,0 +1,27 @@
+"""
+强制短连接任务测试
+"""
+from app.models.task import Task, TaskStatus
+from app.services.task_service import TaskService
+
+
+def test_connection_close_is_kept_on_retry(db, make_client, admin_user, approved_apply):
+    admin, apply_task = admin_user, approved_apply
+    client = make_client(admin)
+
+    response = client.post("/api/tasks", json={
+        "apply_id": apply_task.id, "target_url": apply_task.url, "connection_close": True
+    })
+    assert response.status_code == 201
+    assert response.json()["connection_close"] is True
+
+    task = db.query(Task).filter(Task.id == response.json()["id"]).first()
+    task.status = TaskStatus.FAILED
+    db.commit()
+
+    # 接口重试会立即在后台执行任务，这里直接调用服务层
+    retried = TaskService.retry_task(db=db, task_id=task.id, created_by=admin.id)
+    assert retried.connection_close is True
+
+    default = client.post("/api/tasks", json={"apply_id": apply_task.id, "target_url": apply_task.url})
+    assert default.json()["connection_close"] is False
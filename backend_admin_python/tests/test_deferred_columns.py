@@ -0,0 +1,130 @@
+"""
+大字段延迟加载测试：任务列表不读取原始结果JSON和日志内容，详情查询显式加载
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+from app.models.task import Task, TaskStatus
+from app.models.result import Result
+from app.models.task_log import TaskLog, LogLevel
+from app.services.compare_service import CompareService
+
+TASKS = 20
+RAW_OUTPUT = "Running 30s test @ https://svc.example.com/\n  Latency   12.00ms  C:\\logs\\wrk 首页\n" * 2000
+
+
+def _value_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return 8
+
+
+class CountingCursor:
+    """统计查询结果的字节数（相当于数据库发送给客户端的数据量）"""
+
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def _count(self, rows):
+        self._counter["bytes"] += sum(_value_size(value) for row in rows for value in row)
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, *args):
+        return self._count(self._cursor.fetchmany(*args))
+
+    def fetchall(self):
+        return self._count(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class CountingConnection:
+    def __init__(self, counter):
+        object.__setattr__(self, "_connection", sqlite3.connect(":memory:", check_same_thread=False))
+        object.__setattr__(self, "_counter", counter)
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._connection.cursor(*args, **kwargs), self._counter)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+
+@pytest.fixture
+def counter():
+    return {"bytes": 0}
+
+
+@pytest.fixture
+def sqlite_connect(counter):
+    """覆盖conftest的sqlite_connect：统计从数据库读取的字节数"""
+    return lambda: CountingConnection(counter)
+
+
+@pytest.fixture
+def completed_tasks(db, admin_user, make_task):
+    for i in range(TASKS):
+        task = make_task(TaskStatus.COMPLETED)
+        db.add(Result(task_id=task.id, qps=1000 + i, p99_latency_ms=50, error_rate=0.5, raw_result_json={
+            "metrics": {"requests_per_second": [1000, 1010]}, "raw_output": RAW_OUTPUT,
+        }))
+        for n in range(20):
+            db.add(TaskLog(task_id=task.id, log_level=LogLevel.INFO, log_message=RAW_OUTPUT[:2000]))
+    db.commit()
+    db.expunge_all()
+    return admin_user
+
+
+def test_task_list_skips_heavy_columns(db, counter, make_client, completed_tasks):
+    client = make_client(completed_tasks)
+
+    counter["bytes"] = 0
+    response = client.get("/api/tasks", params={"limit": TASKS})
+    assert response.status_code == 200
+    list_bytes = counter["bytes"]
+    items = response.json()["items"]
+    assert len(items) == TASKS
+    assert items[0]["result"] == {"qps": 1000 + TASKS - 1, "p99_latency_ms": 50.0, "error_rate": 0.5}
+
+    # 对照：同样的查询显式加载原始结果JSON（延迟加载之前的行为）
+    db.expunge_all()
+    counter["bytes"] = 0
+    db.query(Task).options(selectinload(Task.result).undefer(Result.raw_result_json)).limit(TASKS).all()
+    full_bytes = counter["bytes"]
+
+    assert full_bytes > len(RAW_OUTPUT) * TASKS
+    assert list_bytes * 10 < full_bytes
+
+
+def test_heavy_columns_require_explicit_load(db, completed_tasks):
+    result = db.query(Result).first()
+    with pytest.raises(InvalidRequestError):
+        result.raw_result_json
+    log = db.query(TaskLog).first()
+    with pytest.raises(InvalidRequestError):
+        log.log_message
+
+    # 详情查询显式加载
+    run = CompareService.load_run(db, result.task_id)
+    assert run["requests_per_second"] == [1000.0, 1010.0]
@@ -0,0 +1,77 @@
+"""
+响应压缩和文件下载（ETag/Range）测试
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware, choose_encoding
+from app.utils.file_response import RangeFileResponse, is_content_addressed
+
+
+@pytest.fixture
+def client(tmp_path):
+    report = tmp_path / "report.pdf"
+    report.write_bytes(bytes(range(256)) * 40)
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/report")
+    async def report_file():
+        return RangeFileResponse(report, filename="report.pdf")
+
+    @app.get("/items")
+    async def items(size: int = 100):
+        return {"items": [{"id": i, "name": f"item-{i}"} for i in range(size)]}
+
+    return TestClient(app)
+
+
+def test_range_and_conditional_requests(client):
+    full = client.get("/report")
+    assert full.status_code == 200
+    assert full.headers["content-type"] == "application/pdf"
+    assert full.headers["accept-ranges"] == "bytes"
+    assert "content-encoding" not in full.headers
+    etag = full.headers["etag"]
+    assert not etag.startswith("W/")
+
+    partial = client.get("/report", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(full.content)}"
+    assert partial.content == full.content[100:200]
+
+    suffix = client.get("/report", headers={"Range": "bytes=-10"})
+    assert suffix.content == full.content[-10:]
+
+    assert client.get("/report", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/report", headers={"Range": "bytes=999999-"}).status_code == 416
+    # 文件版本已变化时忽略Range，返回完整文件
+    stale = client.get("/report", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert len(stale.content) == len(full.content)
+
+
+def test_json_compressed_above_threshold(client):
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["items"]) == 100
+
+    # content-length为压缩后大小，response.content为解压后内容
+    assert int(response.headers["content-length"]) < len(response.content)
+
+    small = client.get("/items", params={"size": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    identity = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+
+def test_choose_encoding_and_content_addressing():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
+    assert is_content_addressed("/uploads/artifacts/3f2a9c0e4b1d8a7f6e5d4c3b2a1f0e9d8c7b6a5f4e3d2c1b0a9f8e7d6c5b4a3f.png")
+    assert not is_content_addressed("/uploads/images/report_20240101120000.png")
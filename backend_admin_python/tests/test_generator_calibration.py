@@ -0,0 +1,151 @@
+"""
+替身目标服务器和压测客户端上限校准测试：状态码/响应大小分布、连接复用、接近上限的警告
+"""
+import os
+import re
+import json
+import socket
+import subprocess
+import sys
+import http.client
+from collections import Counter
+
+import pytest
+
+from app.models.report import ReportType
+from app.models.result import Result
+from app.models.task import TaskStatus
+from app.services.artifact_service import ArtifactService
+from app.services.calibration_service import CalibrationService
+from app.services.report_service import ReportService
+from config.settings import settings
+from report_module.summary_generator import OVERVIEW_COLUMNS, render_markdown
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STANDIN_SERVER = os.path.join(os.path.dirname(BACKEND_DIR), "backend_admin_wrk_bash", "tools", "standin_server.py")
+
+
+@pytest.fixture
+def standin():
+    """以随机端口启动替身服务器，返回启动函数"""
+    processes = []
+
+    def start(*args):
+        process = subprocess.Popen(
+            [sys.executable, STANDIN_SERVER, "--port", "0", "--seed", "7", *args],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        processes.append(process)
+        line = process.stdout.readline()
+        match = re.search(r":(\d+)/", line)
+        assert match, line + process.stdout.read()
+        return int(match.group(1))
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_standin_status_and_size_mix(standin):
+    port = standin("--workers", "2", "--status-mix", "200:80,503:20", "--size", "100:1,2000:1", "--latency", "uniform:0,2")
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    statuses, sizes = Counter(), Counter()
+    for _ in range(400):
+        connection.request("GET", "/")
+        response = connection.getresponse()
+        body = response.read()
+        assert int(response.getheader("Content-Length")) == len(body)
+        statuses[response.status] += 1
+        sizes[len(body)] += 1
+    connection.close()
+
+    assert set(statuses) == {200, 503} and 40 < statuses[503] < 130
+    assert set(sizes) == {100, 2000}
+
+
+def test_standin_keepalive_and_pipelining(standin):
+    port = standin("--keepalive-requests", "3", "--latency", "exponential:2")
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        # 流水线发送4个请求（第2个带请求体）：按顺序响应3个，第3个响应后关闭连接
+        sock.sendall(b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n"
+                     b"POST /b HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\n\r\nhello"
+                     b"GET /c HTTP/1.1\r\nHost: x\r\n\r\n"
+                     b"GET /d HTTP/1.1\r\nHost: x\r\n\r\n")
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    assert data.count(b"HTTP/1.1 200 OK") == 3
+    assert data.count(b"Connection: close") == 1 and data.rindex(b"Connection: close") > data.rindex(b"HTTP/1.1")
+
+    # 客户端要求关闭连接时响应后关闭
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request("GET", "/", headers={"Connection": "close"})
+    response = connection.getresponse()
+    assert response.getheader("Connection") == "close" and len(response.read()) == 512
+
+
+def test_standin_rejects_bad_distribution():
+    result = subprocess.run([sys.executable, STANDIN_SERVER, "--latency", "gamma:1"], capture_output=True, text=True)
+    assert result.returncode == 2 and "延迟分布格式错误" in result.stderr
+
+
+@pytest.fixture
+def calibration(tmp_path, monkeypatch):
+    path = tmp_path / "generator.json"
+    path.write_text(json.dumps({
+        "schema_version": 1, "measured_at": "2026-10-19T00:00:00Z", "max_qps": 100000.0, "max_qps_tls": 20000.0,
+    }))
+    monkeypatch.setattr(settings, "GENERATOR_CALIBRATION_FILE", str(path))
+    monkeypatch.setattr(settings, "GENERATOR_CEILING_WARN_PERCENT", 20.0)
+    return path
+
+
+def test_ceiling_assessment(calibration, monkeypatch):
+    assert CalibrationService.assess(50000, "http://svc.example.com/")["near_ceiling"] is False
+
+    # HTTPS目标与TLS上限比较
+    assessment = CalibrationService.assess(18000, "https://svc.example.com/")
+    assert assessment["scheme"] == "https" and assessment["ceiling_qps"] == 20000.0
+    assert assessment["near_ceiling"] is True and assessment["ratio"] == 0.9
+    assert "90.0%" in CalibrationService.describe(assessment, 18000)
+
+    monkeypatch.setattr(settings, "GENERATOR_CALIBRATION_FILE", str(calibration) + ".missing")
+    assert CalibrationService.assess(18000) is None
+    assert CalibrationService.fingerprint() is None
+
+
+def test_report_warns_near_ceiling(calibration):
+    best = {field: None for _, field, _ in OVERVIEW_COLUMNS}
+    best.update(test_item="首页", concurrency=500.0, qps=85000.0, errors=0)
+    data = {"rows": [best], "series": [], "best": best, "total_errors": 0, "status_codes": {},
+            "avg_cpu": None, "avg_memory": None, "intervals": {},
+            "generator_ceiling": CalibrationService.assess(best["qps"])}
+    content = render_markdown(data)
+    assert "达到压测客户端上限 100000.0" in content and "85.0%" in content
+
+    data["generator_ceiling"] = CalibrationService.assess(60000.0)
+    assert "压测客户端上限" not in render_markdown(data)
+
+
+def test_https_report_uses_tls_ceiling(db, tmp_path, monkeypatch, calibration, make_task):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("测试项,并发数,QPS,平均延迟(ms),错误数\n首页,500,18000,20.5,0\n", encoding="utf-8")
+
+    # 同一数据文件：HTTP目标未接近10万的上限，HTTPS目标达到2万TLS上限的90%
+    contents = {}
+    for url in ("http://svc.example.com/", "https://svc.example.com/"):
+        task = make_task(TaskStatus.COMPLETED, target_url=url)
+        db.add(Result(task_id=task.id, qps=18000.0, data_file_path=str(csv_path)))
+        db.commit()
+        report, = ReportService.generate_reports_for_task(db, task.id, [ReportType.MARKDOWN])
+        with open(ArtifactService.to_file_path(report.file_path), encoding="utf-8") as f:
+            contents[url] = f.read()
+
+    assert "压测客户端上限" not in contents["http://svc.example.com/"]
+    assert "达到压测客户端上限 20000.0（HTTPS" in contents["https://svc.example.com/"]
+    assert CalibrationService.fingerprint("https://svc.example.com/") != CalibrationService.fingerprint("http://svc.example.com/")
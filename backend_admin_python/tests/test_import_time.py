@@ -0,0 +1,41 @@
+"""
+API启动导入开销测试：app.main 不加载报告生成才用到的重量级库，导入耗时不超过预算
+"""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在生成报告、读取数据文件时按需导入的库
+LAZY_MODULES = ("matplotlib", "pandas", "numpy", "reportlab", "pyarrow", "PIL")
+
+# app.main 累计导入耗时预算（微秒）：当前约1.4秒，主要是fastapi和sqlalchemy
+IMPORT_BUDGET_US = 3_000_000
+
+
+def _import_times(tmp_path) -> dict:
+    """以 -X importtime 在子进程中导入 app.main，返回 {模块名: 累计耗时（微秒）}"""
+    env = dict(os.environ, WRK_REPORT_DIR=str(tmp_path))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_skips_report_libraries(tmp_path):
+    times = _import_times(tmp_path)
+
+    loaded = sorted({name.split(".")[0] for name in times} & set(LAZY_MODULES))
+    assert loaded == []
+    assert times["app.main"] < IMPORT_BUDGET_US
@@ -0,0 +1,103 @@
+"""
+列表接口SQL语句数测试：每页语句数不随分页大小变化（无N+1懒加载）
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.user import User, UserRole
+from app.models.apply_task import ApplyTask, AuditStatus
+from app.models.task import Task, TaskStatus
+from app.models.result import Result
+from app.models.report import Report, ReportType, ReportStatus
+
+
+class StatementCounter:
+    """统计引擎上执行的SQL语句数"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.fixture
+def seeded(db, admin_user):
+    """普通用户的60个申请（每个带一个已完成任务、结果和报告）"""
+    admin = admin_user
+    user = User(username="user", email="user@example.com", password_hash="x", role=UserRole.USER)
+    db.add(user)
+    db.commit()
+
+    for i in range(60):
+        apply_task = ApplyTask(
+            user_id=user.id, application_name=f"申请{i}", domain=f"svc{i}.example.com",
+            url=f"https://svc{i}.example.com/", record_info="备案", audit_status=AuditStatus.APPROVED
+        )
+        db.add(apply_task)
+        db.flush()
+        task = Task(
+            apply_id=apply_task.id, target_url=apply_task.url, concurrency=100, duration="30s",
+            threads=4, status=TaskStatus.COMPLETED, created_by=admin.id
+        )
+        db.add(task)
+        db.flush()
+        db.add(Result(task_id=task.id, qps=1000))
+        db.add(Report(
+            task_id=task.id, apply_id=apply_task.id, report_type=ReportType.PDF,
+            file_path=f"/uploads/report_{i}.pdf", status=ReportStatus.COMPLETED
+        ))
+    db.commit()
+    return admin, user
+
+
+def _count_statements(db, client, url):
+    db.expire_all()
+    with StatementCounter(db.get_bind()) as counter:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    return counter.count, response.json()
+
+
+@pytest.mark.parametrize("role, url", [
+    ("admin", "/api/apply?limit={size}"),
+    ("user", "/api/apply?limit={size}"),
+    ("admin", "/api/tasks?limit={size}"),
+    ("admin", "/api/reports?limit={size}"),
+])
+def test_statements_per_page_constant(db, make_client, seeded, role, url):
+    admin, user = seeded
+    client = make_client(admin if role == "admin" else user)
+
+    small, small_body = _count_statements(db, client, url.format(size=5))
+    large, large_body = _count_statements(db, client, url.format(size=50))
+
+    assert len(small_body["items"]) == 5
+    assert len(large_body["items"]) == 50
+    assert small == large
+
+
+def test_user_apply_list_fields(db, make_client, seeded):
+    _, user = seeded
+    body = make_client(user).get("/api/apply?limit=1").json()
+    item = body["items"][0]
+    assert body["total"] == 60
+    assert item["concurrent_users"] == 100
+    assert item["status"] == "approved"
+    assert "record_info" not in item
+
+
+def test_apply_detail_maps_orm_fields(db, make_client, seeded):
+    _, user = seeded
+    apply_id = db.query(ApplyTask.id).first().id
+    item = make_client(user).get(f"/api/apply/{apply_id}").json()
+    assert item["concurrent_users"] == 100
+    assert item["status"] == "approved"
@@ -0,0 +1,125 @@
+"""
+任务日志归档测试：日志和raw_output归档后读取一致、按after_id跳过压缩块、分页、失败时回滚并删除归档文件
+"""
+import os
+
+import pytest
+from sqlalchemy.orm import undefer
+
+from app.models.task import TaskStatus
+from app.models.result import Result
+from app.models.task_log import TaskLog, LogLevel
+from app.models.task_log_archive import TaskLogArchive
+from app.services import archive_service
+from app.services.archive_service import TaskLogArchiveService
+from config.settings import settings
+
+RAW_OUTPUT = "Running 30s test @ https://svc.example.com/\nRequests/sec:   1234.56\n"
+
+
+@pytest.fixture
+def finished_task(db, tmp_path, monkeypatch, make_task):
+    """已完成的任务：10条日志（每个压缩块4条）和原始压测输出"""
+    monkeypatch.setattr(settings, "TASK_LOG_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "TASK_LOG_ARCHIVE_CHUNK_SIZE", 4)
+    task = make_task(TaskStatus.COMPLETED)
+    for i in range(10):
+        db.add(TaskLog(task_id=task.id, log_level=LogLevel.WARNING if i % 3 else LogLevel.INFO, log_message=f"日志{i}"))
+    db.add(Result(task_id=task.id, qps=1234.56, raw_result_json={"qps": 1234.56, "raw_output": RAW_OUTPUT}))
+    db.commit()
+    return task
+
+
+def test_archive_round_trip(db, finished_task):
+    task = finished_task
+    live_logs = TaskLogArchiveService.get_task_logs(db, task.id, limit=100)
+
+    archive = TaskLogArchiveService.archive_task(db, task.id)
+    assert archive.log_count == 10 and len(archive.chunk_index["chunks"]) == 3
+    assert os.path.exists(archive.file_path) and not os.path.exists(archive.file_path + ".tmp")
+    assert db.query(TaskLog).filter(TaskLog.task_id == task.id).count() == 0
+
+    result = db.query(Result).options(undefer(Result.raw_result_json)).filter(Result.task_id == task.id).first()
+    assert result.raw_result_json == {"qps": 1234.56, "raw_output_archived": True}
+
+    assert TaskLogArchiveService.get_task_logs(db, task.id, limit=100) == live_logs
+    assert TaskLogArchiveService.get_raw_output(db, task.id) == RAW_OUTPUT
+    with pytest.raises(ValueError):
+        TaskLogArchiveService.archive_task(db, task.id)
+
+
+def test_archived_pagination_matches_live(db, finished_task):
+    task = finished_task
+    pages = [(skip, limit) for skip in range(0, 12, 3) for limit in (1, 3, 5)]
+    live_pages = [TaskLogArchiveService.get_task_logs(db, task.id, skip=skip, limit=limit) for skip, limit in pages]
+
+    TaskLogArchiveService.archive_task(db, task.id)
+    assert [TaskLogArchiveService.get_task_logs(db, task.id, skip=skip, limit=limit) for skip, limit in pages] == live_pages
+    assert TaskLogArchiveService.get_task_logs(db, task.id, skip=10) == []
+
+
+def test_archived_reads_skip_unneeded_chunks(db, finished_task, monkeypatch):
+    task = finished_task
+    ids = [log.id for log in db.query(TaskLog.id).filter(TaskLog.task_id == task.id).order_by(TaskLog.id)]
+    archive = TaskLogArchiveService.archive_task(db, task.id)
+
+    reads = []
+    read_block = TaskLogArchiveService._read_block
+
+    def counting_read_block(archive, offset, length):
+        reads.append(offset)
+        return read_block(archive, offset, length)
+
+    monkeypatch.setattr(TaskLogArchiveService, "_read_block", staticmethod(counting_read_block))
+
+    # 增量读取：after_id之前的块不解压
+    logs = TaskLogArchiveService.read_archived_logs(archive, after_id=ids[8])
+    assert [log["id"] for log in logs] == [ids[9]]
+    assert reads == [archive.chunk_index["chunks"][2]["offset"]]
+
+    # 增量读取取满limit条后不再解压后续的块
+    reads.clear()
+    logs = TaskLogArchiveService.read_archived_logs(archive, after_id=ids[0], limit=3)
+    assert [log["id"] for log in logs] == ids[3:0:-1]
+    assert reads == [archive.chunk_index["chunks"][0]["offset"]]
+
+    # 倒序分页：最新的两条只在最后一个块中
+    reads.clear()
+    logs = TaskLogArchiveService.read_archived_logs(archive, limit=2)
+    assert [log["id"] for log in logs] == [ids[9], ids[8]]
+    assert len(reads) == 1
+
+
+def test_archive_rolls_back_on_commit_failure(db, finished_task, monkeypatch):
+    task = finished_task
+
+    def failing_commit():
+        raise RuntimeError("数据库不可用")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "commit", failing_commit)
+        with pytest.raises(RuntimeError):
+            TaskLogArchiveService.archive_task(db, task.id)
+
+    assert os.listdir(settings.TASK_LOG_ARCHIVE_DIR) == []
+    assert db.query(TaskLogArchive).count() == 0
+    assert db.query(TaskLog).filter(TaskLog.task_id == task.id).count() == 10
+    assert TaskLogArchiveService.get_raw_output(db, task.id) == RAW_OUTPUT
+
+
+def test_archive_removes_partial_file_on_write_failure(db, finished_task, monkeypatch):
+    task = finished_task
+    compress = archive_service._compress
+
+    def failing_compress(data, compression):
+        # 前两个块写入后失败
+        if "日志8".encode("utf-8") in data:
+            raise OSError("磁盘已满")
+        return compress(data, compression)
+
+    monkeypatch.setattr(archive_service, "_compress", failing_compress)
+    with pytest.raises(OSError):
+        TaskLogArchiveService.archive_task(db, task.id)
+
+    assert os.listdir(settings.TASK_LOG_ARCHIVE_DIR) == []
+    assert db.query(TaskLog).filter(TaskLog.task_id == task.id).count() == 10
@@ -0,0 +1,94 @@
+"""
+平台指标测试：文本格式、多进程快照合并、请求耗时中间件和 /metrics 接口、连接池等待时间
+"""
+import json
+import os
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.database import TimedQueuePool, get_db
+from app.utils.metrics import DB_POOL_WAIT, Counter, Gauge, Histogram, Registry
+from config.settings import settings
+
+
+def test_render_openmetrics():
+    registry = Registry()
+    requests = Counter("demo_requests", "请求数", ("route",), registry=registry)
+    requests.preallocate([("/a",), ("/b",)])
+    requests.labels("/a").inc(3)
+    Gauge("demo_in_flight", "处理中", registry=registry).set(2)
+    latency = Histogram("demo_latency_seconds", "耗时", ("route",), registry=registry, buckets=(0.1, 1.0))
+    latency.preallocate([("/a",), ("/b",)])
+    latency.labels("/a").observe(0.05)
+    latency.labels("/a").observe(0.5)
+
+    body = registry.render()
+    assert "# TYPE demo_requests counter" in body
+    # 预先创建的计数器输出0，未出现过的直方图标签组合不输出
+    assert 'demo_requests_total{route="/a"} 3' in body and 'demo_requests_total{route="/b"} 0' in body
+    assert "demo_in_flight 2" in body
+    assert 'demo_latency_seconds_bucket{route="/a",le="0.1"} 1' in body
+    assert 'demo_latency_seconds_bucket{route="/a",le="+Inf"} 2' in body
+    assert 'demo_latency_seconds_count{route="/a"} 2' in body
+    assert 'route="/b",le' not in body
+    assert body.endswith("# EOF\n")
+    # Prometheus文本格式：计数器类型行带_total后缀，没有EOF
+    assert "# TYPE demo_requests_total counter" in registry.render(openmetrics=False)
+
+
+def test_merge_process_snapshots(tmp_path):
+    registry = Registry()
+    writes = Counter("demo_writes", "写入数", ("level",), registry=registry)
+    writes.labels("info").inc(2)
+    latency = Histogram("demo_seconds", "耗时", registry=registry, buckets=(1.0,))
+    latency.observe(0.5)
+    Gauge("demo_local", "只输出本进程", shared=False, registry=registry).set(1)
+
+    # 另一个存活进程（父进程）的快照，以及已退出进程的过期快照
+    other = {"demo_writes": [[["info"], 5], [["error"], 1]], "demo_seconds": [[[], [0, 1, 2.0]]], "demo_local": [[[], 9]]}
+    (tmp_path / "other.json").write_text(json.dumps({"pid": os.getppid(), "updated_at": time.time(), "metrics": other}))
+    (tmp_path / "stale.json").write_text(json.dumps({"pid": os.getppid(), "updated_at": 0, "metrics": other}))
+
+    body = registry.render(directory=str(tmp_path))
+    assert 'demo_writes_total{level="info"} 7' in body
+    assert 'demo_writes_total{level="error"} 1' in body
+    assert "demo_seconds_count 2" in body and "demo_seconds_sum 2.5" in body
+    assert "demo_local 1" in body
+
+
+def test_metrics_endpoint(db, tmp_path, monkeypatch):
+    # app.main 挂载报告目录，导入前指向存在的目录
+    monkeypatch.setattr(settings, "WRK_REPORT_DIR", str(tmp_path))
+    from app.main import app
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        for _ in range(3):
+            client.get("/health")
+        client.get("/no-such-path")
+        response = client.get("/metrics", headers={"Accept": "application/openmetrics-text"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    body = response.text
+    count_line = next(line for line in body.splitlines() if line.startswith(
+        'ptp_http_request_duration_seconds_count{method="GET",route="/health",status="2xx"}'
+    ))
+    assert int(count_line.split()[-1]) >= 3
+    assert 'route="<unmatched>",status="4xx"' in body
+    assert 'ptp_tasks{state="running"} 0' in body
+    assert "ptp_http_requests_in_flight 1" in body  # 当前的 /metrics 请求
+    assert 'ptp_task_log_writes_total{level="info"}' in body
+
+
+def test_pool_wait_time(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0)
+    before = sum(DB_POOL_WAIT.samples()[()][:-1])
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    engine.dispose()
+    assert sum(DB_POOL_WAIT.samples()[()][:-1]) == before + 1
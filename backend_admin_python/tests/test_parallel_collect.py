@@ -0,0 +1,48 @@
+"""
+并行压测测试：失败的并行任务不合并结果行，collect返回非0退出码
+"""
+import os
+import subprocess
+
+COLLECT_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "backend_admin_wrk_bash", "lib", "collect.sh"
+)
+
+
+def test_failed_parallel_job_fails_collect(tmp_path):
+    (tmp_path / "data").mkdir()
+    # collect_target替换为写入一行结果（不需要wrk），bad测试项写入部分结果后失败
+    script = f'''
+        source "{COLLECT_SCRIPT}"
+        collect_target() {{
+          local name="${{1%%,*}}"
+          echo "$name,10,100,1,0,0,0,log,1,0,0,0,0,1,x,200:1" >> "$5"
+          [ "$name" = bad ] && return 3
+          return 0
+        }}
+        TARGETS=(bad,http://127.0.0.1/a good,http://127.0.0.1/b other,http://127.0.0.1/c)
+        GENERATOR_CPUS=0-1 PARALLEL_JOBS=2 collect internet data/internet_data.csv "" 1s 10 1
+    '''
+    result = subprocess.run(["bash", "-c", script], cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode != 0, result.stdout + result.stderr
+    assert "3 个并行任务中有 1 个失败" in result.stderr
+
+    rows = (tmp_path / "data" / "internet_data.csv").read_text(encoding="utf-8").splitlines()[1:]
+    assert [row.split(",")[0] for row in rows] == ["good", "other"]
+
+    failed = list(tmp_path.glob("logs/*/jobs/*/failed"))
+    assert [path.parent.name for path in failed] == ["00_bad"] and failed[0].read_text().strip() == "3"
+
+
+def test_parallel_collect_succeeds(tmp_path):
+    (tmp_path / "data").mkdir()
+    script = f'''
+        source "{COLLECT_SCRIPT}"
+        collect_target() {{ echo "${{1%%,*}},10,100,1,0,0,0,log,1,0,0,0,0,1,x,200:1" >> "$5"; }}
+        TARGETS=(a,http://127.0.0.1/a b,http://127.0.0.1/b)
+        GENERATOR_CPUS=0-1 PARALLEL_JOBS=2 collect internet data/internet_data.csv "" 1s 10 1
+    '''
+    result = subprocess.run(["bash", "-c", script], cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    rows = (tmp_path / "data" / "internet_data.csv").read_text(encoding="utf-8").splitlines()[1:]
+    assert [row.split(",")[0] for row in rows] == ["a", "b"]
@@ -0,0 +1,97 @@
+"""
+结果数据缓存测试：字节数LRU淘汰、文件版本失效、按任务失效、结果JSON解析（不缓存）
+"""
+import os
+
+import pytest
+
+from app.models.user import User, UserRole
+from app.services.result_cache_service import ResultCacheService, parse_result_json
+from app.utils.byte_lru_cache import ByteLRUCache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    ResultCacheService.clear()
+    yield
+    ResultCacheService.clear()
+
+
+def test_byte_lru_cache_evicts_least_recently_used():
+    cache = ByteLRUCache(max_bytes=100)
+    cache.put("a", 1, 40)
+    cache.put("b", 2, 40)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 40)
+
+    # b最久未使用，被淘汰
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    # 超过容量上限的条目不缓存
+    assert not cache.put("d", 4, 101)
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 80, 1)
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_read_csv_is_cached_until_file_changes(tmp_path, monkeypatch):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("测试项,并发数,QPS\nsvc,100,1000.5\n", encoding="utf-8")
+    link_path = tmp_path / "latest.csv"
+    os.symlink(csv_path.name, link_path)
+
+    frame = ResultCacheService.read_csv(str(csv_path))
+    frame.loc[0, "QPS"] = 0
+    # 返回副本，修改不影响缓存；软链接解析为同一文件
+    assert ResultCacheService.read_csv(str(link_path)).loc[0, "QPS"] == 1000.5
+    assert ResultCacheService.read_csv(str(csv_path))["并发数"].dtype.itemsize < 8
+    assert ResultCacheService.stats()["hits"] == 2
+
+    csv_path.write_text("测试项,并发数,QPS\nsvc,100,900\nsvc,200,950\n", encoding="utf-8")
+    assert len(ResultCacheService.read_csv(str(csv_path))) == 2
+    # 旧版本条目已删除
+    assert ResultCacheService.stats()["entries"] == 1
+
+
+def test_invalidate_by_task_and_path(tmp_path):
+    metrics_path = tmp_path / "metrics.json"
+    metrics_path.write_text('{"latency_percentiles_ms": {"p99": 40}}')
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("测试项,并发数\nsvc,100\n", encoding="utf-8")
+
+    ResultCacheService.read_json(str(metrics_path), task_id=7)
+    ResultCacheService.read_csv(str(csv_path))
+    assert ResultCacheService.invalidate(task_id=7) == 1
+    assert ResultCacheService.invalidate_result(8, str(csv_path)) == 1
+    assert ResultCacheService.stats()["entries"] == 0
+
+
+def test_parse_result_json():
+    content = "压测输出\n{\"qps\": 1000, \"raw_output\": \"a\tb\"}\n".encode("gbk")
+    assert parse_result_json(content)["qps"] == 1000
+    with pytest.raises(ValueError):
+        parse_result_json(b"no json here")
+
+
+def test_read_result_json_is_not_cached(tmp_path):
+    metrics_path = tmp_path / "metrics.json"
+    metrics_path.write_text('{"p99": 12.5}', encoding="utf-8")
+    result_path = tmp_path / "result.json"
+    result_path.write_text('{"qps": 1000, "raw_output": "' + "x" * 4096 + '"}', encoding="utf-8")
+
+    ResultCacheService.read_json(str(metrics_path), task_id=7)
+    before = ResultCacheService.stats()
+    assert ResultCacheService.read_result_json(str(result_path))["qps"] == 1000
+    # 结果文件（含raw_output）不占用缓存，指标文件仍然命中
+    after = ResultCacheService.stats()
+    assert before["entries"] == 1
+    assert (after["entries"], after["bytes"]) == (before["entries"], before["bytes"])
+    assert ResultCacheService.read_json(str(metrics_path))["p99"] == 12.5
+    assert ResultCacheService.stats()["hits"] == before["hits"] + 1
+
+
+def test_cache_stats_endpoint(make_client):
+    admin = User(id=1, username="admin", email="admin@example.com", password_hash="x", role=UserRole.ADMIN)
+    response = make_client(admin).get("/api/results/cache")
+    assert response.status_code == 200
+    assert {"hits", "misses", "bytes", "max_bytes"} <= set(response.json())
@@ -0,0 +1,59 @@
+"""
+结果文件解析测试：schema_version 2严格解析，旧版文件兼容解析
+"""
+import json
+
+import pytest
+
+from app.utils.result_file import RESULT_SCHEMA_VERSION, parse_result_json
+
+
+def _result(**fields) -> dict:
+    result = {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "success": True,
+        "task_id": "7",
+        "qps": 1234.5,
+        "total_requests": 1000,
+        "http_status": {"2xx": 995, "4xx": 5},
+        "metrics": {"requests_per_second": [1000, 1010]},
+        "trials": [],
+        "raw_output": "测试项: 首页 C:\\logs\\wrk \"quoted\"\t",
+    }
+    result.update(fields)
+    return result
+
+
+def test_parse_versioned_result():
+    result = _result(data_file_path="/data/外网压测.csv", custom_field={"kept": True})
+    data = parse_result_json(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+
+    # 与文件内容一致：中文、反斜杠原样保留，未知字段保留，文件中没有的字段不补默认值
+    assert data == result
+    assert "p99_latency_ms" not in data
+
+    # 数值按类型转换
+    assert parse_result_json(json.dumps(_result(qps=1000)).encode())["qps"] == 1000.0
+
+
+def test_versioned_result_is_strict():
+    with pytest.raises(ValueError, match="不支持的结果文件版本"):
+        parse_result_json(json.dumps(_result(schema_version=99)).encode())
+    with pytest.raises(ValueError, match="结果文件格式错误"):
+        parse_result_json(json.dumps(_result(total_requests="很多")).encode())
+    with pytest.raises(ValueError):
+        parse_result_json(b"[1, 2]")
+
+
+def test_parse_legacy_result():
+    # 旧版start_api.sh手工拼接：原始输出中的反斜杠未转义，bc输出的错误率缺少整数部分，GBK编码
+    content = ('{\n  "success": true,\n  "qps": 1000,\n  "error_rate": .50,\n'
+               '  "raw_output": "首页 C:\\logs\\wrk \\"ok\\""\n}').encode("gbk")
+    data = parse_result_json(b"script output\n" + content)
+    assert data["qps"] == 1000
+    assert data["error_rate"] == 0.5
+    # 中文不再被删除
+    assert data["raw_output"] == '首页 C:\\logs\\wrk "ok"'
+
+    with pytest.raises(ValueError):
+        parse_result_json(b"no json here")
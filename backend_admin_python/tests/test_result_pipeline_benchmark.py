@@ -0,0 +1,80 @@
+"""
+结果处理链路微基准测试：数据文件生成、回归判定和小规模端到端运行
+"""
+import os
+import json
+import subprocess
+import sys
+import importlib.util
+
+from app.services.result_cache_service import parse_result_json
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(BACKEND_DIR, "benchmarks", "result_pipeline.py")
+
+spec = importlib.util.spec_from_file_location("result_pipeline", SCRIPT)
+result_pipeline = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(result_pipeline)
+
+
+def test_fixtures_match_pipeline_formats(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    result_pipeline.write_csv(str(csv_path), 100)
+    lines = csv_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 101 and lines[0] == result_pipeline.CSV_HEADER
+    # 10个测试项 × 10个并发档位
+    assert len({line.split(",")[0] for line in lines[1:]}) == 10
+
+    json_path = tmp_path / "result.json"
+    result_pipeline.write_result_json(str(json_path), 100)
+    current = parse_result_json(json_path.read_bytes())
+    assert current["schema_version"] == 2
+    assert len(current["metrics"]["requests_per_second"]) == 100
+
+    # 旧版格式：无版本号、GBK编码、JSON前有脚本输出
+    result_pipeline.write_result_json(str(json_path), 100, legacy=True)
+    content = json_path.read_bytes()
+    try:
+        content.decode("utf-8")
+        assert False, "GBK数据文件应当无法按UTF-8解码"
+    except UnicodeDecodeError:
+        pass
+    legacy = parse_result_json(content)
+    assert "schema_version" not in legacy
+    assert legacy["raw_output"] == current["raw_output"]
+
+
+def test_compare_flags_time_and_memory_regressions():
+    def entry(median_ms, peak_kb):
+        return {"results": {"report_pdf": {"100": {"median_ms": median_ms, "peak_kb": peak_kb}}}}
+
+    assert result_pipeline.compare(entry(110, 1000), entry(100, 1000), 0.2, 2.0) == []
+    # 比例超出但绝对差值小于2ms：不判定回归
+    assert result_pipeline.compare(entry(1.5, 1000), entry(1.0, 1000), 0.2, 2.0) == []
+    assert result_pipeline.compare(entry(130, 1300), entry(100, 1000), 0.2, 2.0) == [
+        "report_pdf[100]: median_ms 100 -> 130",
+        "report_pdf[100]: peak_kb 1000 -> 1300",
+    ]
+    # 上次没有运行的阶段不对比
+    assert result_pipeline.compare(entry(130, 1300), {"results": {}}, 0.2, 2.0) == []
+
+
+def test_small_run_records_history(tmp_path):
+    history = tmp_path / "history.jsonl"
+    args = [
+        sys.executable, SCRIPT, "--sizes", "1", "10", "--repeat", "2", "--history", str(history),
+        "--stages", "parse_result_json", "steady_state", "read_csv", "awk_find_breakpoint",
+    ]
+    for _ in range(2):
+        completed = subprocess.run(args + ["--tolerance", "100"], cwd=BACKEND_DIR,
+                                   capture_output=True, text=True, timeout=120)
+        assert completed.returncode == 0, completed.stdout[-2000:] + completed.stderr[-2000:]
+
+    entries = [json.loads(line) for line in history.read_text(encoding="utf-8").splitlines()]
+    assert len(entries) == 2
+    results = entries[-1]["results"]
+    assert set(results) == {"parse_result_json", "steady_state", "read_csv", "awk_find_breakpoint"}
+    assert set(results["read_csv"]) == {"1", "10"}
+    assert results["awk_find_breakpoint"]["10"]["runs"] == 2
+    assert all(item["median_ms"] > 0 and item["peak_kb"] > 0 for item in results["parse_result_json"].values())
+    assert "相比无回归" in completed.stdout
@@ -0,0 +1,84 @@
+"""
+列式结果存储测试：CSV写入Parquet后跨任务查询、分区裁剪、指标白名单、带时区的时间范围
+"""
+import os
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pytest
+
+from app.models.task import TaskStatus
+from app.models.result import Result
+from app.services.result_store_service import ResultStoreService, DATASET_RUNS
+from config.settings import settings
+
+CSV_HEADER = "测试项,并发数,QPS,平均延迟(ms),错误数,2xx响应数,5xx响应数,总响应数\n"
+
+
+@pytest.fixture
+def store(db, tmp_path, monkeypatch, make_task):
+    """两次压测（10月1日、10月5日，UTC）的结果写入临时目录下的列式存储"""
+    monkeypatch.setattr(settings, "RESULT_STORE_DIR", str(tmp_path / "store"))
+    tasks = []
+    for day, qps in ((1, 1000), (5, 1200)):
+        task = make_task(TaskStatus.COMPLETED, finished_at=datetime(2026, 10, day, 10, 0, 0))
+        csv_path = tmp_path / f"task_{task.id}.csv"
+        csv_path.write_text(CSV_HEADER + f"首页,100,{qps},20.5,0,{qps * 30},0,{qps * 30}\n"
+                                         f"首页,500,{qps * 2},40.5,3,{qps * 60},3,{qps * 60 + 3}\n")
+        db.add(Result(task_id=task.id, qps=qps * 2, data_file_path=str(csv_path)))
+        db.commit()
+        ResultStoreService.ingest_task_result(db, task.id)
+        tasks.append(task)
+    return tasks
+
+
+def test_ingest_and_query_round_trip(store, approved_apply):
+    first, second = store
+    path = ResultStoreService.partition_path(DATASET_RUNS, first.finished_at, approved_apply.id, first.id)
+    assert os.path.exists(path) and f"date=2026-10-01{os.sep}apply_id={approved_apply.id}" in path
+
+    rows = ResultStoreService.query_runs(domain="svc.example.com", concurrency=500, metrics=["qps", "errors"])
+    assert [(row["task_id"], row["qps"], row["errors"]) for row in rows] == [(first.id, 2000.0, 3), (second.id, 2400.0, 3)]
+    assert rows[0]["run_at"] == "2026-10-01T10:00:00" and rows[0]["apply_id"] == approved_apply.id
+    assert "avg_latency_ms" not in rows[0]
+
+    # 未知指标不读取
+    rows = ResultStoreService.query_runs(concurrency=100, metrics=["qps", "password_hash"])
+    assert set(rows[0]) == {"task_id", "apply_id", "domain", "run_at", "test_item", "concurrency", "qps"}
+
+
+def test_date_range_prunes_partitions(store, approved_apply):
+    # 范围之外的分区即使文件损坏也不会被读取
+    corrupt = os.path.join(ResultStoreService.dataset_dir(DATASET_RUNS), "date=2026-09-01",
+                           f"apply_id={approved_apply.id}", "task_999.parquet")
+    os.makedirs(os.path.dirname(corrupt))
+    with open(corrupt, "wb") as f:
+        f.write(b"not a parquet file")
+
+    rows = ResultStoreService.query_runs(since=datetime(2026, 10, 3), concurrency=100)
+    assert [row["task_id"] for row in rows] == [store[1].id]
+    rows = ResultStoreService.query_runs(since=datetime(2026, 10, 1), apply_id=approved_apply.id)
+    assert len(rows) == 4
+    with pytest.raises(pa.ArrowInvalid):
+        ResultStoreService.query_runs()
+
+
+def test_query_accepts_timezone_aware_bounds(store, make_client, admin_user):
+    first, second = store
+    # 10月5日UTC 09:59（即UTC+8的17:59）之后只有第二次压测
+    rows = ResultStoreService.query_runs(since=datetime(2026, 10, 5, 9, 59, tzinfo=timezone.utc), concurrency=100)
+    assert [row["task_id"] for row in rows] == [second.id]
+
+    client = make_client(admin_user)
+    response = client.get("/api/results/query", params={"since": "2026-10-05T17:59:00+08:00", "concurrency": 100})
+    assert response.status_code == 200
+    assert [row["task_id"] for row in response.json()["items"]] == [second.id]
+
+    # 上界UTC 10:00整包含第一次压测；UTC+8的17:59:59即UTC 09:59:59，不包含
+    response = client.get("/api/results/query", params={"until": "2026-10-01T10:00:00Z", "concurrency": 100})
+    assert [row["task_id"] for row in response.json()["items"]] == [first.id]
+    response = client.get("/api/results/query", params={"until": "2026-10-01T17:59:59+08:00", "concurrency": 100})
+    assert response.status_code == 200 and response.json()["items"] == []
+
+    response = client.get("/api/results/query", params={"metrics": ["qps", "password_hash"]})
+    assert response.status_code == 400 and "password_hash" in response.json()["detail"]
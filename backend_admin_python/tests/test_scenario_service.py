@@ -0,0 +1,82 @@
+"""
+压测场景测试：场景校验、Lua脚本编译、编译接口
+"""
+import pytest
+
+from app.models.user import User, UserRole
+from app.services.scenario_service import ScenarioService
+
+TARGET_URL = "https://svc.example.com/"
+
+SCENARIO = {
+    "name": "下单流程",
+    "think_time_ms": [10, 20],
+    "requests": [
+        {"name": "首页", "path": "/", "weight": 3},
+        {
+            "name": "下单",
+            "method": "post",
+            "url": "https://svc.example.com/api/order?x=1",
+            "headers": {"X-Trace": "t-{{thread}}"},
+            "body": {"sku": "{{seq}}", "note": "含\"引号\"\n换行"},
+        },
+    ],
+}
+
+
+def test_normalize_scenario():
+    scenario = ScenarioService.normalize(SCENARIO, TARGET_URL)
+
+    assert scenario["think_time_ms"] == {"min": 10.0, "max": 20.0}
+    home, order = scenario["requests"]
+    assert (home["method"], home["weight"], home["templated"]) == ("GET", 3, False)
+    assert order["method"] == "POST"
+    assert order["path"] == "/api/order?x=1"
+    assert order["headers"]["Content-Type"] == "application/json"
+    assert order["body"].startswith('{"sku":"{{seq}}"')
+    assert order["templated"]
+
+    # 普通GET申请不需要场景脚本
+    assert ScenarioService.from_request("GET", None, TARGET_URL) is None
+    single = ScenarioService.from_request("POST", '{"a":1}', "https://svc.example.com/login?from=app")
+    assert single["requests"][0]["path"] == "/login?from=app"
+    assert single["requests"][0]["headers"] == {"Content-Type": "application/json"}
+
+
+@pytest.mark.parametrize("request_item, message", [
+    ({"url": "https://other.example.com/"}, "不是同一主机"),
+    ({"path": "/", "weight": 0}, "权重"),
+    ({"path": "/{{user}}"}, "不支持的模板变量"),
+    ({"path": "/", "headers": {"Host": "x"}}, "不能设置请求头"),
+    ({"path": "/", "method": "TRACE"}, "方法不支持"),
+])
+def test_normalize_rejects_invalid_requests(request_item, message):
+    with pytest.raises(ValueError, match=message):
+        ScenarioService.normalize({"requests": [request_item]}, TARGET_URL)
+
+
+def test_compile_lua_escapes_strings(tmp_path):
+    scenario = ScenarioService.normalize(SCENARIO, TARGET_URL)
+    script = ScenarioService.compile_lua(scenario, str(tmp_path), template_variants=8)
+
+    assert "template_variants = 8," in script
+    assert 'method = "POST"' in script
+    # 请求体已是JSON，其中的转义在Lua字面量中再转义一次
+    assert r'含\\\"引号\\\"\\n换行' in script
+    assert "\n换行" not in script
+    assert script.rstrip().endswith(f'dofile("{tmp_path}/scenario.lua")')
+
+
+def test_compile_endpoint(make_client):
+    admin = User(id=1, username="admin", email="admin@example.com", password_hash="x", role=UserRole.ADMIN)
+    client = make_client(admin)
+
+    definition = "{\"requests\": [{\"path\": \"/a\", \"weight\": 2}, {\"path\": \"/b\"}]}"
+    response = client.post("/api/tasks/scenarios/compile", json={"target_url": TARGET_URL, "definition": definition})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["weight"] for item in data["scenario"]["requests"]] == [2, 1]
+    assert "scenario = {" in data["script"]
+
+    invalid = client.post("/api/tasks/scenarios/compile", json={"target_url": TARGET_URL, "scenario": {"requests": []}})
+    assert invalid.status_code == 400
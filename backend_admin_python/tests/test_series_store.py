@@ -0,0 +1,82 @@
+"""
+时间序列查询测试：粒度选择、服务端降采样、首次查询补录
+"""
+import os
+
+import pytest
+
+from app.models.task import TaskStatus
+from app.models.result import Result
+from app.services.series_store_service import SeriesStoreService
+from config.settings import settings
+
+SECONDS = 3600
+
+
+@pytest.fixture
+def soak_task(db, tmp_path, monkeypatch, admin_user, make_task):
+    """1小时压测的任务：每秒请求数在第1800秒有一个尖峰"""
+    monkeypatch.setattr(settings, "RESULT_STORE_DIR", str(tmp_path / "store"))
+    task = make_task(TaskStatus.COMPLETED, duration="3600s")
+    qps = [1000 + s % 10 for s in range(SECONDS)]
+    qps[1800] = 5000
+    db.add(Result(task_id=task.id, qps=1005, raw_result_json={"metrics": {
+        "requests_per_second": qps,
+        "connections": {"per_second": {"server_closes": [0] * SECONDS, "bytes_out": [100] * (SECONDS - 1)}},
+    }}))
+    db.commit()
+    return admin_user, task
+
+
+def test_series_uses_rollups_and_range(db, make_client, soak_task):
+    admin, task = soak_task
+    client = make_client(admin)
+
+    # 首次查询时从结果JSON写入时序存储
+    data = client.get(f"/api/tasks/{task.id}/series").json()
+    assert os.path.exists(SeriesStoreService.file_path(task.id, 60))
+    assert data["total_seconds"] == SECONDS
+    assert data["resolution_seconds"] == 10
+    assert len(data["series"]["qps"]) == 360
+    assert data["series"]["qps"][0] == [0, 1004.5]
+
+    data = client.get(f"/api/tasks/{task.id}/series", params={"max_points": 100}).json()
+    assert data["resolution_seconds"] == 60 and len(data["series"]["qps"]) == 60
+
+    # 放大查看的范围较小时返回原始数据
+    data = client.get(f"/api/tasks/{task.id}/series", params={"from": 1795, "to": 1804, "metric": "qps,bytes_out"}).json()
+    assert data["resolution_seconds"] == 1
+    assert [v for _, v in data["series"]["qps"]] == [1005, 1006, 1007, 1008, 1009, 5000, 1001, 1002, 1003, 1004]
+    assert data["series"]["bytes_out"][0] == [1795, 100]
+    assert client.get(f"/api/tasks/{task.id}/series", params={"from": SECONDS}).status_code == 400
+
+
+def test_series_downsampling_keeps_spike(db, make_client, soak_task):
+    admin, task = soak_task
+    client = make_client(admin)
+
+    data = client.get(f"/api/tasks/{task.id}/series", params={"max_points": 20, "method": "minmax"}).json()
+    points = data["series"]["qps"]
+    assert len(points) == 20
+    assert max(high for _, _, high in points) == 5000
+
+    data = client.get(f"/api/tasks/{task.id}/series", params={"from": 1000, "to": 2999, "max_points": 30}).json()
+    assert data["resolution_seconds"] == 60 and len(data["series"]["qps"]) == 30
+    # 缺少最后一秒的指标输出为null
+    data = client.get(f"/api/tasks/{task.id}/series", params={"from": SECONDS - 2, "metric": "bytes_out"}).json()
+    assert data["series"]["bytes_out"] == [[SECONDS - 2, 100], [SECONDS - 1, None]]
+
+
+def test_series_errors(db, make_client, soak_task):
+    admin, task = soak_task
+    client = make_client(admin)
+
+    response = client.get(f"/api/tasks/{task.id}/series", params={"metric": "p99"})
+    assert response.status_code == 400 and "p99" in response.json()["detail"]
+    assert client.get(f"/api/tasks/{task.id}/series", params={"method": "avg"}).status_code == 400
+    assert client.get("/api/tasks/999/series").status_code == 404
+
+    db.query(Result).filter(Result.task_id == task.id).update({"raw_result_json": {"qps": 1}})
+    db.commit()
+    response = client.get(f"/api/tasks/{task.id}/series")
+    assert response.status_code == 400 and "没有每秒指标数据" in response.json()["detail"]
@@ -0,0 +1,21 @@
+"""
+wrk状态码统计脚本测试：以luajit运行tools/test_status_code.lua（模拟wrk调用status_code.lua）
+"""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+LUA_TEST_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "backend_admin_wrk_bash", "tools", "test_status_code.lua"
+)
+LUA = shutil.which("luajit") or shutil.which("lua5.1")
+
+
+@pytest.mark.skipif(LUA is None, reason="需要luajit或lua5.1")
+def test_status_code_script():
+    result = subprocess.run([LUA, LUA_TEST_SCRIPT], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "status_code.lua单元测试通过" in result.stdout
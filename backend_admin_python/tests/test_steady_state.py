@@ -0,0 +1,80 @@
+"""
+预热与稳态检测测试
+"""
+from app.models.task import TaskStatus
+from app.models.result import Result
+from app.services.compare_service import CompareService
+from app.services.steady_state_service import SteadyStateService
+from app.utils.stats import find_steady_start
+
+# 前4秒爬升，之后在1000左右波动
+RAMP_SERIES = [200, 450, 700, 880, 1000, 1010, 990, 1005, 995, 1000, 1002, 998, 1003, 997]
+
+
+def test_find_steady_start():
+    assert find_steady_start(RAMP_SERIES, window=5, max_cv=0.05) == 4
+    assert find_steady_start([1000] * 10, window=5, max_cv=0.05) == 0
+    # 持续大幅波动或样本不足
+    assert find_steady_start([100, 1000] * 6, window=5, max_cv=0.05) is None
+    assert find_steady_start([1000, 1000], window=5, max_cv=0.05) is None
+    # 预热期的低位平台不能当作稳态
+    assert find_steady_start([300] * 5 + [1000] * 10, window=5, max_cv=0.05) == 5
+
+
+def test_analyze_without_warmup():
+    result_data = {
+        "qps": 850, "avg_latency_ms": 12, "p95_latency_ms": 30, "p99_latency_ms": 45,
+        "metrics": {"requests_per_second": RAMP_SERIES},
+    }
+    analysis = SteadyStateService.analyze(result_data, window=5, max_cv=0.05)
+    steady = analysis["steady_state"]
+
+    assert steady["method"] == "cv"
+    assert steady["start_index"] == 4 and steady["seconds"] == 10
+    assert 995 < steady["qps"] < 1005
+    # wrk只有整次运行的延迟分布，稳态不从第一秒开始时不给出稳态延迟
+    assert steady["latency_scope"] == "full" and steady["p95_latency_ms"] is None
+    assert analysis["full"]["qps"] == 850
+
+    noisy = SteadyStateService.analyze({"qps": 500, "metrics": {"requests_per_second": [100, 900] * 5}}, 5, 0.05)
+    assert noisy["steady_state"]["method"] == "none" and noisy["steady_state"]["qps"] is None
+
+
+def test_analyze_with_warmup_merges_full_metrics():
+    result_data = {
+        "qps": 1000, "avg_latency_ms": 10, "p95_latency_ms": 20, "p99_latency_ms": 30, "warmup_seconds": 10,
+        "metrics": {
+            "duration_s": 30, "requests": 30000, "latency_mean_ms": 10,
+            "requests_per_second": [1000, 1010, 990, 1000],
+            "latency_histogram_ms": [[10, 28000], [20, 1700], [30, 300]],
+        },
+        "warmup_metrics": {
+            "duration_s": 10, "requests": 6000, "latency_mean_ms": 40,
+            "latency_histogram_ms": [[10, 2000], [100, 4000]],
+        },
+    }
+    analysis = SteadyStateService.analyze(result_data, window=5, max_cv=0.05)
+
+    assert analysis["steady_state"]["method"] == "warmup"
+    assert analysis["steady_state"]["p95_latency_ms"] == 20
+    assert analysis["steady_state"]["stable"]
+    assert analysis["full"]["qps"] == 900
+    assert analysis["full"]["avg_latency_ms"] == 15
+    assert analysis["full"]["p95_latency_ms"] == 100
+
+
+def test_compare_prefers_steady_metrics(db, make_task):
+    task = make_task(TaskStatus.COMPLETED, duration="14s")
+    db.add(Result(
+        task_id=task.id, qps=850, avg_latency_ms=12, steady_qps=1000,
+        raw_result_json={
+            "metrics": {"requests_per_second": RAMP_SERIES},
+            "steady_state": {"method": "cv", "start_index": 4},
+        }
+    ))
+    db.commit()
+
+    run = CompareService.load_run(db, task.id)
+    assert run["qps"] == 1000 and run["steady_state"]
+    assert run["avg_latency_ms"] == 12
+    assert run["requests_per_second"] == RAMP_SERIES[4:]
@@ -0,0 +1,81 @@
+"""
+HTML/Markdown报告测试：LTTB降采样、嵌入点数上限、内容转义
+"""
+import json
+import re
+
+from app.utils.stats import lttb
+from config.settings import settings
+from report_module.summary_generator import collect_report_data, generate_html_report, generate_markdown_report
+
+HEADER = ("测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,"
+          "2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数,指标文件路径,状态码分布")
+
+
+def test_lttb_keeps_shape():
+    values = [1000.0 + (i % 60) for i in range(3600)]
+    values[1800] = 9000.0
+    points = lttb(values, 300)
+
+    assert len(points) == 300
+    assert points[0] == (0, values[0]) and points[-1] == (3599, values[-1])
+    assert (1800, 9000.0) in points
+    assert [x for x, _ in points] == sorted({x for x, _ in points})
+    # 点数未超过上限时原样返回
+    assert lttb([1.0, 2.0, 3.0], 10) == [(0, 1.0), (1, 2.0), (2, 3.0)]
+
+
+def _write_data(tmp_path, seconds=3600):
+    """两个测试项的1小时压测数据，测试项名称包含HTML和Markdown特殊字符"""
+    rows = [HEADER]
+    for index, (item, concurrency, qps, errors) in enumerate([("首页", 100, 1200, 0), ("</script><b>x|y", 200, 1800, 5)]):
+        metrics_path = tmp_path / f"metrics_{index}.json"
+        metrics_path.write_text(json.dumps({
+            "latency_percentiles_ms": {"p95": 30.5, "p99": 45.25},
+            "requests_per_second": [qps + (s % 10) for s in range(seconds)],
+        }))
+        rows.append(f"{item},{concurrency},{qps},12.5,35,256,{errors},N/A,{qps * 30},0,{errors},0,0,"
+                    f"{qps * 30 + errors},{metrics_path},200:{qps * 30};502:{errors}")
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return str(csv_path)
+
+
+def test_collect_report_data(tmp_path):
+    data = collect_report_data(_write_data(tmp_path))
+
+    assert data["best"]["qps"] == 1800
+    assert data["total_errors"] == 5
+    assert data["status_codes"] == {"200": 36000 + 54000, "502": 5}
+    assert data["rows"][0]["p99_latency_ms"] == 45.25
+    assert [s["seconds"] for s in data["series"]] == [3600, 3600]
+    assert sum(len(s["points"]) for s in data["series"]) <= settings.REPORT_MAX_POINTS
+
+
+def test_html_report_is_self_contained(tmp_path):
+    path = generate_html_report(_write_data(tmp_path), str(tmp_path / "out"))
+    content = open(path, encoding="utf-8").read()
+
+    assert path.endswith(".html")
+    assert "http://" not in content.replace("http://www.w3.org/2000/svg", "")
+    assert "https://" not in content
+    # 测试项名称转义，不会提前结束脚本或插入标签
+    assert content.count("</script>") == 2
+    assert "&lt;/script&gt;&lt;b&gt;x|y" in content
+
+    embedded = re.search(r'<script type="application/json" id="report-data">(.*?)</script>', content).group(1)
+    series = json.loads(embedded)["series"]
+    assert series[1]["name"].startswith("</script>")
+    assert 0 < sum(len(s["points"]) for s in series) <= settings.REPORT_MAX_POINTS
+
+
+def test_markdown_report(tmp_path):
+    path = generate_markdown_report(_write_data(tmp_path), str(tmp_path / "out"))
+    content = open(path, encoding="utf-8").read()
+
+    assert content.startswith("# 外网压测 性能分析报告")
+    assert "| 首页 | 100 | 1200.00 | 12.50 | 30.50 | 45.25 |" in content
+    # 表格中的竖线转义
+    assert "x\\|y" in content
+    assert "| 502 | 5 |" in content
+    assert "- 总错误数：5" in content
@@ -0,0 +1,119 @@
+"""
+任务日志轮询的条件请求和增量查询测试
+"""
+import pytest
+
+from app.models.task import TaskStatus
+from app.models.task_log import TaskLog, LogLevel
+from app.services.archive_service import TaskLogArchiveService
+from config.settings import settings
+
+
+@pytest.fixture
+def running_task(db, admin_user, make_task):
+    """一个执行中的任务，带3条日志"""
+    task = make_task(TaskStatus.RUNNING)
+    for i in range(3):
+        db.add(TaskLog(task_id=task.id, log_level=LogLevel.INFO, log_message=f"日志{i}"))
+    db.commit()
+    return admin_user, task
+
+
+def test_logs_not_modified_until_new_log(db, make_client, running_task):
+    admin, task = running_task
+    client = make_client(admin)
+
+    first = client.get(f"/api/tasks/{task.id}/logs")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert len(first.json()["logs"]) == 3
+
+    cached = client.get(f"/api/tasks/{task.id}/logs", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    db.add(TaskLog(task_id=task.id, log_level=LogLevel.INFO, log_message="新日志"))
+    db.commit()
+
+    changed = client.get(f"/api/tasks/{task.id}/logs", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_logs_after_id_returns_only_new_logs(db, make_client, running_task):
+    admin, task = running_task
+    client = make_client(admin)
+
+    last_id = client.get(f"/api/tasks/{task.id}/logs").json()["last_id"]
+    empty = client.get(f"/api/tasks/{task.id}/logs", params={"after_id": last_id}).json()
+    assert empty["logs"] == []
+    assert empty["last_id"] == last_id
+
+    db.add(TaskLog(task_id=task.id, log_level=LogLevel.WARNING, log_message="新日志"))
+    db.commit()
+
+    delta = client.get(f"/api/tasks/{task.id}/logs", params={"after_id": last_id}).json()
+    assert [log["message"] for log in delta["logs"]] == ["新日志"]
+    assert delta["last_id"] > last_id
+
+
+def test_logs_after_id_pages_through_burst(db, make_client, running_task):
+    """两次轮询之间新增的日志超过limit条：按ID正序分批返回，不会漏掉较早的新日志"""
+    admin, task = running_task
+    client = make_client(admin)
+
+    last_id = client.get(f"/api/tasks/{task.id}/logs").json()["last_id"]
+    for i in range(25):
+        db.add(TaskLog(task_id=task.id, log_level=LogLevel.INFO, log_message=f"新日志{i}"))
+    db.commit()
+
+    received = []
+    for expected in (10, 10, 5, 0):
+        page = client.get(f"/api/tasks/{task.id}/logs", params={"after_id": last_id, "limit": 10}).json()
+        assert len(page["logs"]) == expected
+        # 每批仍按时间倒序返回
+        assert [log["id"] for log in page["logs"]] == sorted((log["id"] for log in page["logs"]), reverse=True)
+        received.extend(log["message"] for log in page["logs"])
+        if page["logs"]:
+            assert page["last_id"] == page["logs"][0]["id"]
+        else:
+            assert page["last_id"] == last_id
+        last_id = page["last_id"]
+    assert sorted(received) == sorted(f"新日志{i}" for i in range(25))
+
+
+def test_archived_logs_after_id_pages_through_burst(db, make_client, running_task, tmp_path, monkeypatch):
+    """已归档任务的增量读取同样按ID正序分批返回"""
+    monkeypatch.setattr(settings, "TASK_LOG_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TASK_LOG_ARCHIVE_CHUNK_SIZE", 4)
+    admin, task = running_task
+    first_id = db.query(TaskLog).filter(TaskLog.task_id == task.id).order_by(TaskLog.id).first().id
+    for i in range(22):
+        db.add(TaskLog(task_id=task.id, log_level=LogLevel.INFO, log_message=f"新日志{i}"))
+    task.status = TaskStatus.COMPLETED
+    db.commit()
+    TaskLogArchiveService.archive_task(db, task.id)
+    client = make_client(admin)
+
+    received, last_id = [], first_id
+    for expected in (10, 10, 4, 0):
+        page = client.get(f"/api/tasks/{task.id}/logs", params={"after_id": last_id, "limit": 10}).json()
+        assert len(page["logs"]) == expected
+        received.extend(log["id"] for log in page["logs"])
+        last_id = page["last_id"]
+    assert sorted(received) == list(range(first_id + 1, first_id + 25))
+
+
+def test_task_detail_conditional_get(db, make_client, running_task):
+    admin, task = running_task
+    client = make_client(admin)
+
+    first = client.get(f"/api/tasks/{task.id}")
+    etag = first.headers["etag"]
+    assert client.get(f"/api/tasks/{task.id}", headers={"If-None-Match": etag}).status_code == 304
+
+    task.status = TaskStatus.COMPLETED
+    db.commit()
+    changed = client.get(f"/api/tasks/{task.id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["status"] == "completed"
@@ -0,0 +1,84 @@
+"""
+任务执行进程测试：排队、领取、停止时重新排队、就绪检查
+"""
+import json
+import time
+
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.task import TaskStatus
+from app.models.task_log import TaskLog
+from app.services.task_runner_service import TaskRunnerService
+from app.utils.background_tasks import add_background_task
+from config.settings import settings
+
+
+@pytest.fixture
+def runner_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_EXECUTION_MODE", "runner")
+    monkeypatch.setattr(settings, "TASK_RUNNER_STATE_FILE", str(tmp_path / "task_runner.json"))
+
+
+def test_enqueue_and_claim_in_order(db, make_task, runner_mode):
+    first, second = make_task(), make_task()
+    background_tasks = BackgroundTasks()
+    add_background_task(background_tasks, db, second.id)
+    add_background_task(background_tasks, db, first.id)
+
+    # runner模式下不在API进程内执行
+    assert background_tasks.tasks == []
+    assert not TaskRunnerService.enqueue(db, first.id)
+    assert TaskRunnerService.claim_next(db) == second.id
+    assert TaskRunnerService.claim_next(db) == first.id
+    assert TaskRunnerService.claim_next(db) is None
+    db.refresh(second)
+    assert second.status == TaskStatus.RUNNING and second.started_at is not None
+
+
+def test_requeue_interrupted_tasks(db, make_task):
+    running, cancelled = make_task(), make_task()
+    for task in (running, cancelled):
+        TaskRunnerService.enqueue(db, task.id)
+        TaskRunnerService.claim_next(db)
+    cancelled.status = TaskStatus.CANCELLED
+    db.commit()
+
+    assert TaskRunnerService.cancelled(db, [running.id, cancelled.id]) == [cancelled.id]
+    # 已取消的任务不重新排队
+    assert TaskRunnerService.recover(db) == 1
+    db.refresh(running)
+    assert running.status == TaskStatus.PENDING and running.queued_at is not None
+    assert db.query(TaskLog).filter(TaskLog.task_id == running.id, TaskLog.log_message.like("%重新排队%")).count() == 1
+    assert TaskRunnerService.claim_next(db) == running.id
+
+
+def test_ready_endpoint(db, runner_mode, tmp_path, monkeypatch):
+    # app.main 挂载报告目录，导入前指向存在的目录
+    monkeypatch.setattr(settings, "WRK_REPORT_DIR", str(tmp_path))
+    from app.main import app
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["database"]["ok"]
+        assert not response.json()["checks"]["task_runner"]["ok"]
+
+        TaskRunnerService.write_state([3])
+        body = client.get("/ready").json()
+        assert body["ready"] and body["checks"]["task_runner"]["running"] == [3]
+
+        # 心跳超时或正在停止时不就绪
+        with open(settings.TASK_RUNNER_STATE_FILE) as f:
+            state = json.load(f)
+        state["updated_at"] = time.time() - 3600
+        with open(settings.TASK_RUNNER_STATE_FILE, "w") as f:
+            json.dump(state, f)
+        assert client.get("/ready").status_code == 503
+        TaskRunnerService.write_state([], draining=True)
+        assert client.get("/ready").status_code == 503
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,121 @@
+"""
+重复试验与置信区间测试
+"""
+import os
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from app.models.task import Task, TaskStatus
+from app.services.task_service import TaskService
+from app.services.trial_service import TrialService
+from app.utils.stats import bootstrap_ci, quantile
+
+COLLECT_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "backend_admin_wrk_bash", "lib", "collect.sh"
+)
+
+HEADER = ("测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,"
+          "2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数,指标文件路径,状态码分布")
+
+
+def test_bootstrap_ci():
+    values = [980, 1000, 1010, 995, 1020, 1005]
+    low, high = bootstrap_ci(values, iterations=1000)
+    assert low < sum(values) / len(values) < high
+    assert 980 <= low and high <= 1020
+    # 固定随机种子，区间可复现
+    assert bootstrap_ci(values, iterations=1000) == (low, high)
+    assert bootstrap_ci([1000]) is None
+    assert quantile([1, 2, 3, 4], 0.5) == 2.5
+
+
+def test_summarize_trials():
+    trials = [
+        {"qps": 1000, "avg_latency_ms": 10, "p99_latency_ms": 40},
+        {"qps": 1040, "avg_latency_ms": 11, "p99_latency_ms": None},
+        {"qps": 1020, "avg_latency_ms": 12, "p99_latency_ms": 44},
+    ]
+    summary = TrialService.summarize(trials, confidence=0.9, iterations=500)
+
+    assert summary["qps"]["mean"] == 1020 and summary["qps"]["n"] == 3
+    assert summary["qps"]["ci_low"] < 1020 < summary["qps"]["ci_high"]
+    # 缺失分位数的试验不参与该指标
+    assert summary["p99_latency_ms"]["n"] == 2
+    assert summary["p95_latency_ms"] is None
+    assert "3次重复试验" in TrialService.describe(summary)
+
+
+def test_load_intervals_from_trials_csv(tmp_path):
+    rows = []
+    for trial, (qps, p99) in enumerate([(990, 40), (1010, 46), (1000, 43)], start=1):
+        metrics_path = tmp_path / f"svc_100_t{trial}_metrics.json"
+        metrics_path.write_text(json.dumps({"latency_percentiles_ms": {"p95": 30, "p99": p99}}))
+        rows.append(f"svc,100,{qps},10,0,0,0,log,{qps},0,0,0,0,{qps},{metrics_path},200:{qps},{trial}")
+    csv_path = tmp_path / "internet_data_20260101_000000.csv"
+    csv_path.write_text(HEADER + "\nsvc,100,1000,10,0,0,0,log,3000,0,0,0,0,3000,x,200:3000\n", encoding="utf-8")
+    (tmp_path / "internet_data_20260101_000000_trials.csv").write_text(
+        HEADER + ",试验序号\n" + "\n".join(rows) + "\n", encoding="utf-8"
+    )
+
+    intervals = TrialService.load_intervals(str(csv_path))
+    summary = intervals[("svc", 100)]
+    assert summary["qps"]["mean"] == 1000 and summary["qps"]["n"] == 3
+    assert summary["p99_latency_ms"]["mean"] == 43
+    assert summary["p99_latency_ms"]["ci_low"] <= 43 <= summary["p99_latency_ms"]["ci_high"]
+
+    # 没有试验明细的数据文件不绘制误差线
+    assert TrialService.load_intervals(str(tmp_path / "other.csv")) == {}
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="需要bash")
+def test_single_run_ignores_stale_trials(tmp_path):
+    """重复试验之后的单次压测：删除试验明细软链接，版本化数据文件不会读到上一次的试验明细"""
+    (tmp_path / "data").mkdir()
+
+    def collect(repetitions, timestamp):
+        # 测试项为空时只创建数据文件和软链接，不需要wrk；固定时间戳使两次运行的文件名不同
+        script = (f'date() {{ echo {timestamp}; }}; source "{COLLECT_SCRIPT}"; TARGETS=(); '
+                  f'REPETITIONS={repetitions} collect internet data/internet_data.csv "" 1s 10 1')
+        subprocess.run(["bash", "-c", script], cwd=tmp_path, check=True, capture_output=True)
+        return tmp_path / "data" / f"internet_data_{timestamp}.csv"
+
+    repeated = collect(3, "20260101_000000")
+    trials_link = tmp_path / "data" / "internet_data_trials.csv"
+    assert trials_link.is_symlink()
+
+    single = collect(1, "20260101_000100")
+    assert not os.path.lexists(trials_link)
+    assert os.path.realpath(tmp_path / "data" / "internet_data.csv") == os.path.realpath(single)
+    assert os.path.exists(TrialService.trials_csv_path(str(repeated)))
+
+    # 共享数据文件名旁残留的试验明细不影响版本化数据文件
+    trials_link.write_text(HEADER + ",试验序号\nsvc,10,1,1,0,0,0,log,1,0,0,0,0,1,x,200:1,1\n"
+                           "svc,10,3,1,0,0,0,log,1,0,0,0,0,1,x,200:1,2\n", encoding="utf-8")
+    single.write_text(HEADER + "\nsvc,10,2,1,0,0,0,log,2,0,0,0,0,2,x,200:2\n", encoding="utf-8")
+    assert TrialService.load_intervals(str(single)) == {}
+    assert TrialService.load_intervals(str(tmp_path / "data" / "internet_data.csv")) != {}
+
+
+def test_repetitions_parameter(db, make_client, admin_user, approved_apply):
+    admin, apply_task = admin_user, approved_apply
+    client = make_client(admin)
+
+    response = client.post("/api/tasks", json={
+        "apply_id": apply_task.id, "target_url": apply_task.url, "repetitions": 5
+    })
+    assert response.status_code == 201
+    assert response.json()["repetitions"] == 5
+
+    invalid = client.post("/api/tasks", json={
+        "apply_id": apply_task.id, "target_url": apply_task.url, "repetitions": 0
+    })
+    assert invalid.status_code == 422
+
+    task = db.query(Task).filter(Task.id == response.json()["id"]).first()
+    task.status = TaskStatus.FAILED
+    db.commit()
+    retried = TaskService.retry_task(db=db, task_id=task.id, created_by=admin.id)
+    assert retried.repetitions == 5
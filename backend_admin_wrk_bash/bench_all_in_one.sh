@@ -219,7 +219,10 @@ main() {
     log_info "使用内网测试配置"
     
     # 执行内网压测（不再区分before/after）
-     collect "intranet" "data/intranet_data.csv" "$CONTAINER_NAME" "$DURATION" "$CONNECTIONS" "$THREADS" "$TASK_ID"
+    # 有测试项压测失败时以非0退出码结束，调用方（start_api.sh）据此将结果标记为失败
+    if ! collect "intranet" "data/intranet_data.csv" "$CONTAINER_NAME" "$DURATION" "$CONNECTIONS" "$THREADS" "$TASK_ID"; then
+      exit_with_error "内网压测失败：部分测试项未完成，请查看上方日志"
+    fi
     log_info "开始生成压测分析报告..."
     generate_simple_analysis "data/intranet_data.csv" "内网压测"
     log_info "🎉 压测与分析完成！请查看生成的分析报告获取详细性能评估"
@@ -230,7 +233,9 @@ main() {
     log_info "使用外网测试配置"
     
     # 执行外网压测
-     collect "internet" "data/internet_data.csv" "$CONTAINER_NAME" "$DURATION" "$CONNECTIONS" "$THREADS" "$TASK_ID"
+    if ! collect "internet" "data/internet_data.csv" "$CONTAINER_NAME" "$DURATION" "$CONNECTIONS" "$THREADS" "$TASK_ID"; then
+      exit_with_error "外网压测失败：部分测试项未完成，请查看上方日志"
+    fi
     log_info "开始生成压测分析报告..."
     generate_simple_analysis "data/internet_data.csv" "外网压测"
     log_info "🎉 压测与分析完成！请查看生成的分析报告获取详细性能评估"
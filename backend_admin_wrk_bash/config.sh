@@ -42,6 +42,37 @@ CONNECTIONS_LIST=(100 300 500 1000 1500)
 # 设置为60秒以获取稳定的性能数据
 DURATION="1s"
 
+# ==============================================================================
+# 并行执行配置
+# ==============================================================================
+# 并行执行的测试项数量（1为顺序执行），同一测试项的并发级别始终顺序执行
+PARALLEL_JOBS=${PARALLEL_JOBS:-1}
+
+# 压测客户端（wrk）可用的CPU列表（taskset格式，如"0-7"），为空时使用当前进程可用的全部CPU
+# 并行执行时按任务数均分为互不重叠的核心组
+GENERATOR_CPUS=${GENERATOR_CPUS:-}
+
+# 预热时长（秒）：每个并发级别正式压测前以相同参数运行wrk预热，结果不计入统计（0表示不预热）
+# 预热覆盖JIT编译、缓存和连接池建立阶段，DURATION较短时预热期会主导平均值
+WARMUP_DURATION=${WARMUP_DURATION:-0}
+
+# 重复试验次数：每个并发级别重复压测的次数，大于1时报告给出QPS和延迟的Bootstrap置信区间
+# 单次压测无法区分几个百分点的性能变化和测量噪声，对比优化效果时建议至少5次
+REPETITIONS=${REPETITIONS:-1}
+
+# 重复试验顺序：sequential（同一并发级别连续重复）| interleaved（每轮依次覆盖所有并发级别，抵消漂移）
+REPETITION_ORDER=${REPETITION_ORDER:-sequential}
+
+# ==============================================================================
+# 连接统计配置
+# ==============================================================================
+# 强制短连接：为true时每个请求带Connection: close，每个请求都新建连接（HTTPS需完整TLS握手），
+# 用于测量握手受限的容量，与长连接结果对比可区分握手开销和应用处理开销
+FORCE_CONNECTION_CLOSE=${FORCE_CONNECTION_CLOSE:-false}
+
+# 压测期间用curl采样新建连接的TCP连接和TLS握手耗时的次数（0表示不采样）
+CONNECTION_PROBE_SAMPLES=${CONNECTION_PROBE_SAMPLES:-5}
+
 # ==============================================================================
 # 使用说明
 # ==============================================================================
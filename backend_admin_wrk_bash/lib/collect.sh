@@ -43,7 +43,7 @@ collect() {
   # 将连接数字符串转换为数组
   IFS="," read -ra CONNECTIONS_LIST <<< "$connections"
   
-  local total_tests=$(( ${#TARGETS[@]} * ${#CONNECTIONS_LIST[@]} ))
+  local total_tests=$(( ${#TARGETS[@]} * ${#CONNECTIONS_LIST[@]} * ${REPETITIONS:-1} ))
   local current_test=0
   
   # 添加时间戳到输出文件名，实现版本化
@@ -53,7 +53,7 @@ collect() {
   local versioned_output_file="$dir_name/${base_name}_${timestamp}.csv"
   
   # 创建CSV文件并写入表头（添加状态码统计字段）
-  echo "测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数" > "$versioned_output_file"
+  echo "测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数,指标文件路径,状态码分布" > "$versioned_output_file"
   
   # 创建软链接指向最新版本的数据文件
   # 使用相对路径，只保留文件名部分，避免指向错误的路径
@@ -63,6 +63,17 @@ collect() {
   log_info "数据文件将保存为: $versioned_output_file"
   log_info "创建软链接指向最新版本: $output_file -> $versioned_output_file"
   
+  # 重复试验：逐次试验的结果行保存在试验明细文件（末尾增加试验序号列），数据文件中为汇总行
+  if [ "${REPETITIONS:-1}" -gt 1 ]; then
+    local trials_output_file="${versioned_output_file%.csv}_trials.csv"
+    echo "$(head -n 1 "$versioned_output_file"),试验序号" > "$trials_output_file"
+    ln -sf "$(basename "$trials_output_file")" "${output_file%.csv}_trials.csv"
+    log_info "每个并发级别重复 ${REPETITIONS} 次试验（${REPETITION_ORDER:-sequential}），试验明细: $trials_output_file"
+  else
+    # 删除上一次重复试验留下的试验明细软链接，否则单次压测的数据文件会读到其他任务的试验明细
+    rm -f "${output_file%.csv}_trials.csv"
+  fi
+  
   # 创建主日志目录
   local log_root_dir="./logs"
   # 创建带日期时间的子目录（年月日时分秒格式）
@@ -78,291 +89,665 @@ collect() {
   
   # 创建目录结构
   mkdir -p "$error_log_dir"
+  # 转为绝对路径，并行任务在各自的工作目录中执行时仍能写入
+  error_log_dir="$(cd "$error_log_dir" && pwd)"
   
   echo "[INFO] 开始执行 ${#TARGETS[@]} 个测试项，${#CONNECTIONS_LIST[@]} 个并发级别的压测任务"
   echo "[INFO] TARGETS = (${TARGETS[@]})"
   echo "[INFO] 详细错误日志将保存在目录: $error_log_dir"
   
-  # 遍历所有测试项和并发级别
-  for target_info in "${TARGETS[@]}"; do
-    # 解析测试项信息 - 使用逗号作为分隔符，因为配置文件中是逗号分隔
-    local target_name=$(echo "$target_info" | cut -d',' -f1)
-    local target_url=$(echo "$target_info" | cut -d',' -f2-)
-    
-    # 调试输出
-    echo "[DEBUG] 解析测试项: 名称='$target_name', URL='$target_url'"
-    
-    echo "
-[INFO] 开始执行 $target_name 测试项"
-    
-    # 遍历不同并发级别
-    for conn in "${CONNECTIONS_LIST[@]}"; do
-      log_info "开始压测目标: $target_name, 并发连接数: $conn"
-      current_test=$((current_test + 1))
-      
-      # 显示进度信息
-      echo "[INFO] 执行测试: $target_name (并发: $conn) - $current_test/$total_tests"
-      
-      # 执行压测并收集数据
-      local result=$(run_wrk_test "$target_url" "$target_name" "$conn" "$duration" "$threads")
-      echo "[DEBUG] run_wrk_test返回结果: $result"  # 添加调试信息
-      
-      # 改进QPS提取逻辑，确保正确获取数值
-      local qps=$(echo "$result" | grep 'Requests/sec:' | awk '{print $2}' | cut -d'.' -f1 || echo "0")
-      
-      # 修复延迟提取逻辑，确保正确获取数值
-  # 提取Thread Stats部分的平均延迟值，支持ms和s单位
-  # 尝试从Thread Stats部分提取Latency行
-  local latency_line=$(echo "$result" | grep -A2 "Thread Stats" | grep "Latency")
-  
-  # 如果没有找到，尝试从其他部分提取
-  if [ -z "$latency_line" ]; then
-    latency_line=$(echo "$result" | grep "Latency")
+  # 遍历所有测试项：PARALLEL_JOBS大于1时不同测试项并行执行，同一测试项的并发级别仍按顺序执行
+  local parallel_jobs=${PARALLEL_JOBS:-1}
+  local collect_failed=false
+  if [ "$parallel_jobs" -gt 1 ] && [ "${#TARGETS[@]}" -gt 1 ]; then
+    collect_targets_parallel "$duration" "$threads" "$error_log_dir" "$versioned_output_file" "$parallel_jobs" || collect_failed=true
+  else
+    for target_info in "${TARGETS[@]}"; do
+      collect_target "$target_info" "$duration" "$threads" "$error_log_dir" "$versioned_output_file" || collect_failed=true
+    done
   fi
   
-  # 从行中提取延迟值
-  local latency_str=$(echo "$latency_line" | awk '{print $2}')
-  local latency_val
-  
-  if [ -z "$latency_str" ]; then
-    # 如果没有获取到延迟信息，设置为0
-    latency_val="0"
-  elif [[ "$latency_str" == *"ms" ]]; then
-    # 移除ms单位
-    latency_val=$(echo "$latency_str" | sed 's/ms//' | cut -d'.' -f1)
-  elif [[ "$latency_str" == *"s" ]]; then
-    # 转换秒为毫秒
-    # 使用bc进行更精确的浮点数计算
-    latency_val=$(echo "scale=0; ${latency_str/s/} * 1000 / 1" | bc 2>/dev/null || echo "0")
-  else
-    # 直接使用数值（如果有的话）
-    latency_val=$(echo "$latency_str" | cut -d'.' -f1)
+  if [ "$collect_failed" = true ]; then
+    log_error "部分测试项压测失败，数据文件中只有成功的测试项: $versioned_output_file"
+    return 1
   fi
   
-  # 如果没有获取到有效数值，设置为0
-  if [ -z "$latency_val" ] || ! [[ "$latency_val" =~ ^[0-9]+$ ]]; then
-    latency_val="0"
+  echo "
+[INFO] 所有压测任务完成，数据已保存至: $versioned_output_file"
+}
+
+# collect_target函数：按顺序执行单个测试项的所有并发级别，结果行追加到CSV
+# 参数：
+#   $1 - 测试项信息（名称,URL）
+#   $2 - 持续时间
+#   $3 - 线程数
+#   $4 - 日志目录
+#   $5 - 结果行写入的CSV文件
+# 说明：
+#   wrk_result.tmp等临时文件位于当前目录，并行执行时每个任务在独立目录中调用
+collect_target() {
+  local target_info="$1"
+  local duration="$2"
+  local threads="$3"
+  local error_log_dir="$4"
+  local rows_file="$5"
+  
+  # 解析测试项信息 - 使用逗号作为分隔符，因为配置文件中是逗号分隔
+  local target_name=$(echo "$target_info" | cut -d',' -f1)
+  local target_url=$(echo "$target_info" | cut -d',' -f2-)
+  
+  # 调试输出
+  echo "[DEBUG] 解析测试项: 名称='$target_name', URL='$target_url'"
+  
+  echo "
+[INFO] 开始执行 $target_name 测试项"
+  
+  # 试验计划（每项为"试验序号 并发数"）：REPETITIONS大于1时每个并发级别重复压测，
+  # 交错执行时每一轮依次覆盖所有并发级别，压测期间目标系统的漂移平均分摊到各并发级别
+  local repetitions=${REPETITIONS:-1}
+  local trials_file="${rows_file%.csv}_trials.csv"
+  local plan=()
+  local trial
+  if [ "${REPETITION_ORDER:-sequential}" = "interleaved" ]; then
+    for ((trial = 1; trial <= repetitions; trial++)); do
+      for conn in "${CONNECTIONS_LIST[@]}"; do
+        plan+=("$trial $conn")
+      done
+    done
+  else
+    for conn in "${CONNECTIONS_LIST[@]}"; do
+      for ((trial = 1; trial <= repetitions; trial++)); do
+        plan+=("$trial $conn")
+      done
+    done
   fi
-      
-      local latency="$latency_val"
-      
-      # 修复错误数提取逻辑，确保正确处理所有错误情况
-      local errors=0
-      
-      # 1. 首先检查Non-2xx or 3xx responses
-      if echo "$result" | grep -q 'Non-2xx or 3xx responses:'; then
-        errors=$(echo "$result" | grep 'Non-2xx or 3xx responses:' | sed -n 's/.*Non-2xx or 3xx responses:\s*\([0-9]*\).*/\1/p' | grep -Eo '[0-9]+' || echo "0")
-      fi
-      
-      # 2. 检查Socket超时错误
-      if echo "$result" | grep -q 'Socket errors:'; then
-        # 提取所有Socket错误（连接、读取、写入、超时）
-        local socket_errors=$(echo "$result" | grep 'Socket errors:' | awk '{print $4+$6+$8+$10}' || echo "0")
-        errors=$((errors + socket_errors))
+  
+  # 遍历不同并发级别
+  local step
+  for step in "${plan[@]}"; do
+    read -r trial conn <<< "$step"
+    # 重复试验时日志和指标文件名带试验序号
+    local trial_suffix=""
+    if [ "$repetitions" -gt 1 ]; then
+      trial_suffix="_t${trial}"
+    fi
+    log_info "开始压测目标: $target_name, 并发连接数: $conn"
+    current_test=$((current_test + 1))
+    
+    # 显示进度信息
+    if [ "$repetitions" -gt 1 ]; then
+      echo "[INFO] 执行测试: $target_name (并发: $conn, 第 $trial/$repetitions 次试验) - $current_test/$total_tests"
+    else
+      echo "[INFO] 执行测试: $target_name (并发: $conn) - $current_test/$total_tests"
+    fi
+    
+    # 执行压测并收集数据
+    local result=$(run_wrk_test "$target_url" "$target_name" "$conn" "$duration" "$threads")
+    echo "[DEBUG] run_wrk_test返回结果: $result"  # 添加调试信息
+    
+    # 改进QPS提取逻辑，确保正确获取数值
+    local qps=$(echo "$result" | grep 'Requests/sec:' | awk '{print $2}' | cut -d'.' -f1 || echo "0")
+    
+    # 修复延迟提取逻辑，确保正确获取数值
+    # 提取Thread Stats部分的平均延迟值，支持ms和s单位
+    # 尝试从Thread Stats部分提取Latency行
+    local latency_line=$(echo "$result" | grep -A2 "Thread Stats" | grep "Latency")
+    
+    # 如果没有找到，尝试从其他部分提取
+    if [ -z "$latency_line" ]; then
+      latency_line=$(echo "$result" | grep "Latency")
+    fi
+    
+    # 从行中提取延迟值
+    local latency_str=$(echo "$latency_line" | awk '{print $2}')
+    local latency_val
+    
+    if [ -z "$latency_str" ]; then
+      # 如果没有获取到延迟信息，设置为0
+      latency_val="0"
+    elif [[ "$latency_str" == *"ms" ]]; then
+      # 移除ms单位
+      latency_val=$(echo "$latency_str" | sed 's/ms//' | cut -d'.' -f1)
+    elif [[ "$latency_str" == *"s" ]]; then
+      # 转换秒为毫秒
+      # 使用bc进行更精确的浮点数计算
+      latency_val=$(echo "scale=0; ${latency_str/s/} * 1000 / 1" | bc 2>/dev/null || echo "0")
+    else
+      # 直接使用数值（如果有的话）
+      latency_val=$(echo "$latency_str" | cut -d'.' -f1)
+    fi
+    
+    # 如果没有获取到有效数值，设置为0
+    if [ -z "$latency_val" ] || ! [[ "$latency_val" =~ ^[0-9]+$ ]]; then
+      latency_val="0"
+    fi
+    
+    local latency="$latency_val"
+    
+    # 修复错误数提取逻辑，确保正确处理所有错误情况
+    local errors=0
+    
+    # 1. 首先检查Non-2xx or 3xx responses
+    if echo "$result" | grep -q 'Non-2xx or 3xx responses:'; then
+      errors=$(echo "$result" | grep 'Non-2xx or 3xx responses:' | sed -n 's/.*Non-2xx or 3xx responses:\s*\([0-9]*\).*/\1/p' | grep -Eo '[0-9]+' || echo "0")
+    fi
+    
+    # 2. 检查Socket超时错误
+    if echo "$result" | grep -q 'Socket errors:'; then
+      # 提取所有Socket错误（连接、读取、写入、超时）
+      local socket_errors=$(echo "$result" | grep 'Socket errors:' | awk '{print $4+$6+$8+$10}' || echo "0")
+      errors=$((errors + socket_errors))
+    fi
+    
+    # 3. 检查是否有5xx错误
+    if echo "$result" | grep -qE '5[0-9]{2} responses'; then
+      local fivexx_errors=$(echo "$result" | grep -E '5[0-9]{2} responses' | awk '{print $1}' || echo "0")
+      # 确保5xx错误被计入总错误数（如果还没计入）
+      if [ "$fivexx_errors" -gt "$errors" ]; then
+        errors="$fivexx_errors"
       fi
-      
-      # 3. 检查是否有5xx错误
-      if echo "$result" | grep -qE '5[0-9]{2} responses'; then
-        local fivexx_errors=$(echo "$result" | grep -E '5[0-9]{2} responses' | awk '{print $1}' || echo "0")
-        # 确保5xx错误被计入总错误数（如果还没计入）
-        if [ "$fivexx_errors" -gt "$errors" ]; then
-          errors="$fivexx_errors"
+    fi
+    
+    # 4. 检查连接重置错误
+    if echo "$result" | grep -q 'connection refused' || echo "$result" | grep -q 'connection reset by peer'; then
+      errors=$((errors + 1))
+    fi
+    
+    # 调试输出
+    echo "[DEBUG] 提取的性能指标 - QPS: $qps, 延迟: $latency, 错误数: $errors"
+    
+    # 直接检查URL是否包含非法字符或格式问题
+    # 现在URL已经正确解析，只需要检查是否为有效的HTTP(S)协议
+    if [[ "$target_url" != http* ]]; then
+      errors="1"
+      echo "[INFO] 检测到URL格式错误，设置错误数为1"
+    fi
+    
+    echo "[DEBUG] 最终错误数: $errors"  # 添加调试信息
+    
+    # 获取Docker容器资源使用情况（真实数据）
+    local cpu_usage=0
+    local mem_usage=0
+    
+    # 检查CONTAINER_NAME参数是否提供
+    if [ -n "$CONTAINER_NAME" ]; then
+      # 验证容器是否存在且运行中
+      if validate_container_exists "$CONTAINER_NAME"; then
+        # 获取真实的CPU使用率
+        cpu_usage=$(get_container_cpu_usage "$CONTAINER_NAME")
+        if [ $? -ne 0 ]; then
+          cpu_usage=0
         fi
+        
+        # 获取真实的内存使用量
+        mem_usage=$(get_container_memory_usage "$CONTAINER_NAME")
+        if [ $? -ne 0 ]; then
+          mem_usage=0
+        fi
+        
+        log_debug "成功获取容器 $CONTAINER_NAME 的资源使用情况：CPU ${cpu_usage}%，内存 ${mem_usage}MB"
+      else
+        log_warn "容器 $CONTAINER_NAME 不存在或未运行，使用默认值"
       fi
+    else
+      log_warn "未提供容器名称，使用默认值"
+    fi
+    
+    # 获取状态码日志路径
+    status_log_path="无错误日志"  # 默认值
+    
+    if [ -f "status_log_path.tmp" ]; then
+      local temp_path=$(cat status_log_path.tmp)
+      rm -f status_log_path.tmp
+          
+      # 使用安全的文件名，移除特殊字符
+      # 使用兼容MacOS的方式处理中文字符
+      local safe_target_name=$(echo "$target_name" | LC_ALL=C sed 's/[^a-zA-Z0-9_-]/_/g')
       
-      # 4. 检查连接重置错误
-      if echo "$result" | grep -q 'connection refused' || echo "$result" | grep -q 'connection reset by peer'; then
-        errors=$((errors + 1))
-      fi
-      
-      # 调试输出
-      echo "[DEBUG] 提取的性能指标 - QPS: $qps, 延迟: $latency, 错误数: $errors"
-      
-      # 直接检查URL是否包含非法字符或格式问题
-      # 现在URL已经正确解析，只需要检查是否为有效的HTTP(S)协议
-      if [[ "$target_url" != http* ]]; then
-        errors="1"
-        echo "[INFO] 检测到URL格式错误，设置错误数为1"
+      # 如果sed处理后结果为空，则使用默认名称
+      if [ -z "$safe_target_name" ]; then
+        safe_target_name="target"
       fi
       
-      echo "[DEBUG] 最终错误数: $errors"  # 添加调试信息
+      local dest_log_path="${error_log_dir}/${safe_target_name}_${conn}${trial_suffix}_conn.log"
       
-      # 获取Docker容器资源使用情况（真实数据）
-      local cpu_usage=0
-      local mem_usage=0
-      
-      # 检查CONTAINER_NAME参数是否提供
-      if [ -n "$CONTAINER_NAME" ]; then
-        # 验证容器是否存在且运行中
-        if validate_container_exists "$CONTAINER_NAME"; then
-          # 获取真实的CPU使用率
-          cpu_usage=$(get_container_cpu_usage "$CONTAINER_NAME")
-          if [ $? -ne 0 ]; then
-            cpu_usage=0
-          fi
-          
-          # 获取真实的内存使用量
-          mem_usage=$(get_container_memory_usage "$CONTAINER_NAME")
-          if [ $? -ne 0 ]; then
-            mem_usage=0
-          fi
+      # 无论是否有错误，都保存状态码日志文件以方便分析
+      if [ -f "$temp_path" ]; then
+        mv "$temp_path" "$dest_log_path"
           
-          log_debug "成功获取容器 $CONTAINER_NAME 的资源使用情况：CPU ${cpu_usage}%，内存 ${mem_usage}MB"
+        # 总是记录完整的日志路径，并在有错误时标记错误数
+        if [[ "$errors" =~ ^[0-9]+$ ]] && [ "$errors" -gt 0 ]; then
+          status_log_path="${dest_log_path} (错误数: $errors)"
+          echo "[INFO] 发现 $errors 个错误请求，详细日志已保存到: $dest_log_path"
         else
-          log_warn "容器 $CONTAINER_NAME 不存在或未运行，使用默认值"
+          # 即使没有错误，也保留日志文件用于分析
+          status_log_path="${dest_log_path}"
         fi
       else
-        log_warn "未提供容器名称，使用默认值"
+        echo "[WARNING] 临时日志文件不存在: $temp_path"
+        status_log_path="日志文件创建失败"
       fi
-      
-      # 获取状态码日志路径
-      status_log_path="无错误日志"  # 默认值
-      
-      if [ -f "status_log_path.tmp" ]; then
-        local temp_path=$(cat status_log_path.tmp)
-        rm -f status_log_path.tmp
-            
-        # 使用安全的文件名，移除特殊字符
-        # 使用兼容MacOS的方式处理中文字符
-        local safe_target_name=$(echo "$target_name" | LC_ALL=C sed 's/[^a-zA-Z0-9_-]/_/g')
-        
-        # 如果sed处理后结果为空，则使用默认名称
-        if [ -z "$safe_target_name" ]; then
-          safe_target_name="target"
+    else
+      status_log_path="日志收集失败"
+    fi
+    
+    # 归档Lua脚本输出的指标文件（延迟分位数、直方图、每秒请求数）
+    local metrics_path=""
+    if [ -s "wrk_metrics.tmp" ]; then
+      local metrics_name=$(echo "$target_name" | LC_ALL=C sed 's/[^a-zA-Z0-9_-]/_/g')
+      metrics_path="$(cd "$error_log_dir" && pwd)/${metrics_name:-target}_${conn}${trial_suffix}_metrics.json"
+      mv "wrk_metrics.tmp" "$metrics_path"
+      echo "[INFO] 压测指标已保存到: $metrics_path"
+      # 预热运行的指标与正式压测的指标文件放在一起，用于计算全程指标
+      if [ -s "wrk_warmup_metrics.tmp" ]; then
+        mv "wrk_warmup_metrics.tmp" "${metrics_path%_metrics.json}_warmup_metrics.json"
+      fi
+    fi
+    rm -f "wrk_warmup_metrics.tmp"
+    
+    # 尝试加载状态码统计信息（如果存在）
+    local status_2xx=0
+    local status_3xx=0
+    local status_4xx=0
+    local status_5xx=0
+    local status_other=0
+    local total_responses=0
+    local status_codes="N/A"
+    
+    if [ -f "status_code_stats_${target_name}_${conn}.tmp" ]; then
+      # 安全地加载状态码统计信息，不使用source命令
+      echo "[DEBUG] 加载状态码统计文件: status_code_stats_${target_name}_${conn}.tmp"
+    
+      # 手动解析文件中的每一行，提取变量值
+      while IFS='=' read -r key value || [[ -n "$key" ]]; do
+        # 跳过空行和注释
+        if [[ -z "$key" ]] || [[ "$key" =~ ^# ]]; then
+          continue
         fi
-        
-        local dest_log_path="${error_log_dir}/${safe_target_name}_${conn}_conn.log"
-        
-        # 无论是否有错误，都保存状态码日志文件以方便分析
-          if [ -f "$temp_path" ]; then
-            mv "$temp_path" "$dest_log_path"
-            
-            # 总是记录完整的日志路径，并在有错误时标记错误数
-            if [[ "$errors" =~ ^[0-9]+$ ]] && [ "$errors" -gt 0 ]; then
-              status_log_path="${dest_log_path} (错误数: $errors)"
-              echo "[INFO] 发现 $errors 个错误请求，详细日志已保存到: $dest_log_path"
-            else
-              # 即使没有错误，也保留日志文件用于分析
-              status_log_path="${dest_log_path}"
-            fi
-          else
-            echo "[WARNING] 临时日志文件不存在: $temp_path"
-            status_log_path="日志文件创建失败"
-          fi
+    
+        # 提取变量名和值（移除可能的引号）
+        value=$(echo "$value" | sed 's/^["'\''\\`]\(.*\)["'\''\\`]$/\1/')
+    
+        # 根据变量名赋值
+        case "$key" in
+          "STATUS_2XX") status_2xx=${value:-0} ;;
+          "STATUS_3XX") status_3xx=${value:-0} ;;
+          "STATUS_4XX") status_4xx=${value:-0} ;;
+          "STATUS_5XX") status_5xx=${value:-0} ;;
+          "STATUS_OTHER") status_other=${value:-0} ;;
+          "TOTAL_RESPONSES") total_responses=${value:-0} ;;
+          "STATUS_CODES") status_codes=${value:-N/A} ;;
+        esac
+      done < "status_code_stats_${target_name}_${conn}.tmp"
+    
+      echo "[DEBUG] 加载的状态码统计: 2xx=${status_2xx}, 3xx=${status_3xx}, 4xx=${status_4xx}, 5xx=${status_5xx}, 总计=${total_responses}" 
+      # 清理临时文件
+      rm -f "status_code_stats_${target_name}_${conn}.tmp"
+    fi
+    
+    # 确保总错误数正确，使用状态码统计或错误检测
+    local total_errors=$((status_4xx + status_5xx + status_other))
+    if [ "$total_errors" -gt 0 ] && [ "$total_errors" -gt "$errors" ]; then
+      errors="$total_errors"
+    else
+      # 将Socket错误映射到状态码统计中
+      # 提取Socket错误数
+      local socket_errors=$(echo "$result" | grep 'Socket errors:' | awk '{print $4+$6+$8+$10}' || echo "0")
+      # 确保socket_errors是整数
+      socket_errors=${socket_errors:-0}
+      if [ "$socket_errors" -gt 0 ]; then
+        # 将Socket错误归类为5xx错误（服务器错误）
+        status_5xx=$((status_5xx + socket_errors))
+        # 更新总响应数
+        total_responses=$((total_responses + socket_errors))
+        # 确保temp_log_file变量已定义再写入日志
+        if [ -n "$temp_log_file" ]; then
+          echo "[DEBUG] Socket错误($socket_errors)已映射到5xx错误统计中" >> "$temp_log_file"
+        fi
+      fi
+    fi
+    
+    # 记录到CSV文件（添加状态码详情），重复试验时逐次记录到试验明细文件，全部试验结束后汇总
+    local row="$target_name,$conn,$qps,$latency,$cpu_usage,$mem_usage,$errors,$status_log_path,$status_2xx,$status_3xx,$status_4xx,$status_5xx,$status_other,$total_responses,$metrics_path,$status_codes"
+    if [ "$repetitions" -gt 1 ]; then
+      echo "$row,$trial" >> "$trials_file"
+    else
+      echo "$row" >> "$rows_file"
+    fi
+    
+    # 显示当前测试结果
+    echo "  - QPS: $qps"
+    echo "  - 平均延迟: ${latency}ms"
+    echo "  - Docker容器CPU峰值: ${cpu_usage}%"
+    echo "  - Docker容器内存峰值: ${mem_usage}MB"
+    echo "  - 错误数: $errors"
+    
+    # 性能趋势分析 - 使用简单变量而非关联数组以提高兼容性
+    if [ "$prev_test_name" = "$target_name" ] && [ "$prev_test_conn" = "$conn" ] && [ "$prev_qps" != "0" ]; then
+      qps_change=$(echo "scale=2; ($qps-$prev_qps)/$prev_qps*100" | bc)
+      lat_change=$(echo "scale=2; ($latency-$prev_lat)/$prev_lat*100" | bc)
+    
+      # 根据变化趋势显示不同的图标
+      if (( $(echo "$qps_change > 0" | bc -l) )); then
+        qps_icon="📈"
+      elif (( $(echo "$qps_change < 0" | bc -l) )); then
+        qps_icon="📉"
       else
-        status_log_path="日志收集失败"
+        qps_icon="➡️"
       fi
-          
-          # 尝试加载状态码统计信息（如果存在）
-          local status_2xx=0
-          local status_3xx=0
-          local status_4xx=0
-          local status_5xx=0
-          local status_other=0
-          local total_responses=0
-          
-          if [ -f "status_code_stats_${target_name}_${conn}.tmp" ]; then
-            # 安全地加载状态码统计信息，不使用source命令
-            echo "[DEBUG] 加载状态码统计文件: status_code_stats_${target_name}_${conn}.tmp"
-            
-            # 手动解析文件中的每一行，提取变量值
-            while IFS='=' read -r key value || [[ -n "$key" ]]; do
-              # 跳过空行和注释
-              if [[ -z "$key" ]] || [[ "$key" =~ ^# ]]; then
-                continue
-              fi
-              
-              # 提取变量名和值（移除可能的引号）
-              value=$(echo "$value" | sed 's/^["'\''\\`]\(.*\)["'\''\\`]$/\1/')
-              
-              # 根据变量名赋值
-              case "$key" in
-                "STATUS_2XX") status_2xx=${value:-0} ;;
-                "STATUS_3XX") status_3xx=${value:-0} ;;
-                "STATUS_4XX") status_4xx=${value:-0} ;;
-                "STATUS_5XX") status_5xx=${value:-0} ;;
-                "STATUS_OTHER") status_other=${value:-0} ;;
-                "TOTAL_RESPONSES") total_responses=${value:-0} ;;
-              esac
-            done < "status_code_stats_${target_name}_${conn}.tmp"
-            
-            echo "[DEBUG] 加载的状态码统计: 2xx=${status_2xx}, 3xx=${status_3xx}, 4xx=${status_4xx}, 5xx=${status_5xx}, 总计=${total_responses}" 
-            # 清理临时文件
-            rm -f "status_code_stats_${target_name}_${conn}.tmp"
-          fi
-          
-          # 确保总错误数正确，使用状态码统计或错误检测
-          local total_errors=$((status_4xx + status_5xx + status_other))
-          if [ "$total_errors" -gt 0 ] && [ "$total_errors" -gt "$errors" ]; then
-            errors="$total_errors"
-          else
-            # 将Socket错误映射到状态码统计中
-            # 提取Socket错误数
-            local socket_errors=$(echo "$result" | grep 'Socket errors:' | awk '{print $4+$6+$8+$10}' || echo "0")
-            # 确保socket_errors是整数
-            socket_errors=${socket_errors:-0}
-            if [ "$socket_errors" -gt 0 ]; then
-              # 将Socket错误归类为5xx错误（服务器错误）
-              status_5xx=$((status_5xx + socket_errors))
-              # 更新总响应数
-              total_responses=$((total_responses + socket_errors))
-              # 确保temp_log_file变量已定义再写入日志
-              if [ -n "$temp_log_file" ]; then
-                echo "[DEBUG] Socket错误($socket_errors)已映射到5xx错误统计中" >> "$temp_log_file"
-              fi
-            fi
-          fi
-          
-          # 记录到CSV文件（添加状态码详情）
-          echo "$target_name,$conn,$qps,$latency,$cpu_usage,$mem_usage,$errors,$status_log_path,$status_2xx,$status_3xx,$status_4xx,$status_5xx,$status_other,$total_responses" >> "$versioned_output_file"
-          
-          # 显示当前测试结果
-          echo "  - QPS: $qps"
-          echo "  - 平均延迟: ${latency}ms"
-          echo "  - Docker容器CPU峰值: ${cpu_usage}%"
-          echo "  - Docker容器内存峰值: ${mem_usage}MB"
-          echo "  - 错误数: $errors"
-          
-          # 性能趋势分析 - 使用简单变量而非关联数组以提高兼容性
-          if [ "$prev_test_name" = "$target_name" ] && [ "$prev_test_conn" = "$conn" ] && [ "$prev_qps" != "0" ]; then
-            qps_change=$(echo "scale=2; ($qps-$prev_qps)/$prev_qps*100" | bc)
-            lat_change=$(echo "scale=2; ($latency-$prev_lat)/$prev_lat*100" | bc)
-            
-            # 根据变化趋势显示不同的图标
-            if (( $(echo "$qps_change > 0" | bc -l) )); then
-              qps_icon="📈"
-            elif (( $(echo "$qps_change < 0" | bc -l) )); then
-              qps_icon="📉"
-            else
-              qps_icon="➡️"
-            fi
-            
-            if (( $(echo "$lat_change < 0" | bc -l) )); then
-              lat_icon="📈"
-            elif (( $(echo "$lat_change > 0" | bc -l) )); then
-              lat_icon="📉"
-            else
-              lat_icon="➡️"
-            fi
-            
-            echo "  📊 性能趋势:"
-            echo "      QPS变化: $qps_icon ${qps_change}%"
-            echo "      延迟变化: $lat_icon ${lat_change}%"
-          fi
-          
-          # 更新历史性能数据
-          prev_test_name="$target_name"
-          prev_qps="$qps"
-          prev_lat="$latency"
-          prev_test_conn="$conn"
-          
-          # 短暂暂停避免系统负载过高
-          sleep 2
-        done
+    
+      if (( $(echo "$lat_change < 0" | bc -l) )); then
+        lat_icon="📈"
+      elif (( $(echo "$lat_change > 0" | bc -l) )); then
+        lat_icon="📉"
+      else
+        lat_icon="➡️"
+      fi
+    
+      echo "  📊 性能趋势:"
+      echo "      QPS变化: $qps_icon ${qps_change}%"
+      echo "      延迟变化: $lat_icon ${lat_change}%"
+    fi
+    
+    # 更新历史性能数据
+    prev_test_name="$target_name"
+    prev_qps="$qps"
+    prev_lat="$latency"
+    prev_test_conn="$conn"
+    
+    # 短暂暂停避免系统负载过高
+    sleep 2
+  done
+  
+  if [ "$repetitions" -gt 1 ]; then
+    aggregate_trials "$trials_file" "$target_name" >> "$rows_file"
+  fi
+}
+
+# aggregate_trials函数：将测试项的重复试验汇总为每个并发级别一行（按首次出现的顺序）
+# 参数：
+#   $1 - 试验明细CSV（结果行末尾为试验序号）
+#   $2 - 测试项名称
+# 返回：
+#   标准输出 - 汇总的结果行：QPS和平均延迟取各次试验的均值，CPU/内存取峰值，错误数和状态码为所有试验合计，
+#   状态码日志和指标文件取QPS最接近中位数的试验（代表性试验）
+aggregate_trials() {
+  local trials_file="$1"
+  local target_name="$2"
+  
+  awk -F',' -v name="$target_name" '
+    $1 == name {
+      conn = $2
+      if (!(conn in count)) {
+        order[++levels] = conn
+      }
+      n = ++count[conn]
+      qps[conn, n] = $3
+      log_path[conn, n] = $8
+      metrics[conn, n] = $15
+      qps_sum[conn] += $3
+      latency_sum[conn] += $4
+      if ($5 + 0 > cpu[conn] + 0) cpu[conn] = $5
+      if ($6 + 0 > mem[conn] + 0) mem[conn] = $6
+      errors[conn] += $7
+      for (i = 9; i <= 14; i++) {
+        totals[conn, i] += $i
+      }
+      # 合并逐状态码计数（200:123;502:4）
+      split($16, pairs, ";")
+      for (i in pairs) {
+        split(pairs[i], kv, ":")
+        if (kv[1] ~ /^[0-9]+$/ && kv[2] ~ /^[0-9]+$/) {
+          if (!((conn, kv[1]) in codes)) {
+            code_list[conn] = code_list[conn] " " kv[1]
+          }
+          codes[conn, kv[1]] += kv[2]
+        }
+      }
+    }
+    END {
+      for (l = 1; l <= levels; l++) {
+        conn = order[l]
+        n = count[conn]
+        mean_qps = qps_sum[conn] / n
+        # 代表性试验：QPS最接近中位数
+        for (i = 1; i <= n; i++) {
+          sorted[i] = qps[conn, i] + 0
+        }
+        for (i = 2; i <= n; i++) {
+          v = sorted[i]
+          for (j = i - 1; j >= 1 && sorted[j] > v; j--) {
+            sorted[j + 1] = sorted[j]
+          }
+          sorted[j + 1] = v
+        }
+        median = (n % 2) ? sorted[(n + 1) / 2] : (sorted[n / 2] + sorted[n / 2 + 1]) / 2
+        best = 1
+        for (i = 2; i <= n; i++) {
+          d = qps[conn, i] - median
+          b = qps[conn, best] - median
+          if ((d < 0 ? -d : d) < (b < 0 ? -b : b)) best = i
+        }
+        # 状态码按数值排序
+        m = split(code_list[conn], code_keys, " ")
+        for (i = 2; i <= m; i++) {
+          v = code_keys[i]
+          for (j = i - 1; j >= 1 && code_keys[j] + 0 > v + 0; j--) {
+            code_keys[j + 1] = code_keys[j]
+          }
+          code_keys[j + 1] = v
+        }
+        status_codes = ""
+        for (i = 1; i <= m; i++) {
+          status_codes = status_codes (status_codes == "" ? "" : ";") code_keys[i] ":" codes[conn, code_keys[i]]
+        }
+        printf "%s,%s,%.0f,%.0f,%s,%s,%d,%s", name, conn, mean_qps, latency_sum[conn] / n, cpu[conn] + 0, mem[conn] + 0, errors[conn], log_path[conn, best]
+        for (i = 9; i <= 14; i++) {
+          printf ",%d", totals[conn, i]
+        }
+        printf ",%s,%s\n", metrics[conn, best], (status_codes == "" ? "N/A" : status_codes)
+      }
+    }
+  ' "$trials_file"
+}
+
+# collect_targets_parallel函数：不同测试项并行压测
+# 参数：
+#   $1 - 持续时间
+#   $2 - 线程数
+#   $3 - 日志目录（绝对路径）
+#   $4 - 输出CSV文件路径
+#   $5 - 并行任务数
+# 说明：
+#   CPU（GENERATOR_CPUS，默认当前进程可用的全部CPU）按并行任务数均分为互不重叠的核心组，
+#   每个任务的wrk通过taskset绑定到所属核心组，wrk线程数不超过核心组大小，避免多个wrk互相抢占CPU；
+#   各任务在 <日志目录>/jobs/<序号>_<测试项> 中执行，结束后按TARGETS顺序合并结果行；
+#   失败任务的结果行可能不完整，不合并到输出CSV
+# 返回：
+#   0 - 所有任务成功，1 - 有任务失败
+collect_targets_parallel() {
+  local duration="$1"
+  local threads="$2"
+  local error_log_dir="$3"
+  local output_file="$4"
+  local parallel_jobs="$5"
+  
+  local cpus=($(get_generator_cpus))
+  local cpu_count=${#cpus[@]}
+  
+  if [ "$parallel_jobs" -gt "${#TARGETS[@]}" ]; then
+    parallel_jobs=${#TARGETS[@]}
+  fi
+  if [ "$parallel_jobs" -gt "$cpu_count" ]; then
+    log_warn "可用CPU数($cpu_count)少于并行任务数($parallel_jobs)，并行任务数调整为 $cpu_count"
+    parallel_jobs=$cpu_count
+  fi
+  if [ "$parallel_jobs" -le 1 ]; then
+    local sequential_failed=0
+    for target_info in "${TARGETS[@]}"; do
+      collect_target "$target_info" "$duration" "$threads" "$error_log_dir" "$output_file" || sequential_failed=1
+    done
+    return $sequential_failed
+  fi
+  
+  local cores_per_job=$((cpu_count / parallel_jobs))
+  local job_threads=$threads
+  if [ "$job_threads" -gt "$cores_per_job" ]; then
+    log_info "每个并行任务分配 $cores_per_job 个CPU，wrk线程数由 $threads 调整为 $cores_per_job"
+    job_threads=$cores_per_job
+  fi
+  
+  local pin_cpus=true
+  if ! command -v taskset > /dev/null 2>&1; then
+    log_warn "未找到taskset命令，并行任务将不绑定CPU"
+    pin_cpus=false
+  fi
+  
+  local jobs_dir="$error_log_dir/jobs"
+  mkdir -p "$jobs_dir"
+  
+  echo "[INFO] 并行执行 ${#TARGETS[@]} 个测试项：并行任务数 $parallel_jobs，每个任务 $cores_per_job 个CPU（共 $cpu_count 个）"
+  
+  local slot_pids=()
+  local slot_job_dirs=()
+  local job_dirs=()
+  local index=0
+  local target_info
+  
+  for target_info in "${TARGETS[@]}"; do
+    # 等待空闲槽位，槽位决定任务使用的核心组
+    local slot=""
+    while [ -z "$slot" ]; do
+      local i
+      for ((i = 0; i < parallel_jobs; i++)); do
+        local pid=${slot_pids[$i]}
+        if [ -z "$pid" ]; then
+          slot=$i
+          break
+        fi
+        if ! kill -0 "$pid" 2>/dev/null; then
+          finish_parallel_job "$pid" "${slot_job_dirs[$i]}"
+          slot=$i
+          break
+        fi
       done
-      
-      echo "
-[INFO] 所有压测任务完成，数据已保存至: $versioned_output_file"
+      if [ -z "$slot" ]; then
+        sleep 1
+      fi
+    done
+    
+    local target_name=$(echo "$target_info" | cut -d',' -f1)
+    local safe_target_name=$(echo "$target_name" | LC_ALL=C sed 's/[^a-zA-Z0-9_-]/_/g')
+    local job_dir="$jobs_dir/$(printf '%02d' "$index")_${safe_target_name:-target}"
+    local slot_cpus=$(echo "${cpus[@]:$((slot * cores_per_job)):$cores_per_job}" | tr ' ' ',')
+    mkdir -p "$job_dir"
+    job_dirs+=("$job_dir")
+    
+    echo "[INFO] 启动并行任务: $target_name，CPU: $slot_cpus，工作目录: $job_dir"
+    (
+      cd "$job_dir" || exit 1
+      if [ "$pin_cpus" = true ]; then
+        export WRK_CPUSET="$slot_cpus"
+      fi
+      collect_target "$target_info" "$duration" "$job_threads" "$error_log_dir" "$job_dir/rows.csv"
+    ) > "$job_dir/job.log" 2>&1 &
+    slot_pids[$slot]=$!
+    slot_job_dirs[$slot]="$job_dir"
+    index=$((index + 1))
+  done
+  
+  # 等待剩余任务
+  local i
+  for ((i = 0; i < parallel_jobs; i++)); do
+    if [ -n "${slot_pids[$i]}" ]; then
+      finish_parallel_job "${slot_pids[$i]}" "${slot_job_dirs[$i]}"
+    fi
+  done
+  
+  # 按TARGETS顺序合并结果行，跳过失败的任务（finish_parallel_job写入了failed文件）
+  local failed_jobs=0
+  local job_dir
+  for job_dir in "${job_dirs[@]}"; do
+    if [ -f "$job_dir/failed" ]; then
+      log_error "并行任务失败（退出码: $(cat "$job_dir/failed")），不合并其结果行: $job_dir"
+      failed_jobs=$((failed_jobs + 1))
+      continue
+    fi
+    if [ -s "$job_dir/rows.csv" ]; then
+      cat "$job_dir/rows.csv" >> "$output_file"
+    else
+      log_warn "并行任务没有产生结果: $job_dir"
+    fi
+    if [ -s "$job_dir/rows_trials.csv" ]; then
+      cat "$job_dir/rows_trials.csv" >> "${output_file%.csv}_trials.csv"
+    fi
+  done
+  
+  if [ "$failed_jobs" -gt 0 ]; then
+    log_error "${#job_dirs[@]} 个并行任务中有 $failed_jobs 个失败"
+    return 1
+  fi
+  return 0
+}
+
+# finish_parallel_job函数：等待并行任务结束并输出其日志
+# 参数：
+#   $1 - 任务进程ID
+#   $2 - 任务工作目录
+# 返回：
+#   任务的退出码；非0时将退出码写入 <任务工作目录>/failed，合并结果时跳过该任务
+finish_parallel_job() {
+  local pid="$1"
+  local job_dir="$2"
+  
+  wait "$pid"
+  local exit_code=$?
+  echo "[INFO] 并行任务结束: $job_dir（退出码: $exit_code）"
+  cat "$job_dir/job.log"
+  if [ "$exit_code" -ne 0 ]; then
+    echo "$exit_code" > "$job_dir/failed"
+  fi
+  return $exit_code
+}
+
+# probe_connection_timing函数：压测期间用curl采样新建连接的TCP连接和TLS握手耗时
+# wrk不暴露连接建立耗时，采样在压测负载下进行，每次采样都是新的连接（curl不复用TLS会话）
+# 参数：
+#   $1 - 目标URL
+#   $2 - 压测持续时间（秒）
+#   $3 - 采样次数
+# 返回：
+#   标准输出 - JSON，如 {"samples":5,"failed":0,"tcp_connect_ms":1.234,"tls_handshake_ms":8.765,"tls_handshake_max_ms":12.3}
+probe_connection_timing() {
+  local target_url="$1"
+  local duration="$2"
+  local samples="$3"
+  
+  # 采样均匀分布在压测期间
+  local interval=$(awk -v d="$duration" -v n="$samples" 'BEGIN { printf "%.2f", d / (n + 1) }')
+  local i
+  for ((i = 1; i <= samples; i++)); do
+    sleep "$interval"
+    curl -s -o /dev/null -k --max-time 5 -H "Connection: close" \
+      -w '%{time_namelookup} %{time_connect} %{time_appconnect}\n' "$target_url" 2>/dev/null || echo "failed"
+  done | awk -v samples="$samples" '
+    $1 == "failed" || NF < 3 || $2 == 0 { next }
+    {
+      ok++
+      tcp += ($2 - $1) * 1000
+      if ($3 > 0) {
+        tls_n++
+        handshake = ($3 - $2) * 1000
+        tls += handshake
+        if (handshake > tls_max) tls_max = handshake
+      }
+    }
+    END {
+      printf "{\"samples\":%d,\"failed\":%d,", samples, samples - ok
+      printf "\"tcp_connect_ms\":%s,", ok ? sprintf("%.3f", tcp / ok) : "null"
+      printf "\"tls_handshake_ms\":%s,", tls_n ? sprintf("%.3f", tls / tls_n) : "null"
+      printf "\"tls_handshake_max_ms\":%s}\n", tls_n ? sprintf("%.3f", tls_max) : "null"
+    }'
 }
 
 # run_wrk_test函数：执行wrk压测并返回结果
@@ -398,12 +783,49 @@ run_wrk_test() {
   echo "[DEBUG] 执行wrk测试，URL: $target_url, 目标名称: $target_name, 并发: $connections, 线程: $threads, 持续: $duration" > "$temp_log_file"
   
   # 在后台执行wrk并获取PID，使用--latency参数获取更详细的延迟信息，增加--timeout参数以更好地捕获502错误
-  # 使用Lua脚本捕获HTTP状态码信息
-  local lua_script="$(dirname "$0")/lib/status_code.lua"
+  # 使用Lua脚本捕获HTTP状态码信息；WRK_LUA_SCRIPT为压测场景等自定义脚本（需加载status_code.lua）
+  local lua_script="${WRK_LUA_SCRIPT:-$SCRIPT_DIR/lib/status_code.lua}"
+  # 每个线程的连接数，场景脚本据此判断响应能否与请求一一对应
+  export WRK_CONNECTIONS_PER_THREAD=$((connections / threads))
+  # 初始连接数，Lua脚本据此计算新建连接数
+  export WRK_CONNECTIONS=$connections
+  # Lua脚本在done阶段将延迟分位数、延迟直方图和每秒请求数写入该文件，由collect函数归档
+  rm -f "wrk_metrics.tmp"
+  export WRK_METRICS_FILE="$(pwd)/wrk_metrics.tmp"
   # 同时使用tee保存完整输出到日志文件
-  wrk -t$threads -c$connections -d$duration --latency --timeout 10s -s "$lua_script" "$target_url" 2>&1 | tee -a "$temp_log_file" > wrk_result.tmp &
+  # 并行执行时绑定到分配的核心组（WRK_CPUSET由collect_targets_parallel设置）
+  local cpu_pinning=()
+  if [ -n "$WRK_CPUSET" ]; then
+    cpu_pinning=(taskset -c "$WRK_CPUSET")
+  fi
+  # FORCE_CONNECTION_CLOSE=true时每个请求都新建连接，用于测量握手受限的容量
+  local header_args=()
+  if [ "$FORCE_CONNECTION_CLOSE" = "true" ]; then
+    header_args=(-H "Connection: close")
+  fi
+  
+  # 预热：以相同参数独立运行wrk WARMUP_DURATION秒，结果不计入统计，
+  # 预热指标单独保存（wrk_warmup_metrics.tmp），后端用于计算包含预热的全程指标
+  rm -f "wrk_warmup_metrics.tmp"
+  if [ "${WARMUP_DURATION:-0}" -gt 0 ]; then
+    log_info "预热 ${WARMUP_DURATION} 秒（结果不计入统计）"
+    WRK_METRICS_FILE="$(pwd)/wrk_warmup_metrics.tmp" WRK_STATUS_INTERVAL=0 \
+      "${cpu_pinning[@]}" wrk -t$threads -c$connections -d${WARMUP_DURATION}s --latency --timeout 10s "${header_args[@]}" -s "$lua_script" "$target_url" > wrk_warmup.tmp 2>&1
+    echo "[WARMUP] 预热 ${WARMUP_DURATION} 秒完成，$(grep 'Requests/sec:' wrk_warmup.tmp | tr -s ' ')" >> "$temp_log_file"
+    rm -f wrk_warmup.tmp
+  fi
+  
+  "${cpu_pinning[@]}" wrk -t$threads -c$connections -d$duration --latency --timeout 10s "${header_args[@]}" -s "$lua_script" "$target_url" 2>&1 | tee -a "$temp_log_file" > wrk_result.tmp &
   local wrk_pid=$!
   
+  # 压测期间采样连接建立和TLS握手耗时
+  local probe_pid=""
+  rm -f "connection_probe.tmp"
+  if [ "${CONNECTION_PROBE_SAMPLES:-0}" -gt 0 ] && command -v curl > /dev/null 2>&1; then
+    probe_connection_timing "$target_url" "$total_seconds" "$CONNECTION_PROBE_SAMPLES" > connection_probe.tmp &
+    probe_pid=$!
+  fi
+  
   # 等待命令完成
   wait $wrk_pid
   local wrk_exit_code=$?
@@ -411,6 +833,20 @@ run_wrk_test() {
   # 添加退出码信息到日志
   echo "[DEBUG] wrk命令退出码: $wrk_exit_code" >> "$temp_log_file"
   
+  # 握手采样结果写入指标文件的connection_probe字段（指标文件为单行JSON对象）
+  if [ -n "$probe_pid" ]; then
+    wait $probe_pid
+    local probe_json=$(cat connection_probe.tmp 2>/dev/null)
+    rm -f "connection_probe.tmp"
+    if [ -n "$probe_json" ]; then
+      echo "[CONNECTION_PROBE] $probe_json" >> "$temp_log_file"
+      if [ -s "wrk_metrics.tmp" ]; then
+        local metrics_json=$(cat wrk_metrics.tmp)
+        printf '%s,"connection_probe":%s}\n' "${metrics_json%\}}" "$probe_json" > wrk_metrics.tmp
+      fi
+    fi
+  fi
+  
   # 检查是否有URL错误
   if grep -q "invalid URL" wrk_result.tmp || grep -q "Failed to connect" wrk_result.tmp || grep -q "Failed to resolve" wrk_result.tmp; then
     echo "[DEBUG] 检测到URL错误或连接失败: $target_url" >> "$temp_log_file"
@@ -432,66 +868,37 @@ run_wrk_test() {
   local status_other=0
   local total_responses=0
   
-  # 优先使用新的计数器文件方式
-  if [ -f "status_code_counter.tmp" ]; then
-    echo "[DEBUG] 从计数器文件提取状态码信息" >> "$temp_log_file"
-    
-    # 统计各类状态码
-    status_2xx=$(grep -c "^2xx$" "status_code_counter.tmp")
-    status_3xx=$(grep -c "^3xx$" "status_code_counter.tmp")
-    status_4xx=$(grep -c "^4xx$" "status_code_counter.tmp")
-    status_5xx=$(grep -c "^5xx$" "status_code_counter.tmp")
-    status_other=$(grep -c "^other$" "status_code_counter.tmp")
-    
-    # 计算总响应数
-    total_responses=$((status_2xx + status_3xx + status_4xx + status_5xx + status_other))
-    
-    # 清理计数器文件
-    rm -f "status_code_counter.tmp"
+  # 逐状态码分布（CSV中以 "200:123;502:4" 格式保存，避免与逗号分隔符冲突）
+  local status_codes="N/A"
+  
+  # 优先使用Lua脚本done阶段输出的精确统计（各线程内存计数汇总）
+  local statistics_line=$(grep -m 1 "\[STATISTICS\]" "$temp_log_file")
+  if [ -n "$statistics_line" ]; then
+    echo "[DEBUG] 从Lua统计行提取状态码信息" >> "$temp_log_file"
+    status_2xx=$(echo "$statistics_line" | sed -E 's/.*2xx=([0-9]+).*/\1/')
+    status_3xx=$(echo "$statistics_line" | sed -E 's/.*3xx=([0-9]+).*/\1/')
+    status_4xx=$(echo "$statistics_line" | sed -E 's/.*4xx=([0-9]+).*/\1/')
+    status_5xx=$(echo "$statistics_line" | sed -E 's/.*5xx=([0-9]+).*/\1/')
+    status_other=$(echo "$statistics_line" | sed -E 's/.*other=([0-9]+).*/\1/')
+    total_responses=$(echo "$statistics_line" | sed -E 's/.*total=([0-9]+).*/\1/')
     
-    echo "[DEBUG] 计数器文件提取结果: 2xx=${status_2xx}, 3xx=${status_3xx}, 4xx=${status_4xx}, 5xx=${status_5xx}, 其他=${status_other}, 总计=${total_responses}" >> "$temp_log_file"
-  else
-    # 降级方案1：从日志中提取[STATISTICS]行（如果有）
-    local statistics_line=$(grep -m 1 "\[STATISTICS\]" "$temp_log_file")
-    if [ -n "$statistics_line" ]; then
-      echo "[DEBUG] 从统计行提取状态码信息" >> "$temp_log_file"
-      status_2xx=$(echo "$statistics_line" | sed -E 's/.*2xx=([0-9]+).*/\1/')
-      status_3xx=$(echo "$statistics_line" | sed -E 's/.*3xx=([0-9]+).*/\1/')
-      status_4xx=$(echo "$statistics_line" | sed -E 's/.*4xx=([0-9]+).*/\1/')
-      status_5xx=$(echo "$statistics_line" | sed -E 's/.*5xx=([0-9]+).*/\1/')
-      total_responses=$(echo "$statistics_line" | sed -E 's/.*total=([0-9]+).*/\1/')
-    else
-      # 降级方案2：从日志中提取STATUS_CODE或STATUS_CODE_SAMPLE统计信息
-      echo "[DEBUG] 使用降级方案提取状态码信息" >> "$temp_log_file"
-      
-      # 计算样本数量的缩放因子（如果使用了采样）
-      local sample_count=$(grep -c "STATUS_CODE_SAMPLE:" "$temp_log_file")
-      local scaling_factor=100  # 采样率为1/100
-      
-      # 如果有样本，基于样本估算总数
-      if [ $sample_count -gt 0 ]; then
-        status_2xx=$(( $(grep "STATUS_CODE_SAMPLE:[2][0-9][0-9]" "$temp_log_file" | wc -l) * scaling_factor ))
-        status_3xx=$(( $(grep "STATUS_CODE_SAMPLE:[3][0-9][0-9]" "$temp_log_file" | wc -l) * scaling_factor ))
-        status_4xx=$(( $(grep "STATUS_CODE_SAMPLE:[4][0-9][0-9]" "$temp_log_file" | wc -l) * scaling_factor ))
-        status_5xx=$(( $(grep "STATUS_CODE_SAMPLE:[5][0-9][0-9]" "$temp_log_file" | wc -l) * scaling_factor ))
-        
-        # 尝试从wrk输出中获取实际请求数
-        total_responses=$(grep -oP '\d+ requests' "$temp_log_file" | awk '{print $1}')
-        if [ -z "$total_responses" ] || [ $total_responses -eq 0 ]; then
-          total_responses=$((sample_count * scaling_factor))
-        fi
-      else
-        # 尝试使用完整的STATUS_CODE格式
-        status_2xx=$(grep -c "STATUS_CODE:[2][0-9][0-9]" "$temp_log_file")
-        status_3xx=$(grep -c "STATUS_CODE:[3][0-9][0-9]" "$temp_log_file")
-        status_4xx=$(grep -c "STATUS_CODE:[4][0-9][0-9]" "$temp_log_file")
-        status_5xx=$(grep -c "STATUS_CODE:[5][0-9][0-9]" "$temp_log_file")
-        total_responses=$((status_2xx + status_3xx + status_4xx + status_5xx))
-      fi
+    local status_codes_line=$(grep -m 1 "\[STATUS_CODES\]" "$temp_log_file")
+    if [ -n "$status_codes_line" ]; then
+      status_codes=$(echo "$status_codes_line" | sed -E 's/^.*\[STATUS_CODES\] *//; s/[{}" ]//g; s/,/;/g')
+      status_codes=${status_codes:-N/A}
     fi
+  else
+    # Lua脚本未执行done阶段（如wrk异常退出）：只能使用wrk汇总，无法区分具体状态码
+    echo "[WARNING] 未找到Lua状态码统计，按wrk汇总统计（Non-2xx计入其他状态码）" >> "$temp_log_file"
+    total_responses=$(grep -oE '[0-9]+ requests in' wrk_result.tmp | head -1 | awk '{print $1}')
+    total_responses=${total_responses:-0}
+    local non_2xx=$(grep 'Non-2xx or 3xx responses:' wrk_result.tmp | grep -oE '[0-9]+' | head -1)
+    non_2xx=${non_2xx:-0}
+    status_other=$non_2xx
+    status_2xx=$((total_responses - non_2xx))
   fi
   
-  echo "[DEBUG] 使用新格式STATUS_CODE解析: 2xx=${status_2xx}, 3xx=${status_3xx}, 4xx=${status_4xx}, 5xx=${status_5xx}, 总计=${total_responses}" >> "$temp_log_file"
+  echo "[DEBUG] 状态码统计: 2xx=${status_2xx}, 3xx=${status_3xx}, 4xx=${status_4xx}, 5xx=${status_5xx}, 其他=${status_other}, 总计=${total_responses}, 分布=${status_codes}" >> "$temp_log_file"
   
   # 将Socket错误映射到5xx错误统计中
   local socket_errors=$(grep "Socket errors:" wrk_result.tmp | awk '{print $4+$6+$8+$10}' || echo "0")
@@ -612,6 +1019,7 @@ run_wrk_test() {
     echo "STATUS_5XX=${status_5xx:-0}"
     echo "STATUS_OTHER=${status_other:-0}"
     echo "TOTAL_RESPONSES=${total_responses:-0}"
+    echo "STATUS_CODES=${status_codes:-N/A}"
   } > status_code_stats_${target_name}_${connections}.tmp
   
   # 确保文件有执行权限（可选）
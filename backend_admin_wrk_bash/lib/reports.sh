@@ -79,7 +79,7 @@ generate_simple_analysis() {
   
   # 读取CSV数据并生成表格，同时收集错误信息
   if [ "$line_count" -ge 2 ]; then
-    tail -n +2 "$csv_file" | while IFS=',' read name conn qps latency cpu mem err log_path status_2xx status_3xx status_4xx status_5xx status_other total_requests; do
+    tail -n +2 "$csv_file" | while IFS=',' read name conn qps latency cpu mem err log_path status_2xx status_3xx status_4xx status_5xx status_other total_requests metrics_path status_codes; do
       # 确保err是有效的整数，如果为空则设为0
       if [ -z "$err" ]; then
         err="0"
@@ -117,8 +117,16 @@ generate_simple_analysis() {
           # 分析状态码信息
           echo "\n### HTTP状态码分析："
           
+          # 优先使用CSV中的逐状态码精确计数（格式 200:123;502:4）
+          if [ -n "$status_codes" ] && [ "$status_codes" != "N/A" ]; then
+            echo "| 状态码 | 出现次数 | 说明 |" >> "$error_details_file"
+            echo "|--------|----------|------|" >> "$error_details_file"
+            echo "$status_codes" | tr ';' '\n' | awk -F':' '$1 !~ /^[23]/ && $2 > 0 {print $2, $1}' | sort -nr | while read count code; do
+              local desc=$(parse_http_status "$code")
+              echo "| $code | $count | $desc |" >> "$error_details_file"
+            done
           # 尝试从日志中提取状态码信息
-          if grep -q -E ' [0-9]{3} ' "$actual_log_path"; then
+          elif grep -q -E ' [0-9]{3} ' "$actual_log_path"; then
             echo "| 状态码 | 出现次数 | 说明 |" >> "$error_details_file"
             echo "|--------|----------|------|" >> "$error_details_file"
             
@@ -145,6 +153,8 @@ generate_simple_analysis() {
     echo "| 无数据 | - | - | - | - | - | - | - |" >> "$report"
   fi
   
+  append_trials_table "$csv_file" "" "$report"
+  
   # 2. 性能分析
   echo -e "\n## 2. 性能分析" >> "$report"
   
@@ -307,6 +317,119 @@ generate_simple_analysis() {
   echo "$report"
 }
 
+# append_connection_table函数：将数据文件中各测试项的连接统计（来自指标文件的connections字段）追加到报告
+# 参数：
+#   $1 - CSV数据文件
+#   $2 - 数据来源说明（如"外网"）
+#   $3 - 报告文件
+append_connection_table() {
+  local csv_file="$1"
+  local label="$2"
+  local report="$3"
+  
+  if ! command -v jq > /dev/null 2>&1; then
+    echo -e "\n（未安装jq，跳过${label}连接统计）" >> "$report"
+    return 0
+  fi
+  
+  echo -e "\n### ${label}连接复用与TLS握手" >> "$report"
+  echo "| 测试项 | 并发数 | 短连接 | 新建连接 | 每连接请求数 | TLS握手 | 握手耗时(ms) | TCP连接耗时(ms) | 连接/读/写/超时错误 | 接收(MB) | 发送(MB) |" >> "$report"
+  echo "|--------|--------|--------|----------|--------------|---------|--------------|-----------------|---------------------|----------|----------|" >> "$report"
+  
+  tail -n +2 "$csv_file" | while IFS=',' read name conn qps latency cpu mem err log_path status_2xx status_3xx status_4xx status_5xx status_other total_requests metrics_path status_codes; do
+    if [ -z "$metrics_path" ] || [ ! -f "$metrics_path" ]; then
+      continue
+    fi
+    jq -r --arg name "$name" --arg conn "$conn" '
+      .connections as $c | .connection_probe as $p |
+      select($c != null) |
+      "| \($name) | \($conn) | \(if $c.forced_close then "是" else "否" end) | \($c.new_connections) | \($c.requests_per_connection)" +
+      " | \(if $c.tls then $c.tls_handshakes else "-" end) | \($p.tls_handshake_ms // "N/A") | \($p.tcp_connect_ms // "N/A")" +
+      " | \($c.socket_errors | "\(.connect)/\(.read)/\(.write)/\(.timeout)")" +
+      " | \($c.bytes_in / 1048576 * 100 | round / 100) | \($c.bytes_out / 1048576 * 100 | round / 100) |"
+    ' "$metrics_path" 2>/dev/null >> "$report"
+  done
+  
+  echo "- 每连接请求数接近1说明连接未被复用（短连接或服务端/WAF主动关闭连接），此时吞吐量主要受握手开销限制" >> "$report"
+  echo "- 握手耗时为压测期间新建连接的采样值，与 FORCE_CONNECTION_CLOSE=true 的短连接压测结果对比可区分握手开销和应用处理开销" >> "$report"
+}
+
+# append_trials_table函数：数据文件有重复试验明细（同名的 _trials.csv）时，将各测试项QPS、平均延迟和P99延迟的
+# 试验均值及95%置信区间（百分位Bootstrap）追加到报告
+# 参数：
+#   $1 - CSV数据文件
+#   $2 - 数据来源说明（如"外网"）
+#   $3 - 报告文件
+append_trials_table() {
+  local csv_file="$1"
+  local label="$2"
+  local report="$3"
+  local trials_file="${csv_file%.csv}_trials.csv"
+  
+  if [ ! -s "$trials_file" ] || [ "$(wc -l < "$trials_file")" -lt 2 ]; then
+    return 0
+  fi
+  
+  echo -e "\n### ${label}重复试验（均值 [95%置信区间]）" >> "$report"
+  echo "| 测试项 | 并发数 | 试验次数 | QPS | 平均延迟(ms) | P99延迟(ms) |" >> "$report"
+  echo "|--------|--------|----------|-----|--------------|-------------|" >> "$report"
+  
+  # 逐次试验的P99延迟来自各自的指标文件
+  tail -n +2 "$trials_file" | while IFS=',' read -r name conn qps latency cpu mem err log_path status_2xx status_3xx status_4xx status_5xx status_other total_requests metrics_path status_codes trial; do
+    local p99=""
+    if [ -n "$metrics_path" ] && [ -f "$metrics_path" ] && command -v jq > /dev/null 2>&1; then
+      p99=$(jq -r '.latency_percentiles_ms.p99 // empty' "$metrics_path" 2>/dev/null)
+    fi
+    echo "$name,$conn,$qps,$latency,$p99"
+  done | awk -F',' -v iterations=2000 -v confidence=0.95 '
+    # 希尔排序（非递归，重采样结果大量重复时不会出现快速排序的深递归）
+    function shell_sort(a, n,   gap, i, j, t) {
+      for (gap = int(n / 2); gap > 0; gap = int(gap / 2)) {
+        for (i = gap + 1; i <= n; i++) {
+          t = a[i]
+          for (j = i; j > gap && a[j - gap] > t; j -= gap) a[j] = a[j - gap]
+          a[j] = t
+        }
+      }
+    }
+    # 有放回重采样iterations次，取重采样均值分布的分位数作为区间
+    function interval(key, column,   n, i, j, sum, resampled, estimates) {
+      n = samples[key, column]
+      if (n == 0) return "N/A"
+      sum = 0
+      for (j = 1; j <= n; j++) sum += values[key, column, j]
+      if (n < 2) return sprintf("%.1f", sum / n)
+      for (i = 1; i <= iterations; i++) {
+        resampled = 0
+        for (j = 1; j <= n; j++) resampled += values[key, column, int(rand() * n) + 1]
+        estimates[i] = resampled / n
+      }
+      shell_sort(estimates, iterations)
+      return sprintf("%.1f [%.1f, %.1f]", sum / n,
+        estimates[int((1 - confidence) / 2 * iterations) + 1], estimates[int((1 + confidence) / 2 * iterations)])
+    }
+    BEGIN { srand(1) }
+    {
+      key = $1 SUBSEP $2
+      if (!(key in trials)) order[++levels] = key
+      trials[key]++
+      for (c = 3; c <= 5; c++) {
+        if ($c ~ /^[0-9.]+$/) values[key, c, ++samples[key, c]] = $c
+      }
+    }
+    END {
+      for (l = 1; l <= levels; l++) {
+        split(order[l], parts, SUBSEP)
+        printf "| %s | %s | %d | %s | %s | %s |\n", parts[1], parts[2], trials[order[l]],
+          interval(order[l], 3), interval(order[l], 4), interval(order[l], 5)
+      }
+    }
+  ' >> "$report"
+  
+  echo "- 置信区间为逐次试验均值的百分位Bootstrap区间；两组结果的区间不重叠时，差异才可认为超出测量噪声" >> "$report"
+  echo "- 试验次数少于5次时区间偏窄，仅供参考" >> "$report"
+}
+
 # generate_waf_report函数：生成WAF性能报告
 # 参数：无
 # 返回值：0表示成功，非0表示失败
@@ -437,6 +560,12 @@ generate_waf_internet_report() {
     echo "| $name | $conn | $qps_intranet | ${qps_internet:-N/A} | ${qps_drop}% | ${lat_intranet}ms | ${lat_internet:-N/A}ms | ${lat_increase}% | ${err_intranet} | ${err_internet:-0} | ${err_change} |" >> "$report"
   done
   
+  # WAF常以关闭长连接、限制TLS会话等方式影响吞吐量，分别列出内外网的连接统计
+  append_connection_table "$intranet_file" "内网(无WAF)" "$report"
+  append_connection_table "$internet_file" "外网(有WAF)" "$report"
+  append_trials_table "$intranet_file" "内网(无WAF)" "$report"
+  append_trials_table "$internet_file" "外网(有WAF)" "$report"
+  
   # 2. WAF防护效果评估
   echo -e "\n## 2. WAF防护效果评估" >> "$report"
   
@@ -0,0 +1,281 @@
+-- wrk 压测场景运行时 - 按权重混合多个接口请求，输出各接口的请求数、状态码和延迟
+--
+-- 由ScenarioService生成的场景脚本先定义全局变量scenario，再依次加载status_code.lua和本文件：
+--   scenario = {
+--       think_time_ms = { min = 0, max = 0 },   -- 每个连接两次请求之间的等待时间
+--       template_variants = 64,                 -- 含模板变量的请求预先展开的份数
+--       endpoints = {
+--           { name = "首页", name_json = "\"首页\"", method = "GET", path = "/", headers = {}, body = nil, weight = 1, templated = false },
+--       },
+--   }
+--
+-- 请求字符串在init阶段按接口（及模板变量展开份数）一次性构建，request()只做加权选择，不再拼接字符串。
+-- wrk的response()不携带连接信息，只有每个线程一个连接（WRK_CONNECTIONS_PER_THREAD=1）时
+-- 响应才能与请求一一对应；否则只统计各接口的请求数，状态码和延迟按整体统计
+
+local scenario_threads = {}
+local base_setup, base_init, base_response, base_done = setup, init, response, done
+
+-- 微秒级时钟（LuaJIT FFI），不可用时不统计各接口延迟
+local now_us = nil
+local ffi_ok, ffi = pcall(require, "ffi")
+if ffi_ok then
+    if ffi.os == "OSX" then
+        ffi.cdef("typedef struct { long tv_sec; int32_t tv_usec; } scenario_timeval;")
+    else
+        ffi.cdef("typedef struct { long tv_sec; long tv_usec; } scenario_timeval;")
+    end
+    ffi.cdef("int gettimeofday(scenario_timeval *tv, void *tz);")
+    local timeval = ffi.new("scenario_timeval")
+    now_us = function()
+        ffi.C.gettimeofday(timeval, nil)
+        return tonumber(timeval.tv_sec) * 1000000 + tonumber(timeval.tv_usec)
+    end
+end
+
+function setup(thread)
+    base_setup(thread)
+    table.insert(scenario_threads, thread)
+end
+
+-- 展开模板变量：{{seq}} 展开序号，{{thread}} 线程序号，{{rand}} 随机整数
+local function expand_template(text, seq)
+    if not text then
+        return nil
+    end
+    text = string.gsub(text, "{{seq}}", tostring(seq))
+    text = string.gsub(text, "{{thread}}", tostring(thread_id or 0))
+    text = string.gsub(text, "{{rand}}", function() return tostring(math.random(0, 2147483646)) end)
+    return text
+end
+
+-- 线程内全局变量：
+--   endpoint_requests  各接口预先构建的请求字符串列表
+--   endpoint_cursor    各接口下一次使用的请求字符串序号
+--   cumulative_weights 累计权重，request()中二分查找选择接口
+--   endpoint_stats     各接口统计（请求数、响应数、状态码、延迟直方图）
+function init(args)
+    base_init(args)
+    -- 发送字节数在request()中按实际请求长度统计
+    count_bytes_out_on_response = false
+    math.randomseed(os.time() * 1000 + (thread_id or 0))
+    
+    exact_attribution = tonumber(os.getenv("WRK_CONNECTIONS_PER_THREAD") or "0") == 1
+    endpoint_requests = {}
+    endpoint_cursor = {}
+    cumulative_weights = {}
+    endpoint_stats = {}
+    total_weight = 0
+    pending_endpoint = nil
+    pending_start = nil
+    
+    for i, endpoint in ipairs(scenario.endpoints) do
+        local variants = {}
+        local count = endpoint.templated and scenario.template_variants or 1
+        for seq = 1, count do
+            -- 命令行-H设置的请求头（如Connection: close）对所有接口生效，接口请求头优先
+            local headers = {}
+            for name, value in pairs(wrk.headers) do
+                if name ~= "Content-Length" then
+                    headers[name] = value
+                end
+            end
+            for name, value in pairs(endpoint.headers) do
+                headers[name] = endpoint.templated and expand_template(value, seq) or value
+            end
+            variants[seq] = wrk.format(
+                endpoint.method,
+                expand_template(endpoint.path, seq),
+                headers,
+                expand_template(endpoint.body, seq)
+            )
+        end
+        endpoint_requests[i] = variants
+        endpoint_cursor[i] = 0
+        total_weight = total_weight + endpoint.weight
+        cumulative_weights[i] = total_weight
+        endpoint_stats[i] = { sent = 0, responses = 0, latency_sum_us = 0, status = {}, latency = {} }
+    end
+end
+
+function request()
+    -- 按累计权重二分查找接口
+    local target = math.random() * total_weight
+    local low, high = 1, #cumulative_weights
+    while low < high do
+        local middle = math.floor((low + high) / 2)
+        if target < cumulative_weights[middle] then
+            high = middle
+        else
+            low = middle + 1
+        end
+    end
+    
+    local variants = endpoint_requests[low]
+    local cursor = endpoint_cursor[low] % #variants + 1
+    endpoint_cursor[low] = cursor
+    endpoint_stats[low].sent = endpoint_stats[low].sent + 1
+    
+    if exact_attribution then
+        pending_endpoint = low
+        pending_start = now_us and now_us() or nil
+    end
+    local req = variants[cursor]
+    record_bytes_out(#req)
+    return req
+end
+
+-- 延迟直方图分桶：与status_code.lua一致，保留两位有效数字（微秒）
+local function latency_bucket(us)
+    if us < 100 then
+        return math.floor(us)
+    end
+    local magnitude = 10 ^ (math.floor(math.log10(us)) - 1)
+    return math.floor(us / magnitude) * magnitude
+end
+
+function response(status, headers, body)
+    local result = base_response(status, headers, body)
+    
+    if pending_endpoint then
+        local stats = endpoint_stats[pending_endpoint]
+        stats.responses = stats.responses + 1
+        stats.status[status] = (stats.status[status] or 0) + 1
+        if pending_start then
+            local elapsed = now_us() - pending_start
+            local bucket = latency_bucket(elapsed)
+            stats.latency[bucket] = (stats.latency[bucket] or 0) + 1
+            stats.latency_sum_us = stats.latency_sum_us + elapsed
+        end
+        pending_endpoint = nil
+        pending_start = nil
+    end
+    
+    return result
+end
+
+if scenario.think_time_ms and scenario.think_time_ms.max > 0 then
+    function delay()
+        local think_time = scenario.think_time_ms
+        return think_time.min + math.random() * (think_time.max - think_time.min)
+    end
+end
+
+-- 汇总各线程的接口统计
+local function merge_endpoint_stats()
+    local merged = {}
+    for i = 1, #scenario.endpoints do
+        merged[i] = { sent = 0, responses = 0, latency_sum_us = 0, status = {}, latency = {} }
+    end
+    for _, thread in ipairs(scenario_threads) do
+        local stats = thread:get("endpoint_stats")
+        if stats then
+            for i, item in pairs(stats) do
+                local target = merged[i]
+                target.sent = target.sent + item.sent
+                target.responses = target.responses + item.responses
+                target.latency_sum_us = target.latency_sum_us + item.latency_sum_us
+                for code, count in pairs(item.status) do
+                    target.status[code] = (target.status[code] or 0) + count
+                end
+                for bucket, count in pairs(item.latency) do
+                    target.latency[bucket] = (target.latency[bucket] or 0) + count
+                end
+            end
+        end
+    end
+    return merged
+end
+
+-- 由延迟直方图计算分位数（毫秒）
+local function histogram_percentiles(histogram, total, percents)
+    local buckets = {}
+    for bucket in pairs(histogram) do
+        table.insert(buckets, bucket)
+    end
+    table.sort(buckets)
+    
+    local result = {}
+    local seen, index = 0, 1
+    for _, percent in ipairs(percents) do
+        local threshold = total * percent / 100
+        while index <= #buckets and seen + histogram[buckets[index]] < threshold do
+            seen = seen + histogram[buckets[index]]
+            index = index + 1
+        end
+        local bucket = buckets[math.min(index, #buckets)] or 0
+        table.insert(result, bucket / 1000)
+    end
+    return result
+end
+
+local function endpoint_status_json(counts)
+    local codes = {}
+    for code in pairs(counts) do
+        table.insert(codes, code)
+    end
+    table.sort(codes)
+    local parts = {}
+    for _, code in ipairs(codes) do
+        table.insert(parts, string.format('"%d":%.0f', code, counts[code]))
+    end
+    return "{" .. table.concat(parts, ",") .. "}"
+end
+
+-- 各接口统计的JSON数组，attribution为exact时包含状态码和延迟
+local function endpoints_json(merged)
+    local items = {}
+    for i, endpoint in ipairs(scenario.endpoints) do
+        local stats = merged[i]
+        local fields = {
+            '"name":' .. endpoint.name_json,
+            string.format('"method":"%s"', endpoint.method),
+            string.format('"weight":%d', endpoint.weight),
+            string.format('"requests":%.0f', stats.sent),
+            string.format('"attribution":"%s"', exact_attribution and "exact" or "none"),
+        }
+        if exact_attribution then
+            table.insert(fields, string.format('"responses":%.0f', stats.responses))
+            table.insert(fields, '"status_codes":' .. endpoint_status_json(stats.status))
+            local measured = 0
+            for _, count in pairs(stats.latency) do
+                measured = measured + count
+            end
+            if measured > 0 then
+                local p = histogram_percentiles(stats.latency, measured, { 50, 90, 95, 99 })
+                table.insert(fields, string.format(
+                    '"latency_ms":{"mean":%.3f,"p50":%.3f,"p90":%.3f,"p95":%.3f,"p99":%.3f}',
+                    stats.latency_sum_us / measured / 1000, p[1], p[2], p[3], p[4]
+                ))
+            end
+        end
+        table.insert(items, "{" .. table.concat(fields, ",") .. "}")
+    end
+    return "[" .. table.concat(items, ",") .. "]"
+end
+
+local merged_endpoint_stats = nil
+
+table.insert(metrics_extensions, function()
+    return '"endpoints":' .. endpoints_json(merged_endpoint_stats or merge_endpoint_stats())
+end)
+
+function done(summary, latency, requests)
+    exact_attribution = tonumber(os.getenv("WRK_CONNECTIONS_PER_THREAD") or "0") == 1
+    merged_endpoint_stats = merge_endpoint_stats()
+    
+    print("\n==== 场景接口统计 ====")
+    for i, endpoint in ipairs(scenario.endpoints) do
+        local stats = merged_endpoint_stats[i]
+        local line = string.format("[ENDPOINT] %s %s weight=%d requests=%.0f",
+            endpoint.name, endpoint.method, endpoint.weight, stats.sent)
+        if exact_attribution then
+            for code, count in pairs(stats.status) do
+                line = line .. string.format(" %d=%.0f", code, count)
+            end
+        end
+        print(line)
+    end
+    
+    base_done(summary, latency, requests)
+end
@@ -1,43 +1,364 @@
--- wrk 状态码统计脚本 - 使用文件进行状态码累积统计
+-- wrk 状态码统计脚本 - 各线程在内存中按状态码精确计数，done阶段汇总
+-- 同时统计连接复用情况：服务端关闭的连接数、收发字节数，结合wrk的Socket错误估算新建连接和TLS握手次数
 
 -- 初始化信息
 print("[Lua] 状态码统计脚本已加载")
 
--- 每个响应一个简单标记，避免日志文件过大，但保留基本跟踪
+-- 所有压测线程，done函数中通过thread:get汇总各线程的每秒请求数和状态码计数
+local threads = {}
+
+-- 扩展脚本（如场景脚本 scenario.lua）注册的指标字段生成函数，
+-- 每个函数返回一段JSON字段（如 '"endpoints":[...]'），追加到指标文件
+metrics_extensions = metrics_extensions or {}
+
+function setup(thread)
+    thread:set("thread_id", #threads + 1)
+    table.insert(threads, thread)
+end
+
+-- 线程内全局变量：
+--   requests_per_second 每秒完成的请求数（key为Unix秒）
+--   status_counts       各状态码的响应数（key为状态码），每个状态码只在首次出现时创建表项
+--   connection_stats    服务端关闭的连接数（响应带Connection: close）、收发字节数（收到字节数只在按秒统计时估算）
+--   connection_per_second 每秒的连接统计（key为Unix秒），收到字节数按响应头和响应体长度估算
+--   track_seconds       是否按秒统计：只有指标文件（WRK_METRICS_FILE）和间隔输出需要，
+--                       两者都关闭时response()不调用os.time()
+function init(args)
+    requests_per_second = {}
+    status_counts = {}
+    connection_stats = { closes = 0, bytes_in = 0, bytes_out = 0 }
+    connection_per_second = {}
+    -- 未定义request()时wrk每次发送相同的请求，按响应数计算发送字节数；
+    -- 场景脚本在request()中调用record_bytes_out并关闭该选项
+    request_size = #wrk.format()
+    count_bytes_out_on_response = true
+    -- 每隔多少秒输出一次本线程的状态码计数（WRK_STATUS_INTERVAL，0表示不输出）
+    status_interval = tonumber(os.getenv("WRK_STATUS_INTERVAL") or "10") or 10
+    track_seconds = (os.getenv("WRK_METRICS_FILE") or "") ~= "" or status_interval > 0
+    last_status_report = track_seconds and os.time() or 0
+end
+
+-- 按状态码排序后的状态码列表
+local function sorted_codes(counts)
+    local codes = {}
+    for code in pairs(counts) do
+        table.insert(codes, code)
+    end
+    table.sort(codes)
+    return codes
+end
+
+-- 状态码计数格式化为 "200=123 502=4"
+local function format_status_counts(counts)
+    local parts = {}
+    for _, code in ipairs(sorted_codes(counts)) do
+        table.insert(parts, string.format("%d=%.0f", code, counts[code]))
+    end
+    return table.concat(parts, " ")
+end
+
+-- 某一秒的连接统计
+local function connection_second(second)
+    local stats = connection_per_second[second]
+    if not stats then
+        stats = { closes = 0, bytes_in = 0, bytes_out = 0 }
+        connection_per_second[second] = stats
+    end
+    return stats
+end
+
+-- 记录发送的请求字节数
+function record_bytes_out(size)
+    connection_stats.bytes_out = connection_stats.bytes_out + size
+    if track_seconds then
+        local stats = connection_second(os.time())
+        stats.bytes_out = stats.bytes_out + size
+    end
+end
+
+-- 响应头字节数估算：状态行 + 响应头 + 空行（不含分块编码开销）
+local function header_size(headers)
+    local size = 19
+    for name, value in pairs(headers) do
+        size = size + #name + #value + 4
+    end
+    return size
+end
+
+-- 当前秒、当前秒的连接统计和响应头字节数：同一秒内的响应直接累加，不再查找表项和遍历响应头
+local current_second = nil
+local current_stats = nil
+local current_header_size = 0
+
+-- 进入新的一秒：切换当前秒的统计表，以本秒第一个响应的响应头估算本秒所有响应的响应头字节数
+-- （同一目标的响应头大小基本固定），并按间隔输出本线程累计的状态码计数和连接统计，
+-- 便于在任务日志中观察错误和重连出现的时间
+local function start_second(second, headers)
+    current_second = second
+    current_stats = connection_second(second)
+    current_header_size = header_size(headers)
+    requests_per_second[second] = requests_per_second[second] or 0
+    
+    if status_interval > 0 and second - last_status_report >= status_interval then
+        last_status_report = second
+        print(string.format("[STATUS_INTERVAL] thread=%s time=%d %s", thread_id, second, format_status_counts(status_counts)))
+        print(string.format("[CONN_INTERVAL] thread=%s time=%d closes=%.0f bytes_in=%.0f bytes_out=%.0f",
+            thread_id, second, connection_stats.closes, connection_stats.bytes_in, connection_stats.bytes_out))
+    end
+end
+
 function response(status, headers, body)
-    -- 使用简单格式输出每个状态码，但每100个请求才输出一次，减少日志量
-    if math.random(100) == 1 then
-        print("STATUS_CODE_SAMPLE:" .. status)
+    status_counts[status] = (status_counts[status] or 0) + 1
+    
+    -- 服务端在响应中声明关闭连接时，wrk会重新建立连接（HTTPS需重新TLS握手）；
+    -- 只有长度为5的值才可能是不同大小写的close，其余值不调用string.lower
+    local connection = headers["Connection"] or headers["connection"]
+    local closed = connection ~= nil and (connection == "close" or (#connection == 5 and string.lower(connection) == "close"))
+    if closed then
+        connection_stats.closes = connection_stats.closes + 1
+    end
+    if count_bytes_out_on_response then
+        connection_stats.bytes_out = connection_stats.bytes_out + request_size
     end
     
-    -- 对于502错误，总是标记
-    if status == 502 then
-        print("FOUND_502_ERROR:1")
+    if not track_seconds then
+        return true
     end
     
-    -- 尝试使用shell命令更新计数器文件（通过os.execute）
-    local status_category = "other"
-    if status >= 200 and status < 300 then
-        status_category = "2xx"
-    elseif status >= 300 and status < 400 then
-        status_category = "3xx"
-    elseif status >= 400 and status < 500 then
-        status_category = "4xx"
-    elseif status >= 500 and status < 600 then
-        status_category = "5xx"
+    -- 每秒请求数采样，用于跨任务比较时的显著性检验
+    local second = os.time()
+    if second ~= current_second then
+        start_second(second, headers)
     end
+    requests_per_second[second] = requests_per_second[second] + 1
     
-    -- 使用原子操作更新计数器（使用绝对路径，避免多线程问题）
-    os.execute("echo '" .. status_category .. "' >> $(pwd)/status_code_counter.tmp 2>/dev/null")
+    local stats = current_stats
+    if closed then
+        stats.closes = stats.closes + 1
+    end
+    local size = current_header_size + (body and #body or 0)
+    connection_stats.bytes_in = connection_stats.bytes_in + size
+    stats.bytes_in = stats.bytes_in + size
+    if count_bytes_out_on_response then
+        stats.bytes_out = stats.bytes_out + request_size
+    end
     
     return true
 end
 
--- done函数 - 输出最终信息
+-- 汇总各线程的状态码计数
+local function merge_status_counts()
+    local merged = {}
+    for _, thread in ipairs(threads) do
+        local counts = thread:get("status_counts")
+        if counts then
+            for code, count in pairs(counts) do
+                merged[code] = (merged[code] or 0) + count
+            end
+        end
+    end
+    return merged
+end
+
+-- 汇总各线程的连接统计，返回总计和每秒统计
+local function merge_connection_stats()
+    local totals = { closes = 0, bytes_in = 0, bytes_out = 0 }
+    local per_second = {}
+    for _, thread in ipairs(threads) do
+        local stats = thread:get("connection_stats")
+        if stats then
+            for key in pairs(totals) do
+                totals[key] = totals[key] + (stats[key] or 0)
+            end
+        end
+        local seconds = thread:get("connection_per_second")
+        if seconds then
+            for second, item in pairs(seconds) do
+                local merged = per_second[second] or { closes = 0, bytes_in = 0, bytes_out = 0 }
+                for key in pairs(merged) do
+                    merged[key] = merged[key] + (item[key] or 0)
+                end
+                per_second[second] = merged
+            end
+        end
+    end
+    return totals, per_second
+end
+
+-- 连接统计转换为JSON对象
+-- 新建连接数 = 初始连接数 + 服务端关闭后的重连 + 连接/读/写错误后的重连（wrk在这些情况下重建连接，超时不重连）；
+-- HTTPS下wrk不复用TLS会话，每个成功建立的连接都进行一次完整握手
+local function connections_json(summary, totals, first_second, last_second, per_second)
+    local errors = summary.errors
+    local initial = tonumber(os.getenv("WRK_CONNECTIONS") or "") or 0
+    local reconnects = totals.closes + errors.connect + errors.read + errors.write
+    local new_connections = initial + reconnects
+    local tls = wrk.scheme == "https"
+    local established = math.max(new_connections - errors.connect, 0)
+    local forced_close = string.lower(wrk.headers["Connection"] or "") == "close"
+    
+    local series = { closes = {}, bytes_in = {}, bytes_out = {} }
+    if first_second then
+        for second = first_second, last_second do
+            local item = per_second[second]
+            for key, values in pairs(series) do
+                table.insert(values, string.format("%.0f", item and item[key] or 0))
+            end
+        end
+    end
+    
+    local fields = {
+        string.format('"forced_close":%s', tostring(forced_close)),
+        string.format('"initial_connections":%.0f', initial),
+        string.format('"server_closes":%.0f', totals.closes),
+        string.format('"reconnects":%.0f', reconnects),
+        string.format('"new_connections":%.0f', new_connections),
+        string.format('"requests_per_connection":%.2f', new_connections > 0 and summary.requests / new_connections or 0),
+        string.format('"tls":%s', tostring(tls)),
+        string.format('"tls_handshakes":%.0f', tls and established or 0),
+        string.format('"socket_errors":{"connect":%.0f,"read":%.0f,"write":%.0f,"timeout":%.0f}',
+            errors.connect, errors.read, errors.write, errors.timeout),
+        string.format('"bytes_in":%.0f', summary.bytes),
+        string.format('"bytes_out":%.0f', totals.bytes_out),
+    }
+    if first_second then
+        table.insert(fields, '"per_second":{"server_closes":[' .. table.concat(series.closes, ",") ..
+            '],"bytes_in_estimated":[' .. table.concat(series.bytes_in, ",") ..
+            '],"bytes_out":[' .. table.concat(series.bytes_out, ",") .. ']}')
+    end
+    return "{" .. table.concat(fields, ",") .. "}"
+end
+
+-- 状态码计数转换为JSON对象，如 {"200":123,"502":4}
+local function status_counts_json(counts)
+    local parts = {}
+    for _, code in ipairs(sorted_codes(counts)) do
+        table.insert(parts, string.format('"%d":%.0f', code, counts[code]))
+    end
+    return "{" .. table.concat(parts, ",") .. "}"
+end
+
+-- 按类别汇总：2xx/3xx/4xx/5xx/other
+local function status_classes(counts)
+    local classes = { ["2xx"] = 0, ["3xx"] = 0, ["4xx"] = 0, ["5xx"] = 0, other = 0 }
+    local total = 0
+    for code, count in pairs(counts) do
+        local class = "other"
+        if code >= 200 and code < 600 then
+            class = string.format("%dxx", math.floor(code / 100))
+        end
+        classes[class] = classes[class] + count
+        total = total + count
+    end
+    return classes, total
+end
+
+-- 延迟直方图分桶：保留两位有效数字（微秒），不同任务的桶边界一致，便于合并和比较
+local function latency_bucket(us)
+    if us < 100 then
+        return us
+    end
+    local magnitude = 10 ^ (math.floor(math.log10(us)) - 1)
+    return math.floor(us / magnitude) * magnitude
+end
+
+-- 将压测指标写入WRK_METRICS_FILE指定的JSON文件（由collect.sh设置）
+local function write_metrics(summary, latency, status_counts_all, connections)
+    local metrics_file = os.getenv("WRK_METRICS_FILE")
+    if not metrics_file or metrics_file == "" then
+        return
+    end
+    
+    -- 汇总各线程的每秒请求数，首尾两秒为不完整秒，样本足够时丢弃
+    local merged = {}
+    local first_second, last_second
+    for _, thread in ipairs(threads) do
+        local counts = thread:get("requests_per_second")
+        if counts then
+            for second, count in pairs(counts) do
+                merged[second] = (merged[second] or 0) + count
+                if not first_second or second < first_second then first_second = second end
+                if not last_second or second > last_second then last_second = second end
+            end
+        end
+    end
+    local per_second = {}
+    if first_second then
+        if last_second - first_second >= 3 then
+            first_second = first_second + 1
+            last_second = last_second - 1
+        end
+        for second = first_second, last_second do
+            table.insert(per_second, string.format("%.0f", merged[second] or 0))
+        end
+    end
+    
+    -- 延迟直方图：[桶下界(ms), 请求数]
+    local buckets = {}
+    local bucket_keys = {}
+    for i = 1, #latency do
+        local value, count = latency(i)
+        local bucket = latency_bucket(value)
+        if not buckets[bucket] then
+            buckets[bucket] = 0
+            table.insert(bucket_keys, bucket)
+        end
+        buckets[bucket] = buckets[bucket] + count
+    end
+    table.sort(bucket_keys)
+    local histogram = {}
+    for _, bucket in ipairs(bucket_keys) do
+        table.insert(histogram, string.format("[%.3f,%.0f]", bucket / 1000, buckets[bucket]))
+    end
+    
+    local percentiles = {}
+    for _, p in ipairs({ {"p50", 50}, {"p75", 75}, {"p90", 90}, {"p95", 95}, {"p99", 99}, {"p999", 99.9} }) do
+        table.insert(percentiles, string.format('"%s":%.3f', p[1], latency:percentile(p[2]) / 1000))
+    end
+    
+    local file = io.open(metrics_file, "w")
+    if not file then
+        print("[Lua] 无法写入指标文件: " .. metrics_file)
+        return
+    end
+    file:write("{")
+    file:write(string.format('"duration_s":%.3f,', summary.duration / 1000000))
+    file:write(string.format('"requests":%.0f,', summary.requests))
+    file:write(string.format('"latency_mean_ms":%.3f,', latency.mean / 1000))
+    file:write(string.format('"latency_stdev_ms":%.3f,', latency.stdev / 1000))
+    file:write(string.format('"latency_max_ms":%.3f,', latency.max / 1000))
+    file:write('"latency_percentiles_ms":{' .. table.concat(percentiles, ",") .. "},")
+    file:write('"latency_histogram_ms":[' .. table.concat(histogram, ",") .. "],")
+    file:write('"requests_per_second":[' .. table.concat(per_second, ",") .. "],")
+    file:write('"status_codes":' .. status_counts_json(status_counts_all) .. ",")
+    file:write('"connections":' .. connections(first_second, last_second))
+    for _, extension in ipairs(metrics_extensions) do
+        file:write("," .. extension())
+    end
+    file:write("}\n")
+    file:close()
+end
+
+-- done函数 - 汇总并输出状态码统计，写入指标文件
 function done(summary, latency, requests)
+    local counts = merge_status_counts()
+    local classes, total = status_classes(counts)
+    
     print("\n==== 状态码统计结束 ====")
-    print("统计信息将通过collect.sh脚本从计数器文件中提取")
+    -- collect.sh从以下两行解析精确的状态码统计
+    print("[STATUS_CODES] " .. status_counts_json(counts))
+    print(string.format("[STATISTICS] 2xx=%.0f 3xx=%.0f 4xx=%.0f 5xx=%.0f other=%.0f total=%.0f",
+        classes["2xx"], classes["3xx"], classes["4xx"], classes["5xx"], classes.other, total))
+    
+    local connection_totals, connection_seconds = merge_connection_stats()
+    local function connections(first_second, last_second)
+        return connections_json(summary, connection_totals, first_second, last_second, connection_seconds)
+    end
+    -- collect.sh从该行解析连接统计（不含每秒数据）
+    print("[CONNECTIONS] " .. connections(nil, nil))
+    
+    write_metrics(summary, latency, counts, connections)
     
     -- 输出一个特殊标记，表示done函数已执行
     print("[LUA_DONE_EXECUTED]")
-end
\ No newline at end of file
+end
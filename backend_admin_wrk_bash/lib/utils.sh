@@ -398,6 +398,54 @@ get_system_info() {
   log_info "- 总内存: $(free -h 2>/dev/null || vm_stat | grep 'Pages free' | awk '{print $3 * 4096 / 1024 / 1024 " MB"}' 2>/dev/null || echo '未知')"
 }
 
+# expand_cpu_list函数：展开CPU列表
+# 参数：
+#   $1 - CPU列表（taskset格式，如"0-3,8,10-11"）
+# 返回值：
+#   空格分隔的CPU编号（如"0 1 2 3 8 10 11"）
+expand_cpu_list() {
+  local cpu_list="$1"
+  local cpus=()
+  local item
+  
+  IFS="," read -ra items <<< "$cpu_list"
+  for item in "${items[@]}"; do
+    item=$(echo "$item" | tr -d ' ')
+    if [[ "$item" =~ ^([0-9]+)-([0-9]+)$ ]]; then
+      local cpu
+      for ((cpu = ${BASH_REMATCH[1]}; cpu <= ${BASH_REMATCH[2]}; cpu++)); do
+        cpus+=("$cpu")
+      done
+    elif [[ "$item" =~ ^[0-9]+$ ]]; then
+      cpus+=("$item")
+    fi
+  done
+  
+  echo "${cpus[@]}"
+}
+
+# get_generator_cpus函数：获取可用于压测客户端（wrk）的CPU编号
+# 优先使用GENERATOR_CPUS配置，其次使用当前进程的CPU亲和性，最后使用全部在线CPU
+# 返回值：
+#   空格分隔的CPU编号
+get_generator_cpus() {
+  if [ -n "$GENERATOR_CPUS" ]; then
+    expand_cpu_list "$GENERATOR_CPUS"
+    return 0
+  fi
+  
+  if command -v taskset > /dev/null 2>&1; then
+    local affinity=$(taskset -cp $$ 2>/dev/null | awk -F': ' '{print $2}')
+    if [ -n "$affinity" ]; then
+      expand_cpu_list "$affinity"
+      return 0
+    fi
+  fi
+  
+  local cpu_count=$(nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 1)
+  expand_cpu_list "0-$((cpu_count - 1))"
+}
+
 # ==============================================================================
 # 依赖检查函数
 # ==============================================================================
@@ -699,6 +747,16 @@ validate_configuration() {
     errors=$((errors + 1))
   fi
   
+  # 验证重复试验配置
+  if [[ ! "${REPETITIONS:-1}" =~ ^[0-9]+$ ]] || [ "${REPETITIONS:-1}" -le 0 ]; then
+    log_error "错误：重复试验次数必须是正整数，当前值: $REPETITIONS"
+    errors=$((errors + 1))
+  fi
+  if [ "${REPETITION_ORDER:-sequential}" != "sequential" ] && [ "${REPETITION_ORDER:-sequential}" != "interleaved" ]; then
+    log_error "错误：重复试验顺序必须是sequential或interleaved，当前值: $REPETITION_ORDER"
+    errors=$((errors + 1))
+  fi
+  
   # 验证必需的外部工具
   for cmd in "docker" "wrk"; do
     if ! command -v "$cmd" &> /dev/null; then
@@ -742,7 +800,7 @@ validate_csv_data() {
   local data_rows=$(tail -n +2 "$csv_file" | wc -l)
   
   # 检查表头格式
-  local expected_header_cols=14  # 基于我们最新的CSV格式
+  local expected_header_cols=16  # 基于我们最新的CSV格式（含指标文件路径、状态码分布）
   local actual_header_cols=$(echo "$header" | awk -F',' '{print NF}')
   
   if [ "$actual_header_cols" -ne "$expected_header_cols" ]; then
@@ -752,7 +810,7 @@ validate_csv_data() {
   fi
   
   # 检查数据行格式
-  tail -n +2 "$csv_file" | while IFS=, read -r target conn qps latency cpu mem errors_field status_log_path status_2xx status_3xx status_4xx status_5xx status_other total_responses; do
+  tail -n +2 "$csv_file" | while IFS=, read -r target conn qps latency cpu mem errors_field status_log_path status_2xx status_3xx status_4xx status_5xx status_other total_responses metrics_path status_codes; do
     # 验证数值字段
     for field in "$conn" "$qps" "$latency" "$cpu" "$mem" "$errors_field" "$status_2xx" "$status_3xx" "$status_4xx" "$status_5xx" "$status_other" "$total_responses"; do
       if [[ ! "$field" =~ ^[0-9.]+$ ]]; then
@@ -838,7 +896,7 @@ run_system_self_check() {
       check_result=1
     else
       # 从CSV中提取状态码日志路径并验证
-      tail -n +2 "$csv_file" | while IFS=, read -r _ _ _ _ _ _ _ status_log_path _ _ _ _ _ _; do
+      tail -n +2 "$csv_file" | while IFS=, read -r _ _ _ _ _ _ _ status_log_path _; do
         if [ "$status_log_path" != "N/A" ] && [ -f "$status_log_path" ]; then
           if ! validate_status_code_log "$status_log_path"; then
             check_result=1
@@ -37,6 +37,9 @@ THREADS=4
 TASK_ID=""
 SCRIPT_PATH=""
 OUTPUT_JSON=""
+CONNECTION_CLOSE=false
+WARMUP=""
+REPETITIONS_ARG=""
 
 # 解析命令行参数
 while [[ $# -gt 0 ]]; do
@@ -73,6 +76,20 @@ while [[ $# -gt 0 ]]; do
       OUTPUT_JSON="${1#*=}"
       shift
       ;;
+    --warmup=*)
+      # 预热时长，支持"10"或"10s"
+      WARMUP="${1#*=}"
+      WARMUP="${WARMUP%s}"
+      shift
+      ;;
+    --repetitions=*)
+      REPETITIONS_ARG="${1#*=}"
+      shift
+      ;;
+    --connection-close)
+      CONNECTION_CLOSE=true
+      shift
+      ;;
     *)
       echo "未知参数: $1" >&2
       exit 1
@@ -98,6 +115,20 @@ fi
 # 确保输出目录存在
 mkdir -p "$(dirname "$OUTPUT_JSON")"
 
+# 结果JSON格式版本：由jq生成（字符串正确转义、非UTF-8字节替换为U+FFFD），后端按版本严格解析
+RESULT_SCHEMA_VERSION=2
+
+# write_result_json函数：生成结果JSON，先写临时文件再替换，后端不会读到半个文件
+# 参数：
+#   $1 - 压测原始输出，经标准输入传给jq（过滤器中为 .），不受命令行参数长度限制
+#   其余 - jq参数和过滤器，过滤器中可使用 $schema_version
+write_result_json() {
+  local raw_output="$1"
+  shift
+  printf '%s' "$raw_output" | jq -Rs --argjson schema_version "$RESULT_SCHEMA_VERSION" "$@" > "$OUTPUT_JSON.tmp" \
+    && mv "$OUTPUT_JSON.tmp" "$OUTPUT_JSON"
+}
+
 # ==============================================================================
 # 执行压测
 # ==============================================================================
@@ -125,6 +156,37 @@ export DURATION
 export THREADS
 export TASK_ID
 
+# 自定义Lua脚本（如后端编译的压测场景脚本），collect.sh中替代默认的status_code.lua
+if [ -n "$SCRIPT_PATH" ]; then
+  if [ ! -f "$SCRIPT_PATH" ]; then
+    echo "错误：Lua脚本不存在: $SCRIPT_PATH" >&2
+    exit 1
+  fi
+  export WRK_LUA_SCRIPT="$SCRIPT_PATH"
+fi
+
+# 强制短连接（每个请求新建连接），config.sh中FORCE_CONNECTION_CLOSE的默认值不会覆盖
+if [ "$CONNECTION_CLOSE" = "true" ]; then
+  export FORCE_CONNECTION_CLOSE=true
+fi
+
+if [ -n "$WARMUP" ]; then
+  if ! [[ "$WARMUP" =~ ^[0-9]+$ ]]; then
+    echo "错误：--warmup 必须是秒数: $WARMUP" >&2
+    exit 1
+  fi
+  export WARMUP_DURATION="$WARMUP"
+fi
+
+# 重复试验次数，大于1时结果中包含每次试验的指标，由后端计算置信区间
+if [ -n "$REPETITIONS_ARG" ]; then
+  if ! [[ "$REPETITIONS_ARG" =~ ^[1-9][0-9]*$ ]]; then
+    echo "错误：--repetitions 必须是正整数: $REPETITIONS_ARG" >&2
+    exit 1
+  fi
+  export REPETITIONS="$REPETITIONS_ARG"
+fi
+
 # 执行bench_all_in_one.sh的internet模式
 echo "执行命令: $MAIN_SCRIPT internet" >&2
 
@@ -135,6 +197,10 @@ echo "- DURATION: $DURATION" >&2
 echo "- CONNECTIONS: $CONCURRENCY" >&2
 echo "- THREADS: $THREADS" >&2
 echo "- TASK_ID: $TASK_ID" >&2
+echo "- WRK_LUA_SCRIPT: ${WRK_LUA_SCRIPT:-默认}" >&2
+echo "- FORCE_CONNECTION_CLOSE: ${FORCE_CONNECTION_CLOSE:-false}" >&2
+echo "- WARMUP_DURATION: ${WARMUP_DURATION:-0}" >&2
+echo "- REPETITIONS: ${REPETITIONS:-1}" >&2
 
 # 执行bench_all_in_one.sh并捕获输出，确保所有参数都正确传递
 BENCH_OUTPUT=$(cd "$SCRIPT_DIR" && \
@@ -152,16 +218,8 @@ if [ $BENCH_EXIT_CODE -ne 0 ]; then
   echo "错误：压测执行失败" >&2
   echo "$BENCH_OUTPUT" >&2
   
-  # 输出错误JSON（不使用jq）
-  ESCAPED_OUTPUT=$(echo "$BENCH_OUTPUT" | LC_ALL=C sed 's/"/\\"/g; s/\n/\\n/g')
-  cat > "$OUTPUT_JSON" <<EOF
-{
-  "success": false,
-  "error": "压测执行失败",
-  "exit_code": $BENCH_EXIT_CODE,
-  "output": "$ESCAPED_OUTPUT"
-}
-EOF
+  write_result_json "$BENCH_OUTPUT" --arg error "压测执行失败" --argjson exit_code "$BENCH_EXIT_CODE" \
+    '{schema_version: $schema_version, success: false, error: $error, exit_code: $exit_code, output: .}'
   exit $BENCH_EXIT_CODE
 fi
 
@@ -182,30 +240,28 @@ done
 
 if [ ! -f "$CSV_FILE" ]; then
   echo "错误：压测结果文件不存在" >&2
-  cat > "$OUTPUT_JSON" <<EOF
-{
-  "success": false,
-  "error": "压测结果文件不存在",
-  "exit_code": $BENCH_EXIT_CODE,
-  "output": $(echo "$BENCH_OUTPUT" | jq -Rs .)
-}
-EOF
+  write_result_json "$BENCH_OUTPUT" --arg error "压测结果文件不存在" --argjson exit_code "$BENCH_EXIT_CODE" \
+    '{schema_version: $schema_version, success: false, error: $error, exit_code: $exit_code, output: .}'
   exit 1
 fi
 
+# 数据文件是指向最新版本的软链接，记录实际的版本化文件：
+# 后续任务会更新软链接，结果中的数据文件和试验明细必须始终对应本次压测
+if [ -L "$CSV_FILE" ]; then
+  CSV_LINK_TARGET=$(readlink "$CSV_FILE")
+  case "$CSV_LINK_TARGET" in
+    /*) CSV_FILE="$CSV_LINK_TARGET" ;;
+    *) CSV_FILE="$(dirname "$CSV_FILE")/$CSV_LINK_TARGET" ;;
+  esac
+fi
+
 # 读取CSV文件的最后一行（除了表头）
 LAST_LINE=$(tail -n +2 "$CSV_FILE" | head -1)
 
 if [ -z "$LAST_LINE" ]; then
   echo "错误：压测结果文件为空" >&2
-  cat > "$OUTPUT_JSON" <<EOF
-{
-  "success": false,
-  "error": "压测结果文件为空",
-  "exit_code": $BENCH_EXIT_CODE,
-  "output": $(echo "$BENCH_OUTPUT" | jq -Rs .)
-}
-EOF
+  write_result_json "$BENCH_OUTPUT" --arg error "压测结果文件为空" --argjson exit_code "$BENCH_EXIT_CODE" \
+    '{schema_version: $schema_version, success: false, error: $error, exit_code: $exit_code, output: .}'
   exit 1
 fi
 
@@ -213,7 +269,7 @@ fi
 IFS="," read -ra CSV_FIELDS <<< "$LAST_LINE"
 
 # 提取各项指标
-# CSV格式：测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数
+# CSV格式：测试项,并发数,QPS,平均延迟(ms),Docker容器CPU峰值(%),Docker容器内存峰值(MB),错误数,状态码日志路径,2xx响应数,3xx响应数,4xx响应数,5xx响应数,其他状态码,总响应数,指标文件路径,状态码分布
 TEST_NAME=${CSV_FIELDS[0]}
 CONCURRENCY=${CSV_FIELDS[1]}
 QPS=${CSV_FIELDS[2]}
@@ -228,6 +284,65 @@ HTTP_STATUS_4XX=${CSV_FIELDS[10]}
 HTTP_STATUS_5XX=${CSV_FIELDS[11]}
 HTTP_STATUS_OTHER=${CSV_FIELDS[12]}
 TOTAL_REQUESTS=${CSV_FIELDS[13]}
+METRICS_FILE=${CSV_FIELDS[14]}
+STATUS_CODES_FIELD=${CSV_FIELDS[15]}
+
+# 读取Lua脚本输出的指标文件（延迟分位数、延迟直方图、每秒请求数）
+METRICS_JSON="null"
+P95_LATENCY="null"
+P99_LATENCY="null"
+if [ -n "$METRICS_FILE" ] && [ -f "$METRICS_FILE" ] && jq -e . "$METRICS_FILE" > /dev/null 2>&1; then
+  METRICS_JSON=$(jq -c . "$METRICS_FILE")
+  P95_LATENCY=$(jq '.latency_percentiles_ms.p95 // null' "$METRICS_FILE")
+  P99_LATENCY=$(jq '.latency_percentiles_ms.p99 // null' "$METRICS_FILE")
+fi
+
+# 重复试验明细：每次试验的QPS、延迟和分位数（汇总行中的计数为所有试验合计，指标文件为代表性试验）
+TRIALS_JSON="[]"
+TRIALS_FILE="${CSV_FILE%.csv}_trials.csv"
+if [ "${REPETITIONS:-1}" -gt 1 ] && [ -f "$TRIALS_FILE" ]; then
+  TRIALS_JSON=$(tail -n +2 "$TRIALS_FILE" | while IFS=',' read -r name conn qps latency cpu mem err log_path s2 s3 s4 s5 so total metrics_path status_codes trial; do
+    trial_metrics="{}"
+    if [ -n "$metrics_path" ] && [ -f "$metrics_path" ] && jq -e . "$metrics_path" > /dev/null 2>&1; then
+      trial_metrics=$(jq -c . "$metrics_path")
+    fi
+    jq -cn --argjson trial "${trial:-0}" --argjson qps "${qps:-0}" --argjson latency "${latency:-0}" \
+      --argjson errors "${err:-0}" --argjson total "${total:-0}" --arg metrics_path "$metrics_path" --argjson m "$trial_metrics" \
+      '{trial: $trial, qps: $qps, avg_latency_ms: $latency, p95_latency_ms: $m.latency_percentiles_ms.p95,
+        p99_latency_ms: $m.latency_percentiles_ms.p99, errors: $errors, total_requests: $total, metrics_file_path: $metrics_path}'
+  done | jq -cs 'sort_by(.trial)')
+fi
+
+# 逐状态码计数：优先取指标文件中的status_codes，否则由CSV中的"200:123;502:4"转换
+# 重复试验时指标文件只对应代表性试验，使用CSV中所有试验合计的计数
+STATUS_CODES_JSON="{}"
+if [ "$METRICS_JSON" != "null" ] && [ "$TRIALS_JSON" = "[]" ]; then
+  STATUS_CODES_JSON=$(jq -c '.status_codes // {}' "$METRICS_FILE")
+elif [ -n "$STATUS_CODES_FIELD" ] && [ "$STATUS_CODES_FIELD" != "N/A" ]; then
+  STATUS_CODES_JSON=$(echo "$STATUS_CODES_FIELD" | awk -F';' '{
+    out = ""
+    for (i = 1; i <= NF; i++) {
+      split($i, kv, ":")
+      if (kv[1] ~ /^[0-9]+$/ && kv[2] ~ /^[0-9]+$/) {
+        out = out (out == "" ? "" : ",") "\"" kv[1] "\":" kv[2]
+      }
+    }
+    print "{" out "}"
+  }')
+fi
+
+# 预热运行的指标（与正式压测的指标文件同目录），后端用于计算包含预热的全程指标
+WARMUP_METRICS_JSON="null"
+WARMUP_METRICS_FILE="${METRICS_FILE%_metrics.json}_warmup_metrics.json"
+if [ -n "$METRICS_FILE" ] && [ -f "$WARMUP_METRICS_FILE" ] && jq -e . "$WARMUP_METRICS_FILE" > /dev/null 2>&1; then
+  WARMUP_METRICS_JSON=$(jq -c . "$WARMUP_METRICS_FILE")
+fi
+
+# 连接统计：新建连接、重连、TLS握手、Socket错误、收发字节数，附带压测期间的握手耗时采样
+CONNECTIONS_JSON="null"
+if [ "$METRICS_JSON" != "null" ]; then
+  CONNECTIONS_JSON=$(jq -c 'if .connections then .connections + {probe: .connection_probe} else null end' "$METRICS_FILE")
+fi
 
 # 计算错误率
 if [ -n "$TOTAL_REQUESTS" ] && [ "$TOTAL_REQUESTS" -gt 0 ]; then
@@ -239,40 +354,55 @@ fi
 # 计算成功请求数
 SUCCESSFUL_REQUESTS=$((HTTP_STATUS_2XX + HTTP_STATUS_3XX))
 
-# 生成JSON结果
-# 不使用jq，手动转义字符串
-ESCAPED_OUTPUT=$(echo "$BENCH_OUTPUT" | LC_ALL=C sed 's/"/\\"/g; s/\n/\\n/g')
-
-cat > "$OUTPUT_JSON" <<EOF
-{
-  "success": true,
-  "task_id": "${TASK_ID}",
-  "target_url": "${TARGET_URL}",
-  "concurrency": ${CONCURRENCY},
-  "duration": "${DURATION}",
-  "threads": ${THREADS},
-  "qps": ${QPS:-0},
-  "avg_latency_ms": ${AVG_LATENCY:-0},
-  "error_rate": ${ERROR_RATE:-0},
-  "total_requests": ${TOTAL_REQUESTS:-0},
-  "successful_requests": ${SUCCESSFUL_REQUESTS:-0},
-  "failed_requests": ${ERRORS:-0},
-  "http_status": {
-    "2xx": ${HTTP_STATUS_2XX:-0},
-    "3xx": ${HTTP_STATUS_3XX:-0},
-    "4xx": ${HTTP_STATUS_4XX:-0},
-    "5xx": ${HTTP_STATUS_5XX:-0},
-    "other": ${HTTP_STATUS_OTHER:-0}
-  },
-  "resource_usage": {
-    "cpu_usage_percent": ${CPU_USAGE:-0},
-    "mem_usage_mb": ${MEM_USAGE:-0}
-  },
-  "data_file_path": "${CSV_FILE}",
-  "status_log_path": "${STATUS_LOG_PATH}",
-  "raw_output": "$ESCAPED_OUTPUT"
-}
-EOF
+# 生成JSON结果：数值字段无法解析时为0（与之前的默认值一致），指标、试验明细经文件传给jq（可能超过单个参数的长度限制）
+write_result_json "$BENCH_OUTPUT" \
+  --arg task_id "$TASK_ID" --arg target_url "$TARGET_URL" --arg concurrency "$CONCURRENCY" \
+  --arg duration "$DURATION" --arg threads "$THREADS" --arg qps "$QPS" --arg avg_latency "$AVG_LATENCY" \
+  --argjson p95 "$P95_LATENCY" --argjson p99 "$P99_LATENCY" --arg error_rate "$ERROR_RATE" \
+  --arg total "$TOTAL_REQUESTS" --arg successful "$SUCCESSFUL_REQUESTS" --arg failed "$ERRORS" \
+  --arg s2xx "$HTTP_STATUS_2XX" --arg s3xx "$HTTP_STATUS_3XX" --arg s4xx "$HTTP_STATUS_4XX" \
+  --arg s5xx "$HTTP_STATUS_5XX" --arg sother "$HTTP_STATUS_OTHER" \
+  --argjson status_codes "$STATUS_CODES_JSON" --argjson connections "$CONNECTIONS_JSON" \
+  --arg cpu "$CPU_USAGE" --arg mem "$MEM_USAGE" \
+  --arg data_file_path "$CSV_FILE" --arg status_log_path "$STATUS_LOG_PATH" --arg metrics_file_path "$METRICS_FILE" \
+  --slurpfile metrics <(printf '%s' "$METRICS_JSON") \
+  --arg warmup_seconds "$WARMUP_DURATION" \
+  --slurpfile warmup_metrics <(printf '%s' "$WARMUP_METRICS_JSON") \
+  --arg repetitions "$REPETITIONS" \
+  --slurpfile trials <(printf '%s' "$TRIALS_JSON") \
+  'def num: tonumber? // 0;
+  {
+    schema_version: $schema_version,
+    success: true,
+    task_id: $task_id,
+    target_url: $target_url,
+    concurrency: ($concurrency | num),
+    duration: $duration,
+    threads: ($threads | num),
+    qps: ($qps | num),
+    avg_latency_ms: ($avg_latency | num),
+    p95_latency_ms: $p95,
+    p99_latency_ms: $p99,
+    error_rate: ($error_rate | num),
+    total_requests: ($total | num),
+    successful_requests: ($successful | num),
+    failed_requests: ($failed | num),
+    http_status: {
+      "2xx": ($s2xx | num), "3xx": ($s3xx | num), "4xx": ($s4xx | num), "5xx": ($s5xx | num), other: ($sother | num)
+    },
+    status_codes: $status_codes,
+    connections: $connections,
+    resource_usage: {cpu_usage_percent: ($cpu | num), mem_usage_mb: ($mem | num)},
+    data_file_path: $data_file_path,
+    status_log_path: $status_log_path,
+    metrics_file_path: $metrics_file_path,
+    metrics: $metrics[0],
+    warmup_seconds: ($warmup_seconds | num),
+    warmup_metrics: $warmup_metrics[0],
+    repetitions: (($repetitions | tonumber?) // 1),
+    trials: $trials[0],
+    raw_output: .
+  }' || { echo "错误：生成结果JSON失败" >&2; exit 1; }
 
 echo "压测完成，结果已保存至: $OUTPUT_JSON" >&2
 echo "$OUTPUT_JSON"
@@ -0,0 +1,72 @@
+#!/bin/bash
+
+# ==============================================================================
+# 并行压测调度基准测试
+# 在本机启动多个替身目标服务器（每个测试项一个进程），分别以顺序和并行方式执行collect，
+# 对比总耗时和各测试项QPS（并行时QPS明显下降说明压测客户端之间存在干扰）
+#
+# 用法: tools/bench_parallel_collect.sh [测试项数量] [并行任务数] [持续时间] [并发连接数列表]
+# 示例: tools/bench_parallel_collect.sh 4 4 5s 50,100
+# 可通过GENERATOR_CPUS指定压测客户端可用的CPU（如 0-7）
+# ==============================================================================
+
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )/.." && pwd )"
+source "$SCRIPT_DIR/lib/collect.sh"
+
+TARGET_COUNT=${1:-4}
+JOBS=${2:-$TARGET_COUNT}
+BENCH_DURATION=${3:-5s}
+BENCH_CONNECTIONS=${4:-"50,100"}
+BASE_PORT=${BASE_PORT:-18080}
+
+check_dependencies wrk python3 || exit 1
+
+WORK_DIR=$(mktemp -d)
+SERVER_PIDS=()
+
+cleanup() {
+  for pid in "${SERVER_PIDS[@]}"; do
+    kill "$pid" 2>/dev/null
+  done
+  rm -rf "$WORK_DIR"
+}
+trap cleanup EXIT
+
+TARGETS=()
+for ((i = 0; i < TARGET_COUNT; i++)); do
+  port=$((BASE_PORT + i))
+  python3 "$SCRIPT_DIR/tools/standin_server.py" --port "$port" --delay-ms 1 &
+  SERVER_PIDS+=($!)
+  TARGETS+=("target$i,http://127.0.0.1:$port/")
+done
+sleep 1
+
+# run_mode函数：以指定并行任务数执行一次collect，输出耗时（秒）
+run_mode() {
+  local jobs="$1"
+  local output="$2"
+  local start=$(date +%s)
+  (cd "$WORK_DIR" && PARALLEL_JOBS="$jobs" collect "bench" "$output" "" "$BENCH_DURATION" "$BENCH_CONNECTIONS" "${THREADS:-2}" > "$WORK_DIR/collect_${jobs}.log" 2>&1)
+  echo $(( $(date +%s) - start ))
+}
+
+log_info "测试项: $TARGET_COUNT，并发连接: $BENCH_CONNECTIONS，持续时间: $BENCH_DURATION"
+sequential_seconds=$(run_mode 1 "$WORK_DIR/sequential.csv")
+parallel_seconds=$(run_mode "$JOBS" "$WORK_DIR/parallel.csv")
+
+echo ""
+echo "| 模式 | 并行任务数 | 总耗时(s) |"
+echo "|------|------------|-----------|"
+echo "| 顺序 | 1 | $sequential_seconds |"
+echo "| 并行 | $JOBS | $parallel_seconds |"
+if [ "$parallel_seconds" -gt 0 ]; then
+  echo "加速比: $(awk -v s="$sequential_seconds" -v p="$parallel_seconds" 'BEGIN {printf "%.2f", s / p}')"
+fi
+
+echo ""
+echo "| 测试项 | 并发数 | 顺序QPS | 并行QPS |"
+echo "|--------|--------|---------|---------|"
+join -t',' \
+  <(tail -n +2 "$WORK_DIR/sequential.csv" | awk -F',' '{print $1"_"$2","$1","$2","$3}' | sort) \
+  <(tail -n +2 "$WORK_DIR/parallel.csv" | awk -F',' '{print $1"_"$2","$3}' | sort) \
+  | awk -F',' '{print "| "$2" | "$3" | "$4" | "$5" |"}'
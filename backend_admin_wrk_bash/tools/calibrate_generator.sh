@@ -0,0 +1,172 @@
+#!/bin/bash
+
+# ==============================================================================
+# 压测客户端上限校准
+# 在本机启动替身目标服务器（无延迟、小响应体），以不同线程数和并发连接数运行wrk（加载与正式压测相同的
+# status_code.lua），取最高的每秒请求数作为当前主机压测客户端的上限，写入校准文件。
+# 后端据此在压测结果接近上限时给出警告（瓶颈可能在压测客户端而不是目标系统）
+#
+# 用法: tools/calibrate_generator.sh [持续时间] [线程数列表] [并发连接数列表]
+# 示例: tools/calibrate_generator.sh 10s 2,4 100,400,1000
+# 环境变量：
+#   GENERATOR_CPUS      wrk绑定的CPU（如 0-7），替身服务器使用其余CPU（STANDIN_CPUS可单独指定）
+#   CALIBRATION_FILE    校准文件路径，默认 calibration/generator.json
+#   CALIBRATE_TLS=true  同时测量HTTPS的上限（需要openssl生成自签名证书）
+#   RESPONSE_SIZE       替身服务器响应体大小（字节），默认64
+# ==============================================================================
+
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )/.." && pwd )"
+source "$SCRIPT_DIR/lib/utils.sh"
+
+CALIBRATE_DURATION=${1:-10s}
+CALIBRATION_FILE=${CALIBRATION_FILE:-"$SCRIPT_DIR/calibration/generator.json"}
+CALIBRATE_TLS=${CALIBRATE_TLS:-false}
+RESPONSE_SIZE=${RESPONSE_SIZE:-64}
+STANDIN_PORT=${STANDIN_PORT:-18090}
+CALIBRATION_SCHEMA_VERSION=1
+
+check_dependencies wrk python3 jq || exit 1
+if [ "$CALIBRATE_TLS" = "true" ]; then
+  check_dependencies openssl || exit 1
+fi
+
+# wrk使用GENERATOR_CPUS（未设置时为当前可用的全部CPU），替身服务器使用其余CPU；
+# 没有剩余CPU时两者共享，校准结果偏低，日志中给出提示
+GENERATOR_CPU_LIST=($(get_generator_cpus))
+ALL_CPU_LIST=($(GENERATOR_CPUS="" get_generator_cpus))
+if [ -z "$STANDIN_CPUS" ]; then
+  standin_cpus=()
+  for cpu in "${ALL_CPU_LIST[@]}"; do
+    [[ " ${GENERATOR_CPU_LIST[*]} " == *" $cpu "* ]] || standin_cpus+=("$cpu")
+  done
+  STANDIN_CPUS=$(IFS=","; echo "${standin_cpus[*]}")
+fi
+
+WRK_PINNING=()
+STANDIN_PINNING=()
+if command -v taskset > /dev/null 2>&1; then
+  [ -n "$GENERATOR_CPUS" ] && WRK_PINNING=(taskset -c "$GENERATOR_CPUS")
+  [ -n "$STANDIN_CPUS" ] && STANDIN_PINNING=(taskset -c "$STANDIN_CPUS")
+fi
+if [ -n "$STANDIN_CPUS" ]; then
+  STANDIN_WORKERS=${STANDIN_WORKERS:-$(expand_cpu_list "$STANDIN_CPUS" | wc -w)}
+else
+  log_warn "替身服务器与wrk共用CPU，校准结果会低于wrk的实际上限（可通过GENERATOR_CPUS为wrk保留部分CPU）"
+  STANDIN_WORKERS=${STANDIN_WORKERS:-1}
+fi
+
+THREADS_LIST=${2:-${#GENERATOR_CPU_LIST[@]}}
+CONNECTIONS_LIST=${3:-"100,400,1000"}
+
+WORK_DIR=$(mktemp -d)
+SERVER_PID=""
+
+cleanup() {
+  if [ -n "$SERVER_PID" ]; then
+    kill "$SERVER_PID" 2>/dev/null
+    wait "$SERVER_PID" 2>/dev/null
+  fi
+  rm -rf "$WORK_DIR"
+}
+trap cleanup EXIT
+
+# start_standin函数：启动替身服务器并等待端口就绪
+# 参数：
+#   $@ - 额外的服务器参数
+start_standin() {
+  "${STANDIN_PINNING[@]}" python3 "$SCRIPT_DIR/tools/standin_server.py" --port "$STANDIN_PORT" \
+    --workers "$STANDIN_WORKERS" --size "$RESPONSE_SIZE" "$@" > "$WORK_DIR/standin.log" 2>&1 &
+  SERVER_PID=$!
+  local i
+  for ((i = 0; i < 50; i++)); do
+    grep -q "替身服务器已启动" "$WORK_DIR/standin.log" && return 0
+    sleep 0.1
+  done
+  log_error "替身服务器启动失败: $(cat "$WORK_DIR/standin.log")"
+  return 1
+}
+
+stop_standin() {
+  kill "$SERVER_PID" 2>/dev/null
+  wait "$SERVER_PID" 2>/dev/null
+  SERVER_PID=""
+}
+
+# sweep函数：对目标URL依次运行各线程数和并发连接数组合
+# 参数：
+#   $1 - 目标URL
+# 返回：
+#   标准输出 - 每行一个JSON对象 {threads, connections, qps}
+sweep() {
+  local url="$1"
+  local threads connections qps
+  IFS="," read -ra thread_values <<< "$THREADS_LIST"
+  IFS="," read -ra connection_values <<< "$CONNECTIONS_LIST"
+  for threads in "${thread_values[@]}"; do
+    for connections in "${connection_values[@]}"; do
+      [ "$connections" -lt "$threads" ] && continue
+      WRK_CONNECTIONS=$connections WRK_CONNECTIONS_PER_THREAD=$((connections / threads)) \
+        WRK_STATUS_INTERVAL=0 WRK_METRICS_FILE="$WORK_DIR/metrics.tmp" \
+        "${WRK_PINNING[@]}" wrk -t"$threads" -c"$connections" -d"$CALIBRATE_DURATION" --timeout 10s \
+        -s "$SCRIPT_DIR/lib/status_code.lua" "$url" > "$WORK_DIR/wrk.out" 2>&1
+      qps=$(awk '/^Requests\/sec:/ {print $2}' "$WORK_DIR/wrk.out")
+      if [ -z "$qps" ]; then
+        log_warn "wrk未输出结果（线程=$threads, 连接=$connections）: $(tail -n 1 "$WORK_DIR/wrk.out")" >&2
+        continue
+      fi
+      log_info "线程=$threads, 连接=$connections: $qps 请求/秒" >&2
+      jq -cn --argjson threads "$threads" --argjson connections "$connections" --argjson qps "$qps" \
+        '{threads: $threads, connections: $connections, qps: $qps}'
+    done
+  done
+}
+
+log_info "校准压测客户端上限: 持续时间=$CALIBRATE_DURATION, 线程数=$THREADS_LIST, 并发连接=$CONNECTIONS_LIST"
+log_info "wrk CPU: ${GENERATOR_CPUS:-全部}, 替身服务器CPU: ${STANDIN_CPUS:-共用}（$STANDIN_WORKERS 个worker）"
+
+start_standin || exit 1
+sweep "http://127.0.0.1:$STANDIN_PORT/" > "$WORK_DIR/http.jsonl"
+stop_standin
+
+: > "$WORK_DIR/https.jsonl"
+if [ "$CALIBRATE_TLS" = "true" ]; then
+  openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj "/CN=127.0.0.1" \
+    -keyout "$WORK_DIR/key.pem" -out "$WORK_DIR/cert.pem" > /dev/null 2>&1 || { log_error "生成自签名证书失败"; exit 1; }
+  start_standin --tls-cert "$WORK_DIR/cert.pem" --tls-key "$WORK_DIR/key.pem" || exit 1
+  sweep "https://127.0.0.1:$STANDIN_PORT/" > "$WORK_DIR/https.jsonl"
+  stop_standin
+fi
+
+if [ ! -s "$WORK_DIR/http.jsonl" ]; then
+  log_error "校准失败：wrk没有输出任何结果"
+  exit 1
+fi
+
+mkdir -p "$(dirname "$CALIBRATION_FILE")"
+jq -n \
+  --argjson schema_version "$CALIBRATION_SCHEMA_VERSION" \
+  --arg host "$(hostname)" \
+  --arg measured_at "$(date -u '+%Y-%m-%dT%H:%M:%SZ')" \
+  --arg wrk_version "$(wrk -v 2>&1 | head -n 1)" \
+  --arg generator_cpus "${GENERATOR_CPUS:-}" \
+  --argjson cpu_count "${#GENERATOR_CPU_LIST[@]}" \
+  --arg duration "$CALIBRATE_DURATION" \
+  --argjson response_size "$RESPONSE_SIZE" \
+  --slurpfile http "$WORK_DIR/http.jsonl" \
+  --slurpfile https "$WORK_DIR/https.jsonl" \
+  '{
+    schema_version: $schema_version,
+    host: $host,
+    measured_at: $measured_at,
+    wrk_version: $wrk_version,
+    generator_cpus: $generator_cpus,
+    cpu_count: $cpu_count,
+    duration: $duration,
+    response_size: $response_size,
+    max_qps: ($http | map(.qps) | max),
+    max_qps_tls: (if ($https | length) > 0 then ($https | map(.qps) | max) else null end),
+    runs: {http: $http, https: $https}
+  }' > "$CALIBRATION_FILE.tmp" && mv "$CALIBRATION_FILE.tmp" "$CALIBRATION_FILE" || { log_error "写入校准文件失败"; exit 1; }
+
+log_info "压测客户端上限: $(jq -r '.max_qps' "$CALIBRATION_FILE") 请求/秒（HTTPS: $(jq -r '.max_qps_tls // "未测量"' "$CALIBRATION_FILE")）"
+log_info "校准结果已保存至: $CALIBRATION_FILE"
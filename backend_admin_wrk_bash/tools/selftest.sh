@@ -0,0 +1,103 @@
+#!/bin/bash
+
+# ==============================================================================
+# 离线自检
+# 先运行status_code.lua单元测试（tools/test_status_code.lua，需要luajit或lua 5.1，未安装时跳过），
+# 再在本机启动替身目标服务器（按比例返回503、每个连接限定请求数），通过start_api.sh执行完整的压测流程，
+# 检查结果JSON：格式版本、QPS、逐状态码计数、服务端关闭连接统计和每秒请求数。不需要外部网络，可用于CI
+#
+# 用法: tools/selftest.sh [持续时间] [并发连接数] [线程数]
+# 示例: tools/selftest.sh 5 20 2
+# 返回：全部检查通过时退出码为0
+# ==============================================================================
+
+SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )/.." && pwd )"
+source "$SCRIPT_DIR/lib/utils.sh"
+
+SELFTEST_DURATION=${1:-5}
+SELFTEST_CONNECTIONS=${2:-20}
+SELFTEST_THREADS=${3:-2}
+STANDIN_PORT=${STANDIN_PORT:-18091}
+# 替身服务器返回503的比例（%），以及每个连接处理的请求数
+ERROR_PERCENT=10
+KEEPALIVE_REQUESTS=100
+
+LUA_BIN=$(command -v luajit || command -v lua5.1)
+if [ -n "$LUA_BIN" ]; then
+  log_info "运行status_code.lua单元测试: $LUA_BIN"
+  "$LUA_BIN" "$SCRIPT_DIR/tools/test_status_code.lua" || { log_error "status_code.lua单元测试失败"; exit 1; }
+else
+  log_warn "未找到luajit或lua5.1，跳过status_code.lua单元测试"
+fi
+
+check_dependencies wrk python3 jq bc || exit 1
+
+WORK_DIR=$(mktemp -d)
+SERVER_PID=""
+
+cleanup() {
+  if [ -n "$SERVER_PID" ]; then
+    kill "$SERVER_PID" 2>/dev/null
+    wait "$SERVER_PID" 2>/dev/null
+  fi
+  rm -rf "$WORK_DIR"
+}
+trap cleanup EXIT
+
+python3 "$SCRIPT_DIR/tools/standin_server.py" --port "$STANDIN_PORT" --latency uniform:1,5 \
+  --status-mix "200:$((100 - ERROR_PERCENT)),503:$ERROR_PERCENT" --size 512:90,8192:10 \
+  --keepalive-requests "$KEEPALIVE_REQUESTS" --seed 1 > "$WORK_DIR/standin.log" 2>&1 &
+SERVER_PID=$!
+for ((i = 0; i < 50; i++)); do
+  grep -q "替身服务器已启动" "$WORK_DIR/standin.log" && break
+  sleep 0.1
+done
+if ! grep -q "替身服务器已启动" "$WORK_DIR/standin.log"; then
+  log_error "替身服务器启动失败: $(cat "$WORK_DIR/standin.log")"
+  exit 1
+fi
+
+RESULT_JSON="$WORK_DIR/result.json"
+log_info "执行压测: 持续时间=${SELFTEST_DURATION}秒, 并发连接=$SELFTEST_CONNECTIONS, 线程数=$SELFTEST_THREADS"
+if ! "$SCRIPT_DIR/start_api.sh" --target-url="http://127.0.0.1:$STANDIN_PORT/" --concurrency="$SELFTEST_CONNECTIONS" \
+    --duration="$SELFTEST_DURATION" --threads="$SELFTEST_THREADS" --task-id=selftest \
+    --output-json="$RESULT_JSON" > "$WORK_DIR/start_api.log" 2>&1; then
+  log_error "start_api.sh执行失败:"
+  tail -n 20 "$WORK_DIR/start_api.log" >&2
+  exit 1
+fi
+
+FAILED=0
+
+# check函数：对结果JSON执行jq条件，不满足时记录失败
+# 参数：
+#   $1 - 检查项说明
+#   $2 - jq条件表达式
+check() {
+  if jq -e "$2" "$RESULT_JSON" > /dev/null 2>&1; then
+    log_info "通过: $1"
+  else
+    log_error "失败: $1（$2）"
+    FAILED=$((FAILED + 1))
+  fi
+}
+
+check "结果JSON格式版本为2且压测成功" '.schema_version == 2 and .success == true'
+check "QPS大于0" '.qps > 0'
+check "总请求数与状态码合计一致" '.total_requests == ([.status_codes[]] | add)'
+check "只出现200和503两种状态码" '.status_codes | keys == ["200", "503"]'
+check "2xx响应数与200的计数一致" '.http_status["2xx"] == .status_codes["200"]'
+check "指标文件与结果的逐状态码计数一致" '.metrics.status_codes == .status_codes'
+check "每秒请求数合计不超过总请求数" '(.metrics.requests_per_second | add) <= .total_requests'
+check "503比例接近${ERROR_PERCENT}%" \
+  "(.status_codes[\"503\"] // 0) / .total_requests * 100 | . > $ERROR_PERCENT / 2 and . < $ERROR_PERCENT * 2"
+check "记录了服务端关闭的连接（每连接 $KEEPALIVE_REQUESTS 个请求）" '.connections.server_closes > 0'
+check "每秒请求数覆盖压测时长" "(.metrics.requests_per_second | length) >= $SELFTEST_DURATION - 1"
+check "延迟分位数不低于替身服务器的最小延迟" '.p99_latency_ms >= 1'
+
+log_info "QPS: $(jq -r '.qps' "$RESULT_JSON"), 状态码: $(jq -c '.status_codes' "$RESULT_JSON")"
+if [ "$FAILED" -gt 0 ]; then
+  log_error "自检失败: $FAILED 项检查未通过"
+  exit 1
+fi
+log_info "自检通过"
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+本地替身目标服务器
+基于asyncio的HTTP/1.1服务器（安装uvloop时自动使用），可启动多个worker进程共享监听端口，
+按配置的分布生成延迟、状态码和响应大小，并控制连接复用行为。
+用于在没有真实目标时验证压测流程、测量压测客户端的上限（tools/calibrate_generator.sh）和离线自检（tools/selftest.sh）
+
+分布参数格式：
+  --latency      fixed:5 | uniform:1,10 | normal:10,2 | exponential:5（毫秒，exponential为均值）
+  --status-mix   200:95,503:5（状态码:权重）
+  --size         512 或 512:90,65536:10（字节数:权重）
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import socket
+import ssl
+import sys
+from collections import deque
+from http import HTTPStatus
+
+# uvloop为可选依赖，未安装时使用asyncio默认事件循环
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+MAX_HEADER_BYTES = 64 * 1024
+
+
+def parse_weighted(spec: str, name: str):
+    """解析“值:权重,值:权重”格式，省略权重时为1，返回(值列表, 累计权重列表)"""
+    values, cumulative, total = [], [], 0.0
+    for item in spec.split(","):
+        value, _, weight = item.strip().partition(":")
+        try:
+            value = int(value)
+            weight = float(weight) if weight else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{name}格式错误: {spec}")
+        if value < 0 or weight <= 0:
+            raise argparse.ArgumentTypeError(f"{name}的值不能为负数，权重必须大于0: {spec}")
+        total += weight
+        values.append(value)
+        cumulative.append(total)
+    return values, cumulative
+
+
+def parse_latency(spec: str):
+    """解析延迟分布，返回由随机数生成器得到延迟（秒）的函数"""
+    kind, _, params = spec.partition(":")
+    try:
+        args = [float(v) for v in params.split(",")] if params else []
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"延迟分布格式错误: {spec}")
+    expected = {"fixed": 1, "uniform": 2, "normal": 2, "exponential": 1}
+    if kind not in expected or len(args) != expected[kind] or any(v < 0 for v in args):
+        raise argparse.ArgumentTypeError(
+            f"延迟分布格式错误: {spec}（可选: fixed:毫秒, uniform:最小,最大, normal:均值,标准差, exponential:均值）"
+        )
+    if kind == "fixed":
+        return lambda rng: args[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1]) / 1000
+    if kind == "normal":
+        return lambda rng: max(rng.gauss(args[0], args[1]), 0.0) / 1000
+    if args[0] == 0:
+        return lambda rng: 0.0
+    return lambda rng: rng.expovariate(1 / args[0]) / 1000
+
+
+class ResponseFactory:
+    """按状态码、响应大小和是否关闭连接缓存完整的响应字节"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, status: int, size: int, close: bool, head: bool) -> bytes:
+        key = (status, size, close, head)
+        response = self._cache.get(key)
+        if response is None:
+            try:
+                reason = HTTPStatus(status).phrase
+            except ValueError:
+                reason = "Unknown"
+            lines = [
+                f"HTTP/1.1 {status} {reason}",
+                "Server: standin",
+                "Content-Type: text/plain",
+                f"Content-Length: {size}",
+            ]
+            if close:
+                lines.append("Connection: close")
+            response = ("\r\n".join(lines) + "\r\n\r\n").encode("ascii")
+            if not head:
+                response += b"x" * size
+            self._cache[key] = response
+        return response
+
+
+class StandinProtocol(asyncio.Protocol):
+    """
+    单个连接：解析请求（支持流水线和Content-Length请求体），按生成的延迟发送响应。
+    同一连接上的响应按请求顺序发送，后一个响应不早于前一个
+    """
+
+    def __init__(self, config, rng, responses):
+        self.config = config
+        self.rng = rng
+        self.responses = responses
+        self.loop = asyncio.get_running_loop()
+        self.transport = None
+        self.buffer = bytearray()
+        self.requests = 0
+        self.closing = False
+        self.pending = deque()
+        self.last_due = 0.0
+        self.flush_handle = None
+        self.idle_handle = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._reset_idle()
+
+    def connection_lost(self, exc):
+        for handle in (self.flush_handle, self.idle_handle):
+            if handle is not None:
+                handle.cancel()
+        self.pending.clear()
+
+    def data_received(self, data):
+        if self.closing:
+            return
+        self.buffer += data
+        self._reset_idle()
+        while not self.closing:
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self._bad_request()
+                return
+            head = bytes(self.buffer[:end]).decode("latin-1")
+            request_line, _, header_block = head.partition("\r\n")
+            headers = {}
+            for line in header_block.split("\r\n"):
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            try:
+                body_length = int(headers.get("content-length", "0"))
+            except ValueError:
+                self._bad_request()
+                return
+            if body_length < 0 or "chunked" in headers.get("transfer-encoding", "").lower():
+                self._bad_request()
+                return
+            if len(self.buffer) < end + 4 + body_length:
+                return
+            del self.buffer[:end + 4 + body_length]
+            self._handle(request_line, headers)
+
+    def _handle(self, request_line: str, headers: dict):
+        parts = request_line.split()
+        if len(parts) != 3:
+            self._bad_request()
+            return
+        method, _, version = parts
+        self.requests += 1
+        connection = headers.get("connection", "").lower()
+        close = (
+            connection == "close"
+            or (version == "HTTP/1.0" and connection != "keep-alive")
+            or 0 < self.config.keepalive_requests <= self.requests
+        )
+        status = self.rng.choices(self.config.statuses, cum_weights=self.config.status_weights)[0]
+        size = self.rng.choices(self.config.sizes, cum_weights=self.config.size_weights)[0]
+        self._respond(self.responses.get(status, size, close, method == "HEAD"), close, self.config.latency(self.rng))
+
+    def _bad_request(self):
+        self._respond(self.responses.get(400, 0, True, False), True, 0.0)
+
+    def _respond(self, payload: bytes, close: bool, delay: float):
+        if close:
+            self.closing = True
+        if delay <= 0 and not self.pending:
+            self._send(payload, close)
+            return
+        # 延迟到期时间单调不减，保证同一连接上的响应顺序
+        due = max(self.loop.time() + delay, self.last_due)
+        self.last_due = due
+        self.pending.append((due, payload, close))
+        if self.flush_handle is None:
+            self.flush_handle = self.loop.call_at(due, self._flush)
+
+    def _flush(self):
+        self.flush_handle = None
+        now = self.loop.time()
+        while self.pending and self.pending[0][0] <= now:
+            _, payload, close = self.pending.popleft()
+            self._send(payload, close)
+        if self.pending:
+            self.flush_handle = self.loop.call_at(self.pending[0][0], self._flush)
+
+    def _send(self, payload: bytes, close: bool):
+        if self.transport.is_closing():
+            return
+        self.transport.write(payload)
+        if close:
+            self.transport.close()
+
+    def _reset_idle(self):
+        if self.config.idle_timeout <= 0:
+            return
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+        self.idle_handle = self.loop.call_later(self.config.idle_timeout, self._on_idle)
+
+    def _on_idle(self):
+        # 仍有待发送的响应时等响应发送后再计时
+        if self.pending:
+            self._reset_idle()
+        elif self.transport is not None:
+            self.transport.close()
+
+
+def run_worker(sock: socket.socket, config, worker_index: int):
+    """在当前进程中运行事件循环，直到收到SIGTERM/SIGINT"""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    seed = None if config.seed is None else config.seed + worker_index
+    rng = random.Random(seed)
+    responses = ResponseFactory()
+    ssl_context = None
+    if config.tls_cert:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(config.tls_cert, config.tls_key)
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        server = await loop.create_server(lambda: StandinProtocol(config, rng, responses), sock=sock, ssl=ssl_context)
+        async with server:
+            await stop
+
+    asyncio.run(serve())
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="本地替身目标服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080, help="监听端口，0表示随机端口（启动后输出实际端口）")
+    parser.add_argument("--workers", type=int, default=1, help="worker进程数，共享同一个监听Socket")
+    parser.add_argument("--latency", type=parse_latency, default=None,
+                        help="延迟分布（毫秒）: fixed:5, uniform:1,10, normal:10,2, exponential:5")
+    parser.add_argument("--delay-ms", type=float, default=0, help="每个请求的固定延迟（毫秒），等同于 --latency fixed:N")
+    parser.add_argument("--status-mix", type=lambda s: parse_weighted(s, "状态码分布"), default="200",
+                        help="状态码及权重，如 200:95,503:5")
+    parser.add_argument("--size", type=lambda s: parse_weighted(s, "响应大小"), default="512",
+                        help="响应体大小（字节），可带权重，如 512:90,65536:10")
+    parser.add_argument("--keepalive-requests", type=int, default=0,
+                        help="每个连接最多处理的请求数，达到后响应带Connection: close并关闭（0不限制，1为每个请求新建连接）")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="连接空闲超过该秒数时关闭（0不关闭）")
+    parser.add_argument("--seed", type=int, default=None, help="随机数种子（每个worker为种子+序号），用于复现")
+    parser.add_argument("--tls-cert", default=None, help="证书文件，设置后以HTTPS提供服务")
+    parser.add_argument("--tls-key", default=None, help="私钥文件（证书文件中已包含私钥时可省略）")
+    parser.add_argument("--backlog", type=int, default=4096)
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    if args.latency is None:
+        args.latency = parse_latency(f"fixed:{args.delay_ms}")
+    args.statuses, args.status_weights = args.status_mix
+    args.sizes, args.size_weights = args.size
+    if any(status < 100 or status > 599 for status in args.statuses):
+        print("错误：状态码必须在100~599之间", file=sys.stderr)
+        return 2
+
+    # 在父进程中创建监听Socket，各worker进程继承后共同accept
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.setblocking(False)
+    scheme = "https" if args.tls_cert else "http"
+    print(f"替身服务器已启动: {scheme}://{args.host}:{sock.getsockname()[1]}/ "
+          f"(workers={args.workers}, loop={'uvloop' if uvloop else 'asyncio'})", flush=True)
+
+    if args.workers <= 1:
+        run_worker(sock, args, 0)
+        return 0
+
+    children = []
+    for index in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock, args, index)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop_children(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+    for pid in children:
+        while True:
+            try:
+                os.waitpid(pid, 0)
+                break
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+-- status_code.lua单元测试：模拟wrk的setup/init/response/done调用，检查逐状态码计数、连接统计、
+-- 每秒统计和指标文件内容，以及未要求按秒统计时response()不调用os.time()
+--
+-- 用法: luajit tools/test_status_code.lua（wrk内置LuaJIT，也可用lua 5.1）
+-- 返回：全部检查通过时退出码为0
+
+local script_dir = debug.getinfo(1, "S").source:sub(2):match("(.*/)") or "./"
+local STATUS_CODE_SCRIPT = script_dir .. "../lib/status_code.lua"
+local REQUEST = "GET / HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n"
+
+local failed = 0
+
+local function check(name, ok, detail)
+    if ok then
+        print("[INFO] 通过: " .. name)
+    else
+        print("[ERROR] 失败: " .. name .. (detail and ("（" .. detail .. "）") or ""))
+        failed = failed + 1
+    end
+end
+
+-- 在独立的全局环境中加载status_code.lua，对应wrk的主线程或一个压测线程的Lua状态
+-- 参数：env - 环境变量表，clock - 返回当前Unix秒的函数，output - 收集print输出的表
+local function load_script(env, clock, output)
+    local globals = setmetatable({
+        wrk = { format = function() return REQUEST end, headers = {}, scheme = "http" },
+        os = setmetatable({ time = clock, getenv = function(name) return env[name] end }, { __index = os }),
+        print = function(...) table.insert(output, table.concat({ ... }, "\t")) end,
+    }, { __index = _G })
+    local chunk
+    if setfenv then
+        chunk = assert(loadfile(STATUS_CODE_SCRIPT))
+        setfenv(chunk, globals)
+    else
+        chunk = assert(loadfile(STATUS_CODE_SCRIPT, "t", globals))
+    end
+    chunk()
+    return globals
+end
+
+-- 模拟一次压测：threads为每个线程的响应列表 {second, status, headers, body}
+-- 返回：主线程输出、各线程输出
+local function run(env, threads, clock_override)
+    local now = 0
+    local clock = clock_override or function() return now end
+    local main_output = {}
+    local main = load_script(env, clock, main_output)
+    local thread_outputs = {}
+    local total = 0
+    for index, responses in ipairs(threads) do
+        thread_outputs[index] = {}
+        local state = load_script(env, clock, thread_outputs[index])
+        main.setup({
+            set = function(_, name, value) state[name] = value end,
+            get = function(_, name) return state[name] end,
+        })
+        now = responses[1] and responses[1][1] or 0
+        state.init({})
+        for _, item in ipairs(responses) do
+            now = item[1]
+            state.response(item[2], item[3], item[4])
+            total = total + 1
+        end
+    end
+
+    local latency = setmetatable({ 1, mean = 1500, stdev = 100, max = 2000,
+        percentile = function(_, p) return 1000 + p end }, {
+        __call = function(_, i) return 1500, total end,
+    })
+    main.done({ duration = 3000000, requests = total, bytes = 4096,
+        errors = { connect = 0, read = 0, write = 0, status = 0, timeout = 0 } }, latency, {})
+    return main_output, thread_outputs
+end
+
+local function find(lines, prefix)
+    for _, line in ipairs(lines) do
+        if line:sub(1, #prefix) == prefix then
+            return line
+        end
+    end
+end
+
+local function read_file(path)
+    local file = io.open(path, "r")
+    if not file then return "" end
+    local content = file:read("*a")
+    file:close()
+    return content
+end
+
+local function contains(text, fragment)
+    return text:find(fragment, 1, true) ~= nil
+end
+
+-- 线程1：第100秒3个200（服务端关闭连接），第101秒1个503（Connection: Close）；
+-- 线程2：第100秒2个200（keep-alive），第102秒1个404
+local close_headers = { ["Content-Length"] = "5", Connection = "close" }
+local keepalive_headers = { ["Content-Length"] = "5", Connection = "keep-alive" }
+local THREADS = {
+    {
+        { 100, 200, close_headers, "hello" }, { 100, 200, close_headers, "hello" }, { 100, 200, close_headers, "hello" },
+        { 101, 503, { ["Content-Length"] = "0", connection = "Close" }, "" },
+    },
+    {
+        { 100, 200, keepalive_headers, "hello" }, { 100, 200, keepalive_headers, "hello" },
+        { 102, 404, { ["Content-Length"] = "5" }, "nope!" },
+    },
+}
+
+-- 写入指标文件并每秒输出间隔统计
+local metrics_file = os.tmpname()
+local output, thread_outputs = run(
+    { WRK_METRICS_FILE = metrics_file, WRK_STATUS_INTERVAL = "1", WRK_CONNECTIONS = "2" }, THREADS)
+local metrics = read_file(metrics_file)
+os.remove(metrics_file)
+
+check("逐状态码精确计数", find(output, "[STATUS_CODES]") == '[STATUS_CODES] {"200":5,"404":1,"503":1}',
+    find(output, "[STATUS_CODES]"))
+check("状态码类别合计", find(output, "[STATISTICS]") == "[STATISTICS] 2xx=5 3xx=0 4xx=1 5xx=1 other=0 total=7",
+    find(output, "[STATISTICS]"))
+local connections = find(output, "[CONNECTIONS]") or ""
+check("服务端关闭连接数（不区分大小写）", contains(connections, '"server_closes":4'), connections)
+check("发送字节数按响应数计算", contains(connections, string.format('"bytes_out":%d', 7 * #REQUEST)), connections)
+check("[CONNECTIONS]行不含每秒数据", not contains(connections, "per_second"), connections)
+
+check("指标文件每秒请求数", contains(metrics, '"requests_per_second":[5,1,1]'), metrics)
+check("指标文件状态码", contains(metrics, '"status_codes":{"200":5,"404":1,"503":1}'), metrics)
+-- 每秒收到字节数：响应头按每秒第一个响应估算（状态行19 + 每个响应头 名称+值+4）加响应体长度
+check("指标文件每秒连接统计", contains(metrics, string.format(
+    '"per_second":{"server_closes":[3,1,0],"bytes_in_estimated":[320,57,43],"bytes_out":[%d,%d,%d]}',
+    5 * #REQUEST, #REQUEST, #REQUEST)), metrics)
+check("按间隔输出线程的状态码计数", find(thread_outputs[1], "[STATUS_INTERVAL]") == "[STATUS_INTERVAL] thread=1 time=101 200=3 503=1",
+    find(thread_outputs[1], "[STATUS_INTERVAL]"))
+
+-- 不写指标文件且不输出间隔统计时不按秒统计，response()不调用os.time()
+local time_calls = 0
+output = run({ WRK_STATUS_INTERVAL = "0", WRK_CONNECTIONS = "2" }, THREADS, function()
+    time_calls = time_calls + 1
+    return 100
+end)
+check("未按秒统计时不调用os.time()", time_calls == 0, string.format("调用 %d 次", time_calls))
+check("未按秒统计时状态码计数不变", find(output, "[STATUS_CODES]") == '[STATUS_CODES] {"200":5,"404":1,"503":1}',
+    find(output, "[STATUS_CODES]"))
+connections = find(output, "[CONNECTIONS]") or ""
+check("未按秒统计时连接统计不变", contains(connections, '"server_closes":4') and
+    contains(connections, string.format('"bytes_out":%d', 7 * #REQUEST)), connections)
+
+if failed > 0 then
+    print(string.format("[ERROR] status_code.lua单元测试失败: %d 项检查未通过", failed))
+    os.exit(1)
+end
+print("[INFO] status_code.lua单元测试通过")
@@ -0,0 +1,55 @@
+-- ==============================================================================
+-- 迁移 001：热点列表查询的复合索引与域名全文索引
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 001_composite_indexes.sql
+-- 验证方式：python3 backend_admin_python/benchmarks/explain_hot_queries.py
+-- ==============================================================================
+--
+-- 对应的热点查询：
+--   1. 任务列表      WHERE status = ? ORDER BY created_at DESC LIMIT ?
+--   2. 任务日志      WHERE task_id = ? ORDER BY created_at DESC, id DESC LIMIT ?
+--   3. 我的申请      WHERE user_id = ? [AND audit_status = ?] ORDER BY created_at DESC LIMIT ?
+--   4. 申请审核列表  WHERE audit_status = ? ORDER BY created_at DESC LIMIT ?
+--   5. 域名搜索      WHERE domain LIKE '%x%'（改为ngram全文索引 + LIKE复核）
+--
+-- InnoDB二级索引隐含主键列，(task_id, created_at) 即可同时满足 created_at DESC, id DESC 的排序；
+-- 各COUNT(*)查询只访问索引即可完成（覆盖索引）。
+-- 被复合索引最左前缀覆盖的单列索引随之删除，外键约束由复合索引继续提供支持。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+-- 压测任务表：按状态筛选并按创建时间倒序
+ALTER TABLE `tasks`
+  ADD KEY `idx_status_created_at` (`status`, `created_at`),
+  DROP KEY `idx_status`;
+
+-- 任务日志表：按任务查询并按时间倒序分页
+ALTER TABLE `task_logs`
+  ADD KEY `idx_task_id_created_at` (`task_id`, `created_at`),
+  DROP KEY `idx_task_id`;
+
+-- 压测申请表：用户申请列表、审核列表
+ALTER TABLE `apply_tasks`
+  ADD KEY `idx_user_id_created_at` (`user_id`, `created_at`),
+  ADD KEY `idx_user_id_audit_status_created_at` (`user_id`, `audit_status`, `created_at`),
+  ADD KEY `idx_audit_status_created_at` (`audit_status`, `created_at`),
+  DROP KEY `idx_user_id`,
+  DROP KEY `idx_audit_status`;
+
+-- 压测申请表：域名子串搜索（ngram分词，默认 ngram_token_size=2）
+ALTER TABLE `apply_tasks`
+  ADD FULLTEXT KEY `ft_domain` (`domain`) WITH PARSER ngram;
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `tasks` ADD KEY `idx_status` (`status`), DROP KEY `idx_status_created_at`;
+-- ALTER TABLE `task_logs` ADD KEY `idx_task_id` (`task_id`), DROP KEY `idx_task_id_created_at`;
+-- ALTER TABLE `apply_tasks`
+--   ADD KEY `idx_user_id` (`user_id`),
+--   ADD KEY `idx_audit_status` (`audit_status`),
+--   DROP KEY `idx_user_id_created_at`,
+--   DROP KEY `idx_user_id_audit_status_created_at`,
+--   DROP KEY `idx_audit_status_created_at`,
+--   DROP KEY `ft_domain`;
@@ -0,0 +1,26 @@
+-- ==============================================================================
+-- 迁移 002：报告产物内容寻址与预览图
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 002_report_artifacts.sql
+-- ==============================================================================
+--
+-- 新生成的报告文件按"CSV内容 + 渲染器版本"的SHA-256存放在 uploads/artifacts/，
+-- content_hash 记录摘要：相同数据复用已有文件，删除报告时按摘要判断是否还有其他引用。
+-- preview_path 记录图片报告的低分辨率WebP预览图，列表页直接展示缩略图。
+-- 历史报告两列为NULL，仍按原 file_path 读取和删除。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+ALTER TABLE `reports`
+  ADD COLUMN `content_hash` CHAR(64) NULL DEFAULT NULL COMMENT '产物摘要（输入数据+渲染参数的SHA-256）' AFTER `file_size`,
+  ADD COLUMN `preview_path` VARCHAR(500) NULL DEFAULT NULL COMMENT '预览图路径（低分辨率WebP）' AFTER `content_hash`,
+  ADD KEY `idx_content_hash` (`content_hash`);
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `reports`
+--   DROP KEY `idx_content_hash`,
+--   DROP COLUMN `preview_path`,
+--   DROP COLUMN `content_hash`;
@@ -0,0 +1,24 @@
+-- ==============================================================================
+-- 迁移 003：压测场景
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 003_scenarios.sql
+-- ==============================================================================
+--
+-- scenario 保存多接口加权请求的场景定义（请求方法、路径、请求头、请求体、权重、思考时间），
+-- 执行任务时编译为wrk Lua脚本。任务的场景为空时使用申请的场景；
+-- 两者都为空时按申请的 method / request_body 生成单请求场景（GET且无请求体时不使用场景脚本）。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+ALTER TABLE `apply_tasks`
+  ADD COLUMN `scenario` JSON NULL DEFAULT NULL COMMENT '压测场景（多接口加权请求）' AFTER `request_body`;
+
+ALTER TABLE `tasks`
+  ADD COLUMN `scenario` JSON NULL DEFAULT NULL COMMENT '压测场景（为空时使用申请的场景）' AFTER `script_path`;
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `tasks` DROP COLUMN `scenario`;
+-- ALTER TABLE `apply_tasks` DROP COLUMN `scenario`;
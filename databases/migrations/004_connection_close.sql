@@ -0,0 +1,20 @@
+-- ==============================================================================
+-- 迁移 004：强制短连接压测
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 004_connection_close.sql
+-- ==============================================================================
+--
+-- connection_close 为1时任务的每个请求都带 Connection: close，每个请求新建连接（HTTPS需完整TLS握手），
+-- 用于测量握手受限的容量；与长连接任务的结果对比可区分握手开销和应用处理开销。
+-- 连接统计（新建连接、TLS握手、Socket错误、收发字节数）保存在结果JSON的 connections 字段，无需新增列。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+ALTER TABLE `tasks`
+  ADD COLUMN `connection_close` TINYINT(1) NOT NULL DEFAULT 0 COMMENT '强制短连接：1-每个请求Connection: close，0-长连接' AFTER `scenario`;
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `tasks` DROP COLUMN `connection_close`;
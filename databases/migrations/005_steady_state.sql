@@ -0,0 +1,32 @@
+-- ==============================================================================
+-- 迁移 005：预热与稳态指标
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 005_steady_state.sql
+-- ==============================================================================
+--
+-- tasks.warmup_seconds 为正式压测前的预热时长，预热以相同参数独立运行wrk，结果不计入统计。
+-- results.steady_* 为稳态区间的指标：设置了预热时为正式压测的指标；否则按每秒请求数的
+-- 滑动窗口变异系数检测稳态起点（稳态不从第一秒开始时只有稳态QPS，延迟列为NULL）。
+-- 原有的 qps / avg_latency_ms / p95_latency_ms / p99_latency_ms 保持为正式压测全程的指标，
+-- 包含预热的全程指标和稳态区间明细保存在 raw_result_json 的 full / steady_state 字段。
+-- 旧结果的稳态列为NULL，结果比较时回退到全程指标。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+ALTER TABLE `tasks`
+  ADD COLUMN `warmup_seconds` INT NOT NULL DEFAULT 0 COMMENT '预热时长（秒），预热结果不计入统计' AFTER `scenario`;
+
+ALTER TABLE `results`
+  ADD COLUMN `steady_qps` DECIMAL(10, 2) NULL COMMENT '稳态QPS' AFTER `p99_latency_ms`,
+  ADD COLUMN `steady_avg_latency_ms` DECIMAL(10, 2) NULL COMMENT '稳态平均响应时间（毫秒）' AFTER `steady_qps`,
+  ADD COLUMN `steady_p95_latency_ms` DECIMAL(10, 2) NULL COMMENT '稳态P95延迟（毫秒）' AFTER `steady_avg_latency_ms`,
+  ADD COLUMN `steady_p99_latency_ms` DECIMAL(10, 2) NULL COMMENT '稳态P99延迟（毫秒）' AFTER `steady_p95_latency_ms`;
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `results`
+--   DROP COLUMN `steady_p99_latency_ms`, DROP COLUMN `steady_p95_latency_ms`,
+--   DROP COLUMN `steady_avg_latency_ms`, DROP COLUMN `steady_qps`;
+-- ALTER TABLE `tasks` DROP COLUMN `warmup_seconds`;
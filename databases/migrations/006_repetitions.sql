@@ -0,0 +1,31 @@
+-- ==============================================================================
+-- 迁移 006：重复试验与置信区间
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 006_repetitions.sql
+-- ==============================================================================
+--
+-- tasks.repetitions 为重复试验次数，大于1时同一参数连续压测多次。
+-- 重复试验的结果中 qps / avg_latency_ms / p95_latency_ms / p99_latency_ms 为各次试验的均值，
+-- results.*_ci_low / *_ci_high 为QPS和P99延迟的百分位Bootstrap置信区间（默认95%），
+-- 每次试验的指标和全部指标的置信区间保存在 raw_result_json 的 trials / confidence_intervals 字段。
+-- 单次压测的结果置信区间列为NULL。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+ALTER TABLE `tasks`
+  ADD COLUMN `repetitions` INT NOT NULL DEFAULT 1 COMMENT '重复试验次数' AFTER `connection_close`;
+
+ALTER TABLE `results`
+  ADD COLUMN `qps_ci_low` DECIMAL(10, 2) NULL COMMENT 'QPS置信区间下限（重复试验）' AFTER `steady_p99_latency_ms`,
+  ADD COLUMN `qps_ci_high` DECIMAL(10, 2) NULL COMMENT 'QPS置信区间上限（重复试验）' AFTER `qps_ci_low`,
+  ADD COLUMN `p99_ci_low` DECIMAL(10, 2) NULL COMMENT 'P99延迟置信区间下限（毫秒，重复试验）' AFTER `qps_ci_high`,
+  ADD COLUMN `p99_ci_high` DECIMAL(10, 2) NULL COMMENT 'P99延迟置信区间上限（毫秒，重复试验）' AFTER `p99_ci_low`;
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `results`
+--   DROP COLUMN `p99_ci_high`, DROP COLUMN `p99_ci_low`,
+--   DROP COLUMN `qps_ci_high`, DROP COLUMN `qps_ci_low`;
+-- ALTER TABLE `tasks` DROP COLUMN `repetitions`;
@@ -0,0 +1,22 @@
+-- ==============================================================================
+-- 迁移 007：任务执行进程排队
+-- 数据库：MySQL 8.0+
+-- 执行方式：mysql -u root -p pressure_test_platform < 007_task_queue.sql
+-- ==============================================================================
+--
+-- TASK_EXECUTION_MODE=runner（serve.py 生产启动）时，API进程只记录 tasks.queued_at，
+-- 由独立的 task_runner.py 进程按排队时间领取 pending 任务执行；
+-- 服务停止时未完成的任务终止压测脚本后回到 pending（保留排队时间），重启后重新执行。
+-- inline 模式下该列为NULL。
+-- ==============================================================================
+
+USE `pressure_test_platform`;
+
+ALTER TABLE `tasks`
+  ADD COLUMN `queued_at` TIMESTAMP NULL DEFAULT NULL COMMENT '加入任务执行进程队列时间（TASK_EXECUTION_MODE=runner）' AFTER `created_by`,
+  ADD INDEX `idx_status_queued_at` (`status`, `queued_at`);
+
+-- ==============================================================================
+-- 回滚
+-- ==============================================================================
+-- ALTER TABLE `tasks` DROP INDEX `idx_status_queued_at`, DROP COLUMN `queued_at`;
@@ -49,6 +49,7 @@ CREATE TABLE IF NOT EXISTS `apply_tasks` (
   `duration` VARCHAR(20) NOT NULL DEFAULT '30s' COMMENT '压测持续时间（如：30s, 1m）',
   `expected_qps` INT NULL DEFAULT NULL COMMENT '预期QPS',
   `request_body` TEXT NULL DEFAULT NULL COMMENT '请求体（JSON格式）',
+  `scenario` JSON NULL DEFAULT NULL COMMENT '压测场景（多接口加权请求）',
   `audit_status` ENUM('pending', 'approved', 'rejected') NOT NULL DEFAULT 'pending' COMMENT '审核状态：pending-待审核，approved-审核通过，rejected-审核驳回',
   `audit_user_id` BIGINT UNSIGNED NULL DEFAULT NULL COMMENT '审核人ID（管理员）',
   `audit_comment` TEXT COMMENT '审核意见（通过时的备注或驳回时的原因）',
@@ -56,11 +57,13 @@ CREATE TABLE IF NOT EXISTS `apply_tasks` (
   `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '提交时间',
   `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
   PRIMARY KEY (`id`),
-  KEY `idx_user_id` (`user_id`),
-  KEY `idx_audit_status` (`audit_status`),
+  KEY `idx_user_id_created_at` (`user_id`, `created_at`),
+  KEY `idx_user_id_audit_status_created_at` (`user_id`, `audit_status`, `created_at`),
+  KEY `idx_audit_status_created_at` (`audit_status`, `created_at`),
   KEY `idx_audit_user_id` (`audit_user_id`),
   KEY `idx_domain` (`domain`),
   KEY `idx_created_at` (`created_at`),
+  FULLTEXT KEY `ft_domain` (`domain`) WITH PARSER ngram,
   CONSTRAINT `fk_apply_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
   CONSTRAINT `fk_apply_audit_user` FOREIGN KEY (`audit_user_id`) REFERENCES `users` (`id`) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='压测申请表';
@@ -76,15 +79,21 @@ CREATE TABLE IF NOT EXISTS `tasks` (
   `duration` VARCHAR(20) NOT NULL DEFAULT '30s' COMMENT '压测持续时间（如：30s, 1m）',
   `threads` INT NOT NULL DEFAULT 4 COMMENT '线程数',
   `script_path` VARCHAR(500) COMMENT '可选Lua脚本路径',
+  `scenario` JSON NULL DEFAULT NULL COMMENT '压测场景（为空时使用申请的场景）',
+  `warmup_seconds` INT NOT NULL DEFAULT 0 COMMENT '预热时长（秒），预热结果不计入统计',
+  `connection_close` TINYINT(1) NOT NULL DEFAULT 0 COMMENT '强制短连接：1-每个请求Connection: close，0-长连接',
+  `repetitions` INT NOT NULL DEFAULT 1 COMMENT '重复试验次数',
   `status` ENUM('pending', 'running', 'completed', 'failed', 'cancelled') NOT NULL DEFAULT 'pending' COMMENT '任务状态：pending-待执行，running-执行中，completed-已完成，failed-失败，cancelled-已终止',
   `created_by` BIGINT UNSIGNED NOT NULL COMMENT '创建人ID（管理员）',
+  `queued_at` TIMESTAMP NULL DEFAULT NULL COMMENT '加入任务执行进程队列时间（TASK_EXECUTION_MODE=runner）',
   `started_at` TIMESTAMP NULL DEFAULT NULL COMMENT '开始执行时间',
   `finished_at` TIMESTAMP NULL DEFAULT NULL COMMENT '完成时间',
   `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
   `updated_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
   PRIMARY KEY (`id`),
   KEY `idx_apply_id` (`apply_id`),
-  KEY `idx_status` (`status`),
+  KEY `idx_status_created_at` (`status`, `created_at`),
+  KEY `idx_status_queued_at` (`status`, `queued_at`),
   KEY `idx_created_by` (`created_by`),
   KEY `idx_created_at` (`created_at`),
   CONSTRAINT `fk_task_apply` FOREIGN KEY (`apply_id`) REFERENCES `apply_tasks` (`id`) ON DELETE CASCADE,
@@ -101,6 +110,14 @@ CREATE TABLE IF NOT EXISTS `results` (
   `avg_latency_ms` DECIMAL(10, 2) COMMENT '平均响应时间（毫秒）',
   `p95_latency_ms` DECIMAL(10, 2) COMMENT 'P95延迟（毫秒）',
   `p99_latency_ms` DECIMAL(10, 2) COMMENT 'P99延迟（毫秒）',
+  `steady_qps` DECIMAL(10, 2) COMMENT '稳态QPS',
+  `steady_avg_latency_ms` DECIMAL(10, 2) COMMENT '稳态平均响应时间（毫秒）',
+  `steady_p95_latency_ms` DECIMAL(10, 2) COMMENT '稳态P95延迟（毫秒）',
+  `steady_p99_latency_ms` DECIMAL(10, 2) COMMENT '稳态P99延迟（毫秒）',
+  `qps_ci_low` DECIMAL(10, 2) COMMENT 'QPS置信区间下限（重复试验）',
+  `qps_ci_high` DECIMAL(10, 2) COMMENT 'QPS置信区间上限（重复试验）',
+  `p99_ci_low` DECIMAL(10, 2) COMMENT 'P99延迟置信区间下限（毫秒，重复试验）',
+  `p99_ci_high` DECIMAL(10, 2) COMMENT 'P99延迟置信区间上限（毫秒，重复试验）',
   `error_rate` DECIMAL(5, 2) COMMENT '错误率（百分比）',
   `total_requests` BIGINT UNSIGNED COMMENT '总请求数',
   `successful_requests` BIGINT UNSIGNED COMMENT '成功请求数（2xx/3xx）',
@@ -125,6 +142,8 @@ CREATE TABLE IF NOT EXISTS `reports` (
   `report_type` ENUM('html', 'markdown', 'image', 'pdf') NOT NULL COMMENT '报告类型：html-HTML报告，markdown-Markdown报告，image-图片报告，pdf-PDF报告',
   `file_path` VARCHAR(500) NOT NULL COMMENT '报告文件路径',
   `file_size` BIGINT UNSIGNED COMMENT '文件大小（字节）',
+  `content_hash` CHAR(64) NULL DEFAULT NULL COMMENT '产物摘要（输入数据+渲染参数的SHA-256）',
+  `preview_path` VARCHAR(500) NULL DEFAULT NULL COMMENT '预览图路径（低分辨率WebP）',
   `status` ENUM('generating', 'completed', 'failed') NOT NULL DEFAULT 'generating' COMMENT '报告状态：generating-生成中，completed-已完成，failed-失败',
   `generated_at` TIMESTAMP NULL DEFAULT NULL COMMENT '生成完成时间',
   `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
@@ -135,6 +154,7 @@ CREATE TABLE IF NOT EXISTS `reports` (
   KEY `idx_report_type` (`report_type`),
   KEY `idx_status` (`status`),
   KEY `idx_created_at` (`created_at`),
+  KEY `idx_content_hash` (`content_hash`),
   CONSTRAINT `fk_report_task` FOREIGN KEY (`task_id`) REFERENCES `tasks` (`id`) ON DELETE CASCADE,
   CONSTRAINT `fk_report_apply` FOREIGN KEY (`apply_id`) REFERENCES `apply_tasks` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='报告表';
@@ -149,7 +169,7 @@ CREATE TABLE IF NOT EXISTS `task_logs` (
   `log_message` TEXT NOT NULL COMMENT '日志消息',
   `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '日志时间',
   PRIMARY KEY (`id`),
-  KEY `idx_task_id` (`task_id`),
+  KEY `idx_task_id_created_at` (`task_id`, `created_at`),
   KEY `idx_log_level` (`log_level`),
   KEY `idx_created_at` (`created_at`),
   CONSTRAINT `fk_log_task` FOREIGN KEY (`task_id`) REFERENCES `tasks` (`id`) ON DELETE CASCADE
@@ -175,6 +195,26 @@ CREATE TABLE IF NOT EXISTS `feedbacks` (
   CONSTRAINT `fk_feedback_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='反馈表';
 
+-- ==============================================================================
+-- 8. 任务日志归档表（task_log_archives）- 冷数据层，存储已归档日志的压缩文件索引
+-- ==============================================================================
+CREATE TABLE IF NOT EXISTS `task_log_archives` (
+  `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT COMMENT '归档ID',
+  `task_id` BIGINT UNSIGNED NOT NULL COMMENT '关联任务ID',
+  `file_path` VARCHAR(500) NOT NULL COMMENT '归档文件路径',
+  `compression` VARCHAR(10) NOT NULL COMMENT '压缩算法：zstd/gzip',
+  `log_count` INT NOT NULL DEFAULT 0 COMMENT '归档日志条数',
+  `first_log_id` BIGINT UNSIGNED NULL DEFAULT NULL COMMENT '归档中最小日志ID',
+  `last_log_id` BIGINT UNSIGNED NULL DEFAULT NULL COMMENT '归档中最大日志ID',
+  `original_size` BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '压缩前大小（字节）',
+  `compressed_size` BIGINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '压缩后大小（字节）',
+  `chunk_index` JSON NOT NULL COMMENT '压缩块索引（偏移量、长度、日志ID范围，以及raw_output块位置）',
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '归档时间',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_task_id` (`task_id`),
+  CONSTRAINT `fk_log_archive_task` FOREIGN KEY (`task_id`) REFERENCES `tasks` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='任务日志归档表';
+
 -- ==============================================================================
 -- 初始化数据
 -- ==============================================================================
@@ -204,4 +244,5 @@ ON DUPLICATE KEY UPDATE `username`=`username`;
 -- tasks (1) -> (1) results: 一个任务对应一个结果
 -- tasks (1) -> (N) reports: 一个任务可以生成多个报告（不同格式）
 -- tasks (1) -> (N) task_logs: 一个任务有多条日志记录
+-- tasks (1) -> (1) task_log_archives: 一个任务的日志归档后对应一条归档记录
 
@@ -12,6 +12,7 @@ import {
   Form,
   Row,
   Col,
+  Image,
 } from 'antd';
 import type { ColumnsType } from 'antd/es/table';
 import {
@@ -26,6 +27,35 @@ import {
 } from '@ant-design/icons';
 import reportService, { Report, ReportQueryParams } from '@/services/reports';
 
+// 报告缩略图：按需加载低分辨率预览图，点击可放大查看
+const ReportThumbnail = ({ report }: { report: Report }) => {
+  const [src, setSrc] = useState<string>();
+
+  useEffect(() => {
+    if (!report.preview_path) {
+      return undefined;
+    }
+    let objectUrl: string | undefined;
+    reportService
+      .getReportPreview(report.id)
+      .then((blob) => {
+        objectUrl = window.URL.createObjectURL(blob);
+        setSrc(objectUrl);
+      })
+      .catch((error) => console.error('获取报告预览图失败:', error));
+    return () => {
+      if (objectUrl) {
+        window.URL.revokeObjectURL(objectUrl);
+      }
+    };
+  }, [report.id, report.preview_path]);
+
+  if (!report.preview_path) {
+    return <span>-</span>;
+  }
+  return <Image width={80} src={src} alt={`报告${report.id}预览`} />;
+};
+
 const ReportsPage = () => {
   // 状态管理
   const [reports, setReports] = useState<Report[]>([]);
@@ -54,6 +84,12 @@ const ReportsPage = () => {
   // 列配置
   const columns: ColumnsType<Report> = [
     { title: '报告ID', dataIndex: 'id', width: 100 },
+    {
+      title: '预览',
+      key: 'preview',
+      width: 100,
+      render: (_, record: Report) => <ReportThumbnail report={record} />,
+    },
     { title: '任务ID', dataIndex: 'task_id' },
     { title: '申请ID', dataIndex: 'apply_id' },
     {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Card,
   Table,
@@ -52,6 +52,8 @@ const TaskPage = () => {
   >([]);
   const [logLoading, setLogLoading] = useState(false);
   const [logTimer, setLogTimer] = useState<NodeJS.Timeout | null>(null);
+  // 已加载的最新日志ID，轮询时只拉取之后的日志
+  const lastLogIdRef = useRef<number | null>(null);
 
   // 筛选参数
   const [filters, setFilters] = useState({
@@ -327,27 +329,49 @@ const TaskPage = () => {
   const handleViewLogs = (task: Task) => {
     setCurrentTask(task);
     setIsLogModalVisible(true);
+    setLogs([]);
+    lastLogIdRef.current = null;
     fetchLogs(task.id);
 
-    // 设置定时器，每秒刷新日志
+    // 设置定时器，每秒增量刷新日志（无变化时服务端返回304）
     const timer = setInterval(() => {
-      fetchLogs(task.id);
+      fetchLogs(task.id, true);
     }, 1000);
 
     setLogTimer(timer);
   };
 
   // 获取任务日志
-  const fetchLogs = async (taskId: number) => {
-    setLogLoading(true);
+  const fetchLogs = async (taskId: number, incremental = false) => {
+    const afterId = incremental ? lastLogIdRef.current : null;
+    // 增量轮询不显示加载状态，避免日志区域每秒闪烁
+    if (!incremental) {
+      setLogLoading(true);
+    }
     try {
-      const response = await taskService.getTaskLogs(taskId, { limit: 100 });
-      setLogs(response.logs);
+      const response = await taskService.getTaskLogs(taskId, {
+        limit: 100,
+        ...(afterId !== null ? { after_id: afterId } : {}),
+      });
+      if (afterId === null) {
+        setLogs(response.logs);
+      } else if (response.logs.length > 0) {
+        setLogs((prev) => {
+          const known = new Set(prev.map((log) => log.id));
+          const fresh = response.logs.filter((log) => !known.has(log.id));
+          return [...fresh, ...prev].slice(0, 100);
+        });
+      }
+      if (response.last_id !== null && response.last_id !== undefined) {
+        lastLogIdRef.current = response.last_id;
+      }
     } catch (error) {
       message.error('获取日志失败');
       console.error('获取日志失败:', error);
     } finally {
-      setLogLoading(false);
+      if (!incremental) {
+        setLogLoading(false);
+      }
     }
   };
 
@@ -25,6 +25,8 @@ export interface Report {
   };
   created_at: string;
   completed_at: string;
+  // 低分辨率WebP预览图（仅图片报告），为空表示无预览
+  preview_path?: string | null;
 }
 
 // 报告查询参数接口
@@ -72,6 +74,13 @@ export const exportReportCSV = async (reportId: number) => {
   });
 };
 
+// 获取报告预览图（内容寻址，浏览器可长期缓存）
+export const getReportPreview = async (reportId: number) => {
+  return request.get(`/reports/${reportId}/preview`, {
+    responseType: 'blob',
+  });
+};
+
 // 报告服务对象
 const reportService = {
   getReports,
@@ -80,6 +89,7 @@ const reportService = {
   deleteReport,
   exportReportPDF,
   exportReportCSV,
+  getReportPreview,
 };
 
 export default reportService;
@@ -55,13 +55,18 @@ export const startTask = async (taskId: number) => {
   return request.post(`/tasks/${taskId}/start`);
 };
 
-// 获取任务日志
-export const getTaskLogs = async (taskId: number, params?: { skip?: number; limit?: number }) => {
+// 获取任务日志（after_id用于增量轮询，只返回更新的日志）
+export const getTaskLogs = async (
+  taskId: number,
+  params?: { skip?: number; limit?: number; after_id?: number },
+) => {
   return request.get<{
     logs: Array<{ id: number; level: string; message: string; created_at: string }>;
     total: number;
     skip: number;
     limit: number;
+    last_id: number | null;
+    status: string;
   }>(`/tasks/${taskId}/logs`, { params });
 };
 